@@ -6,7 +6,6 @@
  */
 
 const crypto = require('crypto')
-const { machineIdSync } = require('node-machine-id')
 
 class DeviceBoundLicenseGenerator {
   constructor() {
@@ -22,6 +21,8 @@ class DeviceBoundLicenseGenerator {
   getCurrentDeviceId() {
     try {
       // استخدام نفس الطريقة المستخدمة في licenseManager
+      // يُحمّل عند الحاجة فقط - مسار توليد المفاتيح لأجهزة أخرى لا يحتاجه
+      const { machineIdSync } = require('node-machine-id')
       const machineId = machineIdSync()
       const hash = crypto.createHash('sha256')
       hash.update(machineId + 'dental-clinic-license-salt-2025') // نفس APP_SALT
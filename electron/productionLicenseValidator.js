@@ -5,10 +5,36 @@
 
 const fs = require('fs')
 const path = require('path')
+const crypto = require('crypto')
+
+// الفهرس الجانبي الذي يكتبه license_pack.py (انظر صيغته هناك)
+const INDEX_MAGIC = 'DDLPACK1'
+const INDEX_VERSION = 1
+const INDEX_HEADER_SIZE = 52
+const COMPACT_KEY_LENGTH = 20
+// صيغة المفاتيح في ملف الإنتاج (نفس KEY_PATTERN في license_pack.py)
+const KEY_PATTERN = /^[A-Z0-9]{5}-[A-Z0-9]{5}-[A-Z0-9]{5}-[A-Z0-9]{5}$/
+
+/**
+ * FNV-1a (32 بت) للمفتاح بدون شرطات - نفس key_slot_hash في license_pack.py
+ */
+function keySlotHash(compactKey) {
+  let hash = 0x811c9dc5
+  for (let i = 0; i < compactKey.length; i++) {
+    hash ^= compactKey.charCodeAt(i)
+    hash = Math.imul(hash, 0x01000193) >>> 0
+  }
+  return hash
+}
 
 class ProductionLicenseValidator {
-  constructor() {
+  constructor(licensePath = path.join(__dirname, '..', 'production-licenses.json')) {
+    this.licensePath = licensePath
+    this.indexPath = licensePath.replace(/\.json$/i, '') + '.idx'
     this.productionLicenses = null
+    this.licenseIndex = null
+    this.licenseMap = null
+    this.rawLicenses = null
     this.loadProductionLicenses()
   }
 
@@ -17,11 +43,17 @@ class ProductionLicenseValidator {
    */
   loadProductionLicenses() {
     try {
-      const licensePath = path.join(__dirname, '..', 'production-licenses.json')
+      const licensePath = this.licensePath
       
       if (fs.existsSync(licensePath)) {
-        const licenseData = JSON.parse(fs.readFileSync(licensePath, 'utf8'))
-        this.productionLicenses = licenseData.licenses
+        const raw = fs.readFileSync(licensePath)
+        // مع فهرس مطابق لا حاجة لتحليل JSON من أجل التحقق؛ يُحلل عند الحاجة للتفاصيل فقط
+        if (this.loadLicenseIndex(raw)) {
+          this.rawLicenses = raw
+          console.log(`✅ Loaded ${this.licenseIndex.count} production license keys (indexed)`)
+          return true
+        }
+        this.setLicenses(JSON.parse(raw.toString('utf8')).licenses)
         console.log(`✅ Loaded ${this.productionLicenses.length} production license keys`)
         return true
       } else {
@@ -34,6 +66,96 @@ class ProductionLicenseValidator {
     }
   }
 
+  /**
+   * تحميل الفهرس الجانبي إذا كان مبنياً من نفس الملف
+   */
+  loadLicenseIndex(raw) {
+    this.licenseIndex = null
+    if (!fs.existsSync(this.indexPath)) {
+      return false
+    }
+    try {
+      const buffer = fs.readFileSync(this.indexPath)
+      if (buffer.length < INDEX_HEADER_SIZE ||
+          buffer.toString('latin1', 0, 8) !== INDEX_MAGIC ||
+          buffer.readUInt32LE(8) !== INDEX_VERSION) {
+        console.log('⚠️ Invalid production license index, ignoring it')
+        return false
+      }
+      const digest = crypto.createHash('sha256').update(raw).digest()
+      if (!digest.equals(buffer.subarray(20, 52))) {
+        console.log('⚠️ Production license index is stale, ignoring it')
+        return false
+      }
+      const count = buffer.readUInt32LE(12)
+      const size = buffer.readUInt32LE(16)
+      const tableOffset = INDEX_HEADER_SIZE + count * COMPACT_KEY_LENGTH
+      this.licenseIndex = {
+        count,
+        mask: size - 1,
+        keys: buffer.toString('latin1', INDEX_HEADER_SIZE, tableOffset),
+        table: new Uint32Array(buffer.buffer.slice(
+          buffer.byteOffset + tableOffset, buffer.byteOffset + tableOffset + size * 4
+        ))
+      }
+      return true
+    } catch (error) {
+      console.error('❌ Error loading production license index:', error)
+      return false
+    }
+  }
+
+  /**
+   * تعيين قائمة المفاتيح وبناء جدول البحث
+   */
+  setLicenses(licenses) {
+    this.productionLicenses = licenses
+    this.licenseMap = new Map()
+    if (Array.isArray(licenses)) {
+      licenses.forEach((license, position) => {
+        if (!this.licenseMap.has(license.key)) {
+          this.licenseMap.set(license.key, position)
+        }
+      })
+    }
+  }
+
+  /**
+   * تحليل JSON عند الحاجة (عند التحميل عبر الفهرس)
+   */
+  ensureLicenses() {
+    if (this.productionLicenses === null && this.rawLicenses) {
+      this.setLicenses(JSON.parse(this.rawLicenses.toString('utf8')).licenses)
+      this.rawLicenses = null
+    }
+    return this.productionLicenses
+  }
+
+  /**
+   * موضع المفتاح في قائمة المفاتيح (أو -1)
+   */
+  findLicensePosition(normalizedKey) {
+    if (this.licenseIndex) {
+      // مفتاح بدون شرطات أو بشرطات في غير موضعها غير موجود في الملف (كما في licenseMap)
+      if (!KEY_PATTERN.test(normalizedKey)) {
+        return -1
+      }
+      const compactKey = normalizedKey.replace(/-/g, '')
+      const { keys, table, mask } = this.licenseIndex
+      let slot = keySlotHash(compactKey) & mask
+      while (table[slot] !== 0) {
+        const position = table[slot] - 1
+        if (keys.substr(position * COMPACT_KEY_LENGTH, COMPACT_KEY_LENGTH) === compactKey) {
+          return position
+        }
+        slot = (slot + 1) & mask
+      }
+      return -1
+    }
+    const position = this.licenseMap ? this.licenseMap.get(normalizedKey) : undefined
+    return position === undefined ? -1 : position
+  }
+
   /**
    * التحقق من صحة مفتاح الترخيص
    */
@@ -42,13 +164,13 @@ class ProductionLicenseValidator {
       return false
     }
 
-    if (!this.productionLicenses || !Array.isArray(this.productionLicenses)) {
+    if (!this.isLoaded()) {
       console.log('⚠️ Production licenses not loaded')
       return false
     }
 
     const normalizedKey = licenseKey.trim().toUpperCase()
-    const isValid = this.productionLicenses.some(license => license.key === normalizedKey)
+    const isValid = this.findLicensePosition(normalizedKey) !== -1
     
     console.log(`🔍 License validation: ${normalizedKey} -> ${isValid ? 'VALID' : 'INVALID'}`)
     return isValid
@@ -62,12 +184,16 @@ class ProductionLicenseValidator {
       return null
     }
 
-    if (!this.productionLicenses || !Array.isArray(this.productionLicenses)) {
+    if (!this.isLoaded()) {
       return null
     }
 
     const normalizedKey = licenseKey.trim().toUpperCase()
-    const license = this.productionLicenses.find(l => l.key === normalizedKey)
+    const position = this.findLicensePosition(normalizedKey)
+    if (position === -1) {
+      return null
+    }
+    const license = this.ensureLicenses()[position]
     
     if (license) {
       return {
@@ -92,6 +218,7 @@ class ProductionLicenseValidator {
    * الحصول على إحصائيات المفاتيح
    */
   getStatistics() {
+    this.ensureLicenses()
     if (!this.productionLicenses || !Array.isArray(this.productionLicenses)) {
       return {
         total: 0,
@@ -122,7 +249,7 @@ class ProductionLicenseValidator {
    * البحث في المفاتيح
    */
   searchLicenses(searchTerm) {
-    if (!searchTerm || !this.productionLicenses) {
+    if (!searchTerm || !this.ensureLicenses()) {
       return []
     }
 
@@ -137,7 +264,7 @@ class ProductionLicenseValidator {
    * الحصول على مفتاح عشوائي
    */
   getRandomLicense() {
-    if (!this.productionLicenses || this.productionLicenses.length === 0) {
+    if (!this.ensureLicenses() || this.productionLicenses.length === 0) {
       return null
     }
 
@@ -150,7 +277,8 @@ class ProductionLicenseValidator {
    * التحقق من حالة التحميل
    */
   isLoaded() {
-    return this.productionLicenses !== null && Array.isArray(this.productionLicenses)
+    return this.licenseIndex !== null ||
+      (this.productionLicenses !== null && Array.isArray(this.productionLicenses))
   }
 
   /**
@@ -158,6 +286,9 @@ class ProductionLicenseValidator {
    */
   reload() {
     this.productionLicenses = null
+    this.licenseIndex = null
+    this.licenseMap = null
+    this.rawLicenses = null
     return this.loadProductionLicenses()
   }
 }
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DentaDesk Async License API
+واجهة asyncio لتوليد المفاتيح من أدوات أخرى (بدون Tk وبدون thread لكل استدعاء)
+
+    record = await generate(device_id, "PREMIUM", "UAE")
+    async for record in generate_many(device_ids, "STANDARD"):
+        ...
+
+الخلفيات المتاحة:
+    native  - داخل نفس العملية (الافتراضية)
+    pool    - عمليات عاملة (ProcessPoolExecutor)
+    node    - scripts/generateKeyForDevice.js عبر asyncio.create_subprocess_exec
+"""
+
+import asyncio
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from license_keys import (
+    LICENSE_TYPES, REGIONS, generate_key, normalize_device_id, validate_device_id
+)
+from license_node import NodeLauncher
+import license_trace
+
+_KEY_PATTERN = re.compile(r'[0-9A-F]{5}(?:-[0-9A-F]{5}){3}')
+
+# عدد المفاتيح التي تُولد قبل إعادة التحكم لحلقة الأحداث
+_NATIVE_SLICE = 256
+
+
+def _prepare(item, license_type, region):
+    """تحويل عنصر (معرف أو (معرف، نوع، منطقة)) إلى tuple صالح"""
+    if isinstance(item, str):
+        device_id = item
+    else:
+        values = tuple(item)
+        device_id = values[0]
+        if len(values) > 1:
+            license_type = values[1]
+        if len(values) > 2:
+            region = values[2]
+    device_id = normalize_device_id(device_id)
+    if not validate_device_id(device_id):
+        raise ValueError(f"معرف الجهاز غير صالح: {device_id}")
+    if license_type not in LICENSE_TYPES:
+        raise ValueError(f"نوع الترخيص غير صالح: {license_type}")
+    if region not in REGIONS:
+        raise ValueError(f"المنطقة غير صالحة: {region}")
+    return device_id, license_type, region
+
+
+def _generate_items(items, job=None):
+    """توليد مفاتيح مجموعة عناصر (تعمل داخل العمليات العاملة أيضاً)"""
+    lanes, every = license_trace.key_lanes(("hash",), job, len(items))
+    if lanes is None:
+        return [generate_key(device_id, license_type) for device_id, license_type, _ in items]
+
+    now = license_trace.now
+    events = lanes[0].data.extend
+    keys = []
+    for index, (device_id, license_type, _) in enumerate(items, 1):
+        if index % every:
+            keys.append(generate_key(device_id, license_type))
+        else:
+            started = now()
+            keys.append(generate_key(device_id, license_type))
+            events((index, started, now() - started))
+    return keys
+
+
+class NativeBackend:
+    """التوليد داخل نفس العملية مع إعادة التحكم للحلقة بين الأجزاء"""
+
+    name = "native"
+
+    async def generate_chunk(self, items):
+        keys = []
+        for start in range(0, len(items), _NATIVE_SLICE):
+            keys.extend(_generate_items(items[start:start + _NATIVE_SLICE]))
+            await asyncio.sleep(0)
+        return keys
+
+    async def aclose(self):
+        pass
+
+
+class PoolBackend:
+    """التوليد في عمليات عاملة"""
+
+    name = "pool"
+
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self._executor = None
+
+    async def generate_chunk(self, items):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self.workers)
+        loop = asyncio.get_running_loop()
+        tracer = license_trace.current()
+        if tracer is None:
+            return await loop.run_in_executor(self._executor, _generate_items, items)
+
+        job = tracer.next_id()
+        started = license_trace.now()
+        keys, events = await loop.run_in_executor(
+            self._executor, license_trace.traced_call, _generate_items, "worker", "pool", job, items, job
+        )
+        tracer.async_span("dispatch", "pool", started, job=job, keys=len(items))
+        tracer.merge(events)
+        return keys
+
+    async def aclose(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+class NodeBackend:
+    """التوليد عبر Node.js مع حد أقصى للعمليات المتزامنة"""
+
+    name = "node"
+
+    def __init__(self, project_path=None, concurrency=None):
+        self.launcher = NodeLauncher(project_path or os.path.dirname(os.path.abspath(__file__)))
+        self._semaphore = asyncio.Semaphore(concurrency or os.cpu_count() or 1)
+        self._command = None
+        self._env = None
+
+    async def _prepare_command(self):
+        if self._command is None:
+            loop = asyncio.get_running_loop()
+            # تحديد مسار Node وإصداره يحتاج استدعاءً متزامناً مرة واحدة
+            node = await loop.run_in_executor(None, self.launcher.node_path)
+            self._env = await loop.run_in_executor(None, self.launcher.env)
+            self._command = [node, self.launcher.script_path]
+        return self._command
+
+    async def _generate_one(self, device_id, license_type, region):
+        command = await self._prepare_command()
+        async with self._semaphore:
+            started = license_trace.now()
+            process = await asyncio.create_subprocess_exec(
+                *command, device_id, license_type, region,
+                cwd=self.launcher.project_path,
+                env=self._env,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            try:
+                stdout, stderr = await process.communicate()
+            except asyncio.CancelledError:
+                # عدم ترك عمليات Node يتيمة عند الإلغاء أو انتهاء المهلة
+                if process.returncode is None:
+                    process.kill()
+                    await process.wait()
+                raise
+            tracer = license_trace.current()
+            if tracer is not None:
+                tracer.async_span("spawn", "node", started, device_id=device_id, returncode=process.returncode)
+        if process.returncode != 0:
+            raise RuntimeError(stderr.decode('utf-8', 'replace').strip() or f"exit {process.returncode}")
+        for line in stdout.decode('utf-8', 'replace').splitlines():
+            if 'المفتاح:' in line or 'Key:' in line:
+                match = _KEY_PATTERN.search(line)
+                if match:
+                    return match.group(0)
+        raise RuntimeError("لم يتم العثور على المفتاح في مخرجات Node.js")
+
+    async def generate_chunk(self, items):
+        return list(await asyncio.gather(*(self._generate_one(*item) for item in items)))
+
+    async def aclose(self):
+        pass
+
+
+BACKENDS = {
+    NativeBackend.name: NativeBackend,
+    PoolBackend.name: PoolBackend,
+    NodeBackend.name: NodeBackend,
+}
+
+_default_backend = None
+
+
+def get_backend(name=None, **options):
+    """إنشاء خلفية بالاسم، أو الخلفية الافتراضية المشتركة"""
+    global _default_backend
+    if name is None:
+        if _default_backend is None:
+            _default_backend = NativeBackend()
+        return _default_backend
+    try:
+        return BACKENDS[name](**options)
+    except KeyError:
+        raise ValueError(f"خلفية غير معروفة: {name} (المتاح: {', '.join(BACKENDS)})")
+
+
+def _record(item, key):
+    device_id, license_type, region = item
+    return {
+        'device_id': device_id,
+        'license_key': key,
+        'license_type': license_type,
+        'region': region,
+    }
+
+
+async def generate(device_id, license_type="STANDARD", region="GLOBAL", *, backend=None, timeout=None):
+    """توليد مفتاح واحد"""
+    backend = backend or get_backend()
+    item = _prepare(device_id, license_type, region)
+    keys = await asyncio.wait_for(backend.generate_chunk([item]), timeout)
+    return _record(item, keys[0])
+
+
+async def _iter_chunks(items, chunk_size, license_type, region):
+    chunk = []
+    if hasattr(items, '__aiter__'):
+        async for item in items:
+            chunk.append(_prepare(item, license_type, region))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    else:
+        for item in items:
+            chunk.append(_prepare(item, license_type, region))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+async def _run_chunk(backend, chunk, timeout):
+    keys = await asyncio.wait_for(backend.generate_chunk(chunk), timeout)
+    return [_record(item, key) for item, key in zip(chunk, keys)]
+
+
+async def generate_many(items, license_type="STANDARD", region="GLOBAL", *, backend=None,
+                        chunk_size=1000, concurrency=4, timeout=None):
+    """توليد مفاتيح لمجموعة أجهزة (iterable أو async iterable) بنفس ترتيب الإدخال
+
+    العناصر إما معرفات أجهزة أو (معرف، نوع، منطقة). المهلة timeout لكل مجموعة.
+    عند الإلغاء أو إغلاق المولد تُلغى المجموعات قيد التنفيذ.
+    """
+    backend = backend or get_backend()
+    pending = deque()
+    try:
+        async for chunk in _iter_chunks(items, chunk_size, license_type, region):
+            pending.append(asyncio.ensure_future(_run_chunk(backend, chunk, timeout)))
+            if len(pending) >= concurrency:
+                for record in await pending.popleft():
+                    yield record
+        while pending:
+            for record in await pending.popleft():
+                yield record
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DentaDesk Batch License Generation
+توليد مفاتيح الترخيص لعدة أجهزة دفعة واحدة
+"""
+
+import csv
+import time
+
+from license_keys import (
+    LICENSE_TYPES, REGIONS, generate_key, generate_all_tiers, normalize_device_id, validate_device_id
+)
+from license_store import LicenseStore, type_code, region_code
+from license_bloom import find_issued
+from license_ingest import ingest_device_ids
+import license_trace
+
+CSV_HEADER = ['device_id', 'license_key', 'license_type', 'region', 'issued_at']
+
+# ملف طلبات: نوع ترخيص ومنطقة لكل جهاز (دفعات الموزعين)
+ORDER_HEADER = ['device_id', 'license_type', 'region']
+
+
+def read_device_ids(path):
+    """قراءة معرفات الأجهزة من ملف نصي (معرف في كل سطر)
+
+    تعيد (المعرفات الصالحة، قائمة الأخطاء [(رقم السطر، النص)])
+    """
+    device_ids, errors = ingest_device_ids(path)
+    return device_ids, [(line_no, text) for line_no, text, _ in errors]
+
+
+def is_orders_file(path):
+    """هل الملف CSV بأعمدة device_id,license_type,region؟"""
+    if not path.lower().endswith('.csv'):
+        return False
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        header = next(csv.reader(f), [])
+    return all(column in header for column in ORDER_HEADER)
+
+
+@license_trace.traced("read_device_orders", "parse")
+def read_device_orders(path):
+    """قراءة ملف طلبات (device_id,license_type,region)
+
+    تعيد (الطلبات [(المعرف، النوع، المنطقة)]، الأخطاء [(رقم السطر، النص، السبب)])
+    """
+    types = set(LICENSE_TYPES)
+    regions = set(REGIONS)
+    orders = []
+    errors = []
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        columns = [header.index(column) for column in ORDER_HEADER]
+        width = max(columns) + 1
+        for line_no, fields in enumerate(reader, 2):
+            if not fields:
+                continue
+            if len(fields) < width:
+                errors.append((line_no, ','.join(fields), "missing columns"))
+                continue
+            device_id, license_type, region = (fields[column].strip() for column in columns)
+            device_id = normalize_device_id(device_id)
+            license_type = license_type.upper()
+            region = region.upper()
+            if not validate_device_id(device_id):
+                errors.append((line_no, device_id, "invalid device id"))
+            elif license_type not in types:
+                errors.append((line_no, license_type, "unknown license type"))
+            elif region not in regions:
+                errors.append((line_no, region, "unknown region"))
+            else:
+                orders.append((device_id, license_type, region))
+    return orders, errors
+
+
+def select_orders(orders, device_ids):
+    """أول طلب لكل جهاز من device_ids (بعد split_new_devices) بترتيب الملف"""
+    wanted = set(device_ids)
+    selected = []
+    for order in orders:
+        if order[0] in wanted:
+            wanted.discard(order[0])
+            selected.append(order)
+    return selected
+
+
+@license_trace.traced("split_new_devices", "schedule")
+def split_new_devices(device_ids, bloom=None, index=None, ledger=None):
+    """إزالة المكرر داخل الدفعة والأجهزة التي صدر لها مفتاح مسبقاً
+
+    تعيد (الأجهزة الجديدة، الأجهزة الصادرة مسبقاً، عدد المكرر داخل الملف)
+    """
+    seen = set()
+    unique = []
+    for device_id in device_ids:
+        if device_id not in seen:
+            seen.add(device_id)
+            unique.append(device_id)
+    duplicates = len(device_ids) - len(unique)
+
+    if bloom is None:
+        return unique, set(), duplicates
+    issued = find_issued(unique, bloom, index, ledger)
+    if issued:
+        unique = [device_id for device_id in unique if device_id not in issued]
+    return unique, issued, duplicates
+
+
+def run_batch(device_ids, license_type="STANDARD", region="GLOBAL", store=None, progress=None):
+    """توليد مفتاح لكل جهاز وإضافة النتائج إلى المخزن المضغوط"""
+    # رفض النوع/المنطقة غير الصالحة قبل البدء
+    type_code(license_type)
+    region_code(region)
+
+    if store is None:
+        store = LicenseStore()
+
+    issued_at = int(time.time())
+    total = len(device_ids)
+    with license_trace.job("run_batch", license_type=license_type, region=region, keys=total) as job:
+        lanes, every = license_trace.key_lanes(("hash", "write"), job.id, total)
+        if lanes is None:
+            for index, device_id in enumerate(device_ids, 1):
+                store.append(device_id, generate_key(device_id, license_type), license_type, region, issued_at)
+                if progress and index % 10000 == 0:
+                    progress(index, total)
+        else:
+            _run_traced(device_ids, license_type, region, store, progress, issued_at, lanes, every)
+
+    if progress:
+        progress(total, total)
+    return store
+
+
+def run_orders(orders, store=None, progress=None):
+    """مثل run_batch لكن بنوع ترخيص ومنطقة لكل جهاز [(المعرف، النوع، المنطقة)]"""
+    if store is None:
+        store = LicenseStore()
+
+    issued_at = int(time.time())
+    total = len(orders)
+    with license_trace.job("run_orders", keys=total):
+        for index, (device_id, license_type, region) in enumerate(orders, 1):
+            store.append(device_id, generate_key(device_id, license_type), license_type, region, issued_at)
+            if progress and index % 10000 == 0:
+                progress(index, total)
+
+    if progress:
+        progress(total, total)
+    return store
+
+
+def _run_traced(device_ids, license_type, region, store, progress, issued_at, lanes, every):
+    """نفس حلقة run_batch مع تسجيل زمن التوليد والإضافة لمفتاح من كل every"""
+    now = license_trace.now
+    hash_events = lanes[0].data.extend
+    write_events = lanes[1].data.extend
+    total = len(device_ids)
+    for index, device_id in enumerate(device_ids, 1):
+        if index % every:
+            store.append(device_id, generate_key(device_id, license_type), license_type, region, issued_at)
+        else:
+            started = now()
+            key = generate_key(device_id, license_type)
+            hashed = now()
+            store.append(device_id, key, license_type, region, issued_at)
+            written = now()
+            hash_events((index, started, hashed - started))
+            write_events((index, hashed, written - hashed))
+        if progress and index % 10000 == 0:
+            progress(index, total)
+
+
+def quote_all_tiers(device_ids, license_types=LICENSE_TYPES):
+    """توليد مفاتيح جميع الأنواع لكل جهاز (صف لكل جهاز)"""
+    for device_id in device_ids:
+        keys = generate_all_tiers(device_id, license_types)
+        yield [device_id] + [keys[license_type] for license_type in license_types]
+
+
+def write_quote_csv(rows, path, license_types=LICENSE_TYPES):
+    """حفظ جدول مفاتيح جميع الأنواع (عمود لكل نوع)"""
+    count = 0
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['device_id'] + list(license_types))
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DentaDesk Issued License Bloom Filter
+فلتر Bloom محفوظ على القرص للفحص المسبق السريع: هل صدر مفتاح لهذا الجهاز؟
+
+الفلتر لا يعطي نتيجة سلبية خاطئة أبداً، لذا يُستخدم أولاً
+ولا يُلجأ إلى الفهرس أو السجل إلا عند الإصابة.
+"""
+
+import hashlib
+import math
+import os
+import struct
+import tempfile
+
+from license_keys import compact_key
+from license_ledger import ledger_path, iter_records, read_ledger_chunk
+from license_index import LicenseIndex, index_path_for_ledger, sync_index
+
+BLOOM_NAME = "issued.bloom"
+MAGIC = b'DDBLOOM1'
+HEADER = struct.Struct('<8sQQIIQdQ')
+
+DEFAULT_CAPACITY = 1000000
+DEFAULT_FP_RATE = 0.01
+
+
+def _device_item(device_id):
+    return b'd:' + device_id.lower().encode('ascii')
+
+
+def _key_item(license_key):
+    return b'k:' + compact_key(license_key).upper().encode('ascii')
+
+
+class BloomFilter:
+    """فلتر Bloom بحجم ومعدل خطأ قابلين للتعديل"""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, fp_rate=DEFAULT_FP_RATE):
+        if capacity <= 0 or not 0 < fp_rate < 1:
+            raise ValueError("capacity يجب أن يكون موجباً و fp_rate بين 0 و 1")
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self.bit_count = max(8, int(math.ceil(-capacity * math.log(fp_rate) / (math.log(2) ** 2))))
+        self.hash_count = max(1, int(round(self.bit_count / capacity * math.log(2))))
+        self.bits = bytearray((self.bit_count + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        m = self.bit_count
+        return [(h1 + i * h2) % m for i in range(self.hash_count)]
+
+    def add(self, item):
+        """إضافة عنصر (bytes)"""
+        bits = self.bits
+        for position in self._positions(item):
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        bits = self.bits
+        for position in self._positions(item):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def estimated_fp_rate(self):
+        """معدل الخطأ المتوقع حسب عدد العناصر الحالي"""
+        return (1 - math.exp(-self.hash_count * self.count / self.bit_count)) ** self.hash_count
+
+
+class IssuedFilter(BloomFilter):
+    """فلتر المفاتيح الصادرة - يُحدّث تدريجياً من سجل المفاتيح الصادرة
+
+    يحفظ الفلتر موضع آخر بايت قرأه من السجل، فيقرأ فقط ما أُضيف بعده.
+    """
+
+    def __init__(self, path=None, ledger=None, capacity=DEFAULT_CAPACITY, fp_rate=DEFAULT_FP_RATE):
+        super().__init__(capacity, fp_rate)
+        self.ledger = ledger or ledger_path()
+        # الفلتر يُحفظ بجانب السجل الذي يتبعه
+        self.path = path or os.path.join(os.path.dirname(os.path.abspath(self.ledger)), BLOOM_NAME)
+        self.ledger_offset = 0
+
+    @classmethod
+    def open(cls, path=None, ledger=None, capacity=DEFAULT_CAPACITY, fp_rate=DEFAULT_FP_RATE):
+        """تحميل الفلتر من القرص (أو إنشاؤه) ثم مزامنته مع السجل"""
+        bloom = cls(path, ledger, capacity, fp_rate)
+        if os.path.exists(bloom.path):
+            try:
+                bloom._load()
+            except (OSError, ValueError, struct.error):
+                bloom = cls(path, ledger, capacity, fp_rate)
+        bloom.sync()
+        return bloom
+
+    def _load(self):
+        with open(self.path, 'rb') as f:
+            header = f.read(HEADER.size)
+            magic, bit_count, capacity, hash_count, _, count, fp_rate, offset = HEADER.unpack(header)
+            if magic != MAGIC:
+                raise ValueError(f"ملف فلتر غير صالح: {self.path}")
+            bits = bytearray(f.read())
+        if len(bits) != (bit_count + 7) // 8:
+            raise ValueError(f"ملف فلتر تالف: {self.path}")
+        self.bit_count, self.capacity, self.hash_count = bit_count, capacity, hash_count
+        self.count, self.fp_rate, self.ledger_offset = count, fp_rate, offset
+        self.bits = bits
+
+    def save(self):
+        """حفظ الفلتر بشكل ذري"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix='bloom-', suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(HEADER.pack(
+                    MAGIC, self.bit_count, self.capacity, self.hash_count, 0,
+                    self.count, self.fp_rate, self.ledger_offset
+                ))
+                f.write(self.bits)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def add_record(self, device_id, license_key):
+        """إضافة جهاز ومفتاحه إلى الفلتر"""
+        self.add(_device_item(device_id))
+        self.add(_key_item(license_key))
+
+    def might_have_device(self, device_id):
+        """False يعني أن الجهاز لم يصدر له مفتاح بالتأكيد"""
+        return _device_item(device_id) in self
+
+    def might_have_key(self, license_key):
+        """False يعني أن المفتاح لم يصدر بالتأكيد"""
+        return _key_item(license_key) in self
+
+    def sync(self):
+        """قراءة ما أُضيف إلى السجل منذ آخر مزامنة وإضافته للفلتر"""
+        try:
+            size = os.path.getsize(self.ledger)
+        except OSError:
+            return 0
+        if size < self.ledger_offset:
+            # السجل استُبدل أو قُص - إعادة البناء من البداية
+            return self.rebuild(self.capacity)
+        if size == self.ledger_offset:
+            return 0
+
+        # القراءة على أجزاء حتى لا يُحمّل سجل كبير في الذاكرة عند البناء الأول
+        start = self.ledger_offset
+        added = 0
+        while True:
+            text, end = read_ledger_chunk(self.ledger, self.ledger_offset)
+            if not text:
+                break
+            for line in text.splitlines():
+                fields = line.split(',', 2)
+                if len(fields) < 2 or fields[0] == 'device_id' or not fields[0]:
+                    continue
+                self.add_record(fields[0], fields[1])
+                added += 1
+            self.ledger_offset = end
+        if self.ledger_offset == start:
+            return 0
+
+        if self.count > self.capacity:
+            return self.rebuild(self.capacity * 2)
+        self.save()
+        return added
+
+    def rebuild(self, capacity=None, fp_rate=None):
+        """إعادة بناء الفلتر بالكامل من السجل"""
+        BloomFilter.__init__(self, capacity or self.capacity, fp_rate or self.fp_rate)
+        self.ledger_offset = 0
+        return self.sync()
+
+
+def find_issued(device_ids, bloom, index=None, ledger=None):
+    """تحديد الأجهزة التي صدر لها مفتاح فعلاً
+
+    الفلتر يُفحص أولاً؛ الإصابات فقط تُؤكد من الفهرس.
+    """
+    pending = set()
+    confirmed = set()
+    for device_id in device_ids:
+        if bloom.might_have_device(device_id):
+            if index is not None and device_id in index:
+                confirmed.add(device_id)
+            else:
+                pending.add(device_id)
+
+    # ما لم يجده الفهرس (غير موجود أو أضيف للسجل بعد آخر تحديث له) يُؤكد من فهرس السجل
+    # بعد إلحاق الجزء الجديد من السجل به، بدلاً من قراءة السجل كاملاً مع كل إصابة خاطئة
+    if pending and ledger:
+        path = index_path_for_ledger(ledger)
+        try:
+            sync_index(ledger, path)
+            with LicenseIndex(path) as current:
+                confirmed.update(device_id for device_id in pending if device_id in current)
+        except (OSError, ValueError):
+            # الفهرس لا يمكن تحديثه الآن (مفتوح في عملية أخرى على Windows مثلاً) - مرور على السجل
+            for record in iter_records(ledger):
+                device_id = record['device_id'].lower()
+                if device_id in pending:
+                    confirmed.add(device_id)
+                    pending.discard(device_id)
+                    if not pending:
+                        break
+    return confirmed
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DentaDesk Signed License Bundle
+حزمة مفاتيح موقعة لسلسلة عيادات بدلاً من إرسال المفاتيح واحداً واحداً
+
+صيغة الملف (little-endian):
+    header   '<8sHHI48s'  magic، الإصدار، حجم السجل، وقت الإنشاء، اسم الحزمة (UTF-8)
+    records  count * 38   sha256(معرف الجهاز)[:16]، المفتاح بدون شرطات (20)، رمز النوع، رمز المنطقة
+    trailer  '<I32s'      عدد السجلات، HMAC-SHA256 لكل ما قبل التوقيع
+
+العدد والتوقيع في نهاية الملف حتى تُكتب الحزمة في مرور واحد دون الرجوع لتعديل الرأس.
+معرف الجهاز لا يُحفظ نصاً: يبحث الجهاز عن مفتاحه بحساب hash معرفه.
+الرموز بنفس ترتيب LICENSE_TYPES و REGIONS (مثل LicenseStore).
+"""
+
+import hashlib
+import hmac
+import mmap
+import os
+import struct
+import time
+from collections import Counter
+
+from license_keys import MASTER_KEY, LICENSE_TYPES, REGIONS, KEY_LENGTH, compact_key, format_key
+from license_store import type_code, region_code
+import license_trace
+
+BUNDLE_MAGIC = b'DDLBNDL1'
+BUNDLE_VERSION = 1
+BUNDLE_HEADER = struct.Struct('<8sHHI48s')
+BUNDLE_RECORD = struct.Struct('<16s20sBB')
+BUNDLE_TRAILER = struct.Struct('<I32s')
+
+DEVICE_HASH_BYTES = 16
+LABEL_BYTES = 48
+
+# عدد السجلات في كل كتابة للملف
+CHUNK_ROWS = 50000
+
+
+def device_hash(device_id):
+    """hash معرف الجهاز كما يُحفظ في الحزمة"""
+    return hashlib.sha256(device_id.strip().lower().encode('ascii')).digest()[:DEVICE_HASH_BYTES]
+
+
+def signing_key(master_key=MASTER_KEY):
+    """مفتاح HMAC للحزم (مشتق من المفتاح الرئيسي وليس هو نفسه)"""
+    return hashlib.sha256(b'DentaDesk license bundle\0' + master_key.encode('utf-8')).digest()
+
+
+def _label_bytes(label):
+    data = (label or '').encode('utf-8')
+    if len(data) > LABEL_BYTES:
+        # قص دون كسر حرف UTF-8
+        data = data[:LABEL_BYTES].decode('utf-8', 'ignore').encode('utf-8')
+    return data
+
+
+class BundleWriter:
+    """كتابة حزمة متدفقة: السجلات تُوقع وتُكتب أثناء الإضافة
+
+        with BundleWriter("chain.ddlb", label="Smile Clinics") as writer:
+            writer.write_rows(rows)
+    """
+
+    def __init__(self, path, label='', master_key=MASTER_KEY, created_at=None):
+        self.path = path
+        self.count = 0
+        self._tmp_path = path + '.tmp'
+        self._file = open(self._tmp_path, 'wb')
+        self._mac = hmac.new(signing_key(master_key), digestmod=hashlib.sha256)
+        self._buffer = bytearray()
+        header = BUNDLE_HEADER.pack(BUNDLE_MAGIC, BUNDLE_VERSION, BUNDLE_RECORD.size,
+                                    int(created_at or time.time()), _label_bytes(label))
+        self._emit(header)
+
+    def _emit(self, data):
+        self._mac.update(data)
+        self._file.write(data)
+
+    def _flush(self):
+        if self._buffer:
+            self._emit(self._buffer)
+            self._buffer = bytearray()
+
+    def append(self, device_id, license_key, license_type, region):
+        """إضافة مفتاح جهاز واحد"""
+        key = compact_key(license_key).upper().encode('ascii')
+        if len(key) != KEY_LENGTH:
+            raise ValueError(f"مفتاح الترخيص غير صالح: {license_key}")
+        self._buffer += BUNDLE_RECORD.pack(device_hash(device_id), key,
+                                           type_code(license_type), region_code(region))
+        self.count += 1
+        if len(self._buffer) >= CHUNK_ROWS * BUNDLE_RECORD.size:
+            self._flush()
+
+    def write_rows(self, rows):
+        """إضافة صفوف (device_id, license_key, license_type, region, ...)؛ تعيد عددها"""
+        pack = BUNDLE_RECORD.pack
+        sha256 = hashlib.sha256
+        buffer = self._buffer
+        limit = CHUNK_ROWS * BUNDLE_RECORD.size
+        types = {}
+        regions = {}
+        added = 0
+        for row in rows:
+            device_id, license_key, license_type, region = row[:4]
+            key = license_key.replace('-', '').upper().encode('ascii')
+            if len(key) != KEY_LENGTH:
+                raise ValueError(f"مفتاح الترخيص غير صالح: {license_key}")
+            code = types.get(license_type)
+            if code is None:
+                code = types[license_type] = type_code(license_type)
+            place = regions.get(region)
+            if place is None:
+                place = regions[region] = region_code(region)
+            buffer += pack(sha256(device_id.strip().lower().encode('ascii')).digest()[:DEVICE_HASH_BYTES],
+                           key, code, place)
+            added += 1
+            if len(buffer) >= limit:
+                self._emit(buffer)
+                buffer = self._buffer = bytearray()
+        self.count += added
+        return added
+
+    def close(self):
+        """إنهاء الحزمة (العدد والتوقيع) ونقلها لمسارها؛ تعيد عدد السجلات"""
+        if self._file is None:
+            return self.count
+        self._flush()
+        count = struct.pack('<I', self.count)
+        self._mac.update(count)
+        self._file.write(count + self._mac.digest())
+        self._file.close()
+        self._file = None
+        os.replace(self._tmp_path, self.path)
+        return self.count
+
+    def abort(self):
+        """إلغاء الكتابة وحذف الملف المؤقت"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            os.remove(self._tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+@license_trace.traced("write_bundle", "write")
+def write_bundle(rows, path, label='', master_key=MASTER_KEY):
+    """كتابة حزمة من صفوف (store_rows أو record_rows)؛ تعيد عدد السجلات"""
+    with BundleWriter(path, label, master_key) as writer:
+        writer.write_rows(rows)
+    return writer.count
+
+
+class LicenseBundle:
+    """قراءة حزمة عبر mmap والتحقق من توقيعها دون نسخ السجلات
+
+    يرفع ValueError إذا كان الملف تالفاً أو التوقيع غير مطابق (verify=False لتخطي التوقيع).
+    """
+
+    def __init__(self, path, master_key=MASTER_KEY, verify=True):
+        self.path = path
+        with open(path, 'rb') as f:
+            try:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # ملف فارغ
+                raise ValueError(f"ملف حزمة غير صالح: {path}")
+        self._view = memoryview(self._mmap)
+        self._records = None
+        try:
+            self._parse(master_key, verify)
+        except ValueError:
+            self.close()
+            raise
+
+    def _parse(self, master_key, verify):
+        size = len(self._mmap)
+        if size < BUNDLE_HEADER.size + BUNDLE_TRAILER.size:
+            raise ValueError(f"ملف حزمة غير صالح: {self.path}")
+        magic, version, record_size, self.created_at, label = BUNDLE_HEADER.unpack_from(self._mmap)
+        if magic != BUNDLE_MAGIC or version != BUNDLE_VERSION or record_size != BUNDLE_RECORD.size:
+            raise ValueError(f"ملف حزمة غير صالح أو إصدار غير مدعوم: {self.path}")
+        self.label = label.rstrip(b'\0').decode('utf-8', 'replace')
+        signed = size - BUNDLE_TRAILER.size + 4
+        self.count, signature = BUNDLE_TRAILER.unpack_from(self._mmap, signed - 4)
+        if BUNDLE_HEADER.size + self.count * record_size + BUNDLE_TRAILER.size != size:
+            raise ValueError(f"حجم الحزمة لا يطابق عدد السجلات: {self.path}")
+        self._records = self._view[BUNDLE_HEADER.size:BUNDLE_HEADER.size + self.count * record_size]
+        self.verified = False
+        if verify:
+            expected = hmac.new(signing_key(master_key), self._view[:signed], hashlib.sha256).digest()
+            if not hmac.compare_digest(expected, signature):
+                raise ValueError(f"توقيع الحزمة غير صالح (الملف معدل أو المفتاح الرئيسي مختلف): {self.path}")
+            self.verified = True
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        """(hash الجهاز hex، المفتاح، النوع، المنطقة) لكل سجل"""
+        for hashed, key, code, place in BUNDLE_RECORD.iter_unpack(self._records):
+            yield hashed.hex(), format_key(key.decode('ascii')), LICENSE_TYPES[code], REGIONS[place]
+
+    def lookup(self, device_id):
+        """مفاتيح جهاز: [(المفتاح، النوع، المنطقة)]"""
+        target = device_hash(device_id)
+        records = self._records
+        base = BUNDLE_HEADER.size
+        end = base + len(records)
+        found = []
+        # البحث في mmap مباشرة (بسرعة C) مع التأكد أن الموضع بداية سجل
+        position = self._mmap.find(target, base, end)
+        while position != -1:
+            offset = position - base
+            if offset % BUNDLE_RECORD.size == 0:
+                _, key, code, place = BUNDLE_RECORD.unpack_from(records, offset)
+                found.append((format_key(key.decode('ascii')), LICENSE_TYPES[code], REGIONS[place]))
+            position = self._mmap.find(target, position + 1, end)
+        return found
+
+    def statistics(self):
+        """عدد السجلات لكل نوع ولكل منطقة"""
+        size = BUNDLE_RECORD.size
+        types = Counter(self._records[36::size])
+        regions = Counter(self._records[37::size])
+        return ({LICENSE_TYPES[code]: count for code, count in sorted(types.items())},
+                {REGIONS[code]: count for code, count in sorted(regions.items())})
+
+    def close(self):
+        if self._mmap is not None:
+            # mmap لا يُغلق وهناك memoryview مفتوح عليه
+            if self._records is not None:
+                self._records.release()
+            self._view.release()
+            self._mmap.close()
+            self._mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,947 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DentaDesk License Generator CLI
+أداة سطر الأوامر لتوليد مفاتيح الترخيص
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+
+from license_keys import MASTER_KEY, LICENSE_TYPES, REGIONS, normalize_device_id, validate_device_id
+from license_batch import (
+    read_device_ids, run_batch, split_new_devices,
+    quote_all_tiers, write_quote_csv,
+    is_orders_file, read_device_orders, select_orders, run_orders
+)
+from license_ledger import LicenseLedger, ledger_path, iter_records
+from license_index import build_index, index_path, open_index
+from license_bloom import IssuedFilter, DEFAULT_CAPACITY, DEFAULT_FP_RATE
+from license_rekey import RekeyJob, KeyScheme, SCHEMES, parse_slices
+from license_node import NodeLauncher
+from license_service import serve, DEFAULT_HOST, DEFAULT_PORT
+from license_watch import WatchDaemon
+from license_export import detect_format, export_store
+from license_ingest import ingest_device_ids, write_device_ids, write_error_report
+from license_crypto import process_file
+from license_pack import PackBuilder, PackIndex, PACK_NAME, index_path_for, read_pack_records, verify_pack
+from license_reconcile import reconcile
+from license_collisions import KeySpaceAnalyzer, PREFIX_CHARS, MEMORY_MB
+from license_soak import SoakTest, parse_duration
+from license_bundle import LicenseBundle, write_bundle
+from license_workload import WorkloadSpec, ScalingRun, STAGES, parse_count, parse_mix
+from license_store import LicenseStore
+from license_shards import ShardWriter, DEFAULT_MAX_BYTES, MANIFEST_NAME, parse_size, verify_manifest
+from license_rollup import UsageRollups, DIMENSIONS
+from license_messages import write_messages, store_rows, record_rows, load_template, parse_languages
+import license_trace
+
+
+def print_ingest_errors(errors, limit=20):
+    """عرض أول الأسطر غير الصالحة"""
+    for line_no, text, reason in errors[:limit]:
+        print(f"⚠️  سطر {line_no}: معرف غير صالح ({reason}): {text}")
+    if len(errors) > limit:
+        print(f"⚠️  ... و {len(errors) - limit} خطأ آخر")
+
+
+def cmd_ingest(args):
+    """التحقق من ملف معرفات وتوحيده"""
+    started = time.perf_counter()
+    device_ids, errors = ingest_device_ids(args.input)
+    elapsed = time.perf_counter() - started
+    size = os.path.getsize(args.input)
+
+    print_ingest_errors(errors)
+    output = args.output or f"{args.input}.clean.txt"
+    write_device_ids(device_ids, output)
+    if errors:
+        report = args.errors or f"{args.input}.errors.csv"
+        write_error_report(errors, report)
+        print(f"📝 تقرير الأخطاء: {report}")
+    print(f"✅ معرفات صالحة: {len(device_ids)} | أسطر غير صالحة: {len(errors)}")
+    print(f"💾 المعرفات: {output}")
+    print(f"⏱️  {elapsed:.2f} ثانية ({size / (1024 * 1024) / max(elapsed, 1e-9):.0f} MB/s)")
+    return 0
+
+
+def cmd_batch(args):
+    """توليد مفاتيح لملف معرفات أجهزة"""
+    started = time.perf_counter()
+    orders = None
+    if is_orders_file(args.input):
+        # ملف طلبات: النوع والمنطقة من الملف لكل جهاز بدلاً من -t و -r
+        orders, errors = read_device_orders(args.input)
+        device_ids = [order[0] for order in orders]
+    else:
+        device_ids, errors = ingest_device_ids(args.input)
+    print_ingest_errors(errors)
+
+    ledger = LicenseLedger(args.ledger)
+    bloom = None
+    if not args.include_issued:
+        bloom = IssuedFilter.open(ledger=ledger.path)
+        # إصابات الفلتر تُؤكد من الفهرس الذي يتبع هذا السجل
+        device_ids, issued, duplicates = split_new_devices(device_ids, bloom, None, ledger.path)
+        if duplicates:
+            print(f"ℹ️  تم تجاهل {duplicates} معرف مكرر داخل الملف")
+        if issued:
+            print(f"ℹ️  تم تخطي {len(issued)} جهاز صدر له مفتاح مسبقاً (--include-issued لإعادة التوليد)")
+        if orders is not None:
+            orders = select_orders(orders, device_ids)
+
+    store = LicenseStore()
+    shards = None
+    progress = None
+    if args.split_dir:
+        # التقسيم يتم أثناء التوليد (كل 10000 مفتاح) دون المرور على النتائج مرة أخرى
+        shards = ShardWriter(args.split_dir, parse_size(args.shard_size), args.writers)
+        progress = shards.follow(store)
+    try:
+        if orders is not None:
+            run_orders(orders, store=store, progress=progress)
+        else:
+            run_batch(device_ids, args.type, args.region, store=store, progress=progress)
+    except BaseException:
+        if shards is not None:
+            shards.abort()
+        raise
+    if shards is not None:
+        manifest = shards.close()
+        print(f"🗂️  التقسيم: {args.split_dir} ({manifest['files']} ملف لـ "
+              f"{len({(s['region'], s['license_type']) for s in manifest['shards']})} منطقة/نوع)")
+    output = args.output or f"{args.input}.licenses.csv"
+    export_store(store, output, detect_format(output, default='csv'))
+    if not args.no_ledger:
+        ledger.append_store(store, customer=args.customer, operator=args.operator)
+        if bloom is not None:
+            bloom.sync()
+        UsageRollups.open(ledger=ledger.path).close()
+
+    if args.messages:
+        count = write_messages(store_rows(store), args.messages, parse_languages(args.lang),
+                               parse_templates(args.template))
+        print(f"📧 رسائل العملاء: {args.messages} ({count} رسالة)")
+    if args.bundle:
+        count = write_bundle(store_rows(store), args.bundle, label=args.customer or '')
+        print(f"📦 حزمة المفاتيح: {args.bundle} ({count} مفتاح)")
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ تم توليد {len(store)} مفتاح في {elapsed:.2f} ثانية")
+    print(f"💾 النتائج: {output}")
+    print(f"📊 حجم المخزن: {store.memory_usage() / (1024 * 1024):.1f} MB")
+    return 0
+
+
+def cmd_build_index(args):
+    """إعادة بناء فهرس المفاتيح الصادرة"""
+    started = time.perf_counter()
+    sources = args.sources or [ledger_path()]
+    output = args.output or index_path()
+    # إذا كان السجل ضمن المصادر يُحدّث الفهرس منه تلقائياً بعد ذلك
+    ledger = ledger_path()
+    included = any(os.path.abspath(source) == os.path.abspath(ledger) for source in sources)
+    stats = build_index(sources, output, ledger=ledger if included else None)
+    elapsed = time.perf_counter() - started
+    print(f"✅ تم بناء الفهرس: {output}")
+    print(f"📊 السجلات: {stats['records']} | المكرر: {stats['duplicates']} | المرفوض: {stats['rejected']}")
+    print(f"⏱️  الوقت: {elapsed:.2f} ثانية")
+    return 0
+
+
+def cmd_lookup(args):
+    """البحث عن المفاتيح الصادرة لجهاز"""
+    index = open_index(args.index)
+    if index is None:
+        print("❌ الفهرس غير موجود - شغّل: python license_cli.py build-index", file=sys.stderr)
+        return 1
+    with index:
+        records = index.lookup(args.device_id.strip().lower())
+    if not records:
+        print("ℹ️  لا توجد مفاتيح صادرة لهذا الجهاز")
+        return 2
+    for record in records:
+        issued = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(record.issued_at))
+        print(f"🔑 {record.license_key}  {record.license_type:<12} {record.region:<8} {issued}")
+    return 0
+
+
+def cmd_bloom(args):
+    """إعادة بناء فلتر المفاتيح الصادرة"""
+    bloom = IssuedFilter(ledger=args.ledger, capacity=args.capacity, fp_rate=args.fp_rate)
+    added = bloom.rebuild()
+    print(f"✅ تم بناء الفلتر: {bloom.path}")
+    print(f"📊 السجلات: {added} | الحجم: {len(bloom.bits) / 1024:.0f} KB | دوال hash: {bloom.hash_count}")
+    print(f"🎯 معدل الخطأ المتوقع: {bloom.estimated_fp_rate():.4%}")
+    return 0
+
+
+def cmd_quote(args):
+    """مفاتيح جميع أنواع الترخيص لجهاز أو أكثر"""
+    device_ids = []
+    for device_id in args.device_ids:
+        device_id = normalize_device_id(device_id)
+        if not validate_device_id(device_id):
+            print(f"❌ معرف الجهاز غير صالح: {device_id}", file=sys.stderr)
+            return 1
+        device_ids.append(device_id)
+    if args.input:
+        file_ids, errors = read_device_ids(args.input)
+        for line_no, text in errors[:20]:
+            print(f"⚠️  سطر {line_no}: معرف غير صالح: {text}")
+        device_ids.extend(file_ids)
+    if not device_ids:
+        print("❌ يرجى إدخال معرف جهاز أو ملف معرفات (-i)", file=sys.stderr)
+        return 1
+
+    rows = quote_all_tiers(device_ids)
+    if args.output:
+        started = time.perf_counter()
+        count = write_quote_csv(rows, args.output)
+        elapsed = time.perf_counter() - started
+        print(f"✅ تم توليد {count * len(LICENSE_TYPES)} مفتاح لـ {count} جهاز في {elapsed:.2f} ثانية")
+        print(f"💾 النتائج: {args.output}")
+        return 0
+
+    print(f"{'device_id':<32}  " + "  ".join(f"{t:<23}" for t in LICENSE_TYPES))
+    for row in rows:
+        print("  ".join(f"{value:<23}" for value in row))
+    return 0
+
+
+def cmd_rekey(args):
+    """إعادة توليد جميع المفاتيح الصادرة بإصدار جديد من الخوارزمية"""
+    old_scheme = SCHEMES.get(args.old_version)
+    if old_scheme is None:
+        print(f"❌ إصدار غير معروف: {args.old_version}", file=sys.stderr)
+        return 1
+
+    master_key = old_scheme.master_key
+    if args.new_master_key_env:
+        master_key = os.environ.get(args.new_master_key_env)
+        if not master_key:
+            print(f"❌ متغير البيئة {args.new_master_key_env} غير معرّف", file=sys.stderr)
+            return 1
+    slices = parse_slices(args.new_slices) if args.new_slices else old_scheme.slices
+    new_scheme = KeyScheme(args.new_version, master_key, slices)
+    if new_scheme[1:] == old_scheme[1:]:
+        print("❌ الإصدار الجديد مطابق للقديم - حدد --new-master-key-env أو --new-slices", file=sys.stderr)
+        return 1
+
+    sources = args.sources or [ledger_path()]
+    output = args.output or f"rekey-v{old_scheme.version}-to-v{new_scheme.version}"
+    job = RekeyJob(sources, output, old_scheme, new_scheme, workers=args.workers)
+
+    started = time.perf_counter()
+    def progress(done):
+        rate = done / max(time.perf_counter() - started, 1e-9)
+        print(f"\r⏳ {done} سجل ({rate:,.0f} سجل/ثانية)", end="", flush=True)
+
+    checkpoint = job.run(fresh=args.fresh, progress=progress)
+    print()
+    print(f"✅ اكتمل الترحيل: {checkpoint['records']} سجل")
+    print(f"💾 ملف الربط: {job.mapping_path}")
+    print(f"👥 ملفات العملاء: {len(checkpoint['customers'])} في {job.customers_dir}")
+    if checkpoint['mismatches']:
+        print(f"⚠️  {checkpoint['mismatches']} سجل لا يطابق مفتاحه المخزن الإصدار {old_scheme.version}")
+    return 0
+
+
+def cmd_diagnostics(args):
+    """تشخيص بيئة Node.js وقياس زمن الاستدعاء"""
+    launcher = NodeLauncher(args.project or os.path.dirname(os.path.abspath(__file__)))
+    if not os.path.exists(launcher.script_path):
+        print(f"❌ لم يتم العثور على {launcher.script_path}", file=sys.stderr)
+        return 1
+    print(f"🟢 Node.js: {launcher.node_path()}")
+    result = launcher.measure_spawn_latency(args.runs)
+    print(f"📦 الإصدار: {result['node_version']}")
+    print(f"⚡ التسريع: {result['accelerator']}")
+    print(f"⏱️  بدون تسريع: {result['baseline_ms']:.1f} ms")
+    print(f"⏱️  مع التسريع: {result['accelerated_ms']:.1f} ms")
+    if result['accelerator'] == 'none':
+        print("ℹ️  ذاكرة الترجمة تحتاج Node.js 22.1 أو أحدث")
+    else:
+        print(f"✅ التوفير: {result['saved_ms']:.1f} ms لكل استدعاء")
+    return 0
+
+
+def cmd_serve(args):
+    """تشغيل خدمة التوليد المحلية"""
+    address = f"unix:{args.socket}" if args.socket else f"http://{args.host}:{args.port}"
+    print(f"🚀 خدمة التوليد تعمل على {address} (Ctrl+C للإيقاف)")
+    try:
+        serve(
+            args.host, args.port, args.socket,
+            ledger_path=args.ledger, use_ledger=not args.no_ledger,
+            max_batch=args.max_batch, max_delay=args.max_delay_ms / 1000,
+            queue_size=args.queue_size
+        )
+    except KeyboardInterrupt:
+        print("\n👋 تم إيقاف الخدمة")
+    return 0
+
+
+def cmd_watch(args):
+    """مراقبة مجلد الطلبات"""
+    daemon = WatchDaemon(
+        args.directory, args.type, args.region, ledger=args.ledger,
+        batch_size=args.batch_size, interval=args.interval, settle=args.settle
+    )
+    daemon.setup()
+    daemon.recover()
+    if args.once:
+        while daemon.poll_once() or daemon.has_pending():
+            time.sleep(daemon.settle)
+        return 0
+    print(f"👀 مراقبة {daemon.directory} (Ctrl+C للإيقاف)")
+    try:
+        daemon.run_forever()
+    except KeyboardInterrupt:
+        print("\n👋 تم إيقاف المراقبة")
+    return 0
+
+
+def cmd_crypt(args):
+    """تشفير أو فك تشفير ملف سجلات"""
+    started = time.perf_counter()
+    suffix = '.enc.txt' if args.mode == 'encrypt' else '.dec.jsonl'
+    output = args.output or f"{args.input}{suffix}"
+    master_key = MASTER_KEY
+    if args.master_key_env:
+        master_key = os.environ.get(args.master_key_env)
+        if not master_key:
+            raise ValueError(f"متغير البيئة {args.master_key_env} غير معرف")
+
+    done, errors = process_file(args.mode, args.input, output, master_key, workers=args.workers)
+    for line_no, reason in errors[:20]:
+        print(f"⚠️  سطر {line_no}: {reason}")
+    if len(errors) > 20:
+        print(f"⚠️  ... و {len(errors) - 20} خطأ آخر")
+    elapsed = time.perf_counter() - started
+    print(f"✅ تمت معالجة {done} سجل ({len(errors)} فشل) في {elapsed:.2f} ثانية")
+    print(f"💾 النتائج: {output}")
+    return 0 if not errors else 2
+
+
+def cmd_pack(args):
+    """بناء ملف مفاتيح الإنتاج مع الفهرس الجانبي"""
+    started = time.perf_counter()
+    builder = PackBuilder(args.type, args.region)
+    for source in args.sources:
+        added = builder.add_source(source)
+        print(f"📥 {source}: {added} مفتاح")
+    if args.generate:
+        builder.generate(args.generate)
+        print(f"🎲 مفاتيح جديدة: {args.generate}")
+    if builder.duplicates:
+        print(f"ℹ️  تم حذف {builder.duplicates} مفتاح مكرر")
+    for license_key in builder.invalid[:20]:
+        print(f"⚠️  مفتاح غير صالح: {license_key}")
+    if not builder.records:
+        print("❌ لا توجد مفاتيح - حدد ملفات مصدر أو --generate", file=sys.stderr)
+        return 1
+
+    output = args.output or PACK_NAME
+    index, count = builder.write(output)
+    elapsed = time.perf_counter() - started
+    print(f"✅ {count} مفتاح في {elapsed:.2f} ثانية")
+    print(f"💾 الملف: {output}")
+    print(f"🗂️  الفهرس: {index}")
+    return 0
+
+
+RECONCILE_LABELS = [
+    ('activated', "مفاتيح مفعّلة"),
+    ('never_activated', "مفاتيح لم تُفعّل"),
+    ('unknown_activations', "تفعيلات بدون مفتاح صادر"),
+    ('device_mismatch', "مفاتيح فُعّلت على جهاز آخر"),
+    ('multiple_activations', "مفاتيح فُعّلت أكثر من مرة"),
+    ('repeated_devices', "أجهزة لها أكثر من تفعيل"),
+]
+
+
+def cmd_reconcile(args):
+    """مطابقة المفاتيح الصادرة مع سجلات التفعيل"""
+    issued = args.issued or [ledger_path()]
+    activations = args.activations or [
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "used-licenses.json")
+    ]
+    for path in issued + activations:
+        if not os.path.exists(path):
+            print(f"❌ الملف غير موجود: {path}", file=sys.stderr)
+            return 1
+
+    started = time.perf_counter()
+    stats, reports = reconcile(issued, activations, args.output,
+                               workers=args.workers, chunk_rows=args.chunk_rows)
+    elapsed = time.perf_counter() - started
+    for name, label in RECONCILE_LABELS:
+        print(f"{label:<28} {stats[name]:>12}   {reports[name]}")
+    if stats['duplicate_issued']:
+        print(f"ℹ️  مفاتيح مكررة في السجل: {stats['duplicate_issued']}")
+    if stats['issued_rejected'] or stats['activations_rejected']:
+        print(f"⚠️  سجلات مرفوضة: {stats['issued_rejected']} صادرة، "
+              f"{stats['activations_rejected']} تفعيل")
+    print(f"✅ تمت المطابقة في {elapsed:.2f} ثانية")
+    return 0
+
+
+def cmd_collisions(args):
+    """فحص تصادم المفاتيح بين الأجهزة والأنواع والمفاتيح المحددة مسبقاً"""
+    started = time.perf_counter()
+    license_types = args.type or LICENSE_TYPES
+    analyzer = KeySpaceAnalyzer(os.path.join(args.output, "partitions"),
+                                memory_mb=args.memory_mb, workers=args.workers)
+    if args.input:
+        device_ids, errors = ingest_device_ids(args.input)
+        print_ingest_errors(errors)
+        analyzer.add_devices(device_ids, license_types)
+        print(f"📥 {args.input}: {len(device_ids)} جهاز × {len(license_types)} نوع")
+    if args.random:
+        def progress(done):
+            print(f"\r🎲 {done}/{args.random}", end="", flush=True)
+        analyzer.add_random_devices(args.random, args.seed, license_types, progress)
+        print(f"\r🎲 أجهزة عشوائية: {args.random} × {len(license_types)} نوع (البذرة {args.seed})")
+    for path in args.issued or []:
+        print(f"📥 {path}: {analyzer.add_issued(path)} مفتاح صادر")
+    if not args.no_predefined:
+        print(f"📋 مفاتيح محددة مسبقاً: {analyzer.add_predefined()}")
+    for path in args.pack or []:
+        print(f"📦 {path}: {analyzer.add_pack(path)} مفتاح")
+
+    report = analyzer.analyze(args.output, args.prefix_chars)
+    elapsed = time.perf_counter() - started
+
+    print(f"\n🔑 المفاتيح: {report['keys']} (فريدة {report['unique_keys']}، "
+          f"مكررة لنفس الجهاز والنوع {report['duplicates']})")
+    if report['spills']:
+        print(f"💽 كُتبت الأقسام إلى القرص {report['spills']} مرة")
+    if report['rejected']:
+        print(f"⚠️  مفاتيح مرفوضة: {report['rejected']}")
+    if report['irregular']:
+        print(f"ℹ️  مفاتيح مرجعية ليست 20 حرفاً (لا تتصادم مع المفاتيح المولدة): {report['irregular']}")
+    print("\nالبادئة      مشتركة فعلياً      المتوقع عشوائياً")
+    for row in report['prefixes']:
+        print(f"{row['chars']:>3} حرف  {row['shared']:>16}  {row['expected']:>18.2f}")
+    print("\nالجزء   الإنتروبيا (بت من 20)   أقل حرف (من 4)   قيم مختلفة   المتوقع")
+    for row in report['slices']:
+        print(f"{row['slice']:>4}   {row['entropy_bits']:>18.4f}   {row['min_char_bits']:>13.4f}   "
+              f"{row['distinct']:>10}   {row['expected_distinct']:>10.0f}")
+    print()
+    print(f"🧩 مجموعات بنفس أول {args.prefix_chars} حرف: {report['clusters']}   {report['clusters_path']}")
+    if report['collisions']:
+        print(f"❌ تصادمات: {report['collisions']} ({report['colliding_keys']} مفتاح)   "
+              f"{report['collisions_path']}")
+    else:
+        print("✅ لا توجد تصادمات")
+    print(f"⏱️  {elapsed:.2f} ثانية")
+    return 2 if report['collisions'] else 0
+
+
+def cmd_soak(args):
+    """اختبار تحمل طويل لمسار التوليد في الواجهة"""
+    duration = parse_duration(args.duration)
+    test = SoakTest(
+        duration=duration, rate=args.rate, sample_every=parse_duration(args.sample_every),
+        warmup=parse_duration(args.warmup) if args.warmup else None,
+        use_node=not args.fake_node, batch_every=args.batch_every, batch_size=args.batch_size,
+        clear_every=args.clear_every, seed=args.seed,
+    )
+    print(f"🧪 اختبار التحمل: {duration:.0f} ثانية، {args.rate} طلب/ثانية "
+          f"({'Node.js' if not args.fake_node else 'بدون Node.js'})")
+    problems = test.run()
+    if args.report:
+        test.write_samples(args.report)
+        print(f"💾 العينات: {args.report}")
+    if test.skipped:
+        print(f"ℹ️  طلبات متأخرة تم تخطيها (الطلب السابق لم ينتهِ): {test.skipped}")
+    if not problems:
+        print(f"✅ لا يوجد نمو مستمر بعد {test.requests} طلب")
+        return 0
+    for problem in problems:
+        print(f"❌ {problem}")
+    if test.top_sites:
+        print("\n📈 أكثر مواضع التخصيص نمواً منذ نهاية الإحماء:")
+        for stat in test.top_sites:
+            print(f"   {stat}")
+    return 2
+
+
+def parse_templates(values):
+    """['ar=path', ...] -> {'ar': نص القالب}"""
+    templates = {}
+    for value in values or ():
+        language, sep, path = value.partition('=')
+        if not sep or not path:
+            raise ValueError(f"صيغة القالب: LANG=PATH (مثل ar=message_ar.txt): {value}")
+        templates[language.strip().lower()] = load_template(path)
+    return templates
+
+
+def cmd_messages(args):
+    """رسائل التفعيل للعملاء من ملف نتائج أو من السجل"""
+    started = time.perf_counter()
+    source = args.input or ledger_path()
+    if not os.path.exists(source):
+        print(f"❌ الملف غير موجود: {source}", file=sys.stderr)
+        return 1
+    languages = parse_languages(args.lang)
+    templates = parse_templates(args.template)
+    records = iter_records(source)
+    if args.type or args.region or args.device:
+        devices = {normalize_device_id(device_id) for device_id in args.device or ()}
+        records = (
+            record for record in records
+            if (not args.type or record['license_type'] == args.type)
+            and (not args.region or record['region'] == args.region)
+            and (not devices or record['device_id'] in devices)
+        )
+
+    def progress(done):
+        print(f"\r📧 {done} رسالة...", end="", flush=True)
+
+    count = write_messages(record_rows(records), args.output, languages, templates, progress)
+    elapsed = time.perf_counter() - started
+    print()
+    print(f"✅ تم إنشاء {count} رسالة ({', '.join(languages)}) في {elapsed:.2f} ثانية")
+    print(f"💾 الرسائل: {args.output}")
+    return 0
+
+
+def cmd_bundle(args):
+    """بناء حزمة مفاتيح موقعة من ملف نتائج أو من السجل"""
+    started = time.perf_counter()
+    source = args.input or ledger_path()
+    if not os.path.exists(source):
+        print(f"❌ الملف غير موجود: {source}", file=sys.stderr)
+        return 1
+    records = iter_records(source)
+    if args.type or args.region or args.customer:
+        records = (
+            record for record in records
+            if (not args.type or record['license_type'] == args.type)
+            and (not args.region or record['region'] == args.region)
+            and (not args.customer or record['customer'] == args.customer)
+        )
+    count = write_bundle(record_rows(records), args.output, label=args.label or args.customer or '')
+    elapsed = time.perf_counter() - started
+    print(f"✅ تم بناء حزمة من {count} مفتاح في {elapsed:.2f} ثانية")
+    print(f"📦 الحزمة: {args.output} ({os.path.getsize(args.output) / 1024:.0f} KB)")
+    return 0
+
+
+def cmd_verify_bundle(args):
+    """التحقق من توقيع حزمة مفاتيح وعرض محتواها"""
+    started = time.perf_counter()
+    try:
+        bundle = LicenseBundle(args.bundle)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+    with bundle:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        created = time.strftime('%Y-%m-%d %H:%M', time.localtime(bundle.created_at))
+        print(f"✅ التوقيع صالح ({elapsed_ms:.1f} ms)")
+        print(f"📦 {bundle.label or '-'} | {len(bundle)} مفتاح | أُنشئت {created}")
+        types, regions = bundle.statistics()
+        print("📊 الأنواع: " + ", ".join(f"{name}: {count}" for name, count in types.items()))
+        print("🌍 المناطق: " + ", ".join(f"{name}: {count}" for name, count in regions.items()))
+        for device_id in args.device or ():
+            keys = bundle.lookup(normalize_device_id(device_id))
+            if not keys:
+                print(f"❌ {device_id}: غير موجود في الحزمة")
+            for license_key, license_type, region in keys:
+                print(f"🔑 {device_id}: {license_key}  {license_type}  {region}")
+        if args.list:
+            print()
+            for hashed, license_key, license_type, region in bundle:
+                print(f"{hashed}  {license_key}  {license_type:<12}  {region}")
+    return 0
+
+
+def cmd_verify_pack(args):
+    """التحقق من فهرس ملف مفاتيح الإنتاج والبحث عن مفاتيح عبره"""
+    started = time.perf_counter()
+    problems = verify_pack(args.pack)
+    for problem in problems:
+        print(f"❌ {problem}")
+    if problems:
+        return 2
+    elapsed = time.perf_counter() - started
+    print(f"✅ الفهرس يطابق {args.pack} ({elapsed:.2f} ثانية)")
+    if args.key:
+        records = read_pack_records(args.pack)
+        with PackIndex(index_path_for(args.pack)) as index:
+            for license_key in args.key:
+                position = index.position(license_key)
+                if position is None:
+                    print(f"❌ {license_key}: غير موجود")
+                    continue
+                metadata = records[position].get('metadata') or {}
+                state = "مستخدم" if metadata.get('isUsed') else ("متاح" if metadata.get('isActive') else "معطل")
+                print(f"🔑 {records[position]['key']}  {metadata.get('licenseType', '-')}  "
+                      f"{metadata.get('region', '-')}  {state}")
+    return 0
+
+
+def workload_options(args):
+    """معاملات WorkloadSpec المشتركة بين workload و scaling"""
+    return {
+        'seed': args.seed, 'duplicate_ratio': args.duplicates, 'invalid_ratio': args.invalid,
+        'types': parse_mix(args.types, LICENSE_TYPES), 'regions': parse_mix(args.regions, REGIONS),
+    }
+
+
+def cmd_workload(args):
+    """ملف معرفات أجهزة اصطناعي قابل للتكرار"""
+    started = time.perf_counter()
+    spec = WorkloadSpec(parse_count(args.rows), **workload_options(args))
+
+    def progress(done, total):
+        print(f"\r📄 {done:,} / {total:,}", end="", flush=True)
+
+    stats = spec.write(args.output, progress)
+    elapsed = time.perf_counter() - started
+    print()
+    print(f"✅ {stats['rows']:,} سطر في {elapsed:.2f} ثانية ({stats['rows'] / elapsed:,.0f} سطر/ثانية)")
+    print(f"📊 فريد: {stats['unique']:,} | مكرر: {stats['duplicates']:,} | غير صالح: {stats['invalid']:,}")
+    print(f"💾 الملف: {args.output}")
+    return 0
+
+
+def cmd_scaling(args):
+    """منحنى الإنتاجية والذاكرة مع حجم الإدخال وعدد العمليات"""
+    run = ScalingRun(
+        [parse_count(size) for size in args.sizes.split(',')],
+        [int(workers) for workers in args.workers.split(',')],
+        work_dir=args.work_dir, **workload_options(args)
+    )
+    run.run()
+
+    print()
+    print(f"{'rows':>12} {'workers':>7}  " + "  ".join(f"{stage:>10}" for stage in STAGES) + f"  {'peak MB':>8}")
+    for rows, workers, values in run.table():
+        rates = "  ".join(f"{values[stage][0]:>10,}" if stage in values else f"{'-':>10}" for stage in STAGES)
+        peak = max(peak for _, peak in values.values())
+        print(f"{rows:>12,} {workers:>7}  {rates}  {peak:>8.1f}")
+    print("(صف/ثانية لكل مرحلة)")
+    if args.report:
+        run.write_report(args.report)
+        print(f"💾 التقرير: {args.report}")
+    if run.mismatches:
+        for mismatch in run.mismatches:
+            print(f"❌ {mismatch}")
+        return 2
+    return 0
+
+
+def cmd_verify_shards(args):
+    """التحقق من ملفات التقسيم مقابل manifest.json"""
+    problems = verify_manifest(args.directory)
+    if problems:
+        for problem in problems:
+            print(f"❌ {problem}")
+        return 2
+    print(f"✅ كل الملفات مطابقة لـ {MANIFEST_NAME}")
+    return 0
+
+
+def cmd_usage(args):
+    """تقرير الإصدار من جداول الإحصاءات المجمعة"""
+    with UsageRollups(ledger=args.ledger) as rollups:
+        started = time.perf_counter()
+        added = rollups.rebuild() if args.rebuild else rollups.sync()
+        synced = time.perf_counter()
+        summary = rollups.summary()
+        rows = rollups.report(args.by, since=args.since, until=args.until, operator=args.operator,
+                              license_type=args.type, region=args.region, limit=args.limit)
+        elapsed_ms = (time.perf_counter() - synced) * 1000
+
+    if added:
+        print(f"🔄 تمت إضافة {added} سجل من السجل في {synced - started:.2f} ثانية")
+    print(f"📊 الإجمالي: {summary['total']} | اليوم: {summary['today']} | "
+          f"آخر 7 أيام: {summary['last_7_days']} | آخر 30 يوماً: {summary['last_30_days']}")
+    if args.output:
+        with open(args.output, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow([args.by, 'keys'])
+            writer.writerows(rows)
+        print(f"💾 التقرير: {args.output} ({len(rows)} صف)")
+    else:
+        print()
+        print(f"{args.by:<24}  {'keys':>10}")
+        for value, keys in rows:
+            print(f"{value or '-':<24}  {keys:>10}")
+    print(f"⏱️  زمن الاستعلام: {elapsed_ms:.1f} ms")
+    return 0
+
+
+def build_parser():
+    """إنشاء محلل الأوامر"""
+    parser = argparse.ArgumentParser(
+        prog="license_cli.py",
+        description="DentaDesk License Generator - مولد مفاتيح الترخيص"
+    )
+    parser.add_argument("--trace", metavar="PATH",
+                        help="حفظ تتبع زمني للمهمة بصيغة Chrome/Perfetto (trace.json)")
+    parser.add_argument("--trace-every", type=int, default=1, metavar="N",
+                        help="تسجيل أحداث مفتاح واحد من كل N (افتراضياً كل المفاتيح)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    batch = subparsers.add_parser("batch", help="توليد مفاتيح لملف معرفات أجهزة")
+    batch.add_argument("input", help="ملف نصي يحتوي معرف جهاز في كل سطر، أو CSV بأعمدة device_id,license_type,region")
+    batch.add_argument("-t", "--type", default="STANDARD", choices=LICENSE_TYPES)
+    batch.add_argument("-r", "--region", default="GLOBAL", choices=REGIONS)
+    batch.add_argument("-o", "--output", help="ملف النتائج (.csv أو .jsonl أو .gz أو .zip)")
+    batch.add_argument("--customer", default="", help="اسم العميل في سجل المفاتيح الصادرة")
+    batch.add_argument("--operator", help="اسم المشغل (افتراضياً مستخدم النظام)")
+    batch.add_argument("--ledger", help="مسار سجل المفاتيح الصادرة")
+    batch.add_argument("--no-ledger", action="store_true", help="عدم تسجيل المفاتيح في السجل")
+    batch.add_argument("--include-issued", action="store_true",
+                       help="توليد مفاتيح حتى للأجهزة التي صدر لها مفتاح مسبقاً")
+    batch.add_argument("--messages", help="كتابة رسائل التفعيل للعملاء (.zip أو مجلد)")
+    batch.add_argument("--lang", default="ar,en", help="لغات الرسائل (ar أو en أو ar,en)")
+    batch.add_argument("--template", action="append", metavar="LANG=PATH", help="قالب رسالة مخصص")
+    batch.add_argument("--split-dir", help="تقسيم النتائج أثناء التوليد إلى ملف لكل منطقة ونوع في هذا المجلد")
+    batch.add_argument("--shard-size", default=str(DEFAULT_MAX_BYTES),
+                       help="الحجم الأقصى لكل ملف قبل بدء ملف جديد (مثل 50M)")
+    batch.add_argument("--writers", type=int, help="عدد خيوط الكتابة للتقسيم (افتراضياً حتى 4)")
+    batch.add_argument("--bundle", help="كتابة حزمة مفاتيح موقعة (.ddlb) لسلسلة العيادات")
+    batch.set_defaults(func=cmd_batch)
+
+    ingest = subparsers.add_parser("ingest", help="التحقق من ملف معرفات أجهزة وتوحيده")
+    ingest.add_argument("input", help="ملف نصي يحتوي معرف جهاز في كل سطر")
+    ingest.add_argument("-o", "--output", help="ملف المعرفات الصالحة")
+    ingest.add_argument("--errors", help="ملف CSV لتقرير الأسطر غير الصالحة")
+    ingest.set_defaults(func=cmd_ingest)
+
+    build = subparsers.add_parser("build-index", help="إعادة بناء فهرس المفاتيح الصادرة")
+    build.add_argument("sources", nargs="*", help="ملفات السجل أو نتائج الدفعات (CSV)")
+    build.add_argument("-o", "--output", help="مسار ملف الفهرس")
+    build.set_defaults(func=cmd_build_index)
+
+    lookup = subparsers.add_parser("lookup", help="البحث عن المفاتيح الصادرة لجهاز")
+    lookup.add_argument("device_id")
+    lookup.add_argument("--index", help="مسار ملف الفهرس")
+    lookup.set_defaults(func=cmd_lookup)
+
+    quote = subparsers.add_parser("quote", help="مفاتيح جميع أنواع الترخيص لكل جهاز")
+    quote.add_argument("device_ids", nargs="*", help="معرفات الأجهزة")
+    quote.add_argument("-i", "--input", help="ملف نصي يحتوي معرف جهاز في كل سطر")
+    quote.add_argument("-o", "--output", help="ملف CSV للنتائج (عمود لكل نوع)")
+    quote.set_defaults(func=cmd_quote)
+
+    rekey = subparsers.add_parser("rekey", help="ترحيل المفاتيح الصادرة إلى إصدار جديد من الخوارزمية")
+    rekey.add_argument("sources", nargs="*", help="ملفات السجل أو نتائج الدفعات (CSV)")
+    rekey.add_argument("--old-version", type=int, default=1, help="إصدار الخوارزمية الحالي")
+    rekey.add_argument("--new-version", type=int, required=True, help="رقم الإصدار الجديد")
+    rekey.add_argument("--new-master-key-env", help="متغير البيئة الذي يحتوي المفتاح الرئيسي الجديد")
+    rekey.add_argument("--new-slices", help="مواضع أجزاء المفتاح الجديدة مثل 0:5,8:13,16:21,24:29")
+    rekey.add_argument("-o", "--output", help="مجلد مخرجات الترحيل")
+    rekey.add_argument("--workers", type=int, help="عدد العمليات (افتراضياً عدد الأنوية)")
+    rekey.add_argument("--fresh", action="store_true", help="تجاهل نقطة الاستئناف والبدء من جديد")
+    rekey.set_defaults(func=cmd_rekey)
+
+    diagnostics = subparsers.add_parser("diagnostics", help="تشخيص Node.js وقياس زمن الاستدعاء")
+    diagnostics.add_argument("--project", help="مسار المشروع")
+    diagnostics.add_argument("--runs", type=int, default=5, help="عدد مرات القياس")
+    diagnostics.set_defaults(func=cmd_diagnostics)
+
+    service = subparsers.add_parser("serve", help="تشغيل خدمة التوليد المحلية (HTTP أو Unix socket)")
+    service.add_argument("--host", default=DEFAULT_HOST)
+    service.add_argument("--port", type=int, default=DEFAULT_PORT)
+    service.add_argument("--socket", help="مسار Unix socket بدلاً من TCP")
+    service.add_argument("--max-batch", type=int, default=2048, help="أقصى حجم للدفعة الصغيرة")
+    service.add_argument("--max-delay-ms", type=float, default=2.0, help="أقصى انتظار لتجميع الطلبات")
+    service.add_argument("--queue-size", type=int, default=200000, help="سعة الطابور قبل رفض الطلبات")
+    service.add_argument("--ledger", help="مسار سجل المفاتيح الصادرة")
+    service.add_argument("--no-ledger", action="store_true", help="عدم تسجيل المفاتيح في السجل")
+    service.set_defaults(func=cmd_serve)
+
+    bloom = subparsers.add_parser("bloom", help="إعادة بناء فلتر Bloom للمفاتيح الصادرة")
+    bloom.add_argument("--capacity", type=int, default=DEFAULT_CAPACITY, help="عدد العناصر المتوقع")
+    bloom.add_argument("--fp-rate", type=float, default=DEFAULT_FP_RATE, help="معدل الإيجابيات الخاطئة")
+    bloom.add_argument("--ledger", help="مسار سجل المفاتيح الصادرة")
+    bloom.set_defaults(func=cmd_bloom)
+
+    watch = subparsers.add_parser("watch", help="مراقبة مجلد وتوليد المفاتيح للملفات الجديدة")
+    watch.add_argument("directory", help="المجلد المراقب")
+    watch.add_argument("-t", "--type", default="STANDARD", choices=LICENSE_TYPES,
+                       help="النوع الافتراضي (يمكن تحديده لكل سطر في CSV)")
+    watch.add_argument("-r", "--region", default="GLOBAL", choices=REGIONS)
+    watch.add_argument("--ledger", help="مسار سجل المفاتيح الصادرة")
+    watch.add_argument("--batch-size", type=int, default=5000, help="عدد الأسطر في كل دفعة")
+    watch.add_argument("--interval", type=float, default=1.0, help="الفترة بين الفحوصات (ثانية)")
+    watch.add_argument("--settle", type=float, default=1.0,
+                       help="مدة ثبات الملف قبل معالجته (ثانية)")
+    watch.add_argument("--once", action="store_true", help="معالجة الملفات الموجودة ثم الخروج")
+    watch.set_defaults(func=cmd_watch)
+
+    pack = subparsers.add_parser("pack", help="بناء ملف مفاتيح الإنتاج مرتباً مع فهرس للتحقق السريع")
+    pack.add_argument("sources", nargs="*", help="ملفات مفاتيح (JSON أو نص بمفتاح في كل سطر)")
+    pack.add_argument("--generate", type=int, default=0, help="عدد المفاتيح العشوائية الجديدة")
+    pack.add_argument("-t", "--type", default="STANDARD", choices=LICENSE_TYPES,
+                      help="نوع الترخيص للمفاتيح الجديدة")
+    pack.add_argument("-r", "--region", default="GLOBAL", choices=REGIONS)
+    pack.add_argument("-o", "--output", help=f"مسار الملف (افتراضياً {PACK_NAME})")
+    pack.set_defaults(func=cmd_pack)
+
+    rec = subparsers.add_parser("reconcile", help="مطابقة المفاتيح الصادرة مع سجلات التفعيل")
+    rec.add_argument("-i", "--issued", action="append",
+                     help="سجل أو ملف نتائج أو ملف مفاتيح إنتاج (افتراضياً سجل المفاتيح الصادرة)")
+    rec.add_argument("-a", "--activations", action="append",
+                     help="used-licenses.json أو ملف تفعيلات JSONL/CSV")
+    rec.add_argument("-o", "--output", default="reconcile_report", help="مجلد التقارير")
+    rec.add_argument("--workers", type=int, help="عدد العمليات لحساب الـ hash (افتراضياً عدد الأنوية)")
+    rec.add_argument("--chunk-rows", type=int, default=500000,
+                     help="عدد السجلات في الذاكرة قبل كتابتها إلى ملف مؤقت")
+    rec.set_defaults(func=cmd_reconcile)
+
+    col = subparsers.add_parser("collisions", help="فحص تصادم المفاتيح قبل الإصدارات الكبيرة")
+    col.add_argument("-i", "--input", help="ملف معرفات أجهزة (تُولد مفاتيح كل الأنواع لكل جهاز)")
+    col.add_argument("--random", type=int, default=0, help="عدد أجهزة عشوائية إضافية")
+    col.add_argument("--seed", type=int, default=0, help="بذرة الأجهزة العشوائية")
+    col.add_argument("-t", "--type", action="append", choices=LICENSE_TYPES,
+                     help="نوع الترخيص (يمكن تكراره؛ افتراضياً كل الأنواع)")
+    col.add_argument("--issued", action="append", help="سجل أو ملف نتائج بمفاتيح صادرة")
+    col.add_argument("--pack", action="append", help="ملف مفاتيح إنتاج (JSON)")
+    col.add_argument("--no-predefined", action="store_true",
+                     help="عدم تضمين electron/predefinedLicenses.js")
+    col.add_argument("--prefix-chars", type=int, default=PREFIX_CHARS,
+                     help="طول البادئة المشتركة التي تُعد مجموعة")
+    col.add_argument("--memory-mb", type=int, default=MEMORY_MB,
+                     help="حجم الأقسام في الذاكرة قبل كتابتها إلى القرص")
+    col.add_argument("--workers", type=int, help="عدد العمليات (افتراضياً عدد الأنوية)")
+    col.add_argument("-o", "--output", default="collision_report", help="مجلد التقارير")
+    col.set_defaults(func=cmd_collisions)
+
+    soak = subparsers.add_parser("soak", help="اختبار تحمل طويل للواجهة مع كشف تسرب الذاكرة")
+    soak.add_argument("--duration", default="1h", help="مدة الاختبار (مثل 90s أو 30m أو 8h)")
+    soak.add_argument("--rate", type=float, default=1.0, help="عدد طلبات التوليد في الثانية")
+    soak.add_argument("--sample-every", default="30s", help="الفترة بين العينات")
+    soak.add_argument("--warmup", help="مدة الإحماء قبل أول عينة (افتراضياً خُمس المدة حتى 5 دقائق)")
+    soak.add_argument("--fake-node", action="store_true", help="توليد المفتاح داخلياً بدلاً من تشغيل Node.js")
+    soak.add_argument("--batch-every", type=int, default=0, help="تشغيل دفعة كل N طلب")
+    soak.add_argument("--batch-size", type=int, default=50, help="عدد الأجهزة في كل دفعة")
+    soak.add_argument("--clear-every", type=int, default=0, help="الضغط على زر المسح كل N طلب")
+    soak.add_argument("--seed", type=int, default=0, help="بذرة معرفات الأجهزة")
+    soak.add_argument("--report", help="حفظ العينات في ملف CSV")
+    soak.set_defaults(func=cmd_soak)
+
+    messages = subparsers.add_parser("messages", help="رسائل التفعيل للعملاء (عربي/إنجليزي) لكل جهاز")
+    messages.add_argument("input", nargs="?", help="ملف نتائج دفعة أو سجل (افتراضياً سجل المفاتيح الصادرة)")
+    messages.add_argument("-o", "--output", default="messages.zip", help="حزمة .zip أو مجلد (ملف لكل جهاز)")
+    messages.add_argument("--lang", default="ar,en", help="لغات الرسالة بالترتيب (ar أو en أو ar,en)")
+    messages.add_argument("--template", action="append", metavar="LANG=PATH",
+                          help="قالب مخصص بحقول مثل {license_key} و {type_name} و {region_name}")
+    messages.add_argument("-t", "--type", choices=LICENSE_TYPES, help="رسائل هذا النوع فقط")
+    messages.add_argument("-r", "--region", choices=REGIONS, help="رسائل هذه المنطقة فقط")
+    messages.add_argument("-d", "--device", action="append", help="رسائل هذا الجهاز فقط (يمكن تكراره)")
+    messages.set_defaults(func=cmd_messages)
+
+    bundle = subparsers.add_parser("bundle", help="حزمة مفاتيح موقعة لسلسلة عيادات (ملف واحد)")
+    bundle.add_argument("input", nargs="?", help="ملف نتائج دفعة أو سجل (افتراضياً سجل المفاتيح الصادرة)")
+    bundle.add_argument("-o", "--output", default="licenses.ddlb", help="ملف الحزمة")
+    bundle.add_argument("--label", help="اسم الحزمة (افتراضياً اسم العميل)")
+    bundle.add_argument("--customer", help="مفاتيح هذا العميل فقط (من السجل)")
+    bundle.add_argument("-t", "--type", choices=LICENSE_TYPES, help="مفاتيح هذا النوع فقط")
+    bundle.add_argument("-r", "--region", choices=REGIONS, help="مفاتيح هذه المنطقة فقط")
+    bundle.set_defaults(func=cmd_bundle)
+
+    verify_pack_parser = subparsers.add_parser("verify-pack", help="التحقق من فهرس ملف مفاتيح الإنتاج قبل النشر")
+    verify_pack_parser.add_argument("pack", nargs="?", default=PACK_NAME, help=f"ملف المفاتيح (افتراضياً {PACK_NAME})")
+    verify_pack_parser.add_argument("-k", "--key", action="append", help="البحث عن مفتاح عبر الفهرس (يمكن تكراره)")
+    verify_pack_parser.set_defaults(func=cmd_verify_pack)
+
+    verify = subparsers.add_parser("verify-bundle", help="التحقق من توقيع حزمة مفاتيح وعرض محتواها")
+    verify.add_argument("bundle")
+    verify.add_argument("-d", "--device", action="append", help="عرض مفتاح هذا الجهاز (يمكن تكراره)")
+    verify.add_argument("--list", action="store_true", help="عرض كل السجلات")
+    verify.set_defaults(func=cmd_verify_bundle)
+
+    def add_workload_arguments(command):
+        command.add_argument("--seed", type=int, default=0, help="البذرة (نفس البذرة = نفس الملف)")
+        command.add_argument("--duplicates", type=float, default=0.0, help="نسبة الأسطر المكررة (0.02 = 2%%)")
+        command.add_argument("--invalid", type=float, default=0.0, help="نسبة الأسطر غير الصالحة")
+        command.add_argument("--types", help="توزيع الأنواع مثل PREMIUM=3,STANDARD=1 (افتراضياً متساوٍ)")
+        command.add_argument("--regions", help="توزيع المناطق مثل SAUDI=2,UAE=1 (افتراضياً متساوٍ)")
+
+    workload = subparsers.add_parser("workload", help="ملف معرفات أجهزة اصطناعي قابل للتكرار لاختبار الأداء")
+    workload.add_argument("-n", "--rows", default="1M", help="عدد الأسطر (مثل 100k أو 10M، حتى 100M)")
+    workload.add_argument("-o", "--output", default="workload_devices.txt",
+                          help="ملف نصي (معرف في كل سطر) أو .csv مع النوع والمنطقة")
+    add_workload_arguments(workload)
+    workload.set_defaults(func=cmd_workload)
+
+    scaling = subparsers.add_parser("scaling", help="منحنى الإنتاجية والذاكرة مع حجم الإدخال وعدد العمليات")
+    scaling.add_argument("--sizes", default="10k,100k,1M", help="أحجام الإدخال مفصولة بفواصل")
+    scaling.add_argument("--workers", default="1,2,4", help="أعداد العمليات للتوليد مفصولة بفواصل")
+    scaling.add_argument("--work-dir", help="مجلد الملفات المؤقتة (افتراضياً مجلد النظام المؤقت)")
+    scaling.add_argument("--report", help="حفظ القياسات في ملف CSV")
+    add_workload_arguments(scaling)
+    scaling.set_defaults(func=cmd_scaling)
+
+    shards = subparsers.add_parser("verify-shards", help="التحقق من ملفات التقسيم (batch --split-dir) مقابل manifest")
+    shards.add_argument("directory")
+    shards.set_defaults(func=cmd_verify_shards)
+
+    usage = subparsers.add_parser("usage", help="تقرير المفاتيح الصادرة حسب اليوم أو المشغل أو النوع أو المنطقة")
+    usage.add_argument("--by", choices=list(DIMENSIONS), default="day", help="بعد التجميع")
+    usage.add_argument("--since", metavar="YYYY-MM-DD", help="من هذا التاريخ (شامل)")
+    usage.add_argument("--until", metavar="YYYY-MM-DD", help="حتى هذا التاريخ (شامل)")
+    usage.add_argument("--operator", help="مفاتيح هذا المشغل فقط")
+    usage.add_argument("-t", "--type", choices=LICENSE_TYPES, help="مفاتيح هذا النوع فقط")
+    usage.add_argument("-r", "--region", choices=REGIONS, help="مفاتيح هذه المنطقة فقط")
+    usage.add_argument("--limit", type=int, help="الحد الأقصى لعدد الصفوف")
+    usage.add_argument("-o", "--output", help="حفظ التقرير في ملف CSV")
+    usage.add_argument("--ledger", help="مسار سجل المفاتيح الصادرة")
+    usage.add_argument("--rebuild", action="store_true", help="إعادة بناء الجداول من السجل بالكامل")
+    usage.set_defaults(func=cmd_usage)
+
+    for mode, help_text in (("encrypt", "تشفير ملف JSONL (سجل في كل سطر) بصيغة iv:ciphertext"),
+                            ("decrypt", "فك تشفير ملف سجلات مشفرة (سجل في كل سطر) إلى JSONL")):
+        crypt = subparsers.add_parser(mode, help=help_text)
+        crypt.add_argument("input")
+        crypt.add_argument("-o", "--output", help="ملف النتائج")
+        crypt.add_argument("--workers", type=int, help="عدد العمليات (افتراضياً عدد الأنوية)")
+        crypt.add_argument("--master-key-env", help="متغير البيئة الذي يحتوي مفتاحاً رئيسياً مختلفاً")
+        crypt.set_defaults(func=cmd_crypt, mode=mode)
+
+    return parser
+
+
+def save_trace(path):
+    """حفظ التتبع وإيقافه"""
+    tracer = license_trace.disable()
+    try:
+        count = tracer.export(path)
+    except OSError as e:
+        print(f"❌ تعذر حفظ التتبع: {e}", file=sys.stderr)
+        return
+    print(f"📈 التتبع: {path} ({count} حدث)")
+    if tracer.dropped:
+        print(f"⚠️  تم تجاهل {tracer.dropped} حدث بعد بلوغ الحد الأقصى")
+
+
+def main(argv=None):
+    """الدالة الرئيسية"""
+    args = build_parser().parse_args(argv)
+    if args.trace:
+        license_trace.enable(key_every=args.trace_every)
+    try:
+        with license_trace.job(args.command, "cli"):
+            return args.func(args)
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"❌ خطأ: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if args.trace:
+            save_trace(args.trace)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DentaDesk License Key-Space Analyzer
+فحص تصادم المفاتيح قبل الإصدارات الكبيرة
+
+المفتاح أربعة أجزاء (5 أحرف hex) من sha256 واحد (generateAlgorithmicKey)، والمفاتيح
+المحددة مسبقاً (electron/predefinedLicenses.js) ومفاتيح الإنتاج لها نفس الشكل.
+يمرر المحلل كل المفاتيح عبر أقسام (partitions) حسب أول حرفين من المفتاح:
+تبقى الأقسام في الذاكرة حتى حد معين ثم تُكتب إلى ملفات مؤقتة، وبعدها يُحلل كل قسم
+على حدة (فرز ثم مقارنة المتجاورات)، فتبقى الذاكرة محدودة مهما كان عدد المفاتيح.
+
+النتائج:
+    - التصادمات التامة: نفس المفتاح لجهازين أو نوعين مختلفين أو مع مفتاح محدد مسبقاً
+    - المجموعات المشتركة في البادئة (prefix_chars حرف) مقارنة بالعدد المتوقع عشوائياً
+    - الإنتروبيا لكل جزء من المفتاح وتغطية قيمه الممكنة
+"""
+
+import csv
+import math
+import os
+import re
+import zlib
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from hashlib import sha256
+from itertools import groupby
+from random import Random
+
+from license_keys import MASTER_KEY, LICENSE_TYPES, KEY_SLICES, KEY_LENGTH, compact_key, format_key
+from license_ledger import iter_records
+from license_pack import read_pack_records
+
+PARTITIONS = 256
+RECORD_SIZE = KEY_LENGTH + 1 + 16
+# المفتاح (20)، نوع الترخيص (1)، الجهاز (16)؛ المفاتيح المرجعية: النوع 255 والجهاز = رقمها
+REFERENCE_TYPE = 255
+
+DEVICE_BATCH = 20000
+MEMORY_MB = 256
+PREFIX_LENGTHS = (5, 10, 15)
+PREFIX_CHARS = 15
+SLICE_BITS = 20
+SLICE_VALUES = 2 ** SLICE_BITS
+
+COLLISION_HEADER = ['group', 'license_key', 'origin', 'device_id', 'license_type']
+CLUSTER_HEADER = ['prefix', 'keys', 'license_keys']
+
+_PREDEFINED_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                'electron', 'predefinedLicenses.js')
+_CATEGORY = re.compile(r'^\s*(\w+)\s*:\s*\[')
+_QUOTED_KEY = re.compile(r"""['"]([A-Za-z0-9]+(?:-[A-Za-z0-9]+)+)['"]""")
+_HEX = frozenset('0123456789ABCDEF')
+_HEX_BYTES = [bytes((symbol,)) for symbol in b'0123456789ABCDEF']
+
+
+def partition_of(compact):
+    """رقم القسم من أول حرفين (المفاتيح المشتركة في البادئة تقع في نفس القسم)"""
+    head = compact[:2]
+    if _HEX.issuperset(head):
+        return int(head, 16)
+    return zlib.crc32(head.encode('ascii')) % PARTITIONS
+
+
+def read_predefined_licenses(path=_PREDEFINED_FILE):
+    """مفاتيح PREDEFINED_LICENSES مع فئتها [(المفتاح، الفئة)] بدون تشغيل Node"""
+    keys = []
+    category = None
+    with open(path, 'r', encoding='utf-8') as f:
+        inside = False
+        for line in f:
+            if not inside:
+                inside = 'PREDEFINED_LICENSES' in line and '{' in line
+                continue
+            if line.startswith('}'):
+                break
+            match = _CATEGORY.match(line)
+            if match:
+                category = match.group(1)
+            for license_key in _QUOTED_KEY.findall(line.split('//')[0]):
+                keys.append((license_key.upper(), category or ''))
+    return keys
+
+
+# ----------------------------------------------------------------------
+# توليد المفاتيح (في عمليات عاملة)
+
+def _split_records(rows):
+    """توزيع [(المفتاح المضغوط، رمز النوع، الجهاز)] على الأقسام؛ تعيد قائمة بايتات لكل قسم"""
+    parts = [[] for _ in range(PARTITIONS)]
+    for compact, type_index, device in rows:
+        parts[partition_of(compact)].append(compact.encode('ascii') + bytes((type_index,)) + device)
+    return [b''.join(part) for part in parts]
+
+
+def _generate_batch(task):
+    """مفاتيح كل الأنواع لمجموعة أجهزة
+
+    task = (المعرفات أو None، بذرة التوليد، عدد الأجهزة العشوائية، الأنواع، المفتاح الرئيسي)
+    """
+    device_ids, seed, count, license_types, master_key = task
+    if device_ids is None:
+        raw = Random(seed).randbytes(16 * count).hex()
+        device_ids = [raw[i:i + 32] for i in range(0, len(raw), 32)]
+    tiers = [(LICENSE_TYPES.index(t), t.encode('utf-8')) for t in license_types]
+    parts = [[] for _ in range(PARTITIONS)]
+    master = master_key.encode('utf-8')
+    for device_id in device_ids:
+        device = bytes.fromhex(device_id)
+        prefix = sha256(device_id.encode('utf-8') + master)
+        for type_index, license_type in tiers:
+            state = prefix.copy()
+            state.update(license_type)
+            base_hash = state.hexdigest().upper()
+            compact = ''.join(base_hash[start:end] for start, end in KEY_SLICES)
+            parts[int(compact[:2], 16)].append(compact.encode('ascii') + bytes((type_index,)) + device)
+    return len(device_ids), [b''.join(part) for part in parts]
+
+
+# ----------------------------------------------------------------------
+# الأقسام
+
+class _Partitions:
+    """أقسام المفاتيح: في الذاكرة حتى memory_bytes ثم تُلحق بملفات مؤقتة"""
+
+    def __init__(self, directory, memory_bytes):
+        self.directory = directory
+        self.memory_bytes = memory_bytes
+        self.buffers = [bytearray() for _ in range(PARTITIONS)]
+        self.paths = [None] * PARTITIONS
+        self.buffered = 0
+        self.spills = 0
+        self.records = 0
+
+    def add(self, blobs):
+        for index, blob in enumerate(blobs):
+            if blob:
+                self.buffers[index] += blob
+                self.buffered += len(blob)
+                self.records += len(blob) // RECORD_SIZE
+        if self.buffered > self.memory_bytes:
+            self.spill()
+
+    def spill(self):
+        os.makedirs(self.directory, exist_ok=True)
+        for index, buffer in enumerate(self.buffers):
+            if not buffer:
+                continue
+            if self.paths[index] is None:
+                self.paths[index] = os.path.join(self.directory, f'partition-{index:03d}.tmp')
+            with open(self.paths[index], 'ab') as f:
+                f.write(buffer)
+            self.buffers[index] = bytearray()
+        self.buffered = 0
+        self.spills += 1
+
+    def load(self, index):
+        """محتوى القسم كاملاً (ثم تحرير الذاكرة والملف)"""
+        data = b''
+        if self.paths[index]:
+            with open(self.paths[index], 'rb') as f:
+                data = f.read()
+            os.remove(self.paths[index])
+            self.paths[index] = None
+        data += self.buffers[index]
+        self.buffered -= len(self.buffers[index])
+        self.buffers[index] = bytearray()
+        return data
+
+    def cleanup(self):
+        for path in self.paths:
+            if path and os.path.exists(path):
+                os.remove(path)
+        if self.spills and os.path.isdir(self.directory) and not os.listdir(self.directory):
+            os.rmdir(self.directory)
+
+
+def _entropy(counter):
+    total = sum(counter.values())
+    if not total:
+        return 0.0
+    return -sum(n / total * math.log2(n / total) for n in counter.values() if n)
+
+
+def expected_excess(count, space):
+    """العدد المتوقع للمفاتيح التي تشارك مفتاحاً سابقاً بادئته (لمفاتيح عشوائية منتظمة)"""
+    if not count:
+        return 0.0
+    distinct = -space * math.expm1(count * math.log1p(-1.0 / space))
+    return count - distinct
+
+
+class KeySpaceAnalyzer:
+    """تجميع المفاتيح من عدة مصادر ثم تحليلها قسماً قسماً"""
+
+    def __init__(self, work_dir, memory_mb=MEMORY_MB, workers=None, master_key=MASTER_KEY):
+        self.work_dir = work_dir
+        self.workers = workers or os.cpu_count() or 1
+        self.master_key = master_key
+        self.partitions = _Partitions(work_dir, memory_mb * 1024 * 1024)
+        self.references = []
+        self.reference_parts = [[] for _ in range(PARTITIONS)]
+        self.rejected = 0
+        # مفاتيح مرجعية ليست 20 حرفاً: لا يمكن أن تطابق أي مفتاح مولد
+        self.irregular = []
+
+    # -- المصادر ------------------------------------------------------
+
+    def _run(self, tasks, progress=None):
+        done = 0
+        if self.workers == 1:
+            for task in tasks:
+                count, blobs = _generate_batch(task)
+                self.partitions.add(blobs)
+                done += count
+                if progress:
+                    progress(done)
+            return done
+        with ProcessPoolExecutor(self.workers) as pool:
+            pending = deque()
+            for task in tasks:
+                pending.append(pool.submit(_generate_batch, task))
+                while len(pending) >= self.workers * 2 or (pending and pending[0].done()):
+                    count, blobs = pending.popleft().result()
+                    self.partitions.add(blobs)
+                    done += count
+                    if progress:
+                        progress(done)
+            while pending:
+                count, blobs = pending.popleft().result()
+                self.partitions.add(blobs)
+                done += count
+                if progress:
+                    progress(done)
+        return done
+
+    def add_devices(self, device_ids, license_types=LICENSE_TYPES, progress=None):
+        """مفاتيح كل الأنواع المحددة لقائمة معرفات؛ تعيد عدد الأجهزة"""
+        tasks = (
+            (device_ids[start:start + DEVICE_BATCH], 0, 0, list(license_types), self.master_key)
+            for start in range(0, len(device_ids), DEVICE_BATCH)
+        )
+        return self._run(tasks, progress)
+
+    def add_random_devices(self, count, seed=0, license_types=LICENSE_TYPES, progress=None):
+        """مفاتيح لأجهزة عشوائية (قابلة للتكرار بنفس البذرة)"""
+        tasks = (
+            (None, seed * 1000003 + batch, min(DEVICE_BATCH, count - start),
+             list(license_types), self.master_key)
+            for batch, start in enumerate(range(0, count, DEVICE_BATCH))
+        )
+        return self._run(tasks, progress)
+
+    def add_issued(self, path):
+        """المفاتيح الصادرة من سجل أو ملف نتائج؛ تعيد عدد المفاتيح"""
+        rows = []
+        added = 0
+        for record in iter_records(path):
+            compact = compact_key(record['license_key'].strip().upper())
+            try:
+                device = bytes.fromhex(record['device_id'])
+                type_index = LICENSE_TYPES.index(record.get('license_type'))
+            except ValueError:
+                self.rejected += 1
+                continue
+            if len(compact) != KEY_LENGTH or len(device) != 16 or not _HEX.issuperset(compact):
+                self.rejected += 1
+                continue
+            rows.append((compact, type_index, device))
+            if len(rows) >= DEVICE_BATCH:
+                self.partitions.add(_split_records(rows))
+                added += len(rows)
+                rows = []
+        self.partitions.add(_split_records(rows))
+        return added + len(rows)
+
+    def add_reference(self, license_key, origin):
+        """مفتاح مرجعي (محدد مسبقاً أو من ملف الإنتاج) يُقارن مع كل المفاتيح"""
+        compact = compact_key(license_key.strip().upper())
+        if not compact.isascii() or not compact.isalnum():
+            self.rejected += 1
+            return False
+        if len(compact) != KEY_LENGTH:
+            self.irregular.append((license_key.strip().upper(), origin))
+            return True
+        number = len(self.references)
+        self.references.append((license_key.strip().upper(), origin))
+        record = compact.encode('ascii') + bytes((REFERENCE_TYPE,)) + number.to_bytes(16, 'big')
+        self.reference_parts[partition_of(compact)].append(record)
+        return True
+
+    def add_predefined(self, path=_PREDEFINED_FILE):
+        return sum(self.add_reference(key, f'predefined:{category}')
+                   for key, category in read_predefined_licenses(path))
+
+    def add_pack(self, path):
+        origin = f'pack:{os.path.basename(path)}'
+        return sum(self.add_reference(str(record.get('key') or ''), origin)
+                   for record in read_pack_records(path))
+
+    # -- التحليل ------------------------------------------------------
+
+    def _describe(self, record):
+        """(المفتاح، المصدر، الجهاز، النوع) لسجل"""
+        type_index = record[KEY_LENGTH]
+        if type_index == REFERENCE_TYPE:
+            license_key, origin = self.references[int.from_bytes(record[KEY_LENGTH + 1:], 'big')]
+            return license_key, origin, '', ''
+        return (format_key(record[:KEY_LENGTH].decode('ascii')), 'device-bound',
+                record[KEY_LENGTH + 1:].hex(), LICENSE_TYPES[type_index])
+
+    def analyze(self, output_dir, prefix_chars=PREFIX_CHARS, progress=None):
+        """تحليل كل الأقسام وكتابة collisions.csv و clusters.csv؛ تعيد التقرير (dict)"""
+        os.makedirs(output_dir, exist_ok=True)
+        positions = [Counter() for _ in range(KEY_LENGTH)]
+        # القيم المختلفة لكل جزء في خريطة بتات ثابتة (2^20 بايت)؛ الجزء الأول لا يحتاجها
+        # لأن الأقسام مفصولة حسب البادئة فيكفي جمع عدد البادئات المختلفة (5 أحرف)
+        slice_bitmaps = [bytearray(SLICE_VALUES) for _ in KEY_SLICES[1:]]
+        slice_starts = [index * 5 for index in range(len(KEY_SLICES))]
+        lengths = sorted(set(PREFIX_LENGTHS) | {prefix_chars, 5})
+        distinct_prefixes = dict.fromkeys(lengths, 0)
+        report = {
+            'keys': 0, 'unique_keys': 0, 'duplicates': 0, 'collisions': 0,
+            'colliding_keys': 0, 'clusters': 0, 'references': len(self.references),
+            'rejected': self.rejected, 'irregular': len(self.irregular),
+            'spills': self.partitions.spills,
+        }
+        collisions_path = os.path.join(output_dir, 'collisions.csv')
+        clusters_path = os.path.join(output_dir, 'clusters.csv')
+        try:
+            with open(collisions_path, 'w', encoding='utf-8', newline='') as cf, \
+                    open(clusters_path, 'w', encoding='utf-8', newline='') as kf:
+                collisions = csv.writer(cf)
+                collisions.writerow(COLLISION_HEADER)
+                clusters = csv.writer(kf)
+                clusters.writerow(CLUSTER_HEADER)
+
+                for index in range(PARTITIONS):
+                    data = self.partitions.load(index)
+                    # إحصائيات الأحرف على المفاتيح المرتبطة بالأجهزة فقط (كلها hex)
+                    for position in range(KEY_LENGTH):
+                        column = data[position::RECORD_SIZE]
+                        positions[position].update({symbol: column.count(symbol) for symbol in _HEX_BYTES})
+                    records = [data[i:i + RECORD_SIZE] for i in range(0, len(data), RECORD_SIZE)]
+                    del data
+                    report['keys'] += len(records)
+                    device_keys = {record[:KEY_LENGTH] for record in records}
+                    report['unique_keys'] += len(device_keys)
+                    for length in lengths:
+                        distinct_prefixes[length] += len({key[:length] for key in device_keys})
+                    for slice_index, start in enumerate(slice_starts[1:], 1):
+                        bitmap = slice_bitmaps[slice_index - 1]
+                        for value in {key[start:start + 5] for key in device_keys}:
+                            bitmap[int(value, 16)] = 1
+
+                    records.extend(self.reference_parts[index])
+                    self._scan_partition(records, prefix_chars, collisions, clusters, report)
+                    if progress:
+                        progress(index + 1, PARTITIONS)
+        finally:
+            self.partitions.cleanup()
+
+        unique = report['unique_keys']
+        report['prefixes'] = [
+            {
+                'chars': length,
+                'shared': unique - distinct_prefixes[length],
+                'expected': expected_excess(unique, 16 ** length),
+            }
+            for length in lengths
+        ]
+        report['slices'] = []
+        for slice_index, start in enumerate(slice_starts):
+            entropies = [_entropy(positions[p]) for p in range(start, start + 5)]
+            report['slices'].append({
+                'slice': slice_index + 1,
+                'entropy_bits': sum(entropies),
+                'min_char_bits': min(entropies),
+                'distinct': (distinct_prefixes[5] if not slice_index else
+                             SLICE_VALUES - slice_bitmaps[slice_index - 1].count(0)),
+                'expected_distinct': -SLICE_VALUES * math.expm1(
+                    unique * math.log1p(-1.0 / SLICE_VALUES)) if unique else 0.0,
+            })
+        report['collisions_path'] = collisions_path
+        report['clusters_path'] = clusters_path
+        return report
+
+    def _scan_partition(self, records, prefix_chars, collisions, clusters, report):
+        records.sort()
+        keys = [record[:KEY_LENGTH] for record in records]
+        if len(set(keys)) < len(keys):
+            for _, group in groupby(records, key=lambda record: record[:KEY_LENGTH]):
+                members = list(group)
+                if len(members) < 2:
+                    continue
+                owners = sorted(set(members))
+                report['duplicates'] += len(members) - len(owners)
+                if len(owners) < 2:
+                    continue
+                report['collisions'] += 1
+                report['colliding_keys'] += len(owners)
+                for record in owners:
+                    collisions.writerow([report['collisions'], *self._describe(record)])
+
+        unique = sorted(set(keys))
+        if len({key[:prefix_chars] for key in unique}) == len(unique):
+            return
+        for prefix, group in groupby(unique, key=lambda key: key[:prefix_chars]):
+            members = list(group)
+            if len(members) > 1:
+                report['clusters'] += 1
+                clusters.writerow([
+                    prefix.decode('ascii'), len(members),
+                    ' '.join(format_key(key.decode('ascii')) for key in members),
+                ])
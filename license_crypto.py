@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DentaDesk License Data Encryption
+تشفير وفك تشفير بيانات الترخيص بنفس صيغة DeviceBoundLicenseGenerator:
+
+    encryptLicenseData / decryptLicenseData
+    AES-256-CBC، المفتاح = scrypt(masterKey, 'salt', 32)، والناتج "iv_hex:ciphertext_hex"
+
+اشتقاق المفتاح عبر scrypt مكلف عمداً، لذلك يُحسب مرة واحدة لكل عملية
+ويُعاد استخدامه لكل السجلات. يحتاج مكتبة cryptography (pip install cryptography).
+"""
+
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from hashlib import scrypt
+from itertools import islice
+
+from license_keys import MASTER_KEY
+
+try:
+    from cryptography.hazmat.primitives import padding
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+    CRYPTO_AVAILABLE = True
+except ImportError:
+    CRYPTO_AVAILABLE = False
+
+# نفس القيم الافتراضية لـ crypto.scryptSync في Node.js
+SCRYPT_SALT = b'salt'
+SCRYPT_N = 16384
+SCRYPT_R = 8
+SCRYPT_P = 1
+KEY_BYTES = 32
+IV_BYTES = 16
+
+CHUNK_LINES = 2000
+
+
+def _require_crypto():
+    if not CRYPTO_AVAILABLE:
+        raise RuntimeError("مكتبة cryptography غير مثبتة - قم بتثبيتها: pip install cryptography")
+
+
+@lru_cache(maxsize=8)
+def derive_key(master_key=MASTER_KEY):
+    """مفتاح AES المشتق من المفتاح الرئيسي (يُحسب مرة واحدة لكل عملية)"""
+    return scrypt(master_key.encode('utf-8'), salt=SCRYPT_SALT,
+                  n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P, dklen=KEY_BYTES)
+
+
+def encrypt_text(text, master_key=MASTER_KEY, iv=None):
+    """تشفير نص إلى "iv:ciphertext" (hex)"""
+    _require_crypto()
+    iv = iv or os.urandom(IV_BYTES)
+    padder = padding.PKCS7(algorithms.AES.block_size).padder()
+    data = padder.update(text.encode('utf-8')) + padder.finalize()
+    encryptor = Cipher(algorithms.AES(derive_key(master_key)), modes.CBC(iv)).encryptor()
+    return iv.hex() + ':' + (encryptor.update(data) + encryptor.finalize()).hex()
+
+
+def decrypt_text(blob, master_key=MASTER_KEY):
+    """فك تشفير "iv:ciphertext" إلى نص (ValueError عند الفشل)"""
+    _require_crypto()
+    iv_hex, separator, data_hex = blob.strip().partition(':')
+    if not separator:
+        raise ValueError("صيغة غير صالحة: يجب أن تكون iv:ciphertext")
+    iv = bytes.fromhex(iv_hex)
+    data = bytes.fromhex(data_hex)
+    if len(iv) != IV_BYTES or not data or len(data) % IV_BYTES:
+        raise ValueError("صيغة غير صالحة: طول IV أو البيانات غير صحيح")
+    decryptor = Cipher(algorithms.AES(derive_key(master_key)), modes.CBC(iv)).decryptor()
+    unpadder = padding.PKCS7(algorithms.AES.block_size).unpadder()
+    padded = decryptor.update(data) + decryptor.finalize()
+    return (unpadder.update(padded) + unpadder.finalize()).decode('utf-8')
+
+
+def encrypt_license_data(data, master_key=MASTER_KEY, iv=None):
+    """مثل encryptLicenseData: JSON.stringify ثم التشفير"""
+    text = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+    return encrypt_text(text, master_key, iv)
+
+
+def decrypt_license_data(blob, master_key=MASTER_KEY):
+    """مثل decryptLicenseData لكن يرفع ValueError بدلاً من إعادة null"""
+    return json.loads(decrypt_text(blob, master_key))
+
+
+# ----------------------------------------------------------------------
+# معالجة ملفات كاملة (سجل في كل سطر) على عدة أنوية
+
+def _process_lines(task):
+    """تشفير/فك تشفير مجموعة أسطر؛ تعيد [(النتيجة أو None، الخطأ أو None)]"""
+    mode, master_key, lines = task
+    results = []
+    for line in lines:
+        try:
+            if mode == 'encrypt':
+                # التحقق من أن السطر JSON صالح ثم تشفيره كما هو مضغوطاً
+                value = json.loads(line)
+                results.append((encrypt_license_data(value, master_key), None))
+            else:
+                text = decrypt_text(line, master_key)
+                json.loads(text)
+                results.append((text, None))
+        except ValueError as e:
+            results.append((None, str(e) or type(e).__name__))
+    return results
+
+
+def _warm_worker(master_key):
+    derive_key(master_key)
+
+
+def _read_chunks(path, chunk_lines):
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        lines = (line.rstrip('\r\n') for line in f)
+        line_no = 1
+        while True:
+            chunk = list(islice(lines, chunk_lines))
+            if not chunk:
+                return
+            yield line_no, chunk
+            line_no += len(chunk)
+
+
+def process_file(mode, input_path, output_path, master_key=MASTER_KEY,
+                 workers=None, chunk_lines=CHUNK_LINES, progress=None):
+    """تشفير ملف JSONL أو فك تشفير ملف blobs (سطر لكل سجل) مع الحفاظ على الترتيب
+
+    encrypt: كل سطر قيمة JSON ← blob
+    decrypt: كل سطر blob ← JSON
+    الأسطر الفارغة تُتجاهل، والأسطر الفاشلة تُترك فارغة في الناتج
+    حتى يبقى رقم السطر متطابقاً. تعيد (عدد الناجح، [(رقم السطر، السبب)])
+    """
+    if mode not in ('encrypt', 'decrypt'):
+        raise ValueError(f"وضع غير معروف: {mode}")
+    _require_crypto()
+    workers = workers or os.cpu_count() or 1
+    done = 0
+    errors = []
+
+    def write(out, line_no, lines, results):
+        nonlocal done
+        rows = []
+        for offset, (line, (value, error)) in enumerate(zip(lines, results)):
+            if not line.strip():
+                rows.append('')
+            elif error:
+                errors.append((line_no + offset, error))
+                rows.append('')
+            else:
+                rows.append(value)
+                done += 1
+        out.write('\n'.join(rows) + '\n')
+        if progress:
+            progress(done, len(errors))
+
+    tmp_path = output_path + '.tmp'
+    chunks = _read_chunks(input_path, chunk_lines)
+    with open(tmp_path, 'w', encoding='utf-8', newline='\n') as out:
+        if workers == 1:
+            derive_key(master_key)
+            for line_no, lines in chunks:
+                write(out, line_no, lines, _process_lines((mode, master_key, lines)))
+        else:
+            # كل عملية عاملة تشتق المفتاح مرة واحدة عند بدئها
+            with ProcessPoolExecutor(workers, initializer=_warm_worker,
+                                     initargs=(master_key,)) as pool:
+                pending = deque()
+                for line_no, lines in chunks:
+                    pending.append((line_no, lines, pool.submit(_process_lines, (mode, master_key, lines))))
+                    if len(pending) >= workers * 2:
+                        line_no, lines, future = pending.popleft()
+                        write(out, line_no, lines, future.result())
+                while pending:
+                    line_no, lines, future = pending.popleft()
+                    write(out, line_no, lines, future.result())
+    os.replace(tmp_path, output_path)
+    return done, errors
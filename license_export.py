@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DentaDesk License Export
+تصدير النتائج مباشرة من المخزن المضغوط على دفعات (بدون المرور بمربع النص)
+
+الصيغ المدعومة (تُحدد من امتداد الملف):
+    .csv / .csv.gz       - جدول النتائج
+    .jsonl / .jsonl.gz   - سجل JSON في كل سطر
+    .zip                 - حزمة للعملاء: ملف نصي لكل جهاز
+    .ddlb                - حزمة مفاتيح موقعة لسلسلة عيادات (license_bundle)
+"""
+
+import gzip
+import io
+import os
+import time
+import zipfile
+
+from license_batch import CSV_HEADER
+from license_bundle import BundleWriter
+import license_trace
+
+EXPORT_FORMATS = {
+    'csv': "CSV",
+    'csv.gz': "CSV (gzip)",
+    'jsonl': "JSON Lines",
+    'jsonl.gz': "JSON Lines (gzip)",
+    'zip': "حزمة نصية لكل جهاز",
+    'ddlb': "حزمة مفاتيح موقعة",
+}
+
+CHUNK_ROWS = 50000
+
+# gzip بمستوى ضغط منخفض: أسرع بكثير مع فرق صغير في الحجم
+GZIP_LEVEL = 3
+
+BUNDLE_TEMPLATE = (
+    "DentaDesk License\n"
+    "=================\n\n"
+    "معرف الجهاز / Device ID:      {device_id}\n"
+    "نوع الترخيص / License Type:   {license_type}\n"
+    "المنطقة / Region:             {region}\n"
+    "تاريخ الإصدار / Issued:       {issued}\n\n"
+    "مفتاح الترخيص / License Key:\n"
+    "    {license_key}\n"
+)
+
+
+def detect_format(path, default=None):
+    """صيغة التصدير من امتداد الملف (أو default إن لم يكن معروفاً)"""
+    name = path.lower()
+    for fmt in sorted(EXPORT_FORMATS, key=len, reverse=True):
+        if name.endswith('.' + fmt):
+            return fmt
+    if default:
+        return default
+    raise ValueError(f"صيغة تصدير غير مدعومة: {os.path.basename(path)} "
+                     f"(المتاح: {', '.join(EXPORT_FORMATS)})")
+
+
+def _open_text(path, compressed):
+    if compressed:
+        raw = gzip.open(path, 'wb', compresslevel=GZIP_LEVEL)
+        return io.TextIOWrapper(raw, encoding='utf-8', newline='')
+    return open(path, 'w', encoding='utf-8', newline='')
+
+
+def _csv_lines(rows):
+    # القيم (hex، مفاتيح، أسماء ثابتة، أرقام) لا تحتاج إلى اقتباس CSV
+    return ''.join(f"{d},{k},{t},{r},{i}\r\n" for d, k, t, r, i in rows)
+
+
+def _jsonl_lines(rows):
+    return ''.join(
+        f'{{"device_id": "{d}", "license_key": "{k}", "license_type": "{t}", '
+        f'"region": "{r}", "issued_at": {i}}}\n'
+        for d, k, t, r, i in rows
+    )
+
+
+def _write_text(store, path, start, stop, compressed, header, render, progress, chunk_rows):
+    count = 0
+    with _open_text(path, compressed) as f:
+        if header:
+            f.write(header)
+        for rows in store.iter_chunks(start, stop, chunk_rows):
+            f.write(render(rows))
+            count += len(rows)
+            if progress:
+                progress(count)
+    return count
+
+
+def bundle_filename(device_id, license_type):
+    """اسم ملف الجهاز داخل الحزمة"""
+    return f"{device_id}_{license_type}.txt"
+
+
+def unique_name(name, used):
+    """اسم غير مستخدم في الحزمة؛ تكرار الجهاز بنفس النوع يضيف رقماً (name-2.txt ...)
+
+    used: قاموس الأسماء المستخدمة يُمرر بين الاستدعاءات
+    """
+    if name not in used:
+        used[name] = 1
+        return name
+    stem, ext = os.path.splitext(name)
+    number = used[name]
+    while True:
+        number += 1
+        candidate = f"{stem}-{number}{ext}"
+        if candidate not in used:
+            break
+    used[name] = number
+    used[candidate] = 1
+    return candidate
+
+
+def _write_bundle(store, path, start, stop, progress, chunk_rows):
+    count = 0
+    dates = {}
+    names = {}
+    # ملفات بحجم ~300 بايت: ضغط كل ملف على حدة يكلف وقتاً أكثر مما يوفر
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_STORED) as bundle:
+        for rows in store.iter_chunks(start, stop, chunk_rows):
+            for device_id, license_key, license_type, region, issued_at in rows:
+                # صفوف الدفعة الواحدة تشترك في وقت الإصدار غالباً
+                if issued_at not in dates:
+                    local = time.localtime(issued_at)
+                    dates[issued_at] = (time.strftime('%Y-%m-%d', local), local[:6])
+                issued, date_time = dates[issued_at]
+                info = zipfile.ZipInfo(unique_name(bundle_filename(device_id, license_type), names), date_time)
+                bundle.writestr(info, BUNDLE_TEMPLATE.format(
+                    device_id=device_id, license_key=license_key,
+                    license_type=license_type, region=region, issued=issued,
+                ))
+            count += len(rows)
+            if progress:
+                progress(count)
+    return count
+
+
+def _write_signed_bundle(store, path, start, stop, progress, chunk_rows):
+    # BundleWriter يكتب باسمه المؤقت الخاص ثم ينقل الملف إلى path
+    with BundleWriter(path) as writer:
+        for rows in store.iter_chunks(start, stop, chunk_rows):
+            writer.write_rows(rows)
+            if progress:
+                progress(writer.count)
+    return writer.count
+
+
+@license_trace.traced("export_store", "write")
+def export_store(store, path, fmt=None, start=0, stop=None, progress=None, chunk_rows=CHUNK_ROWS):
+    """تصدير نتائج المخزن إلى ملف؛ تعيد عدد الصفوف
+
+    progress(done) تُستدعى بعد كل دفعة. يُكتب الملف باسم مؤقت ثم يُستبدل،
+    فلا يبقى ملف ناقص عند الفشل.
+    """
+    fmt = fmt or detect_format(path)
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"صيغة تصدير غير مدعومة: {fmt}")
+    # تثبيت نهاية النطاق حتى لا تدخل نتائج تُضاف أثناء التصدير
+    stop = len(store) if stop is None else min(stop, len(store))
+
+    tmp_path = path + '.tmp'
+    try:
+        if fmt == 'zip':
+            count = _write_bundle(store, tmp_path, start, stop, progress, chunk_rows)
+        elif fmt == 'ddlb':
+            count = _write_signed_bundle(store, tmp_path, start, stop, progress, chunk_rows)
+        elif fmt.startswith('csv'):
+            header = ','.join(CSV_HEADER) + '\r\n'
+            count = _write_text(store, tmp_path, start, stop, fmt.endswith('.gz'),
+                                header, _csv_lines, progress, chunk_rows)
+        else:
+            count = _write_text(store, tmp_path, start, stop, fmt.endswith('.gz'),
+                                '', _jsonl_lines, progress, chunk_rows)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return count
+
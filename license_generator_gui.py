@@ -7,14 +7,27 @@ DentaDesk License Key Generator GUI
 
 import tkinter as tk
 from tkinter import messagebox, filedialog, ttk
-import subprocess
 import os
 import sys
 import json
 import threading
+import sqlite3
 from datetime import datetime
 import webbrowser
 
+from license_store import LicenseStore
+from license_batch import read_device_ids, run_batch, split_new_devices
+from license_ledger import LicenseLedger, ledger_path
+from license_index import index_path_for_ledger, open_index, sync_index
+from license_bloom import IssuedFilter
+from license_rollup import UsageRollups
+from license_keys import generate_all_tiers
+from license_node import NodeLauncher
+from license_service import ServiceClient, SERVICE_ENV
+from license_export import EXPORT_FORMATS, export_store
+import license_trace
+from license_warmup import Warmup, node_steps, service_steps
+
 # Try to import customtkinter, fall back to tkinter if not available
 try:
     import customtkinter as ctk
@@ -66,8 +79,31 @@ class LicenseGeneratorGUI:
             "QATAR", "BAHRAIN", "OMAN", "GCC", "MENA"
         ]
         
+        # مخزن النتائج المضغوط (للمفاتيح المفردة والدفعات)
+        self.results = LicenseStore()
+        
+        # فهرس المفاتيح الصادرة (يُفتح عبر mmap عند الحاجة)
+        self._index = None
+        self._bloom = None
+        self._rollups = None
+        self._node = None
+        self._exporting = False
+        # الفهرس والفلتر والإحصاءات قد تُفتح من خيط التجهيز وخيط التوليد معاً
+        self._open_lock = threading.Lock()
+        self.warmup = None
+        
+        # عند تعريف DENTADESK_LICENSE_SERVICE تعمل الواجهة كعميل للخدمة المحلية
+        service_url = os.environ.get(SERVICE_ENV)
+        self.service = ServiceClient(service_url) if service_url else None
+        
+        # عند تعريف DENTADESK_TRACE يُسجل تتبع زمني ويُحفظ عند إغلاق النافذة
+        self.trace_path = license_trace.enable_from_env()
+        
         self.setup_ui()
         
+        # التجهيز يبدأ بعد ظهور النافذة (after لا يُنفذ قبل mainloop)
+        self.root.after(100, self.start_warmup)
+        
     def setup_ui(self):
         """إعداد واجهة المستخدم"""
         
@@ -237,6 +273,32 @@ class LicenseGeneratorGUI:
         )
         copy_btn.pack(side="left", padx=5, pady=15)
         
+        # زر توليد دفعة من ملف
+        batch_btn = ctk.CTkButton(
+            button_frame,
+            text="📂 دفعة",
+            command=self.generate_batch,
+            height=50,
+            font=ctk.CTkFont(size=16, weight="bold"),
+            fg_color=("#00897B", "#00695C"),
+            hover_color=("#26A69A", "#00897B"),
+            corner_radius=10
+        )
+        batch_btn.pack(side="left", padx=5, pady=15)
+        
+        # زر مفاتيح جميع الأنواع
+        tiers_btn = ctk.CTkButton(
+            button_frame,
+            text="🧮 كل الأنواع",
+            command=self.quote_all_tiers,
+            height=50,
+            font=ctk.CTkFont(size=16, weight="bold"),
+            fg_color=("#5E35B1", "#4527A0"),
+            hover_color=("#7E57C2", "#5E35B1"),
+            corner_radius=10
+        )
+        tiers_btn.pack(side="left", padx=5, pady=15)
+        
         # زر حفظ النتائج
         save_btn = ctk.CTkButton(
             button_frame,
@@ -250,8 +312,21 @@ class LicenseGeneratorGUI:
         )
         save_btn.pack(side="left", padx=5, pady=15)
         
+        # زر لوحة الإحصاءات
+        stats_btn = ctk.CTkButton(
+            button_frame,
+            text="📊 الإحصاءات",
+            command=self.show_dashboard,
+            height=50,
+            font=ctk.CTkFont(size=16, weight="bold"),
+            fg_color=("#455A64", "#263238"),
+            hover_color=("#607D8B", "#455A64"),
+            corner_radius=10
+        )
+        stats_btn.pack(side="left", padx=5, pady=15)
+        
         # زر مسح البيانات
-        clear_btn = ctk.CTkButton(
+        self.clear_btn = clear_btn = ctk.CTkButton(
             button_frame,
             text="🗑️ مسح",
             command=self.clear_data,
@@ -306,13 +381,25 @@ class LicenseGeneratorGUI:
         )
         self.result_text.pack(fill="both", expand=True, padx=15, pady=(0, 15))
         
+        # شريط التقدم (يظهر أثناء التصدير فقط)
+        self.progress_bar = ctk.CTkProgressBar(main_frame)
+        self.progress_bar.set(0)
+        
         # شريط الحالة
         self.status_label = ctk.CTkLabel(
             main_frame,
             text="جاهز للتوليد",
             font=ctk.CTkFont(size=12)
         )
-        self.status_label.pack(pady=(0, 10))
+        self.status_label.pack(pady=(0, 2))
+        
+        # مؤشر تجهيز المولد في الخلفية
+        self.ready_label = ctk.CTkLabel(
+            main_frame,
+            text="⏳ جاري تجهيز المولد...",
+            font=ctk.CTkFont(size=11)
+        )
+        self.ready_label.pack(pady=(0, 10))
         
         # تعيين مسار افتراضي
         self.project_path.set(os.path.dirname(os.path.abspath(__file__)))
@@ -333,8 +420,13 @@ class LicenseGeneratorGUI:
             initialdir=self.project_path.get()
         )
         if path:
+            changed = path != self.project_path.get()
             self.project_path.set(path)
             self.update_status(f"تم اختيار المسار: {path}")
+            if changed:
+                # مشروع جديد: Node.js والسجل والفهرس من مسار مختلف
+                self.ready_label.configure(text="⏳ جاري تجهيز المولد...")
+                self.start_warmup()
     
     def validate_device_id(self, device_id):
         """التحقق من صحة معرف الجهاز"""
@@ -348,6 +440,105 @@ class LicenseGeneratorGUI:
         except ValueError:
             return False
     
+    def get_index(self):
+        """فتح فهرس المفاتيح الصادرة بعد إلحاق ما كُتب في السجل منذ آخر تحديث له"""
+        with self._open_lock:
+            return self._synced_index()
+    
+    def _synced_index(self):
+        """مزامنة الفهرس مع السجل ثم إعادة فتحه (يُستدعى مع _open_lock)"""
+        ledger = ledger_path(self.project_path.get())
+        path = index_path_for_ledger(ledger)
+        self._release_index()
+        try:
+            sync_index(ledger, path)
+        finally:
+            self._index = open_index(path)
+        return self._index
+    
+    def _release_index(self):
+        """إغلاق الفهرس المفتوح (يُستدعى مع _open_lock)
+        
+        الملف المفتوح عبر mmap لا يمكن استبداله على Windows، فيُغلق قبل أي مزامنة.
+        """
+        if self._index is not None:
+            self._index.close()
+            self._index = None
+    
+    def get_bloom(self):
+        """فلتر المفاتيح الصادرة (مُزامن مع السجل)"""
+        ledger = ledger_path(self.project_path.get())
+        with self._open_lock:
+            if self._bloom is None or self._bloom.ledger != ledger:
+                self._bloom = IssuedFilter.open(ledger=ledger)
+            else:
+                self._bloom.sync()
+            return self._bloom
+    
+    def get_rollups(self):
+        """جداول إحصاءات الإصدار (مُزامنة مع السجل)"""
+        ledger = ledger_path(self.project_path.get())
+        with self._open_lock:
+            if self._rollups is None or self._rollups.ledger != ledger:
+                if self._rollups is not None:
+                    self._rollups.close()
+                self._rollups = UsageRollups.open(ledger=ledger)
+            else:
+                self._rollups.sync()
+            return self._rollups
+    
+    def sync_rollups(self):
+        """تحديث الإحصاءات بعد الكتابة في السجل (الفشل لا يؤثر على التوليد)"""
+        try:
+            self.get_rollups()
+        except (OSError, sqlite3.Error):
+            # لوحة الإحصاءات تعيد المزامنة عند فتحها
+            pass
+    
+    def show_previous_keys(self):
+        """عرض المفاتيح الصادرة سابقاً لهذا الجهاز من الفهرس"""
+        try:
+            # الفحص المسبق عبر الفلتر - لا حاجة للفهرس إن لم يصدر مفتاح للجهاز
+            if not self.get_bloom().might_have_device(self.device_id.get()):
+                return
+            with self._open_lock:
+                index = self._synced_index()
+                records = index.lookup(self.device_id.get().lower()) if index is not None else []
+        except (OSError, ValueError):
+            return
+        if records:
+            self.result_text.insert("end", "\nℹ️ مفاتيح صادرة سابقاً لهذا الجهاز:\n")
+            for record in records:
+                issued = datetime.fromtimestamp(record.issued_at).strftime('%Y-%m-%d %H:%M')
+                self.result_text.insert(
+                    "end", f"   {record.license_key}  {record.license_type}  {record.region}  {issued}\n"
+                )
+    
+    def get_node_launcher(self):
+        """مشغل Node.js لمسار المشروع الحالي"""
+        if self._node is None or self._node.project_path != self.project_path.get():
+            self._node = NodeLauncher(self.project_path.get())
+        return self._node
+    
+    def start_warmup(self):
+        """تجهيز مسار التوليد في الخلفية (Node.js أو الخدمة، السجل، الفلتر، الفهرس)"""
+        if self.service is not None:
+            steps = service_steps(self.service)
+        else:
+            steps = node_steps(self.get_node_launcher())
+        steps.append(("ledger", "فتح سجل المفاتيح الصادرة", self.get_bloom))
+        steps.append(("index", "فتح الفهرس", self.get_index))
+        steps.append(("rollups", "تحديث الإحصاءات", self.get_rollups))
+        
+        def show(text):
+            self.root.after(0, lambda: self.ready_label.configure(text=text))
+        
+        self.warmup = Warmup(
+            steps,
+            on_step=lambda label: show(f"⏳ {label}..."),
+            on_done=lambda warmup: show(warmup.summary())
+        ).start()
+    
     def update_status(self, message):
         """تحديث شريط الحالة"""
         self.status_label.configure(text=message)
@@ -376,10 +567,19 @@ class LicenseGeneratorGUI:
         self.update_status("جاري توليد مفتاح الترخيص...")
         
         def generate_thread():
+            with license_trace.job("generate_license_key", "gui",
+                                   license_type=self.license_type.get(), region=self.region.get()):
+                generate()
+        
+        def generate():
             try:
                 # مسح النتائج السابقة
                 self.result_text.delete("1.0", "end")
                 
+                if self.service is not None:
+                    self.generate_via_service()
+                    return
+                
                 # بناء أمر Node.js
                 script_path = os.path.join(self.project_path.get(), "scripts", "generateKeyForDevice.js")
                 
@@ -389,38 +589,45 @@ class LicenseGeneratorGUI:
                     self.result_text.insert("end", f"المسار المطلوب: {script_path}\n")
                     return
                 
-                # تشغيل الأمر
-                cmd = [
-                    "node",
-                    script_path,
+                # تشغيل العملية (مع ذاكرة الترجمة المؤقتة إن دعمها Node)
+                process = self.get_node_launcher().run_generator(
                     self.device_id.get(),
                     self.license_type.get(),
                     self.region.get()
-                ]
-                
-                # تشغيل العملية
-                process = subprocess.run(
-                    cmd,
-                    cwd=self.project_path.get(),
-                    capture_output=True,
-                    text=True,
-                    encoding='utf-8'
                 )
                 
                 # عرض النتائج
                 if process.returncode == 0:
-                    self.update_status("تم توليد المفتاح بنجاح!")
-                    self.result_text.insert("1.0", "✅ تم توليد مفتاح الترخيص بنجاح!\n\n")
-                    self.result_text.insert("end", process.stdout)
+                    with license_trace.span("show_output", "ui"):
+                        self.update_status("تم توليد المفتاح بنجاح!")
+                        self.result_text.insert("1.0", "✅ تم توليد مفتاح الترخيص بنجاح!\n\n")
+                        self.result_text.insert("end", process.stdout)
                     
                     # استخراج المفتاح من النتائج
-                    lines = process.stdout.split('\n')
-                    for line in lines:
-                        if 'المفتاح:' in line or 'Key:' in line:
-                            key = line.split(':')[-1].strip()
-                            if key:
-                                self.generated_key.set(key)
-                                break
+                    with license_trace.span("parse_output", "parse"):
+                        key = None
+                        for line in process.stdout.split('\n'):
+                            if 'المفتاح:' in line or 'Key:' in line:
+                                key = line.split(':')[-1].strip()
+                                if key:
+                                    break
+                    # قبل تسجيل المفتاح الجديد حتى لا يظهر بين السابقة (والجهاز الجديد لا يمر على الفهرس)
+                    self.show_previous_keys()
+                    if key:
+                        self.generated_key.set(key)
+                        self.results.append(
+                            self.device_id.get().lower(),
+                            key,
+                            self.license_type.get(),
+                            self.region.get()
+                        )
+                        LicenseLedger(ledger_path(self.project_path.get())).append(
+                            self.device_id.get().lower(),
+                            key,
+                            self.license_type.get(),
+                            self.region.get()
+                        )
+                        self.sync_rollups()
                 else:
                     self.update_status("فشل في توليد المفتاح")
                     self.result_text.insert("1.0", "❌ فشل في توليد مفتاح الترخيص!\n\n")
@@ -436,10 +643,210 @@ class LicenseGeneratorGUI:
                 self.result_text.insert("1.0", f"❌ خطأ غير متوقع: {str(e)}\n")
         
         # تشغيل Thread
-        thread = threading.Thread(target=generate_thread)
+        thread = threading.Thread(target=generate_thread, name="generate")
         thread.daemon = True
         thread.start()
     
+    def quote_all_tiers(self):
+        """عرض مفتاح كل نوع ترخيص للجهاز الحالي"""
+        device_id = self.device_id.get().strip().lower()
+        if not self.validate_device_id(device_id):
+            messagebox.showerror(
+                "خطأ", 
+                "معرف الجهاز غير صالح!\nيجب أن يكون مكون من 32 حرف hex\nمثال: 40677b86a3f4d164d1d5e8f9a2b3c4d5"
+            )
+            return
+        
+        keys = generate_all_tiers(device_id)
+        self.result_text.delete("1.0", "end")
+        self.result_text.insert("end", f"🧮 مفاتيح جميع الأنواع للجهاز: {device_id}\n")
+        self.result_text.insert("end", "=" * 50 + "\n")
+        for license_type, key in keys.items():
+            self.result_text.insert("end", f"{license_type:<14} {key}\n")
+        self.result_text.insert("end", "=" * 50 + "\n")
+        self.result_text.insert("end", "💡 عند الترقية يكفي إرسال مفتاح النوع الجديد للعميل\n")
+        self.generated_key.set(keys[self.license_type.get()])
+        self.update_status("تم توليد مفاتيح جميع الأنواع")
+    
+    def generate_via_service(self):
+        """توليد المفتاح عبر الخدمة المحلية"""
+        try:
+            result = self.service.generate(
+                self.device_id.get(),
+                self.license_type.get(),
+                self.region.get()
+            )
+        except (OSError, RuntimeError) as e:
+            self.update_status("فشل الاتصال بالخدمة")
+            self.result_text.insert("1.0", f"❌ فشل الاتصال بخدمة التوليد ({self.service.url}):\n{str(e)}\n")
+            return
+        
+        key = result['license_key']
+        self.generated_key.set(key)
+        self.results.append(result['device_id'], key, result['license_type'], result['region'])
+        self.update_status("تم توليد المفتاح بنجاح!")
+        self.result_text.insert("1.0", "✅ تم توليد مفتاح الترخيص بنجاح!\n\n")
+        self.result_text.insert("end", f"🔑 المفتاح: {key}\n")
+        self.result_text.insert("end", f"💻 معرف الجهاز: {result['device_id']}\n")
+        self.result_text.insert("end", f"📋 نوع الترخيص: {result['license_type']}\n")
+        self.result_text.insert("end", f"🌍 المنطقة: {result['region']}\n")
+        self.result_text.insert("end", f"🛰️ الخدمة: {self.service.url}\n")
+    
+    def generate_batch(self):
+        """توليد مفاتيح لملف معرفات أجهزة"""
+        file_path = filedialog.askopenfilename(
+            title="اختر ملف معرفات الأجهزة",
+            filetypes=[("Text files", "*.txt"), ("CSV files", "*.csv"), ("All files", "*.*")]
+        )
+        if not file_path:
+            return
+        
+        self.update_status("جاري توليد الدفعة...")
+        
+        def batch_thread():
+            with license_trace.job("generate_batch", "gui", path=os.path.basename(file_path),
+                                   license_type=self.license_type.get(), region=self.region.get()):
+                batch()
+        
+        def batch():
+            try:
+                device_ids, errors = read_device_ids(file_path)
+                ledger = LicenseLedger(ledger_path(self.project_path.get()))
+                bloom = self.get_bloom()
+                with self._open_lock:
+                    # إصابات الفلتر تُؤكد من الفهرس بعد مزامنته داخل find_issued؛ يُعاد فتحه عند الحاجة
+                    self._release_index()
+                    device_ids, issued, duplicates = split_new_devices(
+                        device_ids, bloom, None, ledger.path
+                    )
+                start = len(self.results)
+                if self.service is not None:
+                    # الخدمة تسجل المفاتيح في سجلها
+                    response = self.service.batch(device_ids, self.license_type.get(), self.region.get())
+                    for item in response['results']:
+                        self.results.append(
+                            item['device_id'], item['license_key'],
+                            response['license_type'], response['region']
+                        )
+                else:
+                    run_batch(device_ids, self.license_type.get(), self.region.get(), store=self.results)
+                    ledger.append_store(self.results, start)
+                    bloom.sync()
+                    self.sync_rollups()
+                with license_trace.span("show_batch_results", "ui"):
+                    self.show_batch_results(start, errors, issued, duplicates)
+                    self.update_status(f"تم توليد {len(self.results) - start} مفتاح بنجاح!")
+            except Exception as e:
+                self.update_status(f"خطأ: {str(e)}")
+                self.result_text.insert("1.0", f"❌ خطأ في توليد الدفعة: {str(e)}\n")
+        
+        thread = threading.Thread(target=batch_thread, name="batch")
+        thread.daemon = True
+        thread.start()
+    
+    def show_batch_results(self, start, errors, issued=(), duplicates=0, preview=20):
+        """عرض ملخص الدفعة ومعاينة لآخر النتائج من المخزن"""
+        generated = len(self.results) - start
+        self.result_text.delete("1.0", "end")
+        self.result_text.insert("end", f"✅ تم توليد {generated} مفتاح\n")
+        if errors:
+            self.result_text.insert("end", f"⚠️ أسطر غير صالحة: {len(errors)}\n")
+        if duplicates:
+            self.result_text.insert("end", f"ℹ️ معرفات مكررة داخل الملف: {duplicates}\n")
+        if issued:
+            self.result_text.insert("end", f"ℹ️ أجهزة صدر لها مفتاح مسبقاً (تم تخطيها): {len(issued)}\n")
+        self.result_text.insert("end", f"📊 إجمالي النتائج: {len(self.results)}\n\n")
+        for row in self.results.tail(min(preview, generated)):
+            self.result_text.insert(
+                "end", f"{row.device_id}  {row.license_key}  {row.license_type}  {row.region}\n"
+            )
+        if generated > preview:
+            self.result_text.insert("end", f"... و {generated - preview} نتيجة أخرى\n")
+        if generated:
+            self.generated_key.set(self.results[-1].license_key)
+    
+    def show_dashboard(self):
+        """نافذة إحصاءات الإصدار (من جداول الإحصاءات المجمعة دون قراءة السجل)"""
+        window = ctk.CTkToplevel(self.root)
+        window.title("📊 إحصاءات الإصدار")
+        window.geometry("640x520")
+        window.transient(self.root)
+        
+        summary_label = ctk.CTkLabel(
+            window,
+            text="⏳ جاري تحديث الإحصاءات...",
+            font=ctk.CTkFont(size=14, weight="bold")
+        )
+        summary_label.pack(fill="x", padx=15, pady=(15, 10))
+        
+        notebook = ttk.Notebook(window)
+        notebook.pack(fill="both", expand=True, padx=15, pady=(0, 10))
+        
+        # (البعد، عنوان التبويب، عنوان العمود، الحد الأقصى للصفوف)
+        tabs = [
+            ("day", "حسب اليوم", "اليوم", 60),
+            ("month", "حسب الشهر", "الشهر", None),
+            ("operator", "حسب المشغل", "المشغل", None),
+            ("type", "حسب النوع", "نوع الترخيص", None),
+            ("region", "حسب المنطقة", "المنطقة", None),
+        ]
+        trees = {}
+        for dimension, title, heading, _ in tabs:
+            frame = ttk.Frame(notebook)
+            tree = ttk.Treeview(frame, columns=("value", "keys"), show="headings")
+            tree.heading("value", text=heading)
+            tree.heading("keys", text="عدد المفاتيح")
+            tree.column("keys", anchor="e", width=120)
+            scrollbar = ttk.Scrollbar(frame, orient="vertical", command=tree.yview)
+            tree.configure(yscrollcommand=scrollbar.set)
+            scrollbar.pack(side="right", fill="y")
+            tree.pack(fill="both", expand=True)
+            notebook.add(frame, text=title)
+            trees[dimension] = tree
+        
+        def show(summary, reports, elapsed_ms):
+            if not window.winfo_exists():
+                return
+            summary_label.configure(
+                text=f"الإجمالي: {summary['total']}  |  اليوم: {summary['today']}  |  "
+                     f"آخر 7 أيام: {summary['last_7_days']}  |  آخر 30 يوماً: {summary['last_30_days']}"
+            )
+            for dimension, rows in reports.items():
+                tree = trees[dimension]
+                tree.delete(*tree.get_children())
+                for value, keys in rows:
+                    tree.insert("", "end", values=(value or "-", keys))
+            self.update_status(f"تم تحديث الإحصاءات ({elapsed_ms:.1f} ms)")
+        
+        def load():
+            started = datetime.now()
+            try:
+                with license_trace.span("dashboard", "ui"):
+                    rollups = self.get_rollups()
+                    with self._open_lock:
+                        summary = rollups.summary()
+                        reports = {dimension: rollups.report(dimension, limit=limit)
+                                   for dimension, _, _, limit in tabs}
+            except (OSError, sqlite3.Error) as e:
+                self.root.after(0, lambda error=e: summary_label.configure(text=f"❌ خطأ: {error}"))
+                return
+            elapsed_ms = (datetime.now() - started).total_seconds() * 1000
+            self.root.after(0, lambda: show(summary, reports, elapsed_ms))
+        
+        def refresh():
+            summary_label.configure(text="⏳ جاري تحديث الإحصاءات...")
+            threading.Thread(target=load, name="dashboard", daemon=True).start()
+        
+        refresh_btn = ctk.CTkButton(
+            window,
+            text="🔄 تحديث",
+            command=refresh,
+            height=35,
+            font=ctk.CTkFont(size=14, weight="bold")
+        )
+        refresh_btn.pack(pady=(0, 15))
+        refresh()
+    
     def copy_license_key(self):
         """نسخ مفتاح الترخيص إلى الحافظة"""
         if self.generated_key.get():
@@ -451,50 +858,75 @@ class LicenseGeneratorGUI:
             messagebox.showwarning("تحذير", "لا يوجد مفتاح للنسخ")
     
     def save_results(self):
-        """حفظ النتائج في ملف"""
-        if not self.result_text.get("1.0", "end").strip():
+        """تصدير النتائج من المخزن (CSV / JSONL / gzip / حزمة لكل جهاز)"""
+        if not len(self.results):
             messagebox.showwarning("تحذير", "لا توجد نتائج للحفظ")
             return
+        if self._exporting:
+            messagebox.showwarning("تحذير", "جاري تصدير النتائج حالياً")
+            return
         
         # اختيار مكان الحفظ
         file_path = filedialog.asksaveasfilename(
             title="حفظ النتائج",
-            defaultextension=".txt",
-            filetypes=[("Text files", "*.txt"), ("All files", "*.*")],
-            initialname=f"license_result_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
+            defaultextension=".csv",
+            filetypes=[(label, f"*.{fmt}") for fmt, label in EXPORT_FORMATS.items()],
+            initialfile=f"license_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
         )
+        if not file_path:
+            return
         
-        if file_path:
-            try:
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write("DentaDesk License Generator Results\n")
-                    f.write("=" * 50 + "\n\n")
-                    f.write(f"تاريخ التوليد: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                    f.write(f"معرف الجهاز: {self.device_id.get()}\n")
-                    f.write(f"نوع الترخيص: {self.license_type.get()}\n")
-                    f.write(f"المنطقة: {self.region.get()}\n")
-                    f.write(f"مسار المشروع: {self.project_path.get()}\n\n")
-                    f.write("النتائج:\n")
-                    f.write("-" * 30 + "\n")
-                    f.write(self.result_text.get("1.0", "end"))
-                
-                self.update_status(f"تم حفظ النتائج في: {file_path}")
+        total = len(self.results)
+        self._exporting = True
+        # خيط التصدير يقرأ المخزن - لا يُمسح حتى ينتهي
+        self.clear_btn.configure(state="disabled")
+        self.progress_bar.set(0)
+        self.progress_bar.pack(fill="x", padx=20, pady=(0, 5), before=self.status_label)
+        self.update_status(f"جاري تصدير {total} نتيجة...")
+        
+        def show_progress(done):
+            self.root.after(0, lambda: self.progress_bar.set(done / total))
+        
+        def finish(message, error=None):
+            self._exporting = False
+            self.clear_btn.configure(state="normal")
+            self.progress_bar.pack_forget()
+            self.update_status(message)
+            if error:
+                messagebox.showerror("خطأ", f"فشل في حفظ الملف:\n{error}")
+            else:
                 messagebox.showinfo("نجح", f"تم حفظ النتائج في:\n{file_path}")
+        
+        def export_thread():
+            try:
+                count = export_store(self.results, file_path, stop=total, progress=show_progress)
             except Exception as e:
-                messagebox.showerror("خطأ", f"فشل في حفظ الملف:\n{str(e)}")
+                self.root.after(0, lambda error=e: finish(f"خطأ: {error}", error))
+            else:
+                self.root.after(0, lambda: finish(f"تم حفظ {count} نتيجة في: {file_path}"))
+        
+        thread = threading.Thread(target=export_thread, name="export")
+        thread.daemon = True
+        thread.start()
     
     def clear_data(self):
         """مسح جميع البيانات"""
+        if self._exporting:
+            messagebox.showwarning("تحذير", "لا يمكن المسح أثناء تصدير النتائج")
+            return
         self.device_id.set("")
         self.license_type.set("STANDARD")
         self.region.set("GLOBAL")
         self.generated_key.set("")
         self.result_text.delete("1.0", "end")
+        self.results.clear()
         self.update_status("تم مسح البيانات")
     
     def run(self):
         """تشغيل الواجهة"""
         self.root.mainloop()
+        if self.trace_path:
+            license_trace.disable().export(self.trace_path)
 
 def main():
     """الدالة الرئيسية"""
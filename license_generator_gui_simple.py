@@ -14,6 +14,10 @@ import json
 import threading
 from datetime import datetime
 
+from license_node import NodeLauncher
+import license_trace
+from license_warmup import Warmup, node_steps
+
 class LicenseGeneratorGUI:
     def __init__(self):
         self.root = tk.Tk()
@@ -40,6 +44,13 @@ class LicenseGeneratorGUI:
         self.device_id = tk.StringVar()
         self.generated_key = tk.StringVar()
         
+        # مشغل Node.js (يُنشأ عند أول توليد)
+        self.node = None
+        
+        # تتبع زمني اختياري (DENTADESK_TRACE=path) يُحفظ عند إغلاق النافذة
+        self.trace_path = license_trace.enable_from_env()
+        self.warmup = None
+        
         # إعداد الخطوط
         self.setup_fonts()
         
@@ -58,6 +69,9 @@ class LicenseGeneratorGUI:
         # منع تغيير الحجم (اختياري)
         self.root.resizable(True, True)
         
+        # التجهيز يبدأ بعد ظهور النافذة (after لا يُنفذ قبل mainloop)
+        self.root.after(100, self.start_warmup)
+        
     def setup_fonts(self):
         """إعداد الخطوط"""
         self.title_font = font.Font(family="Segoe UI", size=28, weight="bold")
@@ -138,6 +152,17 @@ class LicenseGeneratorGUI:
         )
         self.status_label.pack()
         
+        # مؤشر تجهيز المولد في الخلفية
+        self.ready_label = tk.Label(
+            status_frame,
+            text="⏳ جاري تجهيز المولد...",
+            font=font.Font(family="Segoe UI", size=9),
+            bg='#e0f2fe',
+            fg='#64748b',
+            pady=2
+        )
+        self.ready_label.pack()
+        
     def create_device_id_frame(self, parent):
         """إنشاء إطار معرف الجهاز"""
         # إطار خارجي للتوسيط
@@ -375,6 +400,32 @@ class LicenseGeneratorGUI:
         except ValueError:
             return False
     
+    def get_project_path(self):
+        """مسار المشروع: مجلد البرنامج (EXE) أو مجلد هذا الملف"""
+        if getattr(sys, 'frozen', False):
+            # Running as compiled exe
+            return os.path.dirname(sys.executable)
+        # Running as script
+        return os.path.dirname(os.path.abspath(__file__))
+    
+    def get_node_launcher(self):
+        """مشغل Node.js (يُنشأ مرة واحدة ويشترك فيه التجهيز والتوليد)"""
+        project_path = self.get_project_path()
+        if self.node is None or self.node.project_path != project_path:
+            self.node = NodeLauncher(project_path)
+        return self.node
+    
+    def start_warmup(self):
+        """تجهيز Node.js في الخلفية بعد ظهور النافذة"""
+        def show(text):
+            self.root.after(0, lambda: self.ready_label.config(text=text))
+        
+        self.warmup = Warmup(
+            node_steps(self.get_node_launcher()),
+            on_step=lambda label: show(f"⏳ {label}..."),
+            on_done=lambda warmup: show(warmup.summary())
+        ).start()
+    
     def update_status(self, message):
         """تحديث شريط الحالة"""
         self.status_label.config(text=message)
@@ -396,16 +447,12 @@ class LicenseGeneratorGUI:
         self.update_status("Generating license key...")
         
         def generate_thread():
+            with license_trace.job("generate_license_key", "gui"):
+                generate()
+        
+        def generate():
             try:
-                # استخدام مسار المشروع الحالي
-                # إذا كان التطبيق EXE، استخدم المجلد الحالي
-                if getattr(sys, 'frozen', False):
-                    # Running as compiled exe
-                    project_path = os.path.dirname(sys.executable)
-                else:
-                    # Running as script
-                    project_path = os.path.dirname(os.path.abspath(__file__))
-                
+                project_path = self.get_project_path()
                 script_path = os.path.join(project_path, "scripts", "generateKeyForDevice.js")
                 
                 if not os.path.exists(script_path):
@@ -418,37 +465,31 @@ class LicenseGeneratorGUI:
                     return
                 
                 # استخدام قيم افتراضية
-                cmd = [
-                    "node",
-                    script_path,
+                process = self.get_node_launcher().run_generator(
                     self.device_id.get(),
                     "STANDARD",  # نوع الترخيص الافتراضي
                     "GLOBAL"     # المنطقة الافتراضية
-                ]
-                
-                process = subprocess.run(
-                    cmd,
-                    cwd=project_path,
-                    capture_output=True,
-                    text=True,
-                    encoding='utf-8'
                 )
                 
                 if process.returncode == 0:
                     self.update_status("License key generated successfully!")
                     
                     # استخراج المفتاح من النتائج
-                    lines = process.stdout.split('\n')
-                    for line in lines:
-                        if ':' in line and len(line.split(':')[-1].strip()) > 10:
-                            key = line.split(':')[-1].strip()
-                            if '-' in key and len(key) > 15:
-                                self.generated_key.set(key)
-                                messagebox.showinfo(
-                                    "Success!",
-                                    f"License key generated successfully!\n\nKey: {key}"
-                                )
-                                break
+                    with license_trace.span("parse_output", "parse"):
+                        key = None
+                        for line in process.stdout.split('\n'):
+                            if ':' in line and len(line.split(':')[-1].strip()) > 10:
+                                candidate = line.split(':')[-1].strip()
+                                if '-' in candidate and len(candidate) > 15:
+                                    key = candidate
+                                    break
+                    if key:
+                        with license_trace.span("show_key", "ui"):
+                            self.generated_key.set(key)
+                        messagebox.showinfo(
+                            "Success!",
+                            f"License key generated successfully!\n\nKey: {key}"
+                        )
                 else:
                     self.update_status("Failed to generate key")
                     messagebox.showerror("Error", f"Failed to generate key:\n{process.stderr}")
@@ -463,7 +504,7 @@ class LicenseGeneratorGUI:
                 self.update_status(f"Error: {str(e)}")
                 messagebox.showerror("Error", f"Unexpected error:\n{str(e)}")
         
-        thread = threading.Thread(target=generate_thread)
+        thread = threading.Thread(target=generate_thread, name="generate")
         thread.daemon = True
         thread.start()
     
@@ -496,6 +537,8 @@ class LicenseGeneratorGUI:
     def run(self):
         """تشغيل الواجهة"""
         self.root.mainloop()
+        if self.trace_path:
+            license_trace.disable().export(self.trace_path)
 
 def main():
     """الدالة الرئيسية"""
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DentaDesk Issued License Index
+فهرس ثنائي مرتب للمفاتيح الصادرة يُفتح عبر mmap للبحث الفوري
+
+تنسيق الملف:
+    الترويسة  : magic(8) version(2) record_size(2) bucket_bits(4) count(8) ledger_offset(8)
+    الجدول    : (2^16 + 1) إزاحة uint64 - بداية كل مجموعة حسب أول بايتين من المعرف
+    السجلات   : سجلات ثابتة الطول مرتبة (معرف الجهاز، وقت الإصدار، المفتاح)
+
+ledger_offset هو عدد بايتات سجل المفاتيح الصادرة الموجودة في الفهرس، فيضيف sync_index
+ما كُتب في السجل بعده فقط (مثل فلتر Bloom) بدلاً من إعادة البناء.
+"""
+
+import bisect
+import csv
+import heapq
+import mmap
+import os
+import struct
+import tempfile
+from collections import namedtuple
+
+from license_keys import LICENSE_TYPES, REGIONS, compact_key, format_key
+from license_ledger import data_dir, iter_records, read_ledger_chunk
+from license_store import type_code, region_code
+
+INDEX_NAME = "issued.idx"
+MAGIC = b'DDLIDX01'
+VERSION = 2
+BUCKET_BITS = 16
+
+HEADER = struct.Struct('<8sHHIQQ')
+# big-endian لوقت الإصدار حتى يطابق ترتيب البايتات الترتيب الزمني
+RECORD = struct.Struct('>16sI20sBB')
+OFFSET = struct.Struct('<Q')
+
+BUCKET_COUNT = 1 << BUCKET_BITS
+TABLE_OFFSET = HEADER.size
+RECORDS_OFFSET = TABLE_OFFSET + (BUCKET_COUNT + 1) * OFFSET.size
+
+IndexRecord = namedtuple(
+    'IndexRecord', ['device_id', 'license_key', 'license_type', 'region', 'issued_at']
+)
+
+
+def index_path(project_path=None):
+    """مسار ملف الفهرس"""
+    return os.path.join(data_dir(project_path), INDEX_NAME)
+
+
+def index_path_for_ledger(ledger):
+    """مسار الفهرس الذي يتبع سجلاً (بجانبه، مثل فلتر Bloom)"""
+    return os.path.join(os.path.dirname(os.path.abspath(ledger)), INDEX_NAME)
+
+
+def pack_record(record):
+    """تحويل سجل (dict) إلى سجل ثنائي ثابت الطول"""
+    device = bytes.fromhex(record['device_id'])
+    key = compact_key(record['license_key']).upper().encode('ascii')
+    if len(device) != 16 or len(key) != 20:
+        raise ValueError(f"سجل غير صالح: {record['device_id']}")
+    return RECORD.pack(
+        device, int(record['issued_at']), key,
+        type_code(record['license_type']), region_code(record['region'])
+    )
+
+
+def unpack_record(buffer, offset=0):
+    """تحويل سجل ثنائي إلى IndexRecord"""
+    device, issued_at, key, type_index, region_index = RECORD.unpack_from(buffer, offset)
+    return IndexRecord(
+        device.hex(), format_key(key.decode('ascii')),
+        LICENSE_TYPES[type_index], REGIONS[region_index], issued_at
+    )
+
+
+def _write_run(records, directory):
+    """حفظ مجموعة مرتبة في ملف مؤقت (للفرز الخارجي)"""
+    fd, path = tempfile.mkstemp(prefix='run-', suffix='.tmp', dir=directory)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(b''.join(records))
+    return path
+
+
+def _read_run(path, buffer_size=1 << 20):
+    """قراءة سجلات ملف مؤقت بالتتابع"""
+    size = RECORD.size
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(size * (buffer_size // size))
+            if not block:
+                break
+            for offset in range(0, len(block), size):
+                yield block[offset:offset + size]
+
+
+def build_index(sources, output=None, chunk_rows=1000000, ledger=None):
+    """بناء الفهرس من ملفات السجلات في مرور واحد متدفق (فرز خارجي)
+
+    ledger: السجل الذي سيُحدّث منه الفهرس لاحقاً (إن كان ضمن sources).
+    تعيد إحصائيات البناء: عدد السجلات والمكرر والمرفوض.
+    """
+    output = output or index_path()
+    # ما يُضاف للسجل أثناء البناء يُدمج مرة أخرى في التحديث التالي (والمكرر يُتجاهل)
+    ledger_offset = os.path.getsize(ledger) if ledger and os.path.exists(ledger) else 0
+    directory = os.path.dirname(os.path.abspath(output))
+    os.makedirs(directory, exist_ok=True)
+
+    stats = {'records': 0, 'duplicates': 0, 'rejected': 0}
+    runs = []
+    chunk = []
+    try:
+        for source in sources:
+            for record in iter_records(source):
+                try:
+                    chunk.append(pack_record(record))
+                except (ValueError, KeyError):
+                    stats['rejected'] += 1
+                    continue
+                if len(chunk) >= chunk_rows:
+                    chunk.sort()
+                    runs.append(_write_run(chunk, directory))
+                    chunk = []
+        chunk.sort()
+
+        merged = heapq.merge(chunk, *[_read_run(path) for path in runs])
+        _write_index(merged, output, stats, ledger_offset)
+    finally:
+        for path in runs:
+            os.remove(path)
+    return stats
+
+
+def _write_header(f, counts, count, ledger_offset):
+    """كتابة الترويسة وجدول المجموعات (بعد كتابة السجلات)"""
+    table = bytearray((BUCKET_COUNT + 1) * OFFSET.size)
+    position = 0
+    for bucket, bucket_count in enumerate(counts):
+        OFFSET.pack_into(table, bucket * OFFSET.size, position)
+        position += bucket_count
+    OFFSET.pack_into(table, BUCKET_COUNT * OFFSET.size, position)
+
+    f.seek(0)
+    f.write(HEADER.pack(MAGIC, VERSION, RECORD.size, BUCKET_BITS, count, ledger_offset))
+    f.write(table)
+
+
+def _replace_index(output, write, release=None):
+    """كتابة الفهرس في ملف مؤقت عبر write(f) ثم استبداله بشكل ذري
+
+    release: لإغلاق الفهرس القديم قبل الاستبدال (Windows لا يستبدل ملفاً مفتوحاً عبر mmap).
+    """
+    directory = os.path.dirname(os.path.abspath(output))
+    fd, tmp_path = tempfile.mkstemp(prefix='index-', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            result = write(f)
+        if release is not None:
+            release()
+        os.replace(tmp_path, output)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return result
+
+
+def _write_index(records, output, stats, ledger_offset=0):
+    """كتابة السجلات المرتبة ثم الترويسة والجدول"""
+    def write(f):
+        counts = [0] * BUCKET_COUNT
+        f.seek(RECORDS_OFFSET)
+        previous = None
+        count = 0
+        for record in records:
+            if record == previous:
+                stats['duplicates'] += 1
+                continue
+            previous = record
+            counts[int.from_bytes(record[:2], 'big')] += 1
+            f.write(record)
+            count += 1
+        _write_header(f, counts, count, ledger_offset)
+        return count
+
+    stats['records'] = _replace_index(output, write)
+
+
+class _DeviceColumn:
+    """عرض لعمود معرفات الأجهزة داخل mmap (لاستخدامه مع bisect)"""
+
+    __slots__ = ('_mm', '_count')
+    width = 16
+
+    def __init__(self, mm, count):
+        self._mm = mm
+        self._count = count
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        offset = RECORDS_OFFSET + index * RECORD.size
+        return self._mm[offset:offset + self.width]
+
+
+class _RecordColumn(_DeviceColumn):
+    """عرض للسجلات الكاملة داخل mmap (ترتيب الملف)"""
+
+    __slots__ = ()
+    width = RECORD.size
+
+
+class LicenseIndex:
+    """قارئ الفهرس - فتح O(1) وبحث O(log n) بدون تحميل الملف"""
+
+    def __init__(self, path=None):
+        self.path = path or index_path()
+        self._file = open(self.path, 'rb')
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, record_size, bucket_bits, count, ledger_offset = HEADER.unpack_from(self._mm, 0)
+            if magic != MAGIC or version != VERSION or record_size != RECORD.size \
+                    or bucket_bits != BUCKET_BITS:
+                raise ValueError(f"ملف فهرس غير صالح أو بإصدار قديم (أعد بنائه بالأمر build-index): {self.path}")
+        except BaseException:
+            self._file.close()
+            raise
+        self.count = count
+        self.ledger_offset = ledger_offset
+        self._devices = _DeviceColumn(self._mm, count)
+
+    def __len__(self):
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """إغلاق الفهرس"""
+        self._mm.close()
+        self._file.close()
+
+    def _bucket(self, device):
+        bucket = int.from_bytes(device[:2], 'big')
+        offset = TABLE_OFFSET + bucket * OFFSET.size
+        lo = OFFSET.unpack_from(self._mm, offset)[0]
+        hi = OFFSET.unpack_from(self._mm, offset + OFFSET.size)[0]
+        return lo, hi
+
+    def lookup(self, device_id):
+        """جميع المفاتيح الصادرة لجهاز (مرتبة زمنياً)"""
+        try:
+            device = bytes.fromhex(device_id)
+        except ValueError:
+            return []
+        if len(device) != 16:
+            return []
+        lo, hi = self._bucket(device)
+        index = bisect.bisect_left(self._devices, device, lo, hi)
+        results = []
+        while index < hi and self._devices[index] == device:
+            results.append(unpack_record(self._mm, RECORDS_OFFSET + index * RECORD.size))
+            index += 1
+        return results
+
+    def latest(self, device_id, license_type=None):
+        """آخر مفتاح صادر للجهاز (اختيارياً لنوع ترخيص محدد)"""
+        for record in reversed(self.lookup(device_id)):
+            if license_type is None or record.license_type == license_type:
+                return record
+        return None
+
+    def __contains__(self, device_id):
+        return bool(self.lookup(device_id))
+
+
+def open_index(path=None):
+    """فتح الفهرس إن وُجد (وإلا None)"""
+    path = path or index_path()
+    if not os.path.exists(path):
+        return None
+    return LicenseIndex(path)
+
+
+def _merge_index(index, records, output, ledger_offset):
+    """فهرس جديد = سجلات index + records (سجلات ثنائية)، بنسخ ما بين مواضع الإدراج كتلاً
+
+    كل سجل جديد يُحدد موضعه بـ bisect، فالتكلفة O(k log n) للسجلات الجديدة
+    ونسخ بايتات الفهرس القديم مرة واحدة بدلاً من إعادة الفرز الكامل.
+    """
+    records = sorted(set(records))
+    mm = index._mm
+    column = _RecordColumn(mm, index.count)
+    table = struct.unpack_from(f'<{BUCKET_COUNT + 1}Q', mm, TABLE_OFFSET)
+    counts = [table[bucket + 1] - table[bucket] for bucket in range(BUCKET_COUNT)]
+    size = RECORD.size
+
+    def write(f):
+        f.seek(RECORDS_OFFSET)
+        position = 0
+        added = 0
+        for record in records:
+            at = bisect.bisect_left(column, record, position)
+            if at < index.count and column[at] == record:
+                continue
+            f.write(mm[RECORDS_OFFSET + position * size:RECORDS_OFFSET + at * size])
+            f.write(record)
+            counts[int.from_bytes(record[:2], 'big')] += 1
+            position = at
+            added += 1
+        f.write(mm[RECORDS_OFFSET + position * size:RECORDS_OFFSET + index.count * size])
+        _write_header(f, counts, index.count + added, ledger_offset)
+        return added
+
+    return _replace_index(output, write, release=index.close)
+
+
+def sync_index(ledger, path=None):
+    """إضافة ما كُتب في السجل منذ آخر تحديث للفهرس؛ تعيد عدد السجلات المضافة
+
+    الفهرس غير الموجود (أو التالف، أو الأحدث من السجل) يُبنى من السجل كاملاً.
+    """
+    path = path or index_path_for_ledger(ledger)
+    try:
+        size = os.path.getsize(ledger)
+    except OSError:
+        return 0
+    try:
+        index = LicenseIndex(path)
+    except (OSError, ValueError):
+        index = None
+    if index is None or index.ledger_offset > size:
+        if index is not None:
+            index.close()
+        return build_index([ledger], path, ledger=ledger)['records']
+
+    with index:
+        offset = index.ledger_offset
+        records = []
+        while True:
+            text, end = read_ledger_chunk(ledger, offset)
+            if not text:
+                break
+            for fields in csv.reader(text.splitlines()):
+                if len(fields) < 5 or fields[0] == 'device_id' or not fields[0]:
+                    continue
+                try:
+                    records.append(pack_record({
+                        'device_id': fields[0], 'license_key': fields[1], 'license_type': fields[2],
+                        'region': fields[3], 'issued_at': int(float(fields[4] or 0)),
+                    }))
+                except (ValueError, KeyError):
+                    # نفس السجلات المرفوضة في build_index
+                    continue
+            offset = end
+        if offset == index.ledger_offset:
+            return 0
+        return _merge_index(index, records, path, offset)
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DentaDesk Bulk Device-ID Ingestion
+قراءة والتحقق من ملفات معرفات الأجهزة الضخمة دفعة واحدة
+
+يُقرأ الملف عبر mmap على أجزاء، ويتم التحقق من كل جزء كاملاً بعمليات
+البايتات (translate/split/count) بدلاً من التحقق من كل سطر في Python:
+    - إزالة BOM (UTF-8، وتحويل UTF-16 إن وُجد)
+    - تجاهل CRLF والمسافات في بداية ونهاية السطر والأسطر الفارغة
+    - تحويل المعرفات إلى أحرف صغيرة
+    - تقرير بالأسطر غير الصالحة (رقم السطر، النص، السبب)
+"""
+
+import codecs
+import csv
+import mmap
+import os
+import re
+
+from license_keys import DEVICE_ID_LENGTH
+import license_trace
+
+# أجزاء صغيرة نسبياً: السطر غير الصالح يُبطئ الجزء الذي يحتويه فقط
+CHUNK_BYTES = 256 * 1024
+
+# أقصى طول للنص المحفوظ في تقرير الأخطاء
+ERROR_TEXT_LIMIT = 80
+
+_LOWER_HEX_DIGITS = b'0123456789abcdef'
+_UPPER_HEX_DIGITS = b'ABCDEF'
+_EDGE_SPACE = re.compile(r'^[ \t\f\v]+|[ \t\f\v]+$', re.M)
+_NON_HEX = re.compile(r'[^0-9a-f\n]')
+_HEX_ONLY = re.compile(r'[0-9a-f]*')
+
+REASON_LENGTH = "wrong length"
+REASON_CHARACTERS = "non-hex characters"
+REASON_ENCODING = "invalid UTF-8"
+
+ERROR_HEADER = ['line', 'value', 'reason']
+
+
+def _describe_error(text):
+    """النص والسبب لسطر غير صالح"""
+    try:
+        text.encode('utf-8')
+    except UnicodeEncodeError:
+        # بايتات غير صالحة محفوظة كـ surrogateescape
+        text = text.encode('utf-8', 'surrogateescape').decode('utf-8', 'replace')
+        return text[:ERROR_TEXT_LIMIT], REASON_ENCODING
+    if not _HEX_ONLY.fullmatch(text):
+        return text[:ERROR_TEXT_LIMIT], REASON_CHARACTERS
+    return text[:ERROR_TEXT_LIMIT], REASON_LENGTH
+
+
+def _scan_chunk(data, first_line, device_ids, errors):
+    """التحقق من جزء ينتهي بنهاية سطر؛ تعيد عدد الأسطر فيه
+
+    كل العمليات على الجزء كاملاً (replace/translate/split/count) تتم في C؛
+    الحلقات في Python تمر فقط على الأسطر غير الصالحة أو الفارغة.
+    """
+    if b'\r' in data:
+        # CRLF (Windows) ثم CR وحده (Mac القديم) كنهاية سطر
+        data = data.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+    other = data.translate(None, _LOWER_HEX_DIGITS + b'\n')
+    has_other_bytes = bool(other.translate(None, _UPPER_HEX_DIGITS))
+
+    # المسار السريع: أسطر بطول ثابت (32 + سطر جديد) وأحرف hex فقط
+    width = DEVICE_ID_LENGTH + 1
+    count, remainder = divmod(len(data), width)
+    if (not has_other_bytes and not remainder and data[DEVICE_ID_LENGTH::width] == b'\n' * count
+            and data.count(b'\n') == count):
+        text = data.decode('ascii')
+        if other:
+            text = text.lower()
+        lines = text.split('\n')
+        lines.pop()
+        device_ids.extend(lines)
+        return count
+
+    text = data.decode('utf-8', 'surrogateescape')
+    if other:
+        text = text.lower()
+    if has_other_bytes and (' ' in text or '\t' in text or '\f' in text or '\v' in text):
+        text = _EDGE_SPACE.sub('', text)
+    lines = text.split('\n')
+    if text.endswith('\n'):
+        lines.pop()
+
+    # الأسطر بطول غير صحيح (ومنها الفارغة)
+    lengths = list(map(len, lines))
+    if lengths.count(DEVICE_ID_LENGTH) == len(lengths):
+        rejected = set()
+    else:
+        rejected = {i for i, length in enumerate(lengths) if length != DEVICE_ID_LENGTH}
+
+    # الأسطر التي تحتوي أحرفاً غير hex
+    if has_other_bytes:
+        line, position = 0, 0
+        for match in _NON_HEX.finditer(text):
+            line += text.count('\n', position, match.start())
+            position = match.start()
+            rejected.add(line)
+
+    if not rejected:
+        device_ids.extend(lines)
+        return len(lines)
+
+    previous = 0
+    for index in sorted(rejected):
+        device_ids.extend(lines[previous:index])
+        previous = index + 1
+        if lengths[index]:
+            text, reason = _describe_error(lines[index])
+            errors.append((first_line + index, text, reason))
+    device_ids.extend(lines[previous:])
+    return len(lines)
+
+
+def _iter_chunks(buffer, start, chunk_bytes):
+    """أجزاء من المخزن المؤقت تنتهي عند نهاية سطر"""
+    size = len(buffer)
+    while start < size:
+        end = min(start + chunk_bytes, size)
+        if end < size:
+            newline = buffer.rfind(b'\n', start, end)
+            if newline < 0:
+                # ملف بنهايات CR فقط: القطع بعد CR لا يليه LF داخل الجزء
+                newline = buffer.rfind(b'\r', start, end - 1)
+            if newline < 0:
+                # سطر أطول من الجزء بالكامل
+                newline = buffer.find(b'\n', end)
+                end = size if newline < 0 else newline + 1
+            else:
+                end = newline + 1
+        yield buffer[start:end]
+        start = end
+
+
+def _scan_buffer(buffer, chunk_bytes):
+    device_ids = []
+    errors = []
+    start = len(codecs.BOM_UTF8) if buffer[:3] == codecs.BOM_UTF8 else 0
+    line_no = 1
+    for chunk in _iter_chunks(buffer, start, chunk_bytes):
+        line_no += _scan_chunk(chunk, line_no, device_ids, errors)
+    return device_ids, errors
+
+
+@license_trace.traced("ingest_device_ids", "parse")
+def ingest_device_ids(path, chunk_bytes=CHUNK_BYTES):
+    """قراءة معرفات الأجهزة من ملف (معرف في كل سطر)
+
+    تعيد (المعرفات الصالحة بالترتيب، الأخطاء [(رقم السطر، النص، السبب)])
+    """
+    with open(path, 'rb') as f:
+        head = f.read(2)
+        if head in (codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE):
+            # ملفات UTF-16 (من Notepad مثلاً) تُحول مرة واحدة إلى UTF-8
+            f.seek(0)
+            return _scan_buffer(f.read().decode('utf-16').encode('utf-8'), chunk_bytes)
+        if os.fstat(f.fileno()).st_size == 0:
+            return [], []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            return _scan_buffer(buffer, chunk_bytes)
+
+
+def write_device_ids(device_ids, path):
+    """حفظ المعرفات الصالحة (معرف في كل سطر)"""
+    with open(path, 'w', encoding='utf-8', newline='\n') as f:
+        for start in range(0, len(device_ids), 100000):
+            f.write('\n'.join(device_ids[start:start + 100000]))
+            f.write('\n')
+    return len(device_ids)
+
+
+def write_error_report(errors, path):
+    """حفظ تقرير الأسطر غير الصالحة (CSV)"""
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(ERROR_HEADER)
+        writer.writerows(errors)
+    return len(errors)
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DentaDesk License Key Derivation
+اشتقاق مفاتيح الترخيص بنفس خوارزمية electron/deviceBoundLicenseGenerator.js
+"""
+
+import hashlib
+
+# نفس المفتاح الرئيسي المستخدم في DeviceBoundLicenseGenerator.masterKey
+MASTER_KEY = 'DENTAL_CLINIC_MASTER_KEY_2025_SECURE_ENCRYPTION'
+
+# قوائم الخيارات (بنفس ترتيب الواجهة - الترتيب يحدد رمز التخزين)
+LICENSE_TYPES = [
+    "STANDARD", "PROFESSIONAL", "ENTERPRISE",
+    "PREMIUM", "ULTIMATE"
+]
+
+REGIONS = [
+    "GLOBAL", "SAUDI", "UAE", "KUWAIT",
+    "QATAR", "BAHRAIN", "OMAN", "GCC", "MENA"
+]
+
+# مواضع أجزاء المفتاح داخل الـ hash (generateAlgorithmicKey)
+KEY_SLICES = ((0, 5), (8, 13), (16, 21), (24, 29))
+
+DEVICE_ID_LENGTH = 32
+KEY_LENGTH = 20
+
+_HEX_CHARS = frozenset("0123456789abcdefABCDEF")
+
+
+def validate_device_id(device_id):
+    """التحقق من صحة معرف الجهاز (32 حرف hex)"""
+    if not device_id or len(device_id) != DEVICE_ID_LENGTH:
+        return False
+    return _HEX_CHARS.issuperset(device_id)
+
+
+def normalize_device_id(device_id):
+    """توحيد معرف الجهاز (إزالة المسافات وتحويله لأحرف صغيرة)"""
+    return device_id.strip().lower()
+
+
+def generate_key(device_id, license_type="STANDARD", master_key=MASTER_KEY, slices=KEY_SLICES):
+    """توليد مفتاح الترخيص بصيغة XXXXX-XXXXX-XXXXX-XXXXX"""
+    seed = device_id + master_key + (license_type or "STANDARD")
+    base_hash = hashlib.sha256(seed.encode('utf-8')).hexdigest()
+    return '-'.join(base_hash[start:end] for start, end in slices).upper()
+
+
+def generate_all_tiers(device_id, license_types=LICENSE_TYPES, master_key=MASTER_KEY):
+    """توليد مفتاح لكل نوع ترخيص للجهاز في مرور واحد
+
+    الجزء المشترك (معرف الجهاز + المفتاح الرئيسي) يُحسب مرة واحدة
+    ثم تُنسخ حالة الـ hash لكل نوع.
+    """
+    prefix = hashlib.sha256((device_id + master_key).encode('utf-8'))
+    keys = {}
+    for license_type in license_types:
+        state = prefix.copy()
+        state.update(license_type.encode('utf-8'))
+        base_hash = state.hexdigest()
+        keys[license_type] = '-'.join(base_hash[start:end] for start, end in KEY_SLICES).upper()
+    return keys
+
+
+def compact_key(license_key):
+    """إزالة الشرطات من المفتاح (20 حرف)"""
+    return license_key.replace('-', '')
+
+
+def format_key(compact):
+    """إعادة الشرطات إلى المفتاح المضغوط"""
+    return '-'.join(compact[i:i + 5] for i in range(0, KEY_LENGTH, 5))
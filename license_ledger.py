@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DentaDesk Issued License Ledger
+سجل المفاتيح الصادرة (ملف CSV يُضاف إليه فقط)
+"""
+
+import csv
+import getpass
+import os
+import time
+
+import license_trace
+
+DATA_DIR_NAME = "license_data"
+LEDGER_NAME = "issued.csv"
+
+# أقصى حجم يُقرأ من السجل في كل مرة عند المزامنة التدريجية
+READ_CHUNK_BYTES = 8 * 1024 * 1024
+
+LEDGER_HEADER = [
+    'device_id', 'license_key', 'license_type', 'region',
+    'issued_at', 'customer', 'operator'
+]
+
+
+def data_dir(project_path=None):
+    """مجلد بيانات المولد داخل مسار المشروع"""
+    base = project_path or os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(base, DATA_DIR_NAME)
+
+
+def ledger_path(project_path=None):
+    """مسار سجل المفاتيح الصادرة"""
+    return os.path.join(data_dir(project_path), LEDGER_NAME)
+
+
+def default_operator():
+    """اسم المشغل الحالي"""
+    try:
+        return getpass.getuser()
+    except Exception:
+        return ""
+
+
+class LicenseLedger:
+    """سجل إلحاقي للمفاتيح الصادرة"""
+
+    def __init__(self, path=None):
+        self.path = path or ledger_path()
+
+    def _open_for_append(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        is_new = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        f = open(self.path, 'a', encoding='utf-8', newline='')
+        writer = csv.writer(f)
+        if is_new:
+            writer.writerow(LEDGER_HEADER)
+        return f, writer
+
+    @license_trace.traced("ledger.append", "write")
+    def append(self, device_id, license_key, license_type, region,
+               issued_at=None, customer="", operator=None):
+        """تسجيل مفتاح واحد"""
+        record = [
+            device_id, license_key, license_type, region,
+            int(issued_at if issued_at is not None else time.time()),
+            customer, default_operator() if operator is None else operator
+        ]
+        f, writer = self._open_for_append()
+        with f:
+            writer.writerow(record)
+        return record
+
+    def append_store(self, store, start=0, customer="", operator=None):
+        """تسجيل نتائج مخزن LicenseStore ابتداءً من الصف start"""
+        self.append_rows((store[index] for index in range(start, len(store))), customer, operator)
+
+    @license_trace.traced("ledger.append_rows", "write")
+    def append_rows(self, rows, customer="", operator=None):
+        """تسجيل صفوف (LicenseRow أو ما يشبهها) دفعة واحدة"""
+        if operator is None:
+            operator = default_operator()
+        f, writer = self._open_for_append()
+        with f:
+            for row in rows:
+                writer.writerow([
+                    row.device_id, row.license_key, row.license_type,
+                    row.region, row.issued_at, customer, operator
+                ])
+
+    def __iter__(self):
+        return iter_records(self.path)
+
+
+def read_ledger_chunk(path, offset=0, chunk_bytes=READ_CHUNK_BYTES):
+    """جزء من السجل يبدأ من offset وينتهي بنهاية سطر: (النص، موضع بداية الجزء التالي)
+
+    السطر الأخير غير المكتمل (ما زال يُكتب) لا يُقرأ، والنص فارغ إذا لم يبق سطر كامل.
+    """
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        data = f.read(chunk_bytes)
+        end = data.rfind(b'\n') + 1
+        while not end:
+            # سطر أطول من الجزء
+            block = f.read(chunk_bytes)
+            if not block:
+                return '', offset
+            data += block
+            end = data.rfind(b'\n') + 1
+    return data[:end].decode('utf-8-sig'), offset + end
+
+
+def iter_records(path):
+    """قراءة السجلات من ملف CSV (سجل أو ملف نتائج دفعة) بشكل متدفق"""
+    if not os.path.exists(path):
+        return
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        for record in csv.DictReader(f):
+            if not record.get('device_id') or not record.get('license_key'):
+                continue
+            record['issued_at'] = int(float(record.get('issued_at') or 0))
+            record['customer'] = record.get('customer') or ''
+            record['operator'] = record.get('operator') or ''
+            yield record
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DentaDesk Customer Activation Messages
+رسائل التفعيل للعملاء (عربي / إنجليزي) بدلاً من نسخ مخرجات generateKeyForDevice.js يدوياً
+
+    renderer = MessageRenderer(("ar", "en"))
+    text = renderer.render(device_id, license_key, "PREMIUM", "UAE", issued_at)
+    write_messages(rows, "messages.zip")     # حزمة واحدة
+    write_messages(rows, "messages")         # مجلد: ملف لكل جهاز
+
+الحقول المتاحة في القوالب:
+    {license_key} {device_id} {license_type} {region} {type_name} {region_name} {issued}
+
+يُحلل القالب مرة واحدة إلى نص تنسيق %، وتُدمج فيه قيم النوع والمنطقة والتاريخ مرة واحدة
+لكل مجموعة، فلا يبقى لكل رسالة إلا المفتاح ومعرف الجهاز.
+كل الأرقام بالصيغة الغربية (0-9) حتى في القوالب العربية، وتُعزل القيم اللاتينية داخل
+الأسطر العربية بعلامات العزل (LRI/PDI) حتى لا ينقلب ترتيبها. المفتاح لا يُعزل:
+يبقى في سطر مستقل في القوالب الافتراضية حتى يُنسخ كما هو.
+"""
+
+import itertools
+import os
+import string
+import time
+import zipfile
+
+from license_export import bundle_filename, unique_name
+import license_trace
+
+LANGUAGES = ("ar", "en")
+
+FIELDS = ('license_key', 'device_id', 'license_type', 'region', 'type_name', 'region_name', 'issued')
+
+# الحقول التي تختلف لكل رسالة (باقي الحقول ثابتة داخل مجموعة النوع/المنطقة/التاريخ)
+ROW_FIELDS = ('license_key', 'device_id')
+
+TEMPLATES = {
+    'ar': (
+        "مرحباً،\n\n"
+        "شكراً لاختيارك DentaDesk. هذا مفتاح الترخيص الخاص بجهازك:\n\n"
+        "🎯 {license_key}\n\n"
+        "📋 نوع الترخيص: {type_name}\n"
+        "🌍 المنطقة: {region_name}\n"
+        "💻 معرف الجهاز: {device_id}\n"
+        "📅 تاريخ الإصدار: {issued}\n\n"
+        "💡 ملاحظات:\n"
+        "   • هذا المفتاح يعمل على جهازك فقط\n"
+        "   • أدخل المفتاح في شاشة تفعيل الترخيص\n"
+        "   • الترخيص صالح مدى الحياة\n"
+        "   • لا يحتاج اتصال إنترنت للتفعيل\n"
+    ),
+    'en': (
+        "Hello,\n\n"
+        "Thank you for choosing DentaDesk. Here is the license key for your device:\n\n"
+        "🎯 {license_key}\n\n"
+        "📋 License type: {type_name}\n"
+        "🌍 Region: {region_name}\n"
+        "💻 Device ID: {device_id}\n"
+        "📅 Issued: {issued}\n\n"
+        "💡 Notes:\n"
+        "   • This key works on your device only\n"
+        "   • Enter the key in the license activation screen\n"
+        "   • The license is valid for life\n"
+        "   • No internet connection is needed to activate\n"
+    ),
+}
+
+TYPE_NAMES = {
+    'ar': {
+        "STANDARD": "ترخيص عادي", "PROFESSIONAL": "ترخيص احترافي", "ENTERPRISE": "ترخيص مؤسسي",
+        "PREMIUM": "ترخيص مميز", "ULTIMATE": "ترخيص شامل",
+    },
+    'en': {
+        "STANDARD": "Standard", "PROFESSIONAL": "Professional", "ENTERPRISE": "Enterprise",
+        "PREMIUM": "Premium", "ULTIMATE": "Ultimate",
+    },
+}
+
+REGION_NAMES = {
+    'ar': {
+        "GLOBAL": "عالمي", "SAUDI": "السعودية", "UAE": "الإمارات", "KUWAIT": "الكويت",
+        "QATAR": "قطر", "BAHRAIN": "البحرين", "OMAN": "عمان", "GCC": "دول الخليج",
+        "MENA": "الشرق الأوسط وشمال أفريقيا",
+    },
+    'en': {
+        "GLOBAL": "Global", "SAUDI": "Saudi Arabia", "UAE": "United Arab Emirates", "KUWAIT": "Kuwait",
+        "QATAR": "Qatar", "BAHRAIN": "Bahrain", "OMAN": "Oman", "GCC": "GCC",
+        "MENA": "Middle East & North Africa",
+    },
+}
+
+# اللغات التي تُكتب من اليمين لليسار
+RTL_LANGUAGES = frozenset({'ar'})
+
+# فاصل بين لغات الرسالة الواحدة
+LANGUAGE_SEPARATOR = "\n" + "-" * 50 + "\n\n"
+
+CHUNK_ROWS = 50000
+
+_LRI = "\u2066"
+_PDI = "\u2069"
+
+# الأرقام العربية الهندية والفارسية إلى 0-9
+_WESTERN_DIGITS = str.maketrans("٠١٢٣٤٥٦٧٨٩۰۱۲۳۴۵۶۷۸۹", "0123456789" * 2)
+
+
+def western_digits(text):
+    """تحويل الأرقام العربية (٠-٩) إلى الأرقام الغربية (0-9)"""
+    return text.translate(_WESTERN_DIGITS)
+
+
+def load_template(path):
+    """قراءة قالب من ملف نصي (UTF-8)"""
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        return f.read()
+
+
+class MessageTemplate:
+    """قالب رسالة بلغة واحدة يُحلل مرة واحدة"""
+
+    def __init__(self, text, language):
+        if language not in TYPE_NAMES:
+            raise ValueError(f"لغة غير مدعومة: {language} (المتاح: {', '.join(LANGUAGES)})")
+        self.language = language
+        self.rtl = language in RTL_LANGUAGES
+        self._parts = []
+        try:
+            parsed = list(string.Formatter().parse(western_digits(text)))
+        except ValueError as e:
+            raise ValueError(f"قالب غير صالح ({language}): {e}")
+        for literal, field, spec, conversion in parsed:
+            if field is not None:
+                if field not in FIELDS:
+                    raise ValueError(f"حقل غير معروف في القالب ({language}): {{{field}}} "
+                                     f"(المتاح: {', '.join(FIELDS)})")
+                if spec or conversion:
+                    raise ValueError(f"تنسيق الحقول غير مدعوم في القالب ({language}): {{{field}}}")
+            self._parts.append((literal, field))
+        self._bound = {}
+
+    def _isolate(self, field, value):
+        # المفتاح يبقى بدون علامات عزل حتى يُنسخ كما هو
+        if self.rtl and field != 'license_key':
+            return _LRI + value + _PDI
+        return value
+
+    def bind(self, license_type, region, issued):
+        """نص تنسيق % مع دمج القيم الثابتة؛ تعيد (النص، ترتيب حقول الصف)"""
+        key = (license_type, region, issued)
+        bound = self._bound.get(key)
+        if bound is not None:
+            return bound
+        constants = {
+            'license_type': self._isolate('license_type', license_type),
+            'region': self._isolate('region', region),
+            'type_name': TYPE_NAMES[self.language].get(license_type, license_type),
+            'region_name': REGION_NAMES[self.language].get(region, region),
+            'issued': self._isolate('issued', issued),
+        }
+        pieces = []
+        order = []
+        for literal, field in self._parts:
+            pieces.append(literal.replace('%', '%%'))
+            if field is None:
+                continue
+            if field in ROW_FIELDS:
+                pieces.append(self._isolate(field, '%s'))
+                order.append(field)
+            else:
+                pieces.append(constants[field].replace('%', '%%'))
+        bound = (''.join(pieces), tuple(order))
+        self._bound[key] = bound
+        return bound
+
+
+def _row_values(order, device_id, license_key):
+    return tuple(license_key if field == 'license_key' else device_id for field in order)
+
+
+class MessageRenderer:
+    """رسالة لكل جهاز بلغة أو أكثر (بالترتيب المطلوب في نفس الملف)"""
+
+    def __init__(self, languages=LANGUAGES, templates=None):
+        templates = templates or {}
+        languages = tuple(languages)
+        if not languages:
+            raise ValueError("يرجى تحديد لغة واحدة على الأقل")
+        unused = set(templates) - set(languages)
+        if unused:
+            raise ValueError(f"قالب للغة غير مطلوبة: {', '.join(sorted(unused))} (اللغات: {', '.join(languages)})")
+        self.languages = languages
+        self.templates = [MessageTemplate(templates.get(lang, TEMPLATES.get(lang, '')), lang)
+                          for lang in languages]
+        self._compiled = {}
+        self._dates = {}
+
+    def _issued(self, issued_at):
+        # صفوف الدفعة الواحدة تشترك في وقت الإصدار غالباً
+        issued = self._dates.get(issued_at)
+        if issued is None:
+            issued = time.strftime('%Y-%m-%d', time.localtime(issued_at))
+            self._dates[issued_at] = issued
+        return issued
+
+    def compile(self, license_type, region, issued_at):
+        """(نص تنسيق الرسالة كاملة، ترتيب حقول الصف، التكرار) لمجموعة نوع/منطقة/تاريخ
+
+        التكرار عدد مرات (المفتاح، المعرف) إذا كانت الحقول بهذا الترتيب (القوالب
+        الافتراضية)، فتُبنى قيم الرسالة بضرب tuple بدلاً من المرور على الحقول.
+        """
+        key = (license_type, region, issued_at)
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            issued = self._issued(issued_at)
+            formats = []
+            order = ()
+            for template in self.templates:
+                fmt, fields = template.bind(license_type, region, issued)
+                formats.append(fmt)
+                order += fields
+            repeat = len(order) // 2
+            if order != ROW_FIELDS * repeat:
+                repeat = None
+            compiled = (LANGUAGE_SEPARATOR.replace('%', '%%').join(formats), order, repeat)
+            self._compiled[key] = compiled
+        return compiled
+
+    def render(self, device_id, license_key, license_type, region, issued_at):
+        fmt, order, _ = self.compile(license_type, region, issued_at)
+        return fmt % _row_values(order, device_id, license_key)
+
+    def iter_messages(self, rows):
+        """(اسم الملف، وقت الإصدار، النص) لكل صف (device_id, license_key, license_type, region, issued_at)"""
+        compiled = self._compiled
+        for device_id, license_key, license_type, region, issued_at in rows:
+            entry = compiled.get((license_type, region, issued_at))
+            if entry is None:
+                entry = self.compile(license_type, region, issued_at)
+            fmt, order, repeat = entry
+            if repeat is not None:
+                text = fmt % ((license_key, device_id) * repeat)
+            else:
+                text = fmt % _row_values(order, device_id, license_key)
+            yield bundle_filename(device_id, license_type), issued_at, text
+
+
+def store_rows(store, chunk_rows=CHUNK_ROWS):
+    """صفوف LicenseStore كـ tuples (بدون إنشاء LicenseRow لكل صف)"""
+    return itertools.chain.from_iterable(store.iter_chunks(0, len(store), chunk_rows))
+
+
+def record_rows(records):
+    """صفوف من iter_records (السجل أو ملف نتائج دفعة)"""
+    for record in records:
+        yield (record['device_id'], record['license_key'], record['license_type'],
+               record['region'], record['issued_at'])
+
+
+def _write_zip(messages, path, progress):
+    count = 0
+    date_times = {}
+    names = {}
+    tmp_path = path + '.tmp'
+    try:
+        # رسائل بحجم ~1.2KB: الضغط يوفر نحو 40% من الحجم لكنه يضاعف زمن الكتابة
+        with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_STORED) as bundle:
+            for name, issued_at, text in messages:
+                date_time = date_times.get(issued_at)
+                if date_time is None:
+                    date_time = date_times[issued_at] = time.localtime(issued_at)[:6]
+                bundle.writestr(zipfile.ZipInfo(unique_name(name, names), date_time), text.encode('utf-8'))
+                count += 1
+                if progress and count % CHUNK_ROWS == 0:
+                    progress(count)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return count
+
+
+def _write_directory(messages, path, progress):
+    os.makedirs(path, exist_ok=True)
+    count = 0
+    names = {}
+    for name, _, text in messages:
+        with open(os.path.join(path, unique_name(name, names)), 'wb') as f:
+            f.write(text.encode('utf-8'))
+        count += 1
+        if progress and count % CHUNK_ROWS == 0:
+            progress(count)
+    return count
+
+
+@license_trace.traced("write_messages", "write")
+def write_messages(rows, path, languages=LANGUAGES, templates=None, progress=None):
+    """كتابة رسالة لكل صف إلى حزمة zip (إذا انتهى المسار بـ .zip) أو مجلد؛ تعيد عدد الرسائل
+
+    rows: tuples (device_id, license_key, license_type, region, issued_at)
+    """
+    renderer = MessageRenderer(languages, templates)
+    messages = renderer.iter_messages(rows)
+    if path.lower().endswith('.zip'):
+        count = _write_zip(messages, path, progress)
+    else:
+        count = _write_directory(messages, path, progress)
+    if progress and count % CHUNK_ROWS:
+        progress(count)
+    return count
+
+
+def parse_languages(value):
+    """'ar,en' -> ('ar', 'en')"""
+    languages = tuple(lang.strip().lower() for lang in value.split(',') if lang.strip())
+    for lang in languages:
+        if lang not in LANGUAGES:
+            raise ValueError(f"لغة غير مدعومة: {lang} (المتاح: {', '.join(LANGUAGES)})")
+    return languages
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DentaDesk Node.js Launcher
+تشغيل سكريبت توليد المفاتيح عبر Node.js مع ذاكرة تخزين مؤقت للترجمة
+
+معظم زمن كل استدعاء يذهب في إقلاع Node وترجمة الوحدات. على Node 22.1+
+يتم تفعيل NODE_COMPILE_CACHE في مجلد خاص يُعاد إنشاؤه تلقائياً عند تغيير
+السكريبتات أو إصدار Node. الإصدارات الأقدم تعمل بدونه بصمت.
+"""
+
+import hashlib
+import os
+import shutil
+import statistics
+import subprocess
+import time
+
+from license_ledger import data_dir
+import license_trace
+
+GENERATOR_SCRIPT = os.path.join("scripts", "generateKeyForDevice.js")
+
+# الملفات التي يترجمها Node عند كل استدعاء
+SCRIPT_FILES = [
+    GENERATOR_SCRIPT,
+    os.path.join("electron", "deviceBoundLicenseGenerator.js"),
+]
+
+NODE_CACHE_DIR_NAME = "node-cache"
+COMPILE_CACHE_MIN_VERSION = (22, 1)
+
+PROBE_DEVICE_ID = "40677b86a3f4d164d1d5e8f9a2b3c4d5"
+
+
+class NodeLauncher:
+    """تشغيل Node.js مع تسريع الإقلاع عند توفره"""
+
+    def __init__(self, project_path, node="node"):
+        self.project_path = project_path
+        self.node = node
+        self._node_path = None
+        self._version = None
+        self._cache_dir = None
+        self._fingerprint = None
+
+    @property
+    def script_path(self):
+        return os.path.join(self.project_path, GENERATOR_SCRIPT)
+
+    def node_path(self):
+        """مسار Node.js (يُحدد مرة واحدة)"""
+        if self._node_path is None:
+            path = shutil.which(self.node)
+            if path is None:
+                raise FileNotFoundError("Node.js غير مثبت أو غير موجود في PATH")
+            self._node_path = path
+        return self._node_path
+
+    def node_version(self):
+        """إصدار Node.js على شكل tuple (أو () إن تعذر)"""
+        if self._version is None:
+            try:
+                output = subprocess.run(
+                    [self.node_path(), "--version"],
+                    capture_output=True, text=True, timeout=10
+                ).stdout.strip().lstrip('v')
+                self._version = tuple(int(part) for part in output.split('.')[:2])
+            except (OSError, ValueError, subprocess.SubprocessError):
+                self._version = ()
+        return self._version
+
+    def supports_compile_cache(self):
+        """هل يدعم Node.js المثبت NODE_COMPILE_CACHE؟"""
+        return self.node_version() >= COMPILE_CACHE_MIN_VERSION
+
+    def script_fingerprint(self):
+        """بصمة السكريبتات وإصدار Node - تتغير عند أي تعديل"""
+        digest = hashlib.sha256(repr(self.node_version()).encode())
+        for name in SCRIPT_FILES:
+            try:
+                stat = os.stat(os.path.join(self.project_path, name))
+                digest.update(f"{name}|{stat.st_mtime_ns}|{stat.st_size}".encode())
+            except OSError:
+                digest.update(f"{name}|missing".encode())
+        return digest.hexdigest()[:16]
+
+    def cache_dir(self):
+        """مجلد ذاكرة الترجمة الحالي (وحذف المجلدات القديمة)"""
+        fingerprint = self.script_fingerprint()
+        if self._cache_dir is not None and fingerprint == self._fingerprint:
+            return self._cache_dir
+
+        root = os.path.join(data_dir(self.project_path), NODE_CACHE_DIR_NAME)
+        path = os.path.join(root, fingerprint)
+        try:
+            os.makedirs(path, exist_ok=True)
+            for name in os.listdir(root):
+                if name != fingerprint:
+                    shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+        except OSError:
+            return None
+        self._cache_dir = path
+        self._fingerprint = fingerprint
+        return path
+
+    def env(self, accelerate=True):
+        """متغيرات البيئة لتشغيل Node"""
+        env = os.environ.copy()
+        env.pop("NODE_COMPILE_CACHE", None)
+        if accelerate and self.supports_compile_cache():
+            cache = self.cache_dir()
+            if cache:
+                env["NODE_COMPILE_CACHE"] = cache
+        return env
+
+    def accelerator(self):
+        """اسم طريقة التسريع المستخدمة"""
+        if self.supports_compile_cache() and self.cache_dir():
+            return "compile-cache"
+        return "none"
+
+    @license_trace.traced("spawn", "node")
+    def run_generator(self, device_id, license_type="STANDARD", region="GLOBAL", accelerate=True):
+        """تشغيل generateKeyForDevice.js"""
+        return subprocess.run(
+            [self.node_path(), self.script_path, device_id, license_type, region],
+            cwd=self.project_path,
+            capture_output=True,
+            text=True,
+            encoding='utf-8',
+            env=self.env(accelerate)
+        )
+
+    def _time_run(self, accelerate):
+        started = time.perf_counter()
+        self.run_generator(PROBE_DEVICE_ID, accelerate=accelerate)
+        return (time.perf_counter() - started) * 1000
+
+    def measure_spawn_latency(self, runs=5):
+        """قياس زمن الاستدعاء بدون تسريع ومعه (بالمللي ثانية)"""
+        baseline = statistics.median(self._time_run(False) for _ in range(runs))
+        accelerator = self.accelerator()
+        if accelerator == "none":
+            accelerated = baseline
+        else:
+            # الاستدعاء الأول يملأ الذاكرة المؤقتة
+            self._time_run(True)
+            accelerated = statistics.median(self._time_run(True) for _ in range(runs))
+        return {
+            'node_version': '.'.join(str(part) for part in self.node_version()),
+            'accelerator': accelerator,
+            'baseline_ms': baseline,
+            'accelerated_ms': accelerated,
+            'saved_ms': baseline - accelerated,
+        }
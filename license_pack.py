@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DentaDesk Production License Pack Builder
+بناء ملف مفاتيح الإنتاج (production-licenses.json) مرتباً وبدون تكرار،
+مع فهرس جانبي (production-licenses.idx) يستخدمه ProductionLicenseValidator
+للتحقق من المفتاح في O(1) دون المرور على كل المفاتيح.
+
+صيغة الفهرس (little-endian):
+    header   '<8sIII32s'  magic, الإصدار، عدد المفاتيح، حجم الجدول، sha256 لملف JSON
+    keys     count * 20   المفاتيح بدون شرطات بنفس ترتيب licenses في JSON
+    table    size * u32   جدول hash (عنوان مفتوح): رقم السجل + 1، و 0 للخانة الفارغة
+
+موضع المفتاح في الجدول = FNV-1a (32 بت) للمفتاح بدون شرطات & (size - 1)
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import re
+import secrets
+import struct
+import sys
+import uuid
+from array import array
+from datetime import datetime, timezone
+
+from license_keys import LICENSE_TYPES, REGIONS, KEY_LENGTH, compact_key
+
+PACK_NAME = "production-licenses.json"
+INDEX_SUFFIX = ".idx"
+
+PACK_MAGIC = b'DDLPACK1'
+PACK_VERSION = 1
+PACK_HEADER = struct.Struct('<8sIII32s')
+
+# نفس إعدادات scripts/generateProductionLicenses.js
+KEY_CHARSET = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
+KEY_HASH_SALT = 'dental-clinic-salt-2025'
+KEY_PATTERN = re.compile(r'^[A-Z0-9]{5}-[A-Z0-9]{5}-[A-Z0-9]{5}-[A-Z0-9]{5}$')
+
+_FNV_OFFSET = 0x811c9dc5
+_FNV_PRIME = 0x01000193
+
+
+def index_path_for(pack_path):
+    """مسار الفهرس الجانبي لملف المفاتيح"""
+    base, ext = os.path.splitext(pack_path)
+    return (base if ext.lower() == '.json' else pack_path) + INDEX_SUFFIX
+
+
+def key_slot_hash(compact):
+    """FNV-1a 32 بت (نفس الدالة في productionLicenseValidator.js)"""
+    value = _FNV_OFFSET
+    for byte in compact.encode('ascii'):
+        value = ((value ^ byte) * _FNV_PRIME) & 0xFFFFFFFF
+    return value
+
+
+def key_hash(license_key):
+    """hash المفتاح كما في generateKeyHash"""
+    return hashlib.sha256((license_key + KEY_HASH_SALT).encode('utf-8')).hexdigest()
+
+
+def random_license_key():
+    """مفتاح إنتاج عشوائي XXXXX-XXXXX-XXXXX-XXXXX"""
+    return '-'.join(''.join(secrets.choice(KEY_CHARSET) for _ in range(5)) for _ in range(4))
+
+
+def _now_iso():
+    return datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+
+def new_record(license_key, license_type="STANDARD", region="GLOBAL", created_at=None):
+    """سجل مفتاح بنفس بنية generateProductionLicenses.js"""
+    return {
+        'id': str(uuid.uuid4()),
+        'key': license_key,
+        'hash': key_hash(license_key),
+        'metadata': {
+            'keyIndex': 0,
+            'licenseType': license_type,
+            'region': region,
+            'maxDevices': 1,
+            'isLifetime': True,
+            'createdAt': created_at or _now_iso(),
+            'expiresAt': None,
+            'isActive': True,
+            'isUsed': False,
+            'usedAt': None,
+            'usedBy': None,
+            'deviceId': None,
+        },
+    }
+
+
+def read_pack_records(path):
+    """سجلات ملف مفاتيح موجود (JSON)، أو مفاتيح من ملف نصي (مفتاح في كل سطر)"""
+    if path.lower().endswith('.json'):
+        with open(path, 'r', encoding='utf-8') as f:
+            return list(json.load(f).get('licenses') or [])
+    records = []
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                records.append({'key': line})
+    return records
+
+
+class PackBuilder:
+    """تجميع المفاتيح من عدة مصادر ثم كتابة الملف والفهرس"""
+
+    def __init__(self, license_type="STANDARD", region="GLOBAL"):
+        if license_type not in LICENSE_TYPES:
+            raise ValueError(f"نوع الترخيص غير صالح: {license_type}")
+        if region not in REGIONS:
+            raise ValueError(f"المنطقة غير صالحة: {region}")
+        self.license_type = license_type
+        self.region = region
+        self.records = {}
+        self.duplicates = 0
+        self.invalid = []
+
+    def add(self, record):
+        """إضافة سجل (أول ظهور للمفتاح هو المعتمد)"""
+        license_key = str(record.get('key') or '').strip().upper()
+        if not KEY_PATTERN.match(license_key):
+            self.invalid.append(license_key)
+            return False
+        if license_key in self.records:
+            self.duplicates += 1
+            return False
+        if 'metadata' in record:
+            record = dict(record, key=license_key, hash=key_hash(license_key))
+            record.setdefault('id', str(uuid.uuid4()))
+        else:
+            record = new_record(license_key, self.license_type, self.region)
+        self.records[license_key] = record
+        return True
+
+    def add_source(self, path):
+        """إضافة كل مفاتيح ملف"""
+        added = 0
+        for record in read_pack_records(path):
+            added += self.add(record)
+        return added
+
+    def generate(self, count):
+        """إضافة مفاتيح عشوائية جديدة (بدون تكرار مع الموجود)"""
+        created_at = _now_iso()
+        added = 0
+        while added < count:
+            license_key = random_license_key()
+            if license_key not in self.records:
+                self.records[license_key] = new_record(
+                    license_key, self.license_type, self.region, created_at
+                )
+                added += 1
+        return added
+
+    def sorted_records(self):
+        records = [self.records[license_key] for license_key in sorted(self.records)]
+        for position, record in enumerate(records, 1):
+            record['metadata']['keyIndex'] = position
+        return records
+
+    def write(self, path):
+        """كتابة ملف JSON والفهرس الجانبي؛ تعيد (مسار الفهرس، عدد المفاتيح)"""
+        records = self.sorted_records()
+        stats = {'licenseTypes': {}, 'regions': {}}
+        for record in records:
+            metadata = record['metadata']
+            for field, name in (('licenseTypes', 'licenseType'), ('regions', 'region')):
+                value = metadata.get(name) or 'UNKNOWN'
+                stats[field][value] = stats[field].get(value, 0) + 1
+        active = sum(1 for r in records if r['metadata'].get('isActive'))
+        used = sum(1 for r in records if r['metadata'].get('isUsed'))
+        data = {
+            'metadata': {
+                'title': 'مفاتيح ترخيص نظام إدارة العيادة',
+                'description': 'مفاتيح ترخيص للاستخدام التجاري - مدى الحياة',
+                'version': '1.0.0',
+                'generatedAt': _now_iso(),
+                'totalKeys': len(records),
+                'format': 'XXXXX-XXXXX-XXXXX-XXXXX',
+                'isLifetime': True,
+                'maxDevicesPerKey': 1,
+                'generator': 'Production License Pack Builder (Python)',
+                'sortedBy': 'key',
+            },
+            'statistics': {
+                'totalKeys': len(records),
+                'activeKeys': active,
+                'usedKeys': used,
+                'availableKeys': sum(
+                    1 for r in records if r['metadata'].get('isActive') and not r['metadata'].get('isUsed')
+                ),
+                'licenseTypes': stats['licenseTypes'],
+                'regions': stats['regions'],
+            },
+            'licenses': records,
+        }
+        payload = json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+
+        index = index_path_for(path)
+        write_index([r['key'] for r in records], hashlib.sha256(payload).digest(), index)
+        return index, len(records)
+
+
+def write_index(license_keys, pack_digest, path):
+    """كتابة الفهرس الجانبي لمفاتيح مرتبة حسب ترتيبها في JSON"""
+    count = len(license_keys)
+    size = 1
+    while size < count * 2:
+        size *= 2
+    mask = size - 1
+
+    keys = bytearray()
+    table = array('I', bytes(4 * size))
+    for position, license_key in enumerate(license_keys):
+        compact = compact_key(license_key)
+        keys += compact.encode('ascii')
+        slot = key_slot_hash(compact) & mask
+        while table[slot]:
+            slot = (slot + 1) & mask
+        table[slot] = position + 1
+    if sys.byteorder == 'big':
+        table.byteswap()
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(PACK_HEADER.pack(PACK_MAGIC, PACK_VERSION, count, size, pack_digest))
+        f.write(keys)
+        f.write(table.tobytes())
+    os.replace(tmp_path, path)
+
+
+class PackIndex:
+    """قراءة الفهرس الجانبي عبر mmap والبحث عن مفتاح"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.count, self.size, self.pack_digest = PACK_HEADER.unpack_from(self._mmap)
+        if magic != PACK_MAGIC or version != PACK_VERSION:
+            self.close()
+            raise ValueError(f"ملف فهرس غير صالح: {path}")
+        self._keys_offset = PACK_HEADER.size
+        self._table_offset = self._keys_offset + self.count * KEY_LENGTH
+
+    def position(self, license_key):
+        """رقم السجل في licenses (أو None)"""
+        license_key = license_key.strip().upper()
+        # نفس صيغة المفاتيح في الملف: مفتاح بدون شرطات أو بشرطات في غير موضعها غير موجود
+        if not KEY_PATTERN.match(license_key):
+            return None
+        compact = compact_key(license_key)
+        target = compact.encode('ascii')
+        mask = self.size - 1
+        slot = key_slot_hash(compact) & mask
+        while True:
+            entry = struct.unpack_from('<I', self._mmap, self._table_offset + 4 * slot)[0]
+            if not entry:
+                return None
+            offset = self._keys_offset + (entry - 1) * KEY_LENGTH
+            if self._mmap[offset:offset + KEY_LENGTH] == target:
+                return entry - 1
+            slot = (slot + 1) & mask
+
+    def __contains__(self, license_key):
+        return self.position(license_key) is not None
+
+    def matches(self, pack_path):
+        """هل الفهرس مبني من هذا الملف؟"""
+        digest = hashlib.sha256()
+        with open(pack_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.digest() == self.pack_digest
+
+    def close(self):
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def verify_pack(pack_path):
+    """التحقق من أن الفهرس الجانبي يطابق ملف المفاتيح؛ تعيد قائمة المشكلات
+
+    الفهرس يجب أن يكون مبنياً من نفس الملف (sha256)، وكل مفتاح يُوجد عبره في موضعه من licenses.
+    """
+    index_path = index_path_for(pack_path)
+    if not os.path.exists(index_path):
+        return [f"الفهرس غير موجود: {index_path}"]
+    with PackIndex(index_path) as index:
+        if not index.matches(pack_path):
+            return ["الفهرس لا يطابق ملف المفاتيح (عُدل الملف بعد بناء الفهرس) - أعد البناء بالأمر pack"]
+        records = read_pack_records(pack_path)
+        problems = []
+        if index.count != len(records):
+            problems.append(f"عدد المفاتيح في الفهرس {index.count} بدلاً من {len(records)}")
+        for position, record in enumerate(records):
+            found = index.position(record.get('key') or '')
+            if found != position:
+                problems.append(f"{record.get('key')}: الموضع في الفهرس {found} بدلاً من {position}")
+                if len(problems) >= 20:
+                    break
+        return problems
@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DentaDesk Issued/Activated License Reconciliation
+مطابقة المفاتيح الصادرة مع سجلات التفعيل
+
+usedLicensesTracker.js لا يحفظ المفتاح نفسه بل sha256(المفتاح + 'dental-clinic-salt-2025')،
+لذلك يُحسب hash كل مفتاح صادر (على عدة أنوية)، ثم يُفرز الطرفان فرزاً خارجياً
+(ملفات مؤقتة + heapq.merge) حسب الـ hash، ويُطابقان في مرور واحد متدفق.
+الذاكرة المستخدمة محدودة بحجم الدفعة (chunk_rows) مهما كان عدد السجلات.
+
+مصادر المفاتيح الصادرة:  سجل issued.csv أو ملفات نتائج الدفعات، أو ملف مفاتيح الإنتاج (JSON)
+مصادر التفعيل:           used-licenses.json (صيغة التتبع)، أو JSONL / CSV بسجل تفعيل في كل سطر
+                         (الحقول: hash أو key_hash أو license_key، و hwid، و activated_at، و activation_count)
+
+التقارير (CSV داخل مجلد الإخراج):
+    activated.csv             مفاتيح صادرة وتم تفعيلها
+    never_activated.csv       مفاتيح صادرة لم تُفعّل
+    unknown_activations.csv   تفعيلات لا تطابق أي مفتاح صادر
+    device_mismatch.csv       مفاتيح مرتبطة بجهاز فُعّلت على جهاز آخر
+    multiple_activations.csv  مفاتيح فُعّلت أكثر من مرة أو على أكثر من جهاز
+    repeated_devices.csv      أجهزة لها أكثر من تفعيل
+"""
+
+import csv
+import heapq
+import json
+import os
+import struct
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from hashlib import sha256
+from itertools import groupby, islice
+
+from license_keys import LICENSE_TYPES, REGIONS, compact_key, format_key
+from license_ledger import iter_records
+from license_pack import KEY_HASH_SALT, read_pack_records
+from license_store import type_code, region_code
+
+CHUNK_ROWS = 500000
+HASH_BATCH = 20000
+
+# hash، المفتاح بدون شرطات، الجهاز (أصفار لمفاتيح الإنتاج)، وقت الإصدار، النوع، المنطقة
+ISSUED_RECORD = struct.Struct('>32s20s16sIBB')
+# hash، الجهاز (حتى 32 بايت)، طول الجهاز، وقت التفعيل، عدد مرات التفعيل
+ACTIVATION_RECORD = struct.Struct('>32s32sBII')
+# نفس التفعيل مرتباً حسب الجهاز
+DEVICE_RECORD = struct.Struct('>32sB32sII')
+
+NO_DEVICE = bytes(16)
+NO_TYPE = 255
+
+REPORTS = {
+    'activated': ['license_key', 'device_id', 'license_type', 'region', 'issued_at',
+                  'hwid', 'activated_at', 'activation_count'],
+    'never_activated': ['license_key', 'device_id', 'license_type', 'region', 'issued_at'],
+    'unknown_activations': ['key_hash', 'hwid', 'activated_at', 'activation_count'],
+    'device_mismatch': ['license_key', 'device_id', 'hwid', 'activated_at'],
+    'multiple_activations': ['license_key', 'key_hash', 'activations', 'devices', 'hwids'],
+    'repeated_devices': ['hwid', 'activations', 'keys', 'first_activated_at', 'last_activated_at'],
+}
+
+
+def activation_hash(license_key):
+    """hash المفتاح كما في hashLicenseKey (بعد trim و toUpperCase)"""
+    return sha256((license_key.strip().upper() + KEY_HASH_SALT).encode('utf-8')).digest()
+
+
+def _timestamp(value):
+    """وقت التفعيل (ISO أو ثوانٍ) إلى ثوانٍ"""
+    if value in (None, ''):
+        return 0
+    if isinstance(value, (int, float)):
+        return int(value)
+    try:
+        return int(float(value))
+    except ValueError:
+        pass
+    return int(datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp())
+
+
+def _iso(seconds):
+    if not seconds:
+        return ''
+    return datetime.fromtimestamp(seconds, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+# ----------------------------------------------------------------------
+# الطرف الأول: المفاتيح الصادرة
+
+def _issued_rows(path):
+    """(المفتاح، الجهاز، وقت الإصدار، رمز النوع، رمز المنطقة) من ملف مصدر"""
+    if path.lower().endswith('.json'):
+        for record in read_pack_records(path):
+            metadata = record.get('metadata') or {}
+            license_type = metadata.get('licenseType')
+            region = metadata.get('region')
+            yield (
+                str(record.get('key') or ''), '',
+                _timestamp(metadata.get('createdAt')),
+                type_code(license_type) if license_type in LICENSE_TYPES else NO_TYPE,
+                region_code(region) if region in REGIONS else NO_TYPE,
+            )
+        return
+    for record in iter_records(path):
+        yield (
+            record['license_key'], record['device_id'], record['issued_at'],
+            type_code(record['license_type']) if record.get('license_type') in LICENSE_TYPES else NO_TYPE,
+            region_code(record['region']) if record.get('region') in REGIONS else NO_TYPE,
+        )
+
+
+def _pack_issued(rows):
+    """حساب hash مجموعة مفاتيح وتحويلها إلى سجلات ثابتة الطول (تعمل في عملية عاملة)
+
+    تعيد (السجلات، عدد المرفوض)
+    """
+    records = []
+    rejected = 0
+    pack = ISSUED_RECORD.pack
+    for license_key, device_id, issued_at, type_index, region_index in rows:
+        compact = compact_key(license_key.strip().upper())
+        try:
+            device = bytes.fromhex(device_id) if device_id else NO_DEVICE
+            if len(compact) != 20 or len(device) != 16:
+                raise ValueError
+            records.append(pack(
+                activation_hash(format_key(compact)), compact.encode('ascii'),
+                device, issued_at, type_index, region_index,
+            ))
+        except (ValueError, UnicodeEncodeError, struct.error):
+            rejected += 1
+    return records, rejected
+
+
+def _batches(rows, size):
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _iter_issued(sources, workers, stats):
+    """سجلات المفاتيح الصادرة بعد حساب الـ hash (بالتوازي إن أمكن)"""
+    rows = (row for source in sources for row in _issued_rows(source))
+    if workers == 1:
+        for batch in _batches(rows, HASH_BATCH):
+            records, rejected = _pack_issued(batch)
+            stats['issued_rejected'] += rejected
+            yield from records
+        return
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        for batch in _batches(rows, HASH_BATCH):
+            pending.append(pool.submit(_pack_issued, batch))
+            if len(pending) >= workers * 2:
+                records, rejected = pending.popleft().result()
+                stats['issued_rejected'] += rejected
+                yield from records
+        while pending:
+            records, rejected = pending.popleft().result()
+            stats['issued_rejected'] += rejected
+            yield from records
+
+
+# ----------------------------------------------------------------------
+# الطرف الثاني: سجلات التفعيل
+
+def _activation_fields(record):
+    """(hash، الجهاز، وقت التفعيل، العدد) من سجل تفعيل (dict)"""
+    key_hash = record.get('hash') or record.get('key_hash') or record.get('keyHash')
+    if key_hash:
+        digest = bytes.fromhex(key_hash)
+    else:
+        license_key = record.get('license_key') or record.get('licenseKey') or record.get('key')
+        if not license_key:
+            raise ValueError("سجل تفعيل بدون مفتاح")
+        digest = activation_hash(license_key)
+    hwid = bytes.fromhex(str(record.get('hwid') or ''))
+    if len(digest) != 32 or not hwid or len(hwid) > 32:
+        raise ValueError("سجل تفعيل غير صالح")
+    count = int(record.get('activation_count') or record.get('activationCount') or 1)
+    activated_at = record.get('activated_at') or record.get('activatedAt')
+    return digest, hwid, _timestamp(activated_at), count
+
+
+def _activation_dicts(path):
+    name = path.lower()
+    if name.endswith('.jsonl'):
+        with open(path, 'r', encoding='utf-8-sig') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    elif name.endswith('.csv'):
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            yield from csv.DictReader(f)
+    else:
+        # صيغة usedLicensesTracker.js: كائن واحد {hash: {...}} يُحمّل كاملاً كما يفعل التتبع نفسه
+        with open(path, 'r', encoding='utf-8') as f:
+            used = json.load(f).get('usedLicenses') or {}
+        for key_hash, record in used.items():
+            yield dict(record, hash=key_hash)
+
+
+def _iter_activations(sources, stats):
+    pack = ACTIVATION_RECORD.pack
+    for source in sources:
+        for record in _activation_dicts(source):
+            try:
+                digest, hwid, activated_at, count = _activation_fields(record)
+                yield pack(digest, hwid, len(hwid), activated_at, count)
+            except (ValueError, TypeError, OverflowError, struct.error):
+                stats['activations_rejected'] += 1
+
+
+# ----------------------------------------------------------------------
+# الفرز الخارجي
+
+def _write_run(records, directory):
+    fd, path = tempfile.mkstemp(prefix='reconcile-', suffix='.tmp', dir=directory)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(b''.join(records))
+    return path
+
+
+def _read_run(path, size, buffer_size=1 << 20):
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(size * (buffer_size // size))
+            if not block:
+                return
+            for offset in range(0, len(block), size):
+                yield block[offset:offset + size]
+
+
+def _external_sort(records, size, directory, chunk_rows, runs):
+    """فرز سجلات ثابتة الطول بذاكرة محدودة
+
+    تُضاف مسارات الملفات المؤقتة إلى runs ليحذفها المستدعي بعد الانتهاء.
+    """
+    own = []
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= chunk_rows:
+            chunk.sort()
+            own.append(_write_run(chunk, directory))
+            runs.append(own[-1])
+            chunk = []
+    chunk.sort()
+    if not own:
+        return iter(chunk)
+    # الدفعة الأخيرة تُكتب أيضاً حتى لا تبقى في الذاكرة أثناء الدمج
+    own.append(_write_run(chunk, directory))
+    runs.append(own[-1])
+    return heapq.merge(*[_read_run(path, size) for path in own])
+
+
+def _write_sorted(records, directory):
+    """حفظ ناتج الدمج في ملف مؤقت واحد (لقراءته أكثر من مرة)"""
+    fd, path = tempfile.mkstemp(prefix='reconcile-', suffix='.tmp', dir=directory)
+    with os.fdopen(fd, 'wb') as f:
+        for block in _batches(records, 65536):
+            f.write(b''.join(block))
+    return path
+
+
+# ----------------------------------------------------------------------
+# المطابقة
+
+class _Reports:
+    """ملفات التقارير المفتوحة أثناء المطابقة"""
+
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        self.paths = {}
+        self._files = {}
+        self._writers = {}
+        for name, header in REPORTS.items():
+            path = os.path.join(directory, name + '.csv')
+            f = open(path, 'w', encoding='utf-8', newline='')
+            writer = csv.writer(f)
+            writer.writerow(header)
+            self.paths[name] = path
+            self._files[name] = f
+            self._writers[name] = writer
+
+    def write(self, name, row):
+        self._writers[name].writerow(row)
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+
+
+def _issued_row(record):
+    _, compact, device, issued_at, type_index, region_index = ISSUED_RECORD.unpack(record)
+    return [
+        format_key(compact.decode('ascii')),
+        device.hex() if device != NO_DEVICE else '',
+        LICENSE_TYPES[type_index] if type_index < len(LICENSE_TYPES) else '',
+        REGIONS[region_index] if region_index < len(REGIONS) else '',
+        _iso(issued_at),
+    ]
+
+
+def _activation(record):
+    digest, hwid, length, activated_at, count = ACTIVATION_RECORD.unpack(record)
+    return digest, hwid[:length], activated_at, count
+
+
+def _join(issued, activations, reports, stats):
+    """مطابقة متدفقة لطرفين مرتبين حسب الـ hash"""
+    issued_groups = groupby(issued, key=lambda record: record[:32])
+    activation_groups = groupby(activations, key=lambda record: record[:32])
+    issued_item = next(issued_groups, None)
+    activation_item = next(activation_groups, None)
+
+    while issued_item or activation_item:
+        if activation_item is None or (issued_item and issued_item[0] < activation_item[0]):
+            records = list(issued_item[1])
+            stats['duplicate_issued'] += len(records) - 1
+            stats['never_activated'] += 1
+            reports.write('never_activated', _issued_row(records[0]))
+            issued_item = next(issued_groups, None)
+            continue
+
+        events = [_activation(record) for record in activation_item[1]]
+        issued_record = None
+        if issued_item and issued_item[0] == activation_item[0]:
+            records = list(issued_item[1])
+            stats['duplicate_issued'] += len(records) - 1
+            issued_record = records[0]
+            issued_item = next(issued_groups, None)
+        activation_item = next(activation_groups, None)
+
+        digest = events[0][0]
+        hwids = sorted({hwid for _, hwid, _, _ in events})
+        total = sum(count for _, _, _, count in events)
+
+        if issued_record is None:
+            stats['unknown_activations'] += len(events)
+            for _, hwid, activated_at, count in events:
+                reports.write('unknown_activations', [digest.hex(), hwid.hex(), _iso(activated_at), count])
+            license_key = ''
+        else:
+            stats['activated'] += 1
+            row = _issued_row(issued_record)
+            license_key, device_id = row[0], row[1]
+            first = min(events, key=lambda event: event[2])
+            reports.write('activated', row + [first[1].hex(), _iso(first[2]), total])
+            if device_id:
+                mismatched = [event for event in events if event[1].hex() != device_id]
+                if mismatched:
+                    stats['device_mismatch'] += 1
+                    for _, hwid, activated_at, _ in mismatched:
+                        reports.write('device_mismatch', [license_key, device_id, hwid.hex(), _iso(activated_at)])
+
+        if total > 1 or len(hwids) > 1:
+            stats['multiple_activations'] += 1
+            reports.write('multiple_activations', [
+                license_key, digest.hex(), total, len(hwids), ' '.join(hwid.hex() for hwid in hwids),
+            ])
+
+
+def _device_records(activations):
+    """سجلات التفعيل مرتبة حسب الجهاز بدلاً من الـ hash"""
+    pack = DEVICE_RECORD.pack
+    for record in activations:
+        digest, hwid, length, activated_at, count = ACTIVATION_RECORD.unpack(record)
+        yield pack(hwid, length, digest, activated_at, count)
+
+
+def _repeated_devices(records, reports, stats):
+    for device, group in groupby(records, key=lambda record: record[:33]):
+        activations = 0
+        keys = set()
+        first = last = None
+        for record in group:
+            _, _, digest, activated_at, count = DEVICE_RECORD.unpack(record)
+            activations += count
+            keys.add(digest)
+            first = activated_at if first is None else min(first, activated_at)
+            last = activated_at if last is None else max(last, activated_at)
+        if activations > 1:
+            stats['repeated_devices'] += 1
+            hwid = device[:device[32]]
+            reports.write('repeated_devices', [hwid.hex(), activations, len(keys), _iso(first), _iso(last)])
+
+
+def reconcile(issued_sources, activation_sources, output_dir,
+              workers=None, chunk_rows=CHUNK_ROWS, temp_dir=None):
+    """مطابقة المفاتيح الصادرة مع التفعيلات وكتابة التقارير في output_dir
+
+    تعيد (الإحصائيات، {اسم التقرير: المسار})
+    """
+    workers = workers or os.cpu_count() or 1
+    temp_dir = temp_dir or output_dir
+    os.makedirs(temp_dir, exist_ok=True)
+    stats = dict.fromkeys([
+        'issued_rejected', 'activations_rejected', 'duplicate_issued', 'activated',
+        'never_activated', 'unknown_activations', 'device_mismatch',
+        'multiple_activations', 'repeated_devices',
+    ], 0)
+
+    runs = []
+    reports = _Reports(output_dir)
+    try:
+        # التفعيلات تُفرز مرتين: حسب الـ hash للمطابقة، وحسب الجهاز لتقرير الأجهزة المتكررة
+        activations = _external_sort(
+            _iter_activations(activation_sources, stats), ACTIVATION_RECORD.size,
+            temp_dir, chunk_rows, runs,
+        )
+        sorted_path = _write_sorted(activations, temp_dir)
+        runs.append(sorted_path)
+
+        issued = _external_sort(
+            _iter_issued(issued_sources, workers, stats), ISSUED_RECORD.size,
+            temp_dir, chunk_rows, runs,
+        )
+        _join(issued, _read_run(sorted_path, ACTIVATION_RECORD.size), reports, stats)
+
+        devices = _external_sort(
+            _device_records(_read_run(sorted_path, ACTIVATION_RECORD.size)),
+            DEVICE_RECORD.size, temp_dir, chunk_rows, runs,
+        )
+        _repeated_devices(devices, reports, stats)
+    finally:
+        reports.close()
+        for path in runs:
+            if os.path.exists(path):
+                os.remove(path)
+    return stats, reports.paths
+
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DentaDesk License Re-keying Pipeline
+إعادة توليد جميع المفاتيح الصادرة عند تغيير المفتاح الرئيسي أو مواضع أجزاء المفتاح
+
+المخرجات داخل مجلد الترحيل:
+    mapping.csv            - المفتاح القديم والجديد لكل سجل
+    customers/<name>.csv   - التغييرات الخاصة بكل عميل (لإعادة الإرسال)
+    checkpoint.json        - نقطة الاستئناف بعد كل مجموعة
+"""
+
+import csv
+import hashlib
+import io
+import json
+import os
+import re
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from license_keys import MASTER_KEY, KEY_SLICES, generate_key
+from license_ledger import iter_records
+
+MAPPING_HEADER = [
+    'device_id', 'license_type', 'region', 'customer',
+    'old_key', 'new_key', 'status'
+]
+DELTA_HEADER = ['device_id', 'license_type', 'region', 'old_key', 'new_key']
+
+KeyScheme = namedtuple('KeyScheme', ['version', 'master_key', 'slices'])
+
+# الإصدار 1 هو ما يستخدمه DeviceBoundLicenseGenerator حالياً
+SCHEMES = {
+    1: KeyScheme(1, MASTER_KEY, KEY_SLICES),
+}
+
+_worker_schemes = None
+
+
+def parse_slices(text):
+    """تحويل "0:5,8:13,16:21,24:29" إلى مواضع أجزاء المفتاح"""
+    slices = []
+    for part in text.split(','):
+        start, end = (int(value) for value in part.split(':'))
+        if not 0 <= start < end <= 64 or end - start != 5:
+            raise ValueError(f"موضع غير صالح: {part}")
+        slices.append((start, end))
+    if len(slices) != 4:
+        raise ValueError("يجب تحديد 4 أجزاء للمفتاح")
+    return tuple(slices)
+
+
+def scheme_fingerprint(scheme):
+    """بصمة الإصدار (بدون كشف المفتاح الرئيسي) للتحقق عند الاستئناف"""
+    data = f"{scheme.version}|{scheme.master_key}|{scheme.slices}".encode('utf-8')
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def customer_filename(customer):
+    """اسم ملف آمن للعميل"""
+    name = re.sub(r'[^\w\-]+', '_', customer or '').strip('_')
+    return (name or '_unassigned') + '.csv'
+
+
+def _init_worker(old_scheme, new_scheme):
+    global _worker_schemes
+    _worker_schemes = (old_scheme, new_scheme)
+
+
+def _rekey_chunk(records):
+    """حساب المفتاح القديم والجديد لمجموعة سجلات (داخل عملية عاملة)"""
+    old, new = _worker_schemes
+    rows = []
+    for device_id, license_type, region, customer, stored_key in records:
+        old_key = generate_key(device_id, license_type, old.master_key, old.slices)
+        new_key = generate_key(device_id, license_type, new.master_key, new.slices)
+        status = 'ok' if old_key == stored_key.upper() else 'mismatch'
+        rows.append((device_id, license_type, region, customer, old_key, new_key, status))
+    return rows
+
+
+def _encode_rows(rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode('utf-8')
+
+
+def _read_chunks(sources, chunk_rows, skip):
+    """قراءة السجلات على شكل مجموعات بعد تخطي ما تمت معالجته"""
+    records = (
+        (r['device_id'].lower(), r['license_type'], r['region'], r['customer'], r['license_key'])
+        for source in sources
+        for r in iter_records(source)
+    )
+    if skip:
+        records = islice(records, skip, None)
+    while True:
+        chunk = list(islice(records, chunk_rows))
+        if not chunk:
+            return
+        yield chunk
+
+
+class RekeyJob:
+    """عملية ترحيل قابلة للاستئناف بين إصدارين من خوارزمية المفاتيح"""
+
+    def __init__(self, sources, output_dir, old_scheme, new_scheme,
+                 workers=None, chunk_rows=20000):
+        self.sources = list(sources)
+        self.output_dir = output_dir
+        self.old_scheme = old_scheme
+        self.new_scheme = new_scheme
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_rows = chunk_rows
+        self.mapping_path = os.path.join(output_dir, 'mapping.csv')
+        self.customers_dir = os.path.join(output_dir, 'customers')
+        self.checkpoint_path = os.path.join(output_dir, 'checkpoint.json')
+
+    def _signature(self):
+        return {
+            'sources': [os.path.abspath(source) for source in self.sources],
+            'old': scheme_fingerprint(self.old_scheme),
+            'new': scheme_fingerprint(self.new_scheme),
+        }
+
+    def _load_checkpoint(self, fresh):
+        """تحميل نقطة الاستئناف وقص الملفات إلى آخر حالة مؤكدة"""
+        if fresh or not os.path.exists(self.checkpoint_path):
+            return {'records': 0, 'mapping_size': 0, 'customers': {}, 'mismatches': 0, 'done': False}
+
+        with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+            checkpoint = json.load(f)
+        if checkpoint.get('signature') != self._signature():
+            raise ValueError(
+                "نقطة الاستئناف تخص مصادر أو إصدارات مختلفة - استخدم --fresh للبدء من جديد"
+            )
+
+        # ما كُتب بعد آخر نقطة استئناف يُحذف ثم يُعاد حسابه
+        self._restore(self.mapping_path, checkpoint['mapping_size'])
+        for name, size in checkpoint['customers'].items():
+            self._restore(os.path.join(self.customers_dir, name), size)
+        if os.path.isdir(self.customers_dir):
+            for name in os.listdir(self.customers_dir):
+                if name not in checkpoint['customers']:
+                    os.truncate(os.path.join(self.customers_dir, name), 0)
+        return checkpoint
+
+    @staticmethod
+    def _restore(path, size):
+        """قص ملف مخرجات إلى حجمه عند نقطة الاستئناف؛ يرفض الاستئناف إذا كان ناقصاً"""
+        if not size:
+            return
+        try:
+            actual = os.path.getsize(path)
+        except OSError:
+            actual = -1
+        if actual < size:
+            state = "غير موجود" if actual < 0 else f"حجمه {actual} بايت بدلاً من {size}"
+            raise ValueError(
+                f"لا يمكن الاستئناف: الملف {path} {state} - استخدم --fresh للبدء من جديد"
+            )
+        os.truncate(path, size)
+
+    def _save_checkpoint(self, checkpoint):
+        checkpoint['signature'] = self._signature()
+        tmp_path = self.checkpoint_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _write_rows(self, mapping, rows, checkpoint):
+        """كتابة نتائج مجموعة في ملف الربط وملفات العملاء"""
+        mapping.write(_encode_rows(rows))
+        mapping.flush()
+        os.fsync(mapping.fileno())
+        checkpoint['mapping_size'] = mapping.tell()
+
+        by_customer = {}
+        for row in rows:
+            device_id, license_type, region, customer, old_key, new_key, status = row
+            if status == 'mismatch':
+                checkpoint['mismatches'] += 1
+            if old_key != new_key:
+                by_customer.setdefault(customer_filename(customer), []).append(
+                    (device_id, license_type, region, old_key, new_key)
+                )
+
+        for name, customer_rows in by_customer.items():
+            path = os.path.join(self.customers_dir, name)
+            with open(path, 'ab') as f:
+                if checkpoint['customers'].get(name, 0) == 0:
+                    f.write(_encode_rows([DELTA_HEADER]))
+                f.write(_encode_rows(customer_rows))
+                f.flush()
+                os.fsync(f.fileno())
+                checkpoint['customers'][name] = f.tell()
+
+    def _commit(self, mapping, rows, checkpoint, progress):
+        self._write_rows(mapping, rows, checkpoint)
+        checkpoint['records'] += len(rows)
+        self._save_checkpoint(checkpoint)
+        if progress:
+            progress(checkpoint['records'])
+
+    def run(self, fresh=False, progress=None):
+        """تشغيل الترحيل (أو استئنافه من آخر نقطة)"""
+        os.makedirs(self.customers_dir, exist_ok=True)
+        if fresh or not os.path.exists(self.checkpoint_path):
+            # بدون نقطة استئناف (انقطاع قبل أول نقطة مثلاً) لا يُعتمد أي ملف عميل سابق
+            for name in os.listdir(self.customers_dir):
+                os.remove(os.path.join(self.customers_dir, name))
+        checkpoint = self._load_checkpoint(fresh)
+        if checkpoint.get('done'):
+            return checkpoint
+
+        mode = 'ab' if checkpoint['mapping_size'] else 'wb'
+        with open(self.mapping_path, mode) as mapping:
+            if mode == 'wb':
+                mapping.write(_encode_rows([MAPPING_HEADER]))
+                mapping.flush()
+                checkpoint['mapping_size'] = mapping.tell()
+
+            chunks = _read_chunks(self.sources, self.chunk_rows, checkpoint['records'])
+            with ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(self.old_scheme, self.new_scheme)
+            ) as pool:
+                # نافذة محدودة من المجموعات قيد المعالجة؛ تُكتب النتائج بالترتيب
+                # فتبقى نقطة الاستئناف بادئة متصلة من المصدر
+                pending = deque()
+                for chunk in chunks:
+                    pending.append(pool.submit(_rekey_chunk, chunk))
+                    if len(pending) >= self.workers * 2:
+                        self._commit(mapping, pending.popleft().result(), checkpoint, progress)
+                while pending:
+                    self._commit(mapping, pending.popleft().result(), checkpoint, progress)
+
+        checkpoint['done'] = True
+        self._save_checkpoint(checkpoint)
+        return checkpoint
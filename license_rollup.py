@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DentaDesk Issuance Rollups
+جداول إحصاءات الإصدار (حسب اليوم والمشغل ونوع الترخيص والمنطقة) تُحدّث تدريجياً من السجل
+
+مثل فلتر Bloom، تحفظ الجداول موضع آخر بايت قرأته من السجل، فتقرأ كل مزامنة ما أُضيف
+بعده فقط. الاستعلامات تُنفذ على الجداول المجمعة (صف لكل يوم/مشغل/نوع/منطقة) ولا تقرأ
+السجل أبداً، فتبقى بالمللي ثانية مهما طال تاريخ الإصدار.
+
+    rollups = UsageRollups.open()          # فتح ومزامنة
+    rollups.report('region')               # [(المنطقة، عدد المفاتيح)]
+    rollups.report('month', since='2025-01-01', region='UAE')
+"""
+
+import csv
+import os
+import sqlite3
+import time
+from collections import Counter
+
+from license_ledger import ledger_path, read_ledger_chunk
+
+ROLLUP_NAME = "rollups.sqlite"
+
+# أبعاد التجميع وعمود كل منها في جدول daily
+DIMENSIONS = {
+    'day': "day",
+    'month': "substr(day, 1, 7)",
+    'year': "substr(day, 1, 4)",
+    'operator': "operator",
+    'type': "license_type",
+    'region': "region",
+}
+
+# الأبعاد المحفوظة مجمعة مسبقاً في جدول totals
+TOTAL_DIMENSIONS = ('day', 'operator', 'type', 'region')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS state (
+    name TEXT PRIMARY KEY,
+    value
+);
+CREATE TABLE IF NOT EXISTS daily (
+    day TEXT NOT NULL,
+    operator TEXT NOT NULL,
+    license_type TEXT NOT NULL,
+    region TEXT NOT NULL,
+    keys INTEGER NOT NULL,
+    PRIMARY KEY (day, operator, license_type, region)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS totals (
+    dimension TEXT NOT NULL,
+    value TEXT NOT NULL,
+    keys INTEGER NOT NULL,
+    PRIMARY KEY (dimension, value)
+) WITHOUT ROWID;
+"""
+
+
+class UsageRollups:
+    """جداول الإحصاءات لسجل مفاتيح صادرة واحد"""
+
+    def __init__(self, path=None, ledger=None):
+        self.ledger = ledger or ledger_path()
+        # الجداول تُحفظ بجانب السجل الذي تتبعه
+        self.path = path or os.path.join(os.path.dirname(os.path.abspath(self.ledger)), ROLLUP_NAME)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # isolation_level=None: المعاملات تُدار يدوياً (BEGIN IMMEDIATE في sync)
+        self._db = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+        self._days = {}
+
+    @classmethod
+    def open(cls, path=None, ledger=None):
+        """فتح الجداول (أو إنشاؤها) ثم مزامنتها مع السجل"""
+        rollups = cls(path, ledger)
+        rollups.sync()
+        return rollups
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _state(self, name, default=None):
+        row = self._db.execute("SELECT value FROM state WHERE name = ?", (name,)).fetchone()
+        return default if row is None else row[0]
+
+    @property
+    def ledger_offset(self):
+        return self._state('ledger_offset', 0)
+
+    def _day(self, issued_at):
+        # صفوف الدفعة الواحدة تشترك في وقت الإصدار
+        day = self._days.get(issued_at)
+        if day is None:
+            day = time.strftime('%Y-%m-%d', time.localtime(issued_at))
+            self._days[issued_at] = day
+        return day
+
+    def sync(self):
+        """إضافة ما كُتب في السجل منذ آخر مزامنة؛ تعيد عدد السجلات المضافة
+
+        يُقرأ السجل على أجزاء (READ_CHUNK_BYTES) ويُحفظ الموضع بعد كل جزء في معاملة خاصة به،
+        فلا يُحمّل سجل طويل في الذاكرة ولا يضيع ما أُنجز إذا توقفت المزامنة.
+        """
+        added = 0
+        while True:
+            try:
+                chunk_added = self._sync_chunk()
+            except FileNotFoundError:
+                return added
+            if chunk_added is None:
+                return added
+            added += chunk_added
+
+    def _sync_chunk(self):
+        """إضافة جزء واحد من السجل؛ تعيد عدد سجلاته أو None إذا لم يبق شيء"""
+        size = os.path.getsize(self.ledger)
+        db = self._db
+        # BEGIN IMMEDIATE: عمليتان تزامنان معاً لا تقرآن نفس الجزء مرتين
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            offset = self._state('ledger_offset', 0)
+            if self._state('ledger') != os.path.abspath(self.ledger) or size < offset:
+                # سجل مختلف أو استُبدل أو قُص - إعادة البناء من البداية
+                db.execute("DELETE FROM daily")
+                db.execute("DELETE FROM totals")
+                db.executemany("INSERT OR REPLACE INTO state VALUES (?, ?)",
+                               [('ledger', os.path.abspath(self.ledger)), ('ledger_offset', 0)])
+                offset = 0
+            text, end = read_ledger_chunk(self.ledger, offset)
+            if not text:
+                db.execute("COMMIT")
+                return None
+
+            counts = Counter()
+            added = 0
+            for fields in csv.reader(text.splitlines()):
+                if len(fields) < 7 or fields[0] == 'device_id' or not fields[0]:
+                    continue
+                try:
+                    issued_at = int(float(fields[4] or 0))
+                except ValueError:
+                    continue
+                counts[(self._day(issued_at), fields[6], fields[2], fields[3])] += 1
+                added += 1
+
+            totals = Counter()
+            for (day, operator, license_type, region), keys in counts.items():
+                totals[('day', day)] += keys
+                totals[('operator', operator)] += keys
+                totals[('type', license_type)] += keys
+                totals[('region', region)] += keys
+            db.executemany(
+                "INSERT INTO daily VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (day, operator, license_type, region) DO UPDATE SET keys = keys + excluded.keys",
+                [key + (keys,) for key, keys in counts.items()]
+            )
+            db.executemany(
+                "INSERT INTO totals VALUES (?, ?, ?) "
+                "ON CONFLICT (dimension, value) DO UPDATE SET keys = keys + excluded.keys",
+                [key + (keys,) for key, keys in totals.items()]
+            )
+            db.executemany(
+                "INSERT OR REPLACE INTO state VALUES (?, ?)",
+                [('ledger', os.path.abspath(self.ledger)), ('ledger_offset', end),
+                 ('synced_at', int(time.time()))]
+            )
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return added
+
+    def rebuild(self):
+        """إعادة بناء الجداول بالكامل من السجل"""
+        self._db.execute("DELETE FROM state WHERE name = 'ledger_offset'")
+        self._db.execute("DELETE FROM daily")
+        self._db.execute("DELETE FROM totals")
+        return self.sync()
+
+    # ------------------------------------------------------------------
+    # الاستعلامات
+
+    def total(self):
+        """إجمالي المفاتيح الصادرة"""
+        row = self._db.execute("SELECT coalesce(sum(keys), 0) FROM totals WHERE dimension = 'type'").fetchone()
+        return row[0]
+
+    def report(self, group_by='day', since=None, until=None, operator=None, license_type=None,
+               region=None, limit=None):
+        """[(القيمة، عدد المفاتيح)] مجمعة حسب بعد مع فلاتر اختيارية
+
+        since / until تواريخ YYYY-MM-DD (شاملة). الأبعاد الزمنية مرتبة من الأحدث،
+        والباقي من الأكثر مفاتيح.
+        """
+        try:
+            column = DIMENSIONS[group_by]
+        except KeyError:
+            raise ValueError(f"بعد غير معروف: {group_by} (المتاح: {', '.join(DIMENSIONS)})")
+        conditions = []
+        params = []
+        for clause, value in (("day >= ?", since), ("day <= ?", until), ("operator = ?", operator),
+                              ("license_type = ?", license_type), ("region = ?", region)):
+            if value:
+                conditions.append(clause)
+                params.append(value)
+        order = "1 DESC" if group_by in ('day', 'month', 'year') else "2 DESC, 1"
+        if conditions:
+            sql = (f"SELECT {column}, sum(keys) FROM daily WHERE {' AND '.join(conditions)} "
+                   f"GROUP BY 1 ORDER BY {order}")
+        elif group_by in TOTAL_DIMENSIONS:
+            # بدون فلاتر: الجدول المجمع مسبقاً يكفي
+            sql = f"SELECT value, keys FROM totals WHERE dimension = ? ORDER BY {order}"
+            params.append(group_by)
+        else:
+            sql = f"SELECT {column}, sum(keys) FROM daily GROUP BY 1 ORDER BY {order}"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        return self._db.execute(sql, params).fetchall()
+
+    def summary(self):
+        """ملخص للوحة الإحصاءات: الإجمالي واليوم وآخر 7 و 30 يوماً"""
+        today = time.strftime('%Y-%m-%d')
+        week = time.strftime('%Y-%m-%d', time.localtime(time.time() - 6 * 86400))
+        month = time.strftime('%Y-%m-%d', time.localtime(time.time() - 29 * 86400))
+        row = self._db.execute(
+            "SELECT coalesce(sum(keys), 0), "
+            "coalesce(sum(CASE WHEN value = ? THEN keys END), 0), "
+            "coalesce(sum(CASE WHEN value >= ? THEN keys END), 0), "
+            "coalesce(sum(CASE WHEN value >= ? THEN keys END), 0) "
+            "FROM totals WHERE dimension = 'day'", (today, week, month)
+        ).fetchone()
+        return {'total': row[0], 'today': row[1], 'last_7_days': row[2], 'last_30_days': row[3]}
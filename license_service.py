@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DentaDesk Local License Service
+خدمة محلية (asyncio) لتوليد المفاتيح عبر HTTP أو Unix socket
+
+    POST /generate  {"device_id": "...", "license_type": "STANDARD", "region": "GLOBAL"}
+    POST /batch     {"device_ids": [...], "license_type": "...", "region": "..."}
+    GET  /health
+    GET  /metrics
+
+الطلبات المتزامنة تُجمع في دفعات صغيرة وتُولد باستدعاء واحد للخلفية،
+وعند امتلاء الطابور تعيد الخدمة 503 بدلاً من تراكم الطلبات.
+"""
+
+import asyncio
+import http.client
+import json
+import socket
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+
+from license_keys import LICENSE_TYPES, REGIONS, normalize_device_id, validate_device_id
+from license_batch import run_batch
+from license_ledger import LicenseLedger
+import license_trace
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+SERVICE_ENV = "DENTADESK_LICENSE_SERVICE"
+
+MAX_BODY_BYTES = 16 * 1024 * 1024
+MAX_BATCH_IDS = 100000
+
+_REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable",
+}
+
+
+class RequestError(Exception):
+    """خطأ في الطلب يُعاد للعميل مع رمز HTTP"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _parse_item(device_id, license_type, region):
+    if device_id is not None and not isinstance(device_id, str):
+        raise RequestError(400, f"معرف الجهاز يجب أن يكون نصاً: {device_id!r}")
+    device_id = normalize_device_id(device_id or "")
+    if not validate_device_id(device_id):
+        raise RequestError(400, f"معرف الجهاز غير صالح: {device_id}")
+    if license_type not in LICENSE_TYPES:
+        raise RequestError(400, f"نوع الترخيص غير صالح: {license_type}")
+    if region not in REGIONS:
+        raise RequestError(400, f"المنطقة غير صالحة: {region}")
+    return device_id, license_type, region
+
+
+class LicenseService:
+    """خدمة التوليد مع تجميع الطلبات في دفعات صغيرة"""
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None,
+                 max_batch=2048, max_delay=0.002, queue_size=200000, ledger=None):
+        self.host = host
+        self.port = port
+        self.socket_path = socket_path
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.queue_size = queue_size
+        self.ledger = ledger
+        self.metrics = {
+            'requests': 0, 'keys': 0, 'batches': 0, 'rejected': 0, 'errors': 0,
+            'max_queue_depth': 0,
+        }
+        self._queue = None
+        self._server = None
+        self._batcher = None
+        self._started = None
+
+    async def start(self):
+        """تشغيل الخدمة"""
+        self._queue = asyncio.Queue(self.queue_size)
+        self._batcher = asyncio.create_task(self._batch_loop())
+        if self.socket_path:
+            self._server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+        else:
+            self._server = await asyncio.start_server(self._handle, self.host, self.port)
+            # المنفذ الفعلي (عند استخدام المنفذ 0 للاختبار)
+            self.port = self._server.sockets[0].getsockname()[1]
+        self._started = time.monotonic()
+        return self
+
+    async def close(self):
+        """إيقاف الخدمة"""
+        self._server.close()
+        await self._server.wait_closed()
+        self._batcher.cancel()
+        try:
+            await self._batcher
+        except asyncio.CancelledError:
+            pass
+
+    async def serve_forever(self):
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    # ------------------------------------------------------------------
+    # تجميع الطلبات
+
+    def _enqueue(self, items):
+        """إضافة عناصر للطابور أو رفضها فوراً عند الامتلاء"""
+        if self._queue.maxsize - self._queue.qsize() < len(items):
+            self.metrics['rejected'] += 1
+            raise RequestError(503, "الخدمة مشغولة - أعد المحاولة لاحقاً")
+        loop = asyncio.get_running_loop()
+        futures = []
+        for item in items:
+            future = loop.create_future()
+            self._queue.put_nowait((item, future))
+            futures.append(future)
+        self.metrics['max_queue_depth'] = max(self.metrics['max_queue_depth'], self._queue.qsize())
+        license_trace.instant("enqueue", "service", keys=len(items), queue_depth=self._queue.qsize())
+        return futures
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self._queue.get()]
+            started = license_trace.now()
+            deadline = loop.time() + self.max_delay
+            while len(pending) < self.max_batch:
+                try:
+                    pending.append(self._queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        pending.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+
+            pending = [(item, future) for item, future in pending if not future.cancelled()]
+            tracer = license_trace.current()
+            if tracer is not None:
+                tracer.async_span("schedule", "service", started, keys=len(pending))
+            if not pending:
+                continue
+            try:
+                with license_trace.span("dispatch", "service", keys=len(pending)):
+                    keys = await loop.run_in_executor(None, self._generate, [item for item, _ in pending])
+            except Exception as e:
+                self.metrics['errors'] += 1
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.metrics['batches'] += 1
+            self.metrics['keys'] += len(keys)
+            for (_, future), key in zip(pending, keys):
+                if not future.done():
+                    future.set_result(key)
+
+    def _generate(self, items):
+        """استدعاء واحد للخلفية لكل دفعة صغيرة (مجمعة حسب النوع والمنطقة)"""
+        groups = defaultdict(list)
+        for position, (device_id, license_type, region) in enumerate(items):
+            groups[(license_type, region)].append((position, device_id))
+
+        keys = [None] * len(items)
+        for (license_type, region), members in groups.items():
+            store = run_batch([device_id for _, device_id in members], license_type, region)
+            for (position, _), row in zip(members, store):
+                keys[position] = row.license_key
+            if self.ledger is not None:
+                self.ledger.append_store(store, operator="service")
+        return keys
+
+    # ------------------------------------------------------------------
+    # HTTP
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode('latin-1').split(' ', 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get('content-length') or 0)
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {'error': 'payload too large'}, close=True)
+                    break
+                body = await reader.readexactly(length) if length else b''
+                keep_alive = headers.get('connection', '').lower() != 'close'
+
+                self.metrics['requests'] += 1
+                try:
+                    status, payload = 200, await self._route(method, path.split('?')[0], body)
+                except RequestError as e:
+                    status, payload = e.status, {'error': str(e)}
+                except Exception as e:
+                    self.metrics['errors'] += 1
+                    status, payload = 500, {'error': str(e)}
+                await self._respond(writer, status, payload, close=not keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, payload, close=False):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        head = [
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}",
+            "Content-Type: application/json; charset=utf-8",
+            f"Content-Length: {len(body)}",
+        ]
+        if status == 503:
+            head.append("Retry-After: 1")
+        if close:
+            head.append("Connection: close")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode('latin-1') + body)
+        await writer.drain()
+
+    async def _route(self, method, path, body):
+        if path == '/health':
+            return {'status': 'ok', 'queue_depth': self._queue.qsize()}
+        if path == '/metrics':
+            return self.snapshot_metrics()
+        if path not in ('/generate', '/batch'):
+            raise RequestError(404, f"المسار غير موجود: {path}")
+        if method != 'POST':
+            raise RequestError(405, "استخدم POST")
+
+        try:
+            data = json.loads(body or b'{}')
+        except ValueError:
+            raise RequestError(400, "JSON غير صالح")
+        if not isinstance(data, dict):
+            raise RequestError(400, "جسم الطلب يجب أن يكون كائن JSON")
+        license_type = str(data.get('license_type') or 'STANDARD').upper()
+        region = str(data.get('region') or 'GLOBAL').upper()
+
+        if path == '/generate':
+            item = _parse_item(data.get('device_id'), license_type, region)
+            key = await self._enqueue([item])[0]
+            return {
+                'device_id': item[0], 'license_key': key,
+                'license_type': license_type, 'region': region,
+            }
+
+        device_ids = data.get('device_ids') or []
+        if not isinstance(device_ids, list) or len(device_ids) > MAX_BATCH_IDS:
+            raise RequestError(400, f"device_ids يجب أن تكون قائمة (حتى {MAX_BATCH_IDS})")
+        items, errors = [], []
+        for position, device_id in enumerate(device_ids):
+            try:
+                items.append(_parse_item(device_id, license_type, region))
+            except RequestError as e:
+                errors.append({'index': position, 'error': str(e)})
+        keys = await asyncio.gather(*self._enqueue(items)) if items else []
+        return {
+            'license_type': license_type, 'region': region,
+            'results': [
+                {'device_id': item[0], 'license_key': key} for item, key in zip(items, keys)
+            ],
+            'errors': errors,
+        }
+
+    def snapshot_metrics(self):
+        """نسخة من مقاييس الخدمة"""
+        metrics = dict(self.metrics)
+        metrics['queue_depth'] = self._queue.qsize() if self._queue else 0
+        metrics['uptime'] = time.monotonic() - self._started if self._started else 0
+        metrics['avg_batch'] = metrics['keys'] / metrics['batches'] if metrics['batches'] else 0
+        return metrics
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None, ledger_path=None,
+          use_ledger=True, **options):
+    """تشغيل الخدمة حتى الإيقاف (Ctrl+C)"""
+    ledger = LicenseLedger(ledger_path) if use_ledger else None
+    service = LicenseService(host, port, socket_path, ledger=ledger, **options)
+    asyncio.run(service.serve_forever())
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout):
+        super().__init__('localhost', timeout=timeout)
+        self._socket_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self._socket_path)
+
+
+class ServiceClient:
+    """عميل الخدمة (للواجهة والأدوات) - http://host:port أو unix:/path"""
+
+    def __init__(self, url, timeout=30):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+
+    def _request(self, method, path, payload=None):
+        body = json.dumps(payload).encode('utf-8') if payload is not None else None
+        headers = {'Content-Type': 'application/json'}
+        if self.url.startswith('unix:'):
+            connection = _UnixHTTPConnection(self.url[5:], self.timeout)
+            try:
+                connection.request(method, path, body, headers)
+                response = connection.getresponse()
+                status, data = response.status, response.read()
+            finally:
+                connection.close()
+        else:
+            request = urllib.request.Request(self.url + path, body, headers, method=method)
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    status, data = response.status, response.read()
+            except urllib.error.HTTPError as e:
+                status, data = e.code, e.read()
+
+        result = json.loads(data or b'{}')
+        if status != 200:
+            raise RuntimeError(result.get('error') or f"HTTP {status}")
+        return result
+
+    def generate(self, device_id, license_type="STANDARD", region="GLOBAL"):
+        """توليد مفتاح واحد"""
+        return self._request('POST', '/generate', {
+            'device_id': device_id, 'license_type': license_type, 'region': region
+        })
+
+    def batch(self, device_ids, license_type="STANDARD", region="GLOBAL"):
+        """توليد دفعة مفاتيح"""
+        return self._request('POST', '/batch', {
+            'device_ids': list(device_ids), 'license_type': license_type, 'region': region
+        })
+
+    def health(self):
+        return self._request('GET', '/health')
+
+    def metrics(self):
+        return self._request('GET', '/metrics')
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DentaDesk Partitioned Batch Output
+تقسيم نتائج الدفعة أثناء التوليد إلى ملفات لكل (منطقة، نوع ترخيص) للموزعين
+
+    shards = ShardWriter("reseller_out", max_bytes=50 * 1024 * 1024)
+    run_batch(device_ids, ..., progress=shards.follow(store))
+    shards.close()                 # يكتب manifest.json
+
+المخرجات داخل المجلد:
+    <REGION>_<TYPE>_001.csv ...    - نفس أعمدة ملف النتائج، ملف جديد عند تجاوز max_bytes
+    manifest.json                  - لكل ملف: المنطقة والنوع وعدد الصفوف والحجم و sha256
+
+التنسيق والتوجيه يتمان في خيط التوليد مباشرة من أعمدة المخزن بعمليات على الكتل (بدون حلقة
+Python لكل صف)، ثم تُرسل كتلة لكل ملف إلى خيوط الكتابة التي تكتب وتحسب sha256 وتبدأ ملفاً جديداً
+عند الحد. كل ملف يملكه خيط واحد فتبقى الصفوف بترتيبها، والطوابير محدودة فيتباطأ التوليد بدلاً
+من نمو الذاكرة إذا كان القرص أبطأ. الـ checksum يُحسب أثناء الكتابة فلا تُقرأ البيانات مرة ثانية.
+الملفات غير المذكورة في manifest.json ناقصة (توقفت الدفعة).
+"""
+
+import hashlib
+import json
+import os
+import queue
+import re
+import threading
+import time
+from itertools import compress, groupby
+
+from license_batch import CSV_HEADER
+from license_keys import LICENSE_TYPES, REGIONS, KEY_LENGTH
+from license_store import DEVICE_BYTES
+import license_trace
+
+MANIFEST_NAME = "manifest.json"
+
+DEFAULT_MAX_BYTES = 100 * 1024 * 1024
+
+# الصفوف التي تُقسم معاً (كل جزء يصبح كتلة واحدة لكل ملف)
+CHUNK_ROWS = 20000
+
+# الدفعات المنتظرة لكل خيط كتابة قبل أن ينتظر خيط التوليد
+QUEUE_DEPTH = 8
+
+_HEADER = (','.join(CSV_HEADER) + '\r\n').encode('ascii')
+
+# "device_id,XXXXX-XXXXX-XXXXX-XXXXX," - الجزء الثابت الطول من كل سطر
+_DEVICE_HEX = DEVICE_BYTES * 2
+_PREFIX = _DEVICE_HEX + 1 + KEY_LENGTH + 3 + 1
+_PREFIX_ROW = re.compile(b'.{%d}' % _PREFIX, re.S)
+
+# رمز النوع في النصف الأعلى من البايت ورمز المنطقة في الأدنى (5 أنواع و 9 مناطق)
+_HIGH_NIBBLE = bytes((code << 4) & 0xFF for code in range(256))
+
+
+def parse_size(text):
+    """حجم مثل 500000 أو 512K أو 50M أو 2G إلى بايت"""
+    text = str(text).strip().upper().rstrip('B')
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def shard_filename(region, license_type, part):
+    return f"{region}_{license_type}_{part:03d}.csv"
+
+
+def _layout(store, first, last, suffix_width):
+    """أسطر CSV للصفوف [first, last) بطول ثابت: المعرف والمفتاح ثم suffix_width بايت فارغة
+
+    كل عمود يُنسخ لكل الصفوف بإسناد شرائح بخطوة (في C) بدلاً من تنسيق كل سطر في Python.
+    """
+    count = last - first
+    width = _PREFIX + suffix_width
+    lines = bytearray(count * width)
+    devices = store.device_ids[first * DEVICE_BYTES:last * DEVICE_BYTES].hex().encode('ascii')
+    keys = bytes(store.keys[first * KEY_LENGTH:last * KEY_LENGTH])
+    for column in range(_DEVICE_HEX):
+        lines[column::width] = devices[column::_DEVICE_HEX]
+    comma = b',' * count
+    lines[_DEVICE_HEX::width] = comma
+    position = _DEVICE_HEX + 1
+    for column in range(KEY_LENGTH):
+        if column and column % 5 == 0:
+            lines[position::width] = b'-' * count
+            position += 1
+        lines[position::width] = keys[column::KEY_LENGTH]
+        position += 1
+    lines[position::width] = comma
+    return lines, width
+
+
+def _suffix(license_type, region, issued_at):
+    return f"{license_type},{region},{issued_at}\r\n".encode('ascii')
+
+
+class _Shard:
+    """ملفات مفتاح واحد (منطقة، نوع) - يستخدمه خيط كتابة واحد فقط"""
+
+    def __init__(self, directory, region, license_type, max_bytes):
+        self.directory = directory
+        self.region = region
+        self.license_type = license_type
+        self.max_bytes = max_bytes
+        self.part = 0
+        self.finished = []
+        self._file = None
+
+    def _open(self):
+        self.part += 1
+        self.name = shard_filename(self.region, self.license_type, self.part)
+        self._file = open(os.path.join(self.directory, self.name), 'wb')
+        self._digest = hashlib.sha256(_HEADER)
+        self._file.write(_HEADER)
+        self.size = len(_HEADER)
+        self.rows = 0
+
+    def _write(self, data, rows):
+        self._file.write(data)
+        self._digest.update(data)
+        self.size += len(data)
+        self.rows += rows
+
+    def write(self, data, width):
+        """كتابة أسطر بطول width مع الانتقال لملف جديد عند تجاوز الحد"""
+        data = memoryview(data)
+        while data:
+            if self._file is None:
+                self._open()
+            room = (self.max_bytes - self.size) // width
+            if len(data) <= room * width:
+                self._write(data, len(data) // width)
+                return
+            # سطر واحد أكبر من الحد يُكتب وحده في ملف جديد
+            count = room or (0 if self.rows else 1)
+            if count:
+                self._write(data[:count * width], count)
+            data = data[count * width:]
+            self.rotate()
+
+    def rotate(self):
+        """إغلاق الملف الحالي وحفظ بياناته للـ manifest"""
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        self.finished.append({
+            'file': self.name, 'region': self.region, 'license_type': self.license_type,
+            'part': self.part, 'rows': self.rows, 'bytes': self.size,
+            'sha256': self._digest.hexdigest(),
+        })
+
+    def abort(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class ShardWriter:
+    """توجيه نتائج المخزن إلى ملفات لكل (منطقة، نوع) عبر خيوط كتابة"""
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES, workers=None, chunk_rows=CHUNK_ROWS):
+        if max_bytes < 1024:
+            raise ValueError("حجم الملف الأقصى يجب ألا يقل عن 1 KB")
+        os.makedirs(directory, exist_ok=True)
+        if os.path.exists(os.path.join(directory, MANIFEST_NAME)):
+            raise ValueError(f"المجلد يحتوي مخرجات سابقة ({MANIFEST_NAME}): {directory}")
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.chunk_rows = chunk_rows
+        self.rows = 0
+        self.started = time.time()
+        self._shards = {}
+        self._error = None
+        self._closed = False
+        self._queues = []
+        self._threads = []
+        for number in range(max(1, workers or min(4, os.cpu_count() or 1))):
+            tasks = queue.Queue(QUEUE_DEPTH)
+            thread = threading.Thread(target=self._writer, args=(tasks,), name=f"shard-writer-{number + 1}",
+                                      daemon=True)
+            thread.start()
+            self._queues.append(tasks)
+            self._threads.append(thread)
+
+    def _writer(self, tasks):
+        while True:
+            task = tasks.get()
+            if task is None:
+                return
+            if self._error is not None:
+                continue
+            shard, data, width = task
+            try:
+                with license_trace.span("write_shard", "write", shard=f"{shard.region}_{shard.license_type}",
+                                        rows=len(data) // width):
+                    shard.write(data, width)
+            except BaseException as e:
+                self._error = e
+
+    def _check(self):
+        if self._error is not None:
+            raise RuntimeError(f"فشل في كتابة ملفات التقسيم: {self._error}") from self._error
+
+    def _submit(self, region, license_type, data, width):
+        key = (region, license_type)
+        shard = self._shards.get(key)
+        if shard is None:
+            shard = self._shards[key] = _Shard(self.directory, region, license_type, self.max_bytes)
+            # كل ملف يُسند لخيط ثابت حتى تبقى كتاباته بالترتيب
+            shard.queue = self._queues[(len(self._shards) - 1) % len(self._queues)]
+        shard.queue.put((shard, data, width))
+
+    def _route(self, store, first, last, issued_at):
+        """تقسيم صفوف لها نفس وقت الإصدار حسب (المنطقة، النوع)"""
+        count = last - first
+        types = store.types[first:last].tobytes()
+        regions = store.regions[first:last].tobytes()
+        if types.count(types[:1]) == count and regions.count(regions[:1]) == count:
+            # الحالة الشائعة (run_batch): كل الصفوف لملف واحد
+            region, license_type = REGIONS[regions[0]], LICENSE_TYPES[types[0]]
+            suffix = _suffix(license_type, region, issued_at)
+            lines, width = _layout(store, first, last, len(suffix))
+            for column, value in enumerate(suffix, _PREFIX):
+                lines[column::width] = bytes((value,)) * count
+            self._submit(region, license_type, lines, width)
+            return
+
+        lines, width = _layout(store, first, last, 0)
+        rows = _PREFIX_ROW.findall(lines)
+        # رمز مشترك لكل صف بجمع عددين كبيرين (بدون حلقة Python على الصفوف)
+        codes = (int.from_bytes(types.translate(_HIGH_NIBBLE), 'big')
+                 + int.from_bytes(regions, 'big')).to_bytes(count, 'big')
+        for code in sorted(set(codes)):
+            region, license_type = REGIONS[code & 0x0F], LICENSE_TYPES[code >> 4]
+            suffix = _suffix(license_type, region, issued_at)
+            selector = bytearray(256)
+            selector[code] = 1
+            data = suffix.join(compress(rows, codes.translate(selector))) + suffix
+            self._submit(region, license_type, data, width + len(suffix))
+
+    def write_store(self, store, start=0, stop=None):
+        """توجيه صفوف المخزن [start, stop)"""
+        self._check()
+        stop = len(store) if stop is None else min(stop, len(store))
+        for first in range(start, stop, self.chunk_rows):
+            last = min(first + self.chunk_rows, stop)
+            issued = store.issued_at[first:last]
+            if issued.count(issued[0]) == len(issued):
+                self._route(store, first, last, issued[0])
+            else:
+                position = first
+                for issued_at, group in groupby(issued):
+                    count = len(list(group))
+                    self._route(store, position, position + count, issued_at)
+                    position += count
+            self.rows += last - first
+
+    def follow(self, store, start=None):
+        """دالة progress(done, total) لـ run_batch تمرر الصفوف الجديدة من المخزن أثناء التوليد"""
+        position = [len(store) if start is None else start]
+
+        def progress(done=None, total=None):
+            end = len(store)
+            if end > position[0]:
+                self.write_store(store, position[0], end)
+                position[0] = end
+        return progress
+
+    def _stop_threads(self):
+        for tasks in self._queues:
+            tasks.put(None)
+        for thread in self._threads:
+            thread.join()
+
+    def close(self):
+        """إنهاء الكتابة وإغلاق الملفات ثم manifest.json؛ تعيد بيانات manifest"""
+        if self._closed:
+            raise RuntimeError("ShardWriter مغلق")
+        self._closed = True
+        self._stop_threads()
+        if self._error is not None:
+            self._abort_files()
+            self._check()
+
+        shards = []
+        for shard in sorted(self._shards.values(), key=lambda s: (s.region, s.license_type)):
+            shard.rotate()
+            shards.extend(shard.finished)
+        manifest = {
+            'created_at': int(self.started),
+            'max_bytes': self.max_bytes,
+            'rows': sum(shard['rows'] for shard in shards),
+            'files': len(shards),
+            'shards': shards,
+        }
+        path = os.path.join(self.directory, MANIFEST_NAME)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(path + '.tmp', path)
+        return manifest
+
+    def _abort_files(self):
+        for shard in self._shards.values():
+            shard.abort()
+
+    def abort(self):
+        """إيقاف الكتابة دون manifest (عند فشل التوليد)"""
+        if not self._closed:
+            self._closed = True
+            self._stop_threads()
+            self._abort_files()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+def verify_manifest(directory):
+    """إعادة حساب sha256 لكل ملف في manifest.json؛ تعيد قائمة الملفات غير المطابقة"""
+    with open(os.path.join(directory, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    problems = []
+    for shard in manifest['shards']:
+        path = os.path.join(directory, shard['file'])
+        digest = hashlib.sha256()
+        try:
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(block)
+        except OSError as e:
+            problems.append(f"{shard['file']}: {e}")
+            continue
+        if digest.hexdigest() != shard['sha256']:
+            problems.append(f"{shard['file']}: sha256 غير مطابق")
+    return problems
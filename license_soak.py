@@ -0,0 +1,528 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DentaDesk License Generator GUI Soak Test
+اختبار تحمل طويل لمسار التوليد في الواجهة مع كشف تسرب الذاكرة
+
+تُنشأ LicenseGeneratorGUI كما هي لكن مع عناصر Tk وهمية (بدون شاشة)، ثم يُطلب توليد
+مفتاح بمعدل ثابت لساعات. كل فترة تُسجل عينة: الذاكرة المحتجزة (tracemalloc)، وعدد
+الخيوط، وواصفات الملفات، والعمليات الفرعية، وحجم مربع النتائج. في النهاية يفشل
+الاختبار إذا استمر أي منها في الزيادة، ويعرض أكثر مواضع التخصيص نمواً.
+
+يعمل المولد في مجلد مشروع مؤقت (نسخة من سكريبت التوليد) فلا يُلمس سجل المفاتيح الحقيقي.
+"""
+
+import csv
+import gc
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import namedtuple
+from contextlib import contextmanager
+from random import Random
+
+from license_keys import generate_key
+
+# ملفات المشروع التي يحتاجها generateKeyForDevice.js
+PROJECT_FILES = (
+    os.path.join("scripts", "generateKeyForDevice.js"),
+    os.path.join("electron", "deviceBoundLicenseGenerator.js"),
+)
+
+SAMPLE_FIELDS = [
+    'elapsed', 'requests', 'completed', 'traced_bytes', 'rss_bytes',
+    'threads', 'fds', 'children', 'text_chars', 'results',
+]
+Sample = namedtuple('Sample', SAMPLE_FIELDS)
+
+# حدود النمو المسموح بعد فترة الإحماء
+MAX_BYTES_PER_REQUEST = 256
+MIN_MEMORY_GROWTH = 1024 * 1024
+THREAD_TOLERANCE = 1
+FD_TOLERANCE = 2
+CHILD_TOLERANCE = 0
+TOP_SITES = 10
+
+
+def parse_duration(text):
+    """مدة مثل 90 أو 90s أو 30m أو 8h إلى ثوانٍ"""
+    text = str(text).strip().lower()
+    units = {'s': 1, 'm': 60, 'h': 3600}
+    if text and text[-1] in units:
+        return float(text[:-1]) * units[text[-1]]
+    return float(text)
+
+
+# ----------------------------------------------------------------------
+# عناصر Tk وهمية
+
+def _noop(*args, **kwargs):
+    return None
+
+
+class FakeWidget:
+    """عنصر واجهة وهمي: يقبل أي خيارات ويتجاهل أوامر التخطيط"""
+
+    def __init__(self, *args, **kwargs):
+        self._options = dict(kwargs)
+        self._value = None
+
+    def configure(self, **kwargs):
+        self._options.update(kwargs)
+
+    config = configure
+
+    def cget(self, name):
+        return self._options.get(name)
+
+    def set(self, value):
+        self._value = value
+
+    def get(self, *args):
+        return self._value
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return _noop
+
+
+class FakeTextbox(FakeWidget):
+    """مربع نص يحتفظ بالمحتوى فعلاً حتى يُقاس نموه"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._chunks = []
+        self._lock = threading.Lock()
+
+    def insert(self, index, text):
+        with self._lock:
+            if index in ("1.0", 1.0):
+                self._chunks.insert(0, text)
+            else:
+                self._chunks.append(text)
+
+    def delete(self, start, end=None):
+        with self._lock:
+            self._chunks = []
+
+    def get(self, start="1.0", end="end"):
+        with self._lock:
+            return ''.join(self._chunks)
+
+    def size(self):
+        with self._lock:
+            return sum(map(len, self._chunks))
+
+
+class FakeRoot(FakeWidget):
+    """نافذة وهمية: after() تضيف إلى طابور يُنفذ في الخيط الرئيسي عند update()"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._queue = []
+        self._lock = threading.Lock()
+        self._main = threading.get_ident()
+
+    def after(self, delay_ms, callback=None, *args):
+        if callback is not None:
+            with self._lock:
+                self._queue.append((time.monotonic() + delay_ms / 1000.0, callback, args))
+
+    def update(self):
+        # Tk الحقيقي لا يُستدعى من خيوط أخرى؛ الخيوط العاملة تستدعي update_status فقط
+        if threading.get_ident() != self._main:
+            return
+        now = time.monotonic()
+        with self._lock:
+            due = [item for item in self._queue if item[0] <= now]
+            self._queue = [item for item in self._queue if item[0] > now]
+        for _, callback, args in due:
+            callback(*args)
+
+    def update_idletasks(self):
+        self.update()
+
+    def winfo_width(self):
+        return 1000
+
+    def winfo_height(self):
+        return 800
+
+    def winfo_screenwidth(self):
+        return 1920
+
+    def winfo_screenheight(self):
+        return 1080
+
+
+class FakeVar:
+    """بديل tk.StringVar"""
+
+    def __init__(self, master=None, value=None, name=None):
+        self._value = '' if value is None else value
+
+    def get(self):
+        return self._value
+
+    def set(self, value):
+        self._value = value
+
+    def trace_add(self, *args):
+        return ''
+
+
+class _FakeCtk:
+    """بديل customtkinter: CTk نافذة، CTkTextbox مربع نص، والباقي عناصر وهمية"""
+
+    CTk = FakeRoot
+    CTkTextbox = FakeTextbox
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return FakeWidget
+
+
+class _FakeTk:
+    StringVar = FakeVar
+    END = "end"
+
+
+class FakeDialogs:
+    """messagebox و filedialog: تُسجل الرسائل وتعيد المسارات المحددة مسبقاً"""
+
+    def __init__(self):
+        self.messages = []
+        self.open_paths = []
+        self.save_paths = []
+
+    def _record(self, kind, title, message=None, **kwargs):
+        self.messages.append((kind, title, message))
+
+    def showerror(self, title, message=None, **kwargs):
+        self._record('error', title, message)
+
+    def showwarning(self, title, message=None, **kwargs):
+        self._record('warning', title, message)
+
+    def showinfo(self, title, message=None, **kwargs):
+        self._record('info', title, message)
+
+    def askyesno(self, *args, **kwargs):
+        return False
+
+    def askopenfilename(self, **kwargs):
+        return self.open_paths.pop(0) if self.open_paths else ''
+
+    def asksaveasfilename(self, **kwargs):
+        return self.save_paths.pop(0) if self.save_paths else ''
+
+    def askdirectory(self, **kwargs):
+        return ''
+
+    def errors(self):
+        return [m for m in self.messages if m[0] == 'error']
+
+
+@contextmanager
+def headless_gui():
+    """استبدال Tk في license_generator_gui مؤقتاً؛ تعيد (الوحدة، الحوارات)"""
+    import license_generator_gui as gui
+    dialogs = FakeDialogs()
+    saved = {name: getattr(gui, name) for name in ('ctk', 'tk', 'messagebox', 'filedialog')}
+    gui.ctk = _FakeCtk()
+    gui.tk = _FakeTk()
+    gui.messagebox = dialogs
+    gui.filedialog = dialogs
+    try:
+        yield gui, dialogs
+    finally:
+        for name, value in saved.items():
+            setattr(gui, name, value)
+
+
+class FakeNodeLauncher:
+    """بديل NodeLauncher بدون Node: نفس مخرجات generateKeyForDevice.js بدون عملية فرعية"""
+
+    def __init__(self, project_path):
+        self.project_path = project_path
+
+    def node_path(self):
+        return "node"
+
+    def node_version(self):
+        return ()
+
+    def env(self, accelerate=True):
+        return dict(os.environ)
+
+    def run_generator(self, device_id, license_type="STANDARD", region="GLOBAL", accelerate=True):
+        key = generate_key(device_id, license_type)
+        stdout = (
+            f"🔑 المفتاح: {key}\n"
+            f"💻 معرف الجهاز: {device_id}\n"
+            f"📋 نوع الترخيص: {license_type}\n"
+            f"🌍 المنطقة: {region}\n"
+        )
+        return subprocess.CompletedProcess([], 0, stdout, '')
+
+
+# ----------------------------------------------------------------------
+# القياسات
+
+def _open_fds():
+    try:
+        return len(os.listdir('/proc/self/fd'))
+    except OSError:
+        return None
+
+
+def _child_processes():
+    """عدد العمليات الفرعية الحية (Linux فقط)"""
+    try:
+        tasks = os.listdir('/proc/self/task')
+    except OSError:
+        return None
+    children = set()
+    for task in tasks:
+        try:
+            with open(f'/proc/self/task/{task}/children') as f:
+                children.update(f.read().split())
+        except OSError:
+            pass
+    return len(children)
+
+
+def _rss_bytes():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _slope(xs, ys):
+    """ميل خط الانحدار (طريقة المربعات الصغرى)"""
+    n = len(xs)
+    mean_x = sum(xs) / n
+    mean_y = sum(ys) / n
+    var = sum((x - mean_x) ** 2 for x in xs)
+    if not var:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / var
+
+
+def analyze_samples(samples, max_bytes_per_request=MAX_BYTES_PER_REQUEST,
+                    min_memory_growth=MIN_MEMORY_GROWTH):
+    """تحليل العينات بعد الإحماء؛ تعيد قائمة المشاكل (فارغة إذا نجح الاختبار)"""
+    problems = []
+    if len(samples) < 4:
+        return problems
+    third = max(1, len(samples) // 3)
+    first, last = samples[:third], samples[-third:]
+
+    completed = [s.completed for s in samples]
+    traced = [s.traced_bytes for s in samples]
+    slope = _slope(completed, traced)
+    growth = min(s.traced_bytes for s in last) - min(s.traced_bytes for s in first)
+    if slope > max_bytes_per_request and growth > min_memory_growth:
+        problems.append(
+            f"الذاكرة المحتجزة تزداد: {slope:.0f} بايت لكل طلب "
+            f"(+{growth / 1024 / 1024:.1f} MB منذ نهاية الإحماء)"
+        )
+
+    # القيم الدنيا تتجاهل الخيوط والعمليات التي كانت تعمل لحظة أخذ العينة
+    for field, label, tolerance in (('threads', "الخيوط", THREAD_TOLERANCE),
+                                    ('fds', "واصفات الملفات", FD_TOLERANCE),
+                                    ('children', "العمليات الفرعية", CHILD_TOLERANCE)):
+        if getattr(samples[0], field) is None:
+            continue
+        before = min(getattr(s, field) for s in first)
+        after = min(getattr(s, field) for s in last)
+        if after > before + tolerance:
+            problems.append(f"عدد {label} يزداد: {before} ← {after}")
+
+    text = [s.text_chars for s in last]
+    if min(text) > max(s.text_chars for s in first) * 2 + 10000:
+        problems.append(f"مربع النتائج يكبر: {max(s.text_chars for s in first)} ← {min(text)} حرف")
+    return problems
+
+
+# ----------------------------------------------------------------------
+# الاختبار
+
+class SoakTest:
+    """تشغيل مسار التوليد في الواجهة بمعدل ثابت وأخذ عينات دورية"""
+
+    def __init__(self, duration=3600, rate=1.0, sample_every=30.0, warmup=None,
+                 use_node=True, batch_every=0, batch_size=50, clear_every=0,
+                 seed=0, source_path=None, log=print):
+        self.duration = duration
+        self.rate = rate
+        self.sample_every = sample_every
+        self.warmup = warmup if warmup is not None else min(duration / 5, 300)
+        self.use_node = use_node
+        self.batch_every = batch_every
+        self.batch_size = batch_size
+        self.clear_every = clear_every
+        self.random = Random(seed)
+        self.source_path = source_path or os.path.dirname(os.path.abspath(__file__))
+        self.log = log
+        self.samples = []
+        self.baseline = None
+        self.top_sites = []
+        self.requests = 0
+        self.skipped = 0
+
+    def _device_id(self):
+        return self.random.getrandbits(128).to_bytes(16, 'big').hex()
+
+    def _setup_project(self):
+        project = tempfile.mkdtemp(prefix='dentadesk-soak-')
+        for relative in PROJECT_FILES:
+            target = os.path.join(project, relative)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copy2(os.path.join(self.source_path, relative), target)
+        return project
+
+    def _write_batch_file(self, project):
+        path = os.path.join(project, f'batch-{self.requests}.txt')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(self._device_id() for _ in range(self.batch_size)) + '\n')
+        return path
+
+    def _start_request(self, app, dialogs, project):
+        """بدء طلب توليد (مفرد أو دفعة)؛ تعيد الخيوط التي بدأها"""
+        before = set(threading.enumerate())
+        self.requests += 1
+        if self.clear_every and self.requests % self.clear_every == 0:
+            app.clear_data()
+        if self.batch_every and self.requests % self.batch_every == 0:
+            dialogs.open_paths.append(self._write_batch_file(project))
+            app.generate_batch()
+        else:
+            app.device_id.set(self._device_id())
+            app.generate_license_key()
+        return [t for t in threading.enumerate() if t not in before]
+
+    def _sample(self, app, started, completed):
+        gc.collect()
+        traced, _ = tracemalloc.get_traced_memory()
+        return Sample(
+            round(time.monotonic() - started, 1), self.requests, completed, traced, _rss_bytes(),
+            threading.active_count(), _open_fds(), _child_processes(),
+            app.result_text.size(), len(app.results),
+        )
+
+    def run(self):
+        """تشغيل الاختبار؛ تعيد قائمة المشاكل (فارغة = نجح)"""
+        project = self._setup_project()
+        was_tracing = tracemalloc.is_tracing()
+        if not was_tracing:
+            tracemalloc.start()
+        try:
+            with headless_gui() as (gui, dialogs):
+                app = gui.LicenseGeneratorGUI()
+                app.project_path.set(project)
+                if not self.use_node:
+                    launcher = FakeNodeLauncher(project)
+                    app.get_node_launcher = lambda: launcher
+                return self._loop(app, dialogs, project)
+        finally:
+            if not was_tracing:
+                tracemalloc.stop()
+            shutil.rmtree(project, ignore_errors=True)
+
+    def _loop(self, app, dialogs, project):
+        started = time.monotonic()
+        interval = 1.0 / self.rate
+        next_request = started
+        next_sample = started + self.sample_every
+        warmed_up = False
+        in_flight = []
+        completed = 0
+        errors_seen = 0
+
+        while True:
+            now = time.monotonic()
+            elapsed = now - started
+            if elapsed >= self.duration:
+                break
+            app.root.update()
+
+            alive = [t for t in in_flight if t.is_alive()]
+            completed += len(in_flight) - len(alive)
+            in_flight = alive
+
+            if now >= next_request:
+                if in_flight:
+                    # الطلب السابق لم ينتهِ بعد: لا نكدس الطلبات فوق بعضها
+                    self.skipped += 1
+                else:
+                    in_flight = self._start_request(app, dialogs, project)
+                next_request += interval
+                if next_request < now:
+                    next_request = now + interval
+
+            if not warmed_up and elapsed >= self.warmup:
+                warmed_up = True
+                gc.collect()
+                self.baseline = tracemalloc.take_snapshot()
+                self.log(f"🔥 انتهى الإحماء بعد {self.requests} طلب")
+
+            if now >= next_sample:
+                next_sample += self.sample_every
+                # العينة تؤخذ بين الطلبات حتى لا تُحسب موارد طلب قيد التنفيذ
+                for thread in in_flight:
+                    thread.join(timeout=30)
+                completed += sum(1 for t in in_flight if not t.is_alive())
+                in_flight = [t for t in in_flight if t.is_alive()]
+                app.root.update()
+                sample = self._sample(app, started, completed)
+                if warmed_up:
+                    self.samples.append(sample)
+                self.log(
+                    f"⏱️  {sample.elapsed:>8.0f}s  طلبات {sample.completed:>7}  "
+                    f"ذاكرة {sample.traced_bytes / 1024:>9.0f} KB  خيوط {sample.threads:>3}  "
+                    f"ملفات {sample.fds if sample.fds is not None else '-':>4}  "
+                    f"عمليات {sample.children if sample.children is not None else '-':>3}  "
+                    f"نص {sample.text_chars:>7}"
+                )
+                errors = dialogs.errors()
+                if len(errors) > errors_seen:
+                    for _, title, message in errors[errors_seen:]:
+                        self.log(f"⚠️  {title}: {message}")
+                    errors_seen = len(errors)
+
+            time.sleep(min(0.01, interval / 10))
+
+        for thread in in_flight:
+            thread.join(timeout=30)
+        app.root.update()
+
+        problems = analyze_samples(self.samples)
+        if problems and self.baseline is not None:
+            gc.collect()
+            final = tracemalloc.take_snapshot()
+            filters = [
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+                tracemalloc.Filter(False, __file__),
+            ]
+            self.top_sites = final.filter_traces(filters).compare_to(
+                self.baseline.filter_traces(filters), 'lineno'
+            )[:TOP_SITES]
+        return problems
+
+    def write_samples(self, path):
+        """حفظ العينات (CSV)"""
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(SAMPLE_FIELDS)
+            writer.writerows(self.samples)
+        return len(self.samples)
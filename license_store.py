@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DentaDesk Compact License Store
+مخزن مضغوط لنتائج توليد المفاتيح في أعمدة array/bytearray
+
+كل صف يحتاج 42 بايت فقط:
+معرف الجهاز (16 بايت) + المفتاح بدون شرطات (20 بايت)
++ رمز نوع الترخيص (1) + رمز المنطقة (1) + وقت الإصدار (4)
+"""
+
+import time
+from array import array
+
+from license_keys import (
+    LICENSE_TYPES, REGIONS, KEY_LENGTH, compact_key, format_key
+)
+
+DEVICE_BYTES = 16
+
+_TYPE_CODES = {name: code for code, name in enumerate(LICENSE_TYPES)}
+_REGION_CODES = {name: code for code, name in enumerate(REGIONS)}
+
+
+def type_code(license_type):
+    """رمز نوع الترخيص"""
+    try:
+        return _TYPE_CODES[license_type]
+    except KeyError:
+        raise ValueError(f"نوع الترخيص غير صالح: {license_type}")
+
+
+def region_code(region):
+    """رمز المنطقة"""
+    try:
+        return _REGION_CODES[region]
+    except KeyError:
+        raise ValueError(f"المنطقة غير صالحة: {region}")
+
+
+class LicenseRow:
+    """عرض لصف واحد داخل المخزن (بدون نسخ البيانات)"""
+
+    __slots__ = ('_store', 'index')
+
+    def __init__(self, store, index):
+        self._store = store
+        self.index = index
+
+    @property
+    def device_id(self):
+        offset = self.index * DEVICE_BYTES
+        return self._store.device_ids[offset:offset + DEVICE_BYTES].hex()
+
+    @property
+    def license_key(self):
+        offset = self.index * KEY_LENGTH
+        return format_key(self._store.keys[offset:offset + KEY_LENGTH].decode('ascii'))
+
+    @property
+    def license_type(self):
+        return LICENSE_TYPES[self._store.types[self.index]]
+
+    @property
+    def region(self):
+        return REGIONS[self._store.regions[self.index]]
+
+    @property
+    def issued_at(self):
+        return self._store.issued_at[self.index]
+
+    def as_dict(self):
+        """تحويل الصف إلى dict"""
+        return {
+            'device_id': self.device_id,
+            'license_key': self.license_key,
+            'license_type': self.license_type,
+            'region': self.region,
+            'issued_at': self.issued_at,
+        }
+
+    def __repr__(self):
+        return f"LicenseRow({self.device_id}, {self.license_key}, {self.license_type}, {self.region})"
+
+
+class LicenseStore:
+    """مخزن أعمدة مضغوط لملايين المفاتيح المُولدة"""
+
+    def __init__(self):
+        self.device_ids = bytearray()
+        self.keys = bytearray()
+        self.types = array('B')
+        self.regions = array('B')
+        self.issued_at = array('I')
+
+    def __len__(self):
+        return len(self.types)
+
+    def __getitem__(self, index):
+        count = len(self)
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError("LicenseStore index out of range")
+        return LicenseRow(self, index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield LicenseRow(self, index)
+
+    def append(self, device_id, license_key, license_type, region, issued_at=None):
+        """إضافة نتيجة واحدة"""
+        key = compact_key(license_key).encode('ascii')
+        if len(key) != KEY_LENGTH:
+            raise ValueError(f"مفتاح الترخيص غير صالح: {license_key}")
+        device = bytes.fromhex(device_id)
+        if len(device) != DEVICE_BYTES:
+            raise ValueError(f"معرف الجهاز غير صالح: {device_id}")
+
+        # التحقق من الرموز قبل الإضافة حتى تبقى الأعمدة متطابقة الطول
+        codes = (type_code(license_type), region_code(region))
+        self.device_ids += device
+        self.keys += key
+        self.types.append(codes[0])
+        self.regions.append(codes[1])
+        self.issued_at.append(int(issued_at if issued_at is not None else time.time()))
+
+    def extend(self, other):
+        """دمج مخزن آخر في هذا المخزن"""
+        self.device_ids += other.device_ids
+        self.keys += other.keys
+        self.types.extend(other.types)
+        self.regions.extend(other.regions)
+        self.issued_at.extend(other.issued_at)
+
+    def iter_chunks(self, start=0, stop=None, chunk_rows=50000):
+        """قراءة الصفوف على شكل مجموعات من tuples (أسرع من LicenseRow للتصدير)
+
+        كل tuple: (device_id, license_key, license_type, region, issued_at)
+        """
+        stop = len(self) if stop is None else min(stop, len(self))
+        hex_width = DEVICE_BYTES * 2
+        for first in range(start, stop, chunk_rows):
+            last = min(first + chunk_rows, stop)
+            devices = self.device_ids[first * DEVICE_BYTES:last * DEVICE_BYTES].hex()
+            keys = self.keys[first * KEY_LENGTH:last * KEY_LENGTH].decode('ascii')
+            device_list = [devices[i:i + hex_width] for i in range(0, len(devices), hex_width)]
+            key_list = [
+                f"{keys[i:i + 5]}-{keys[i + 5:i + 10]}-{keys[i + 10:i + 15]}-{keys[i + 15:i + 20]}"
+                for i in range(0, len(keys), KEY_LENGTH)
+            ]
+            type_list = [LICENSE_TYPES[code] for code in self.types[first:last]]
+            region_list = [REGIONS[code] for code in self.regions[first:last]]
+            yield list(zip(device_list, key_list, type_list, region_list, self.issued_at[first:last]))
+
+    def tail(self, count):
+        """آخر الصفوف (لعرض معاينة في الواجهة)"""
+        start = max(0, len(self) - count)
+        return [LicenseRow(self, index) for index in range(start, len(self))]
+
+    def clear(self):
+        """مسح جميع النتائج"""
+        self.__init__()
+
+    def memory_usage(self):
+        """الحجم التقريبي للبيانات بالبايت"""
+        return (
+            len(self.device_ids) + len(self.keys)
+            + len(self.types) * self.types.itemsize
+            + len(self.regions) * self.regions.itemsize
+            + len(self.issued_at) * self.issued_at.itemsize
+        )
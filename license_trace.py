@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DentaDesk Job Timeline Tracing
+تتبع زمني اختياري لكل مهمة ولكل مفتاح بصيغة Chrome Trace Event
+
+يفتح الملف الناتج في https://ui.perfetto.dev أو chrome://tracing:
+
+    license_trace.enable()
+    ... تشغيل الدفعة ...
+    license_trace.export("batch.trace.json")
+
+الأحداث المسجلة (الفئة cat بين قوسين):
+    enqueue / schedule        (service)   إضافة الطلب للطابور وتجميع الدفعة الصغيرة
+    dispatch / worker         (pool)      الإرسال لعملية عاملة والتنفيذ داخلها
+    spawn                     (node)      تشغيل generateKeyForDevice.js
+    parse                     (io)        قراءة المعرفات أو مخرجات Node
+    hash / write              (key)       توليد كل مفتاح وإضافته للمخزن
+    write                     (io)        السجل والتصدير
+    ui                        (ui)        تحديث الواجهة
+
+عند التعطيل (الافتراضي) تكلف كل نقطة تتبع فحص متغير واحد فقط. عند التفعيل
+تُخزن أحداث المفاتيح في مصفوفات array('q') بدل كائنات Python، وإذا تجاوز
+عددها الحد الأقصى تُسجل عينة منتظمة (مفتاح من كل N) بدل نمو الذاكرة.
+الطوابع الزمنية من time.perf_counter_ns (ساعة رتيبة مشتركة بين العمليات)،
+فتظهر أحداث العمليات العاملة على نفس المحور الزمني.
+"""
+
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from array import array
+
+# عند تعريفه تسجل الواجهتان التتبع وتحفظه في هذا المسار عند الإغلاق
+TRACE_ENV = "DENTADESK_TRACE"
+
+# الحد الأقصى لأحداث المفاتيح المسجلة (لكل عملية تتبع)
+MAX_KEY_EVENTS = 2000000
+# الحد الأقصى لأحداث المهام والمراحل
+MAX_EVENTS = 200000
+
+now = time.perf_counter_ns
+
+
+class KeyLane:
+    """أحداث مرحلة واحدة لكل مفتاح داخل مهمة (index, start_ns, dur_ns)"""
+
+    __slots__ = ('name', 'job', 'pid', 'tid', 'data')
+
+    def __init__(self, name, job, pid, tid):
+        self.name = name
+        self.job = job
+        self.pid = pid
+        self.tid = tid
+        self.data = array('q')
+
+    def __len__(self):
+        return len(self.data) // 3
+
+
+class Tracer:
+    """مجمع أحداث التتبع لعملية واحدة"""
+
+    def __init__(self, max_events=MAX_EVENTS, max_key_events=MAX_KEY_EVENTS, key_every=1):
+        self.pid = os.getpid()
+        self.max_events = max_events
+        self.max_key_events = max_key_events
+        self.key_every = max(1, key_every)
+        self.dropped = 0
+        self.origin = now()
+        # (ph, name, cat, ts_ns, dur_ns, pid, tid, args)
+        self._events = []
+        self._lanes = []
+        self._key_events = 0
+        self._threads = {}
+        self._processes = {self.pid: "license tools"}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def next_id(self):
+        """معرف فريد لمهمة أو لحدث غير متزامن"""
+        return next(self._ids)
+
+    def _thread(self):
+        tid = threading.get_native_id()
+        if tid not in self._threads:
+            self._threads[tid] = threading.current_thread().name
+        return tid
+
+    def add(self, ph, name, cat, start, duration=0, args=None, tid=None):
+        """إضافة حدث خام (X مكتمل، i لحظي، b/e غير متزامن)"""
+        if len(self._events) >= self.max_events:
+            self.dropped += 1
+            return
+        self._events.append((ph, name, cat, start, duration, self.pid,
+                             self._thread() if tid is None else tid, args))
+
+    def complete(self, name, cat, start, end=None, **args):
+        """حدث مكتمل بين start و end (بالنانوثانية من perf_counter_ns)"""
+        self.add('X', name, cat, start, (now() if end is None else end) - start, args or None)
+
+    def instant(self, name, cat, **args):
+        self.add('i', name, cat, now(), 0, args or None)
+
+    def async_span(self, name, cat, start, end=None, **args):
+        """حدث يتداخل مع غيره على نفس الخيط (coroutines) فيُعرض في مسار منفصل"""
+        event_id = self.next_id()
+        args['id'] = event_id
+        self.add('b', name, cat, start, 0, args)
+        self.add('e', name, cat, now() if end is None else end, 0, {'id': event_id})
+
+    def key_lanes(self, names, job, expected):
+        """مسارات أحداث المفاتيح لمهمة وعدد المفاتيح بين كل عينتين
+
+        تعيد (المسارات، every). every يكبر تلقائياً عندما لا تكفي الأحداث
+        المتبقية لتسجيل كل المفاتيح المتوقعة.
+        """
+        tid = self._thread()
+        lanes = [KeyLane(name, job, self.pid, tid) for name in names]
+        with self._lock:
+            remaining = max(0, self.max_key_events - self._key_events)
+            wanted = len(names) * -(-max(expected, 1) // self.key_every)
+            every = self.key_every
+            if wanted > remaining:
+                every = -(-max(expected, 1) * len(names) // max(remaining, 1))
+            self._key_events += len(names) * -(-max(expected, 1) // every)
+            self._lanes.extend(lanes)
+        return lanes, every
+
+    def merge(self, payload):
+        """دمج أحداث عملية عاملة (ناتج traced_call)"""
+        events, lanes, threads, processes = payload
+        with self._lock:
+            self._lanes.extend(lanes)
+        for event in events:
+            if len(self._events) >= self.max_events:
+                self.dropped += 1
+                continue
+            self._events.append(event)
+        self._threads.update(threads)
+        self._processes.update(processes)
+
+    def snapshot(self):
+        """الأحداث بصيغة قابلة للنقل بين العمليات"""
+        # مفاتيح الخيوط تحمل معرف العملية لأنها تُدمج في مجمع عملية أخرى
+        threads = {(self.pid, tid): thread for tid, thread in self._threads.items()}
+        return self._events, self._lanes, threads, self._processes
+
+    def event_count(self):
+        return len(self._events) + sum(len(lane) for lane in self._lanes)
+
+    # ------------------------------------------------------------------
+    # التصدير
+
+    def _iter_lines(self):
+        """أسطر JSON للأحداث (أحداث المفاتيح تُنسق مباشرة دون إنشاء dict لكل حدث)"""
+        origin = self.origin
+        dumps = functools.partial(json.dumps, ensure_ascii=False, separators=(',', ':'), default=str)
+
+        for pid, name in self._processes.items():
+            yield dumps({'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0, 'args': {'name': name}})
+        for tid, name in self._threads.items():
+            pid = self.pid
+            if isinstance(tid, tuple):
+                pid, tid = tid
+            yield dumps({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}})
+
+        for ph, name, cat, start, duration, pid, tid, args in self._events:
+            event = {'name': name, 'cat': cat, 'ph': ph, 'ts': round((start - origin) / 1000, 3),
+                     'pid': pid, 'tid': tid}
+            if ph == 'X':
+                event['dur'] = round(duration / 1000, 3)
+            elif ph == 'i':
+                event['s'] = 't'
+            elif ph in ('b', 'e'):
+                args = dict(args)
+                event['id'] = args.pop('id')
+            if args:
+                event['args'] = args
+            yield dumps(event)
+
+        for lane in self._lanes:
+            template = ('{"name":%s,"cat":"key","ph":"X","ts":%%.3f,"dur":%%.3f,"pid":%d,"tid":%d,'
+                        '"args":{"job":%s,"index":%%d}}') % (dumps(lane.name), lane.pid, lane.tid, dumps(lane.job))
+            data = lane.data
+            for position in range(0, len(data), 3):
+                yield template % ((data[position + 1] - origin) / 1000, data[position + 2] / 1000, data[position])
+
+    def export(self, path):
+        """حفظ التتبع بصيغة JSON (Chrome Trace Event)؛ تعيد عدد الأحداث"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = path + '.tmp'
+        count = 0
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write('{"displayTimeUnit":"ms","otherData":')
+            json.dump({'dropped': self.dropped, 'key_every': self.key_every}, f)
+            f.write(',"traceEvents":[\n')
+            lines = self._iter_lines()
+            for line in lines:
+                f.write(line)
+                count += 1
+                break
+            for line in lines:
+                f.write(',\n')
+                f.write(line)
+                count += 1
+            f.write('\n]}\n')
+        os.replace(tmp_path, path)
+        return count
+
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'cat', 'args', 'start')
+
+    def __init__(self, tracer, name, cat, args):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.start = now()
+        return self
+
+    @property
+    def id(self):
+        """معرف المهمة (من job) أو None"""
+        return self.args.get('job')
+
+    def set(self, **args):
+        """إضافة قيم للحدث قبل انتهائه (عدد المفاتيح مثلاً)"""
+        self.args.update(args)
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        self.tracer.add('X', self.name, self.cat, self.start, now() - self.start, self.args or None)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    id = None
+
+    def __enter__(self):
+        return self
+
+    def set(self, **args):
+        pass
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+_tracer = None
+
+
+def enable(**options):
+    """تفعيل التتبع في هذه العملية (يعيد Tracer موجوداً إن كان مفعلاً)"""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer(**options)
+    return _tracer
+
+
+def enable_from_env():
+    """تفعيل التتبع إن عُرّف DENTADESK_TRACE؛ تعيد مسار الحفظ أو None"""
+    path = os.environ.get(TRACE_ENV)
+    if path:
+        enable()
+    return path or None
+
+
+def disable():
+    """إيقاف التتبع وإعادة المجمع الحالي (للتصدير)"""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+
+def current():
+    return _tracer
+
+
+def export(path):
+    """حفظ أحداث المجمع الحالي؛ تعيد عدد الأحداث (0 عند التعطيل)"""
+    return _tracer.export(path) if _tracer is not None else 0
+
+
+def span(name, cat="job", **args):
+    """سياق يسجل حدثاً مكتملاً (لا شيء عند التعطيل)"""
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_SPAN
+    return _Span(tracer, name, cat, args)
+
+
+def job(name, cat="job", **args):
+    """مثل span مع معرف مهمة جديد في args['job']"""
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_SPAN
+    args['job'] = tracer.next_id()
+    return _Span(tracer, name, cat, args)
+
+
+def instant(name, cat="job", **args):
+    tracer = _tracer
+    if tracer is not None:
+        tracer.instant(name, cat, **args)
+
+
+def key_lanes(names, job, expected):
+    """مسارات أحداث المفاتيح أو (None, 0) عند التعطيل - انظر Tracer.key_lanes"""
+    tracer = _tracer
+    if tracer is None:
+        return None, 0
+    return tracer.key_lanes(names, job, expected)
+
+
+def traced(name, cat):
+    """مزخرف يسجل كل استدعاء للدالة كحدث مكتمل"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return func(*args, **kwargs)
+            with _Span(_tracer, name, cat, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def traced_call(func, name, cat, job, *args):
+    """تشغيل func(*args) داخل عملية عاملة مع تتبعها؛ تعيد (النتيجة، الأحداث)
+
+    تُستخدم مع ProcessPoolExecutor.submit ثم Tracer.merge في العملية الرئيسية.
+    """
+    global _tracer
+    previous = _tracer
+    _tracer = tracer = Tracer()
+    tracer._processes = {tracer.pid: f"worker {tracer.pid}"}
+    try:
+        with _Span(tracer, name, cat, {'job': job}):
+            result = func(*args)
+    finally:
+        _tracer = previous
+    return result, tracer.snapshot()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DentaDesk Backend Warm-up
+تجهيز مسار التوليد في الخلفية بعد ظهور النافذة حتى يكون أول مفتاح بسرعة العاشر
+
+أول توليد بعد فتح الواجهة كان الأبطأ: البحث عن Node.js في PATH، وقراءة scripts/ و electron/
+من القرص لأول مرة، وإنشاء ذاكرة الترجمة، وفتح السجل والفلتر والفهرس عند أول حاجة.
+تُنفذ هذه الخطوات في خيط منفصل مع توليد تجريبي واحد، وتعرض الواجهة حالة التجهيز
+دون أن تنتظرها. فشل أي خطوة لا يمنع التوليد (يُعاد نفس العمل عند أول طلب).
+
+    warmup = Warmup(node_steps(launcher), on_step=..., on_done=...)
+    warmup.start()
+"""
+
+import os
+import re
+import threading
+import time
+
+from license_keys import generate_key
+from license_node import PROBE_DEVICE_ID, SCRIPT_FILES
+import license_trace
+
+_KEY_PATTERN = re.compile(r'[0-9A-F]{5}(?:-[0-9A-F]{5}){3}')
+
+# حجم القراءة عند تحميل الملفات لذاكرة نظام التشغيل
+_READ_SIZE = 1024 * 1024
+
+
+def prime_files(project_path, names=SCRIPT_FILES):
+    """قراءة الملفات مرة واحدة حتى تكون في ذاكرة نظام الملفات عند أول تشغيل لـ Node"""
+    total = 0
+    for name in names:
+        with open(os.path.join(project_path, name), 'rb') as f:
+            while True:
+                data = f.read(_READ_SIZE)
+                if not data:
+                    break
+                total += len(data)
+    return total
+
+
+def probe_node(launcher):
+    """توليد تجريبي عبر Node.js ومطابقته مع التوليد الداخلي"""
+    process = launcher.run_generator(PROBE_DEVICE_ID)
+    if process.returncode != 0:
+        raise RuntimeError(process.stderr.strip() or f"exit {process.returncode}")
+    match = _KEY_PATTERN.search(process.stdout)
+    if match is None:
+        raise RuntimeError("لم يتم العثور على المفتاح في مخرجات Node.js")
+    if match.group(0) != generate_key(PROBE_DEVICE_ID, "STANDARD"):
+        raise RuntimeError("مفتاح Node.js لا يطابق التوليد الداخلي")
+    return match.group(0)
+
+
+def node_steps(launcher):
+    """خطوات تجهيز التوليد عبر Node.js: [(الاسم، الوصف، الدالة)]"""
+    return [
+        ("node_path", "البحث عن Node.js", launcher.node_path),
+        ("node_version", "فحص إصدار Node.js", launcher.node_version),
+        ("scripts", "تحميل السكريبتات", lambda: prime_files(launcher.project_path)),
+        ("compile_cache", "تجهيز ذاكرة الترجمة", launcher.env),
+        ("probe", "توليد تجريبي", lambda: probe_node(launcher)),
+    ]
+
+
+def service_steps(client):
+    """خطوات تجهيز الاتصال بخدمة التوليد المحلية"""
+    return [("service", "الاتصال بخدمة التوليد", client.health)]
+
+
+class Warmup:
+    """تنفيذ خطوات التجهيز بالترتيب في خيط خلفي
+
+    on_step(الوصف) قبل كل خطوة و on_done(warmup) في النهاية - تُستدعيان من الخيط
+    الخلفي، فعلى الواجهة تمريرهما عبر root.after.
+    """
+
+    def __init__(self, steps, on_step=None, on_done=None):
+        self.steps = list(steps)
+        self.on_step = on_step
+        self.on_done = on_done
+        # (الاسم، الزمن بالمللي ثانية، الخطأ أو None)
+        self.results = []
+        self.elapsed_ms = None
+        self._thread = None
+        self._done = threading.Event()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="warmup", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        started = time.perf_counter()
+        try:
+            with license_trace.job("warmup", "gui", steps=len(self.steps)):
+                for name, label, func in self.steps:
+                    if self.on_step:
+                        self.on_step(label)
+                    step_started = time.perf_counter()
+                    error = None
+                    try:
+                        with license_trace.span(name, "warmup"):
+                            func()
+                    except Exception as e:
+                        error = str(e) or type(e).__name__
+                    self.results.append((name, (time.perf_counter() - step_started) * 1000, error))
+        finally:
+            self.elapsed_ms = (time.perf_counter() - started) * 1000
+            self._done.set()
+        if self.on_done:
+            self.on_done(self)
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """انتظار انتهاء التجهيز؛ تعيد True إذا انتهى"""
+        return self._done.wait(timeout)
+
+    def failures(self):
+        return [(name, error) for name, _, error in self.results if error]
+
+    @property
+    def ready(self):
+        return self.done and not self.failures()
+
+    def summary(self):
+        """نص قصير لمؤشر الحالة"""
+        if not self.done:
+            return "⏳ جاري تجهيز المولد..."
+        failures = self.failures()
+        if not failures:
+            return f"🟢 جاهز ({self.elapsed_ms:.0f} ms)"
+        name, error = failures[0]
+        return f"🟠 تجهيز غير مكتمل ({name}): {error}"
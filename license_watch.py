@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DentaDesk Watch-Folder Daemon
+مراقبة مجلد الطلبات وتوليد المفاتيح تلقائياً لملفات معرفات الأجهزة
+
+    <dir>/               - تُسقط هنا ملفات .txt أو .csv
+    <dir>/processing/    - الملف قيد المعالجة (مع ملف journal للاستئناف)
+    <dir>/done/          - الملف الأصلي + <name>.licenses.csv (+ <name>.errors.csv)
+    <dir>/failed/        - الملفات التي تعذرت قراءتها + <name>.error.txt
+
+ملفات CSV التي تحتوي عمود device_id يمكن أن تحدد license_type و region لكل سطر.
+كل دفعة تُسجل في journal قبل وبعد إضافتها للسجل، فلا يُسجل أي مفتاح مرتين بعد انقطاع مفاجئ.
+"""
+
+import csv
+import io
+import json
+import os
+import time
+from itertools import islice
+
+from license_keys import LICENSE_TYPES, REGIONS, normalize_device_id, validate_device_id
+from license_batch import run_batch, split_new_devices
+from license_bloom import IssuedFilter
+from license_ledger import LicenseLedger
+
+INPUT_EXTENSIONS = ('.txt', '.csv')
+RESULT_HEADER = ['device_id', 'license_key', 'license_type', 'region', 'status']
+ERROR_HEADER = ['line', 'value', 'reason']
+
+
+def _read_input(path, license_type, region):
+    """قراءة ملف الإدخال بشكل متدفق: (رقم السطر، المعرف، النوع، المنطقة)"""
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        first = f.readline()
+        f.seek(0)
+        if 'device_id' in first.lower():
+            reader = csv.DictReader(f)
+            reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+            for record in reader:
+                line_no = reader.line_num
+                device_id = normalize_device_id(record.get('device_id') or '')
+                row_type = (record.get('license_type') or license_type).strip().upper()
+                row_region = (record.get('region') or region).strip().upper()
+                yield line_no, device_id, row_type, row_region
+        else:
+            for line_no, line in enumerate(f, 1):
+                yield line_no, normalize_device_id(line), license_type, region
+
+
+def _check_row(device_id, license_type, region):
+    """سبب رفض السطر (أو None)"""
+    if not validate_device_id(device_id):
+        return "invalid device id"
+    if license_type not in LICENSE_TYPES:
+        return f"invalid license type {license_type}"
+    if region not in REGIONS:
+        return f"invalid region {region}"
+    return None
+
+
+def _unique_path(directory, name):
+    """اسم غير مستخدم داخل المجلد"""
+    path = os.path.join(directory, name)
+    if not os.path.exists(path):
+        return path
+    stem, ext = os.path.splitext(name)
+    return os.path.join(directory, f"{stem}-{time.strftime('%Y%m%d%H%M%S')}-{os.getpid()}{ext}")
+
+
+def _append_csv(path, header, rows):
+    """إضافة صفوف إلى ملف CSV مع fsync (وكتابة الترويسة لملف جديد)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        writer.writerow(header)
+    writer.writerows(rows)
+    with open(path, 'ab') as f:
+        f.write(buffer.getvalue().encode('utf-8'))
+        f.flush()
+        os.fsync(f.fileno())
+        return f.tell()
+
+
+class WatchDaemon:
+    """مراقبة مجلد ومعالجة الملفات الجديدة على دفعات محدودة الحجم"""
+
+    def __init__(self, directory, license_type="STANDARD", region="GLOBAL", ledger=None,
+                 batch_size=5000, interval=1.0, settle=1.0, operator="watch", log=print):
+        self.directory = os.path.abspath(directory)
+        self.license_type = license_type
+        self.region = region
+        self.ledger = LicenseLedger(ledger)
+        self.batch_size = batch_size
+        self.interval = interval
+        self.settle = settle
+        self.operator = operator
+        self.log = log
+        self.processing_dir = os.path.join(self.directory, 'processing')
+        self.done_dir = os.path.join(self.directory, 'done')
+        self.failed_dir = os.path.join(self.directory, 'failed')
+        self._seen = {}
+        self._bloom = None
+
+    # ------------------------------------------------------------------
+    # المراقبة
+
+    def setup(self):
+        for path in (self.directory, self.processing_dir, self.done_dir, self.failed_dir):
+            os.makedirs(path, exist_ok=True)
+
+    def scan(self):
+        """الملفات الجاهزة (لم يتغير حجمها أو وقت تعديلها منذ فترة settle)"""
+        ready = []
+        now = time.time()
+        current = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                name = entry.name
+                if name.startswith('.') or not name.lower().endswith(INPUT_EXTENSIONS):
+                    continue
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+                signature = (stat.st_size, stat.st_mtime_ns)
+                current[name] = signature
+                if self._seen.get(name) == signature and now - stat.st_mtime >= self.settle:
+                    ready.append(name)
+        self._seen = current
+        return sorted(ready)
+
+    def has_pending(self):
+        """هل توجد ملفات لم تستقر بعد؟"""
+        return bool(self._seen)
+
+    def claim(self, name):
+        """نقل الملف إلى processing/ بشكل ذري (None إذا سبقنا إليه غيرنا)"""
+        target = _unique_path(self.processing_dir, name)
+        try:
+            os.rename(os.path.join(self.directory, name), target)
+        except FileNotFoundError:
+            return None
+        self._seen.pop(name, None)
+        return target
+
+    def poll_once(self):
+        """فحص واحد للمجلد ومعالجة الملفات الجاهزة"""
+        processed = 0
+        for name in self.scan():
+            path = self.claim(name)
+            if path:
+                self.process(path)
+                processed += 1
+        return processed
+
+    def recover(self):
+        """استئناف الملفات التي انقطعت معالجتها"""
+        for name in sorted(os.listdir(self.processing_dir)):
+            if name.lower().endswith(INPUT_EXTENSIONS):
+                self.log(f"♻️  استئناف: {name}")
+                self.process(os.path.join(self.processing_dir, name))
+
+    def run_forever(self):
+        """تشغيل المراقبة حتى الإيقاف"""
+        self.setup()
+        self.recover()
+        while True:
+            if not self.poll_once():
+                time.sleep(self.interval)
+
+    # ------------------------------------------------------------------
+    # المعالجة
+
+    def _journal_path(self, path):
+        return path + '.journal'
+
+    def _load_journal(self, path):
+        try:
+            with open(self._journal_path(path), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'lines': 0, 'result_size': 0, 'error_size': 0, 'pending': None}
+
+    def _save_journal(self, path, journal):
+        tmp_path = self._journal_path(path) + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(journal, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._journal_path(path))
+
+    def _already_logged(self, pending):
+        """الأجهزة التي وصلت للسجل من دفعة انقطعت قبل تأكيدها"""
+        logged = set()
+        offset = pending['ledger_offset']
+        if os.path.exists(self.ledger.path) and os.path.getsize(self.ledger.path) > offset:
+            with open(self.ledger.path, 'rb') as f:
+                f.seek(offset)
+                tail = f.read().decode('utf-8', 'replace')
+            for line in tail.splitlines():
+                fields = line.split(',', 2)
+                if len(fields) >= 2:
+                    logged.add((fields[0], fields[1]))
+        return logged
+
+    def _get_bloom(self):
+        if self._bloom is None:
+            self._bloom = IssuedFilter.open(ledger=self.ledger.path)
+        else:
+            self._bloom.sync()
+        return self._bloom
+
+    def process(self, path):
+        """معالجة ملف من processing/ (أو استئنافه من آخر دفعة مؤكدة)"""
+        name = os.path.basename(path)
+        started = time.perf_counter()
+        result_part = path + '.licenses.part'
+        error_part = path + '.errors.part'
+        journal = self._load_journal(path)
+
+        # حذف ما كُتب بعد آخر نقطة مؤكدة
+        for part, size in ((result_part, journal['result_size']), (error_part, journal['error_size'])):
+            if os.path.exists(part):
+                os.truncate(part, size)
+        logged = self._already_logged(journal['pending']) if journal['pending'] else set()
+
+        customer = os.path.splitext(name)[0]
+        try:
+            rows = islice(_read_input(path, self.license_type, self.region), journal['lines'], None)
+            while True:
+                batch = list(islice(rows, self.batch_size))
+                if not batch:
+                    break
+                self._process_batch(path, batch, journal, logged, customer, result_part, error_part)
+                logged = set()
+        except (OSError, UnicodeDecodeError, csv.Error) as e:
+            self._fail(path, e)
+            return False
+
+        result_path = _unique_path(self.done_dir, name + '.licenses.csv')
+        if os.path.exists(result_part):
+            os.replace(result_part, result_path)
+        else:
+            _append_csv(result_path, RESULT_HEADER, [])
+        if os.path.exists(error_part):
+            os.replace(error_part, _unique_path(self.done_dir, name + '.errors.csv'))
+        os.replace(path, _unique_path(self.done_dir, name))
+        os.remove(self._journal_path(path))
+
+        elapsed = time.perf_counter() - started
+        self.log(f"✅ {name}: {journal['lines']} سطر في {elapsed:.2f} ثانية → {result_path}")
+        return True
+
+    def _process_batch(self, path, batch, journal, logged, customer, result_part, error_part):
+        """دفعة واحدة: النتائج ثم السجل، مع journal قبل وبعد"""
+        errors = []
+        groups = {}
+        for line_no, device_id, license_type, region in batch:
+            reason = _check_row(device_id, license_type, region)
+            if reason:
+                if device_id:
+                    errors.append((line_no, device_id, reason))
+                continue
+            groups.setdefault((license_type, region), []).append(device_id)
+
+        bloom = self._get_bloom()
+        results = []
+        to_log = []
+        # أجهزة الدفعة المنقطعة التي وصلت للسجل تبقى "issued" دون إعادة تسجيلها
+        recovered = {device_id for device_id, _ in logged}
+        for (license_type, region), device_ids in groups.items():
+            # إصابات الفلتر تُؤكد من فهرس هذا السجل (وليس فهرس السجل الافتراضي)
+            new_ids, _, _ = split_new_devices(device_ids, bloom, None, self.ledger.path)
+            new_ids = set(new_ids)
+            for row in run_batch(list(dict.fromkeys(device_ids)), license_type, region):
+                if (row.device_id, row.license_key) in logged:
+                    status = 'issued'
+                elif row.device_id in new_ids and row.device_id not in recovered:
+                    status = 'issued'
+                    to_log.append(row)
+                else:
+                    status = 'already_issued'
+                results.append((row.device_id, row.license_key, row.license_type, row.region, status))
+
+        # المرحلة الأولى: تسجيل نية الإضافة للسجل (موضع نهايته الحالي)
+        ledger_offset = os.path.getsize(self.ledger.path) if os.path.exists(self.ledger.path) else 0
+        journal['pending'] = {'ledger_offset': ledger_offset}
+        self._save_journal(path, journal)
+
+        # المرحلة الثانية: السجل والنتائج ثم تأكيد الدفعة
+        if to_log:
+            self.ledger.append_rows(to_log, customer=customer, operator=self.operator)
+        if results:
+            journal['result_size'] = _append_csv(result_part, RESULT_HEADER, results)
+        if errors:
+            journal['error_size'] = _append_csv(error_part, ERROR_HEADER, errors)
+        journal['lines'] += len(batch)
+        journal['pending'] = None
+        self._save_journal(path, journal)
+
+    def _fail(self, path, error):
+        """نقل الملف إلى failed/ مع سبب الفشل"""
+        name = os.path.basename(path)
+        target = _unique_path(self.failed_dir, name)
+        os.replace(path, target)
+        with open(target + '.error.txt', 'w', encoding='utf-8') as f:
+            f.write(f"{type(error).__name__}: {error}\n")
+        for suffix in ('.journal', '.licenses.part', '.errors.part'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        self.log(f"❌ {name}: {error}")
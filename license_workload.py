@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DentaDesk Synthetic Workloads
+ملفات معرفات أجهزة اصطناعية قابلة للتكرار (بذرة ثابتة) ومنحنيات أداء الأدوات مع الحجم
+
+    spec = WorkloadSpec(1000000, seed=1, duplicate_ratio=0.02, invalid_ratio=0.01)
+    stats = spec.write("devices.txt")
+
+نفس المواصفات (الحجم والبذرة والنسب) تنتج نفس الملف بايتاً ببايت، ويُكتب الملف على أجزاء
+فلا تتجاوز الذاكرة جزءاً واحداً حتى لـ 100 مليون سطر. المكرر نسخة من معرف سابق، وغير الصالح
+معرف بطول خاطئ أو بحرف غير hex. نوع الترخيص والمنطقة لكل جهاز يُشتقان من المعرف نفسه
+حسب النسب المطلوبة (classify)، فتبقى ثابتة مهما تغير ترتيب القراءة أو عدد العمليات.
+
+ScalingRun يمرر هذه الملفات عبر مسارات الأدوات الفعلية (ingest ثم split_new_devices ثم
+generate_many بعدد عمليات مختلف ثم export_store) ويقيس الإنتاجية وأقصى استهلاك للذاكرة.
+كل قياس في عملية جديدة حتى لا يرث ذاكرة القياس السابق.
+"""
+
+import asyncio
+import csv
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from random import Random
+
+try:
+    import resource
+except ImportError:
+    # Windows: لا يتوفر أقصى استهلاك للذاكرة بدون مكتبات إضافية
+    resource = None
+
+from license_keys import LICENSE_TYPES, REGIONS
+from license_store import LicenseStore
+
+# أسطر كل جزء (جزء من تعريف الملف: تغييره يغير الملفات الناتجة لنفس البذرة)
+CHUNK_ROWS = 100000
+
+MAX_ROWS = 100000000
+
+# دقة توزيع الأنواع والمناطق (16 بت من crc32 للمعرف لكل منهما)
+_MIX_SLOTS = 1 << 16
+
+STAGES = ('dataset', 'ingest', 'dedupe', 'generate', 'export')
+
+REPORT_FIELDS = ['rows', 'workers', 'stage', 'seconds', 'rows_per_sec', 'peak_rss_mb', 'worker_rss_mb']
+
+_NON_HEX = 'ghijklmnopqrstuvwxyz-_ '
+
+
+def parse_count(text):
+    """عدد مثل 1000 أو 10k أو 2.5M أو 1G"""
+    text = str(text).strip().lower().replace('_', '')
+    units = {'k': 1000, 'm': 1000000, 'g': 1000000000}
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def parse_mix(text, names):
+    """'PREMIUM=3,STANDARD=1' -> {الاسم: الوزن}؛ None أو '' لتوزيع متساوٍ"""
+    if not text:
+        return {name: 1.0 for name in names}
+    mix = {}
+    for part in text.split(','):
+        name, separator, weight = part.partition('=')
+        name = name.strip().upper()
+        if name not in names:
+            raise ValueError(f"قيمة غير معروفة في التوزيع: {name} (المتاح: {', '.join(names)})")
+        mix[name] = float(weight) if separator else 1.0
+        if mix[name] < 0:
+            raise ValueError(f"وزن سالب في التوزيع: {part}")
+    if not sum(mix.values()):
+        raise ValueError(f"توزيع بدون أوزان: {text}")
+    return mix
+
+
+def _mix_table(mix):
+    """جدول بطول _MIX_SLOTS: الخانة -> الاسم حسب الأوزان"""
+    total = sum(mix.values())
+    table = []
+    cumulative = 0.0
+    for name, weight in mix.items():
+        cumulative += weight
+        table.extend([name] * (round(cumulative / total * _MIX_SLOTS) - len(table)))
+    return table
+
+
+class WorkloadSpec:
+    """مواصفات ملف معرفات اصطناعي"""
+
+    def __init__(self, rows, seed=0, duplicate_ratio=0.0, invalid_ratio=0.0, types=None, regions=None):
+        if not 0 < rows <= MAX_ROWS:
+            raise ValueError(f"عدد الأسطر يجب أن يكون بين 1 و {MAX_ROWS}")
+        if duplicate_ratio < 0 or invalid_ratio < 0 or duplicate_ratio + invalid_ratio >= 1:
+            raise ValueError("نسب المكرر وغير الصالح يجب أن تكون موجبة ومجموعها أقل من 1")
+        self.rows = rows
+        self.seed = seed
+        self.duplicate_ratio = duplicate_ratio
+        self.invalid_ratio = invalid_ratio
+        self.types = types or {name: 1.0 for name in LICENSE_TYPES}
+        self.regions = regions or {name: 1.0 for name in REGIONS}
+        self._type_table = _mix_table(self.types)
+        self._region_table = _mix_table(self.regions)
+
+    def classify(self, device_id):
+        """(نوع الترخيص، المنطقة) للجهاز حسب توزيع المواصفات"""
+        value = zlib.crc32(device_id.encode('ascii'))
+        return self._type_table[value & 0xFFFF], self._region_table[value >> 16]
+
+    def _invalid(self, rng):
+        device_id = rng.randbytes(16).hex()
+        kind = rng.randrange(3)
+        if kind == 0:
+            return device_id[:rng.randrange(1, 32)]
+        if kind == 1:
+            return device_id + device_id[:rng.randrange(1, 8)]
+        position = rng.randrange(32)
+        return device_id[:position] + rng.choice(_NON_HEX) + device_id[position + 1:]
+
+    def iter_chunks(self, stats=None):
+        """أجزاء الملف كقوائم أسطر (بدون نهاية السطر)
+
+        stats (dict اختياري) يُحدث بالأعداد الفعلية: rows / unique / duplicates / invalid.
+        """
+        rng = Random(self.seed)
+        stats = {} if stats is None else stats
+        stats.update(rows=0, unique=0, duplicates=0, invalid=0)
+        recent = []
+        for start in range(0, self.rows, CHUNK_ROWS):
+            end = min(start + CHUNK_ROWS, self.rows)
+            count = end - start
+            # أعداد تراكمية مقربة: المجموع الكلي مطابق للنسبة بدقة سطر واحد
+            duplicates = round(end * self.duplicate_ratio) - round(start * self.duplicate_ratio)
+            invalid = round(end * self.invalid_ratio) - round(start * self.invalid_ratio)
+            positions = rng.sample(range(count), duplicates + invalid)
+            kinds = dict.fromkeys(positions[:duplicates], True)
+            kinds.update(dict.fromkeys(positions[duplicates:], False))
+
+            blob = rng.randbytes(16 * (count - len(kinds))).hex()
+            fresh = [blob[i:i + 32] for i in range(0, len(blob), 32)]
+            lines = []
+            taken = 0
+            for position in sorted(kinds):
+                step = position - len(lines)
+                lines.extend(fresh[taken:taken + step])
+                taken += step
+                # المكرر من الجزء السابق، أو مما سبقه في نفس الجزء للجزء الأول
+                pool, size = (recent, len(recent)) if recent else (fresh, taken)
+                if kinds[position] and size:
+                    lines.append(pool[rng.randrange(size)])
+                    stats['duplicates'] += 1
+                else:
+                    lines.append(self._invalid(rng))
+                    stats['invalid'] += 1
+            lines.extend(fresh[taken:])
+            recent = fresh
+            stats['unique'] += len(fresh)
+            stats['rows'] += count
+            yield lines
+
+    def write(self, path, progress=None):
+        """كتابة الملف: .csv بأعمدة device_id,license_type,region وغير ذلك معرف في كل سطر
+
+        تعيد stats (انظر iter_chunks). يُكتب باسم مؤقت ثم يُستبدل.
+        """
+        with_columns = path.lower().endswith('.csv')
+        stats = {}
+        tmp_path = path + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='ascii', newline='') as f:
+                if with_columns:
+                    f.write('device_id,license_type,region\n')
+                for lines in self.iter_chunks(stats):
+                    if with_columns:
+                        classify = self.classify
+                        f.write(''.join(
+                            '%s,%s,%s\n' % ((line,) + classify(line)) for line in lines
+                        ))
+                    else:
+                        f.write('\n'.join(lines))
+                        f.write('\n')
+                    if progress:
+                        progress(stats['rows'], self.rows)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return stats
+
+    def options(self):
+        """معاملات إعادة إنشاء المواصفات في عملية أخرى"""
+        return {
+            'rows': self.rows, 'seed': self.seed, 'duplicate_ratio': self.duplicate_ratio,
+            'invalid_ratio': self.invalid_ratio, 'types': self.types, 'regions': self.regions,
+        }
+
+
+# ----------------------------------------------------------------------
+# منحنيات الأداء
+
+def _max_rss(who):
+    if resource is None:
+        return 0
+    peak = resource.getrusage(who).ru_maxrss
+    # ru_maxrss بالبايت على macOS وبالكيلوبايت على Linux
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _peak_rss_bytes():
+    """أقصى ذاكرة مقيمة لهذه العملية منذ بدايتها (0 إن لم تتوفر)"""
+    return _max_rss(resource.RUSAGE_SELF) if resource is not None else 0
+
+
+def _children_peak_rss_bytes():
+    """أقصى ذاكرة مقيمة لعملية فرعية منتهية (العمليات العاملة)"""
+    return _max_rss(resource.RUSAGE_CHILDREN) if resource is not None else 0
+
+
+def _measure_dataset(options, path):
+    started = time.perf_counter()
+    stats = WorkloadSpec(**options).write(path)
+    return [('dataset', time.perf_counter() - started, stats['rows'], _peak_rss_bytes(), 0)], stats
+
+
+async def _generate(items, backend, store, chunk_size, concurrency):
+    # الاستيراد هنا: license_async يستورد license_node وغيره ولا تحتاجه عملية بناء الملف
+    from license_async import generate_many
+    try:
+        async for record in generate_many(items, backend=backend, chunk_size=chunk_size,
+                                          concurrency=concurrency):
+            store.append(record['device_id'], record['license_key'], record['license_type'],
+                         record['region'])
+    finally:
+        await backend.aclose()
+
+
+def _measure_pipeline(options, path, workers, output_dir, chunk_size):
+    """ingest ثم إزالة المكرر ثم التوليد ثم التصدير داخل عملية القياس"""
+    from license_async import NativeBackend, PoolBackend
+    from license_batch import split_new_devices
+    from license_export import export_store
+    from license_ingest import ingest_device_ids
+
+    spec = WorkloadSpec(**options)
+    results = []
+
+    started = time.perf_counter()
+    device_ids, errors = ingest_device_ids(path)
+    results.append(('ingest', time.perf_counter() - started, len(device_ids) + len(errors),
+                    _peak_rss_bytes(), 0))
+
+    started = time.perf_counter()
+    unique, _, duplicates = split_new_devices(device_ids)
+    del device_ids
+    results.append(('dedupe', time.perf_counter() - started, len(unique) + duplicates,
+                    _peak_rss_bytes(), 0))
+
+    items = ((device_id,) + spec.classify(device_id) for device_id in unique)
+    backend = NativeBackend() if workers <= 1 else PoolBackend(workers)
+    store = LicenseStore()
+    started = time.perf_counter()
+    asyncio.run(_generate(items, backend, store, chunk_size, max(2, workers * 2)))
+    # انتظار خروج العمليات العاملة حتى تدخل ذاكرتها في RUSAGE_CHILDREN
+    for child in multiprocessing.active_children():
+        child.join()
+    results.append(('generate', time.perf_counter() - started, len(store), _peak_rss_bytes(),
+                    _children_peak_rss_bytes() if workers > 1 else 0))
+    del unique
+
+    output = os.path.join(output_dir, f"export_{workers}.csv")
+    started = time.perf_counter()
+    count = export_store(store, output, 'csv')
+    results.append(('export', time.perf_counter() - started, count, _peak_rss_bytes(), 0))
+    os.remove(output)
+    return results, {'invalid': len(errors), 'duplicates': duplicates, 'unique': len(store)}
+
+
+def _spawn(func, *args):
+    """تشغيل func في عملية جديدة (spawn) وإعادة نتيجتها"""
+    with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context('spawn')) as executor:
+        return executor.submit(func, *args).result()
+
+
+class ScalingRun:
+    """قياس الإنتاجية والذاكرة مع حجم الإدخال وعدد العمليات
+
+    لكل حجم يُبنى ملف بنفس المواصفات (عدا الحجم)، ثم لكل عدد عمليات يُشغل المسار كاملاً
+    في عملية جديدة. تُقارن أعداد المكرر وغير الصالح التي وجدتها الأدوات مع ما كُتب في الملف.
+    """
+
+    def __init__(self, sizes, workers=(1,), seed=0, duplicate_ratio=0.0, invalid_ratio=0.0,
+                 types=None, regions=None, work_dir=None, chunk_size=10000, log=print):
+        self.sizes = sorted(set(sizes))
+        self.workers = sorted(set(max(1, w) for w in workers))
+        self.options = {'seed': seed, 'duplicate_ratio': duplicate_ratio, 'invalid_ratio': invalid_ratio,
+                        'types': types, 'regions': regions}
+        # التحقق من المواصفات قبل البدء
+        WorkloadSpec(max(self.sizes), **self.options)
+        self.work_dir = work_dir
+        self.chunk_size = chunk_size
+        self.log = log
+        # (rows, workers, stage, seconds, rows_per_sec, peak_rss_mb, worker_rss_mb)
+        self.results = []
+        self.mismatches = []
+
+    def _add(self, rows, workers, measurements):
+        for stage, seconds, count, peak, worker_peak in measurements:
+            row = (rows, workers, stage, round(seconds, 3), round(count / seconds) if seconds else 0,
+                   round(peak / (1024 * 1024), 1), round(worker_peak / (1024 * 1024), 1))
+            self.results.append(row)
+            self.log(f"   {stage:<9} {count:>12,} صف  {seconds:>8.2f} s  {row[4]:>12,} صف/ث  "
+                     f"{row[5]:>8.1f} MB" + (f"  (عملية عاملة {row[6]:.1f} MB)" if worker_peak else ""))
+
+    def run(self):
+        work_dir = tempfile.mkdtemp(prefix="dentadesk_scaling_", dir=self.work_dir)
+        try:
+            for rows in self.sizes:
+                options = dict(self.options, rows=rows)
+                path = os.path.join(work_dir, f"devices_{rows}.txt")
+                self.log(f"📄 {rows:,} سطر")
+                measurements, expected = _spawn(_measure_dataset, options, path)
+                self._add(rows, 1, measurements)
+                for workers in self.workers:
+                    self.log(f"⚙️  {workers} عملية")
+                    measurements, found = _spawn(_measure_pipeline, options, path, workers,
+                                                 work_dir, self.chunk_size)
+                    self._add(rows, workers, measurements)
+                    for name in ('invalid', 'duplicates', 'unique'):
+                        if found[name] != expected[name]:
+                            self.mismatches.append(
+                                f"{rows} سطر / {workers} عملية: {name} = {found[name]} (المتوقع {expected[name]})"
+                            )
+                os.remove(path)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        return self.results
+
+    def table(self):
+        """جدول الإنتاجية (صف/ثانية) لكل مرحلة: [(الحجم، العمليات، {المرحلة: (الإنتاجية، الذاكرة)})]"""
+        rows = {}
+        for size, workers, stage, _, rate, peak, _ in self.results:
+            if stage == 'dataset':
+                for key in [(size, w) for w in self.workers]:
+                    rows.setdefault(key, {})[stage] = (rate, peak)
+            else:
+                rows.setdefault((size, workers), {})[stage] = (rate, peak)
+        return [(size, workers, stages) for (size, workers), stages in sorted(rows.items())]
+
+    def write_report(self, path):
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(REPORT_FIELDS)
+            writer.writerows(self.results)
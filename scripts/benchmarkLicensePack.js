@@ -0,0 +1,93 @@
+/**
+ * قياس زمن التحقق من مفاتيح الإنتاج قبل الفهرس وبعده
+ * Production License Pack Validation Benchmark
+ *
+ * الاستخدام:
+ *   python license_cli.py pack --generate 100000 -o /tmp/pack/production-licenses.json
+ *   node scripts/benchmarkLicensePack.js /tmp/pack/production-licenses.json [lookups]
+ */
+
+const fs = require('fs')
+const { performance } = require('perf_hooks')
+const { ProductionLicenseValidator } = require('../electron/productionLicenseValidator.js')
+
+/**
+ * التحقق بالطريقة السابقة: JSON.parse ثم .some() على كل المفاتيح
+ */
+class LinearValidator {
+  constructor(licensePath) {
+    this.productionLicenses = JSON.parse(fs.readFileSync(licensePath, 'utf8')).licenses
+  }
+
+  isValidLicense(licenseKey) {
+    const normalizedKey = licenseKey.trim().toUpperCase()
+    return this.productionLicenses.some(license => license.key === normalizedKey)
+  }
+}
+
+function measure(label, createValidator, keys) {
+  const log = console.log
+  // isValidLicense يطبع سطراً لكل مفتاح - لا نريد قياس زمن الطباعة
+  console.log = () => {}
+  try {
+    let started = performance.now()
+    const validator = createValidator()
+    const loadMs = performance.now() - started
+
+    // تسخين JIT قبل القياس
+    for (const key of keys.slice(0, 200)) {
+      validator.isValidLicense(key)
+    }
+
+    let valid = 0
+    started = performance.now()
+    for (const key of keys) {
+      if (validator.isValidLicense(key)) {
+        valid++
+      }
+    }
+    const totalMs = performance.now() - started
+    return { label, loadMs, perLookupUs: totalMs * 1000 / keys.length, valid }
+  } finally {
+    console.log = log
+  }
+}
+
+function main() {
+  const licensePath = process.argv[2]
+  const lookups = parseInt(process.argv[3]) || 2000
+  if (!licensePath || !fs.existsSync(licensePath)) {
+    console.error('❌ حدد مسار ملف المفاتيح: node scripts/benchmarkLicensePack.js <production-licenses.json>')
+    process.exit(1)
+  }
+
+  const licenses = JSON.parse(fs.readFileSync(licensePath, 'utf8')).licenses
+  // نصف المفاتيح موجودة ونصفها غير موجود (أسوأ حالة للبحث الخطي)
+  const keys = []
+  for (let i = 0; i < lookups; i++) {
+    keys.push(i % 2 === 0
+      ? licenses[Math.floor(Math.random() * licenses.length)].key.toLowerCase()
+      : 'ZZZZZ-ZZZZZ-ZZZZZ-' + String(i % 100000).padStart(5, '0'))
+  }
+
+  console.log(`📦 ${licensePath}: ${licenses.length} مفتاح، ${lookups} عملية تحقق`)
+  const results = [
+    measure('before (linear .some)', () => new LinearValidator(licensePath), keys),
+    measure('after (sidecar index)', () => new ProductionLicenseValidator(licensePath), keys)
+  ]
+  for (const result of results) {
+    console.log(
+      `${result.label.padEnd(24)} load ${result.loadMs.toFixed(1).padStart(8)} ms | ` +
+      `${result.perLookupUs.toFixed(2).padStart(10)} µs/lookup | valid ${result.valid}`
+    )
+  }
+  if (results[0].valid !== results[1].valid) {
+    console.error('❌ نتائج التحقق غير متطابقة')
+    process.exit(1)
+  }
+  console.log(`⚡ التسريع: ${(results[0].perLookupUs / results[1].perLookupUs).toFixed(0)}x لكل عملية تحقق`)
+}
+
+if (require.main === module) {
+  main()
+}
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبارات واجهة asyncio للتوليد (license_async)
+"""
+
+import asyncio
+import shutil
+
+import pytest
+
+from license_async import generate, generate_many, get_backend, NodeBackend, PoolBackend
+from license_keys import generate_key
+
+DEVICE_IDS = [f"{number:032x}" for number in range(1, 41)]
+
+
+class _SlowBackend:
+    """خلفية لا تنتهي - لاختبار المهلة والإلغاء"""
+
+    def __init__(self):
+        self.cancelled = 0
+
+    async def generate_chunk(self, items):
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+
+
+async def _collect(*args, **kwargs):
+    return [record async for record in generate_many(*args, **kwargs)]
+
+
+def test_generate_single():
+    record = asyncio.run(generate(DEVICE_IDS[0].upper(), "PREMIUM", "UAE"))
+    assert record == {
+        'device_id': DEVICE_IDS[0],
+        'license_key': generate_key(DEVICE_IDS[0], "PREMIUM"),
+        'license_type': "PREMIUM",
+        'region': "UAE",
+    }
+
+
+def test_generate_many_keeps_order_and_mixed_items():
+    items = list(DEVICE_IDS)
+    items[3] = (DEVICE_IDS[3], "ULTIMATE", "GCC")
+    records = asyncio.run(_collect(items, "STANDARD", chunk_size=7, concurrency=2))
+    assert [record['device_id'] for record in records] == DEVICE_IDS
+    assert records[3]['license_key'] == generate_key(DEVICE_IDS[3], "ULTIMATE")
+    assert records[3]['region'] == "GCC"
+    assert records[4]['license_key'] == generate_key(DEVICE_IDS[4], "STANDARD")
+
+
+def test_generate_many_from_async_iterable():
+    async def source():
+        for device_id in DEVICE_IDS[:10]:
+            yield device_id
+
+    records = asyncio.run(_collect(source(), chunk_size=3))
+    assert [record['license_key'] for record in records] == [generate_key(d, "STANDARD") for d in DEVICE_IDS[:10]]
+
+
+@pytest.mark.parametrize('item, license_type, region', [
+    ("xyz", "STANDARD", "GLOBAL"),
+    (DEVICE_IDS[0], "GOLD", "GLOBAL"),
+    (DEVICE_IDS[0], "STANDARD", "MARS"),
+])
+def test_invalid_input_raises(item, license_type, region):
+    with pytest.raises(ValueError):
+        asyncio.run(generate(item, license_type, region))
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        get_backend("gpu")
+
+
+def test_timeout_cancels_pending_chunks():
+    backend = _SlowBackend()
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(_collect(DEVICE_IDS, backend=backend, chunk_size=10, concurrency=4, timeout=0.05))
+    assert backend.cancelled == 4
+
+
+def test_pool_backend():
+    async def run():
+        backend = PoolBackend(workers=2)
+        try:
+            return await _collect(DEVICE_IDS, "PREMIUM", backend=backend, chunk_size=16)
+        finally:
+            await backend.aclose()
+
+    records = asyncio.run(run())
+    assert [record['license_key'] for record in records] == [generate_key(d, "PREMIUM") for d in DEVICE_IDS]
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="Node.js غير مثبت")
+def test_node_backend_matches_native():
+    async def run():
+        return await _collect(DEVICE_IDS[:3], "PREMIUM", backend=NodeBackend(concurrency=2))
+
+    records = asyncio.run(run())
+    assert [record['license_key'] for record in records] == [generate_key(d, "PREMIUM") for d in DEVICE_IDS[:3]]
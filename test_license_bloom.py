@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبارات فلتر Bloom للمفاتيح الصادرة (license_bloom)
+"""
+
+import os
+
+import license_bloom
+from license_bloom import BloomFilter, IssuedFilter, find_issued
+from license_index import LicenseIndex, index_path_for_ledger
+from license_ledger import LicenseLedger
+
+
+def _device(number):
+    return f"{number:032x}"
+
+
+def _append(ledger, numbers):
+    for number in numbers:
+        ledger.append(_device(number), f"{number:020X}", 'PREMIUM', 'UAE', issued_at=1000 + number, operator='ali')
+
+
+class _AlwaysHit:
+    """فلتر يصيب دائماً - كل الأجهزة تحتاج تأكيداً"""
+
+    def might_have_device(self, device_id):
+        return True
+
+
+def test_no_false_negatives_and_rate():
+    bloom = BloomFilter(capacity=2000, fp_rate=0.01)
+    for number in range(2000):
+        bloom.add(_device(number).encode())
+    assert all(_device(number).encode() in bloom for number in range(2000))
+    false_hits = sum(_device(number).encode() in bloom for number in range(2000, 22000))
+    assert false_hits < 20000 * 0.03
+
+
+def test_sync_is_incremental_and_persisted(tmp_path):
+    ledger = LicenseLedger(str(tmp_path / "issued.csv"))
+    _append(ledger, range(10))
+    bloom = IssuedFilter.open(ledger=ledger.path, capacity=1000)
+    assert bloom.might_have_device(_device(3))
+    assert bloom.might_have_key(f"{3:020X}")
+
+    _append(ledger, range(10, 15))
+    assert bloom.sync() == 5
+    assert bloom.sync() == 0
+    assert bloom.ledger_offset == os.path.getsize(ledger.path)
+
+    reopened = IssuedFilter.open(ledger=ledger.path, capacity=1000)
+    assert reopened.ledger_offset == bloom.ledger_offset
+    assert reopened.bits == bloom.bits
+
+
+def test_sync_skips_incomplete_line_and_rebuilds_after_truncation(tmp_path):
+    ledger = LicenseLedger(str(tmp_path / "issued.csv"))
+    _append(ledger, range(3))
+    with open(ledger.path, 'a', encoding='utf-8') as f:
+        f.write(_device(99))
+    bloom = IssuedFilter.open(ledger=ledger.path, capacity=1000)
+    assert bloom.ledger_offset < os.path.getsize(ledger.path)
+
+    open(ledger.path, 'w').close()
+    _append(ledger, [50])
+    bloom.sync()
+    assert bloom.might_have_device(_device(50))
+    assert bloom.ledger_offset == os.path.getsize(ledger.path)
+
+
+def test_find_issued_confirms_hits_from_synced_index(tmp_path):
+    ledger = LicenseLedger(str(tmp_path / "issued.csv"))
+    _append(ledger, range(20))
+    candidates = [_device(number) for number in (5, 19, 100, 200)]
+
+    # لا يوجد فهرس: يُبنى من السجل عند أول إصابة
+    assert find_issued(candidates, _AlwaysHit(), None, ledger.path) == {_device(5), _device(19)}
+    path = index_path_for_ledger(ledger.path)
+    with LicenseIndex(path) as index:
+        assert index.count == 20
+        assert index.ledger_offset == os.path.getsize(ledger.path)
+
+    # ما أُضيف بعد ذلك يُلحق بالفهرس دون إعادة قراءة السجل كاملاً
+    _append(ledger, [100])
+    assert find_issued(candidates, _AlwaysHit(), None, ledger.path) == {_device(5), _device(19), _device(100)}
+    with LicenseIndex(path) as index:
+        assert index.count == 21
+
+
+def test_find_issued_falls_back_to_ledger_scan(tmp_path, monkeypatch):
+    ledger = LicenseLedger(str(tmp_path / "issued.csv"))
+    _append(ledger, range(5))
+
+    def locked(ledger, path=None):
+        raise PermissionError("index in use")
+
+    monkeypatch.setattr(license_bloom, 'sync_index', locked)
+    assert find_issued([_device(2), _device(9)], _AlwaysHit(), None, ledger.path) == {_device(2)}
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبارات حزم المفاتيح الموقعة (license_bundle)
+"""
+
+import os
+
+import pytest
+
+import license_bundle
+from license_bundle import BundleWriter, LicenseBundle, write_bundle, device_hash, LABEL_BYTES
+
+ROWS = [
+    ("40677b86a3f4d164d1d5e8f9a2b3c4d5", "ABCDE-12345-FFFFF-00000", "PREMIUM", "UAE", 1741600000),
+    ("0123456789abcdef0123456789abcdef", "11111-22222-33333-44444", "STANDARD", "GCC", 1741600001),
+    ("40677b86a3f4d164d1d5e8f9a2b3c4d5", "99999-88888-77777-66666", "ULTIMATE", "UAE", 1741600002),
+]
+
+
+def _write(path, rows=ROWS, **options):
+    with BundleWriter(str(path), created_at=1741600000, **options) as writer:
+        writer.write_rows(rows)
+    return str(path)
+
+
+def test_round_trip_and_lookup(tmp_path, monkeypatch):
+    monkeypatch.setattr(license_bundle, 'CHUNK_ROWS', 2)
+    path = _write(tmp_path / "chain.ddlb", label="Smile Clinics")
+    with LicenseBundle(path) as bundle:
+        assert bundle.verified and len(bundle) == 3
+        assert (bundle.label, bundle.created_at) == ("Smile Clinics", 1741600000)
+        assert list(bundle) == [(device_hash(row[0]).hex(), *row[1:4]) for row in ROWS]
+        assert bundle.lookup(" " + ROWS[0][0].upper()) == [ROWS[0][1:4], ROWS[2][1:4]]
+        assert bundle.lookup("ffffffffffffffffffffffffffffffff") == []
+        assert bundle.statistics() == ({'STANDARD': 1, 'PREMIUM': 1, 'ULTIMATE': 1}, {'UAE': 2, 'GCC': 1})
+    assert not os.path.exists(path + '.tmp')
+
+
+def test_append_matches_write_rows(tmp_path):
+    path = _write(tmp_path / "rows.ddlb")
+    with BundleWriter(str(tmp_path / "append.ddlb"), created_at=1741600000) as writer:
+        for row in ROWS:
+            writer.append(*row[:4])
+    with open(path, 'rb') as a, open(tmp_path / "append.ddlb", 'rb') as b:
+        assert a.read() == b.read()
+    assert write_bundle(iter(ROWS), str(tmp_path / "plain.ddlb")) == 3
+
+
+def test_label_truncation_keeps_utf8():
+    label = "عيادات الابتسامة المتحدة للأسنان"
+    data = license_bundle._label_bytes(label)
+    assert len(data) <= LABEL_BYTES and label.startswith(data.decode('utf-8'))
+    assert license_bundle._label_bytes(None) == b''
+
+
+@pytest.mark.parametrize('position', [20, 70, -1])
+def test_tampering_is_detected(tmp_path, position):
+    path = _write(tmp_path / "chain.ddlb")
+    with open(path, 'r+b') as f:
+        f.seek(position, os.SEEK_END if position < 0 else os.SEEK_SET)
+        value = f.read(1)
+        f.seek(-1, os.SEEK_CUR)
+        f.write(bytes((value[0] ^ 1,)))
+    with pytest.raises(ValueError):
+        LicenseBundle(path)
+    with LicenseBundle(path, verify=False) as bundle:
+        assert len(bundle) == 3 and not bundle.verified
+
+
+def test_wrong_master_key(tmp_path):
+    path = _write(tmp_path / "chain.ddlb", master_key="OTHER_KEY")
+    with pytest.raises(ValueError):
+        LicenseBundle(path)
+    with LicenseBundle(path, master_key="OTHER_KEY") as bundle:
+        assert bundle.verified
+
+
+def test_damaged_files(tmp_path):
+    path = _write(tmp_path / "chain.ddlb")
+    with open(path, 'rb') as f:
+        data = f.read()
+    for name, content in (("empty.ddlb", b''), ("short.ddlb", data[:40]), ("cut.ddlb", data[:-10])):
+        (tmp_path / name).write_bytes(content)
+        with pytest.raises(ValueError):
+            LicenseBundle(str(tmp_path / name))
+
+
+def test_invalid_key_aborts(tmp_path):
+    path = str(tmp_path / "chain.ddlb")
+    with pytest.raises(ValueError):
+        _write(path, ROWS + [(ROWS[0][0], "SHORT", "PREMIUM", "UAE")])
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبارات محلل فضاء المفاتيح (license_collisions)
+"""
+
+import csv
+import os
+
+import pytest
+
+from license_collisions import KeySpaceAnalyzer, read_predefined_licenses, expected_excess, COLLISION_HEADER
+from license_keys import generate_key
+from license_ledger import LicenseLedger
+
+DEVICE_IDS = [f"{number:032x}" for number in range(1, 51)]
+
+
+def _rows(path):
+    with open(path, encoding='utf-8', newline='') as f:
+        return list(csv.reader(f))
+
+
+def _analyze(tmp_path, analyzer, **options):
+    report = analyzer.analyze(str(tmp_path / "out"), **options)
+    for name in ('collisions_path', 'clusters_path'):
+        report.pop(name)
+    return report
+
+
+def test_read_predefined_licenses():
+    keys = read_predefined_licenses()
+    assert ('DENTA-CLINI-C2025-MAIN1', 'main') in keys
+    assert len({category for _, category in keys}) > 1
+
+
+def test_expected_excess():
+    assert expected_excess(0, 16) == 0.0
+    assert expected_excess(2, 16) == pytest.approx(1 / 16)
+
+
+def test_issued_keys_are_duplicates_and_references_collide(tmp_path):
+    ledger = LicenseLedger(str(tmp_path / "issued.csv"))
+    for device_id in DEVICE_IDS[:5]:
+        ledger.append(device_id, generate_key(device_id, 'PREMIUM'), 'PREMIUM', 'UAE', issued_at=1)
+    # نفس المفتاح مسجل لجهاز آخر
+    ledger.append(DEVICE_IDS[40], generate_key(DEVICE_IDS[0], 'PREMIUM'), 'PREMIUM', 'UAE', issued_at=1)
+    ledger.append(DEVICE_IDS[41], "not-a-key", 'PREMIUM', 'UAE', issued_at=1)
+
+    analyzer = KeySpaceAnalyzer(str(tmp_path / "work"), workers=1)
+    assert analyzer.add_devices(DEVICE_IDS[:10], ['PREMIUM', 'STANDARD']) == 10
+    assert analyzer.add_issued(ledger.path) == 6
+    analyzer.add_reference(generate_key(DEVICE_IDS[1], 'STANDARD'), 'pack:test.json')
+    analyzer.add_reference("SHORT-KEY", 'pack:test.json')
+    report = _analyze(tmp_path, analyzer)
+
+    assert report['keys'] == 26
+    assert report['unique_keys'] == 20
+    assert report['duplicates'] == 5
+    assert (report['collisions'], report['colliding_keys']) == (2, 4)
+    assert (report['rejected'], report['irregular'], report['references']) == (1, 1, 1)
+
+    rows = _rows(tmp_path / "out" / "collisions.csv")
+    assert rows[0] == COLLISION_HEADER
+    origins = sorted((row[2], row[3]) for row in rows[1:])
+    assert ('pack:test.json', '') in origins
+    assert ('device-bound', DEVICE_IDS[40]) in origins
+    assert not os.path.exists(tmp_path / "work")
+
+
+def test_spilled_partitions_and_workers_match_in_memory(tmp_path):
+    def run(name, memory_mb, workers):
+        analyzer = KeySpaceAnalyzer(str(tmp_path / name), memory_mb=memory_mb, workers=workers)
+        analyzer.add_random_devices(3000, seed=7)
+        analyzer.add_predefined()
+        report = _analyze(tmp_path, analyzer, prefix_chars=4)
+        return report, analyzer.partitions.spills, _rows(tmp_path / "out" / "clusters.csv")
+
+    in_memory, spills, clusters = run("memory", 256, 1)
+    spilled, spilled_count, spilled_clusters = run("spilled", 0, 2)
+    assert spills == 0 and spilled_count > 0
+    in_memory.pop('spills')
+    spilled.pop('spills')
+    assert spilled == in_memory
+    assert spilled_clusters == clusters and len(clusters) > 1
+    assert in_memory['keys'] == 3000 * 5 and in_memory['collisions'] == 0
+    assert not os.path.exists(tmp_path / "spilled")
+
+
+def test_random_devices_are_reproducible(tmp_path):
+    def run(seed):
+        analyzer = KeySpaceAnalyzer(str(tmp_path / "work"), workers=1)
+        analyzer.add_random_devices(500, seed=seed, license_types=['STANDARD'])
+        return _analyze(tmp_path, analyzer)['slices']
+
+    assert run(1) == run(1)
+    assert run(1) != run(2)
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبارات تشفير بيانات الترخيص (license_crypto)
+"""
+
+import json
+import shutil
+import subprocess
+
+import pytest
+
+from license_crypto import (
+    CRYPTO_AVAILABLE, derive_key, encrypt_license_data, decrypt_license_data, decrypt_text, process_file
+)
+from license_keys import MASTER_KEY
+
+requires_crypto = pytest.mark.skipif(not CRYPTO_AVAILABLE, reason="مكتبة cryptography غير مثبتة")
+requires_node = pytest.mark.skipif(shutil.which("node") is None, reason="Node.js غير مثبت")
+
+RECORD = {'deviceId': "40677b86a3f4d164d1d5e8f9a2b3c4d5", 'licenseType': "PREMIUM", 'region': "الإمارات"}
+IV = bytes(range(16))
+
+
+def _node(script, *args):
+    return subprocess.run(["node", "-e", script, *args], capture_output=True, text=True,
+                          encoding='utf-8', check=True).stdout.strip()
+
+
+@requires_node
+def test_derived_key_matches_node_scrypt():
+    script = "console.log(require('crypto').scryptSync(process.argv[1], 'salt', 32).toString('hex'))"
+    assert derive_key(MASTER_KEY).hex() == _node(script, MASTER_KEY)
+
+
+def test_unknown_mode(tmp_path):
+    with pytest.raises(ValueError):
+        process_file('shuffle', str(tmp_path / "in"), str(tmp_path / "out"))
+
+
+@requires_crypto
+def test_round_trip_and_fixed_iv():
+    blob = encrypt_license_data(RECORD, iv=IV)
+    assert blob.startswith(IV.hex() + ':')
+    assert blob == encrypt_license_data(RECORD, iv=IV)
+    assert decrypt_license_data(blob) == RECORD
+    assert decrypt_license_data(encrypt_license_data(RECORD)) == RECORD
+
+
+@requires_crypto
+@pytest.mark.parametrize('blob', ["no-separator", "00:00", IV.hex() + ":" + "ab" * 15])
+def test_malformed_blobs(blob):
+    with pytest.raises(ValueError):
+        decrypt_text(blob)
+
+
+@requires_crypto
+def test_wrong_master_key_fails():
+    with pytest.raises(ValueError):
+        decrypt_license_data(encrypt_license_data(RECORD, iv=IV), master_key="OTHER_KEY")
+
+
+@requires_crypto
+@requires_node
+def test_node_blob_decrypts():
+    script = """
+const crypto = require('crypto')
+const key = crypto.scryptSync(process.argv[1], 'salt', 32)
+const iv = crypto.randomBytes(16)
+const cipher = crypto.createCipheriv('aes-256-cbc', key, iv)
+console.log(iv.toString('hex') + ':' + cipher.update(process.argv[2], 'utf8', 'hex') + cipher.final('hex'))
+"""
+    blob = _node(script, MASTER_KEY, json.dumps(RECORD, ensure_ascii=False))
+    assert decrypt_license_data(blob) == RECORD
+
+
+@requires_crypto
+@pytest.mark.parametrize('workers', [1, 2])
+def test_process_file_keeps_line_numbers(tmp_path, workers):
+    source = tmp_path / "records.jsonl"
+    source.write_text("\n".join([json.dumps(RECORD), "", "{broken", json.dumps([1, 2])]) + "\n", encoding='utf-8')
+    encrypted = tmp_path / "records.enc"
+    done, errors = process_file('encrypt', str(source), str(encrypted), workers=workers, chunk_lines=2)
+    assert done == 2 and [line_no for line_no, _ in errors] == [3]
+
+    decrypted = tmp_path / "records.out.jsonl"
+    done, errors = process_file('decrypt', str(encrypted), str(decrypted), workers=workers, chunk_lines=2)
+    lines = decrypted.read_text(encoding='utf-8').splitlines()
+    assert done == 2 and errors == []
+    assert json.loads(lines[0]) == RECORD and lines[1:3] == ["", ""] and json.loads(lines[3]) == [1, 2]
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبارات تصدير النتائج من المخزن (license_export)
+"""
+
+import csv
+import gzip
+import io
+import json
+import os
+import zipfile
+
+import pytest
+
+from license_batch import CSV_HEADER
+from license_bundle import LicenseBundle
+from license_export import export_store, detect_format, bundle_filename, unique_name
+from license_store import LicenseStore
+
+ROWS = [
+    ("40677b86a3f4d164d1d5e8f9a2b3c4d5", "ABCDE-FGHIJ-KLMNO-PQRST", "PREMIUM", "UAE", 1741600000),
+    ("0123456789abcdef0123456789abcdef", "12345-67890-ABCDE-F1234", "STANDARD", "GCC", 1741600001),
+    ("ffffffffffffffffffffffffffffffff", "AAAAA-BBBBB-CCCCC-DDDDD", "ULTIMATE", "SAUDI", 1741600002),
+]
+
+
+def _store():
+    store = LicenseStore()
+    for row in ROWS:
+        store.append(*row)
+    return store
+
+
+def _expected(rows=ROWS):
+    return [[str(value) for value in row] for row in rows]
+
+
+def test_detect_format():
+    assert detect_format("out.CSV.GZ") == 'csv.gz'
+    assert detect_format("out.jsonl") == 'jsonl'
+    assert detect_format("out.txt", default='csv') == 'csv'
+    with pytest.raises(ValueError):
+        detect_format("out.txt")
+
+
+@pytest.mark.parametrize('name', ["out.csv", "out.csv.gz"])
+def test_csv_round_trip(tmp_path, name):
+    path = str(tmp_path / name)
+    assert export_store(_store(), path, chunk_rows=2) == 3
+    opener = gzip.open if name.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8', newline='') as f:
+        rows = list(csv.reader(f))
+    assert rows == [CSV_HEADER] + _expected()
+    assert not os.path.exists(path + '.tmp')
+
+
+def test_jsonl_round_trip_and_range(tmp_path):
+    path = str(tmp_path / "out.jsonl")
+    assert export_store(_store(), path, start=1, stop=10) == 2
+    with open(path, encoding='utf-8') as f:
+        records = [json.loads(line) for line in f]
+    assert [list(record.values()) for record in records] == [list(row) for row in ROWS[1:]]
+    assert list(records[0]) == CSV_HEADER
+
+
+def test_zip_bundle(tmp_path):
+    path = str(tmp_path / "out.zip")
+    assert export_store(_store(), path) == 3
+    with zipfile.ZipFile(path) as bundle:
+        names = bundle.namelist()
+        text = bundle.read(bundle_filename(ROWS[0][0], ROWS[0][2])).decode('utf-8')
+    assert names == [bundle_filename(row[0], row[2]) for row in ROWS]
+    assert ROWS[0][1] in text and ROWS[0][3] in text
+
+
+def test_zip_bundle_repeated_device(tmp_path):
+    path = str(tmp_path / "out.zip")
+    store = _store()
+    # إعادة إصدار نفس الجهاز بنفس النوع لا تستبدل ملفه السابق في الحزمة
+    store.append(ROWS[0][0], "ZZZZZ-YYYYY-XXXXX-WWWWW", ROWS[0][2], ROWS[0][3], ROWS[0][4] + 60)
+    assert export_store(store, path) == 4
+    first = bundle_filename(ROWS[0][0], ROWS[0][2])
+    with zipfile.ZipFile(path) as bundle:
+        names = bundle.namelist()
+        assert ROWS[0][1] in bundle.read(first).decode('utf-8')
+        assert "ZZZZZ-YYYYY-XXXXX-WWWWW" in bundle.read(names[-1]).decode('utf-8')
+    assert len(set(names)) == 4 and names[-1] == first[:-4] + "-2.txt"
+
+
+def test_unique_name():
+    used = {}
+    assert [unique_name(name, used) for name in ("a.txt", "a.txt", "a-2.txt", "a.txt")] == [
+        "a.txt", "a-2.txt", "a-2-2.txt", "a-3.txt"
+    ]
+
+
+def test_signed_bundle(tmp_path):
+    path = str(tmp_path / "out.ddlb")
+    assert export_store(_store(), path) == 3
+    with LicenseBundle(path) as bundle:
+        assert bundle.lookup(ROWS[1][0]) == [ROWS[1][1:4]]
+
+
+def test_progress_and_failure_leaves_no_file(tmp_path):
+    done = []
+    export_store(_store(), str(tmp_path / "out.csv"), progress=done.append, chunk_rows=2)
+    assert done == [2, 3]
+
+    def fail(count):
+        raise RuntimeError("disk full")
+
+    path = str(tmp_path / "failed.csv")
+    with pytest.raises(RuntimeError):
+        export_store(_store(), path, progress=fail)
+    assert not os.path.exists(path) and not os.path.exists(path + '.tmp')
+
+
+def test_export_header_matches_csv_module(tmp_path):
+    path = str(tmp_path / "out.csv")
+    export_store(_store(), path)
+    with open(path, 'rb') as f:
+        data = f.read()
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_HEADER)
+    writer.writerows(ROWS)
+    assert data.decode('utf-8') == buffer.getvalue()
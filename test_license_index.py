@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبارات فهرس المفاتيح الصادرة (license_index)
+"""
+
+import os
+
+import pytest
+
+from license_index import LicenseIndex, build_index, open_index, sync_index, index_path_for_ledger
+from license_keys import format_key
+from license_ledger import LicenseLedger
+
+
+def _device(number):
+    return f"{number:032x}"
+
+
+def _ledger(path, numbers, license_type='PREMIUM', issued_at=1000):
+    ledger = LicenseLedger(str(path))
+    for number in numbers:
+        ledger.append(_device(number), f"{number:020X}", license_type, 'UAE', issued_at=issued_at + number)
+    return ledger
+
+
+def test_build_with_external_sort_and_lookup(tmp_path):
+    ledger = _ledger(tmp_path / "issued.csv", range(50, 0, -1))
+    # نفس الجهاز بنوع آخر لاحقاً + سجل مكرر + سجل غير صالح
+    ledger.append(_device(7), f"{70:020X}", 'ULTIMATE', 'GCC', issued_at=5000)
+    ledger.append(_device(7), f"{7:020X}", 'PREMIUM', 'UAE', issued_at=1007)
+    ledger.append("not-hex", f"{1:020X}", 'PREMIUM', 'UAE', issued_at=1)
+
+    output = str(tmp_path / "issued.idx")
+    stats = build_index([ledger.path], output, chunk_rows=8)
+    assert stats == {'records': 51, 'duplicates': 1, 'rejected': 1}
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
+
+    with open_index(output) as index:
+        assert len(index) == 51
+        records = index.lookup(_device(7))
+        assert [(r.license_type, r.issued_at) for r in records] == [('PREMIUM', 1007), ('ULTIMATE', 5000)]
+        assert records[1].license_key == format_key(f"{70:020X}")
+        assert index.latest(_device(7)).license_type == 'ULTIMATE'
+        assert index.latest(_device(7), 'PREMIUM').issued_at == 1007
+        assert _device(50) in index and _device(51) not in index
+        assert index.lookup("xyz") == [] and index.lookup("ab") == []
+        assert index.ledger_offset == 0
+
+
+def test_sync_merges_to_same_file_as_full_build(tmp_path):
+    ledger = _ledger(tmp_path / "issued.csv", range(0, 40, 2))
+    path = index_path_for_ledger(ledger.path)
+    assert sync_index(ledger.path) == 20
+    assert sync_index(ledger.path) == 0
+
+    _ledger(tmp_path / "issued.csv", range(1, 40, 2))
+    _ledger(tmp_path / "issued.csv", [0])
+    with open(ledger.path, 'a', encoding='utf-8') as f:
+        f.write(_device(99))
+    assert sync_index(ledger.path) == 20
+
+    full = str(tmp_path / "full.idx")
+    build_index([ledger.path], full)
+    with LicenseIndex(path) as merged, LicenseIndex(full) as rebuilt:
+        assert merged.count == rebuilt.count == 40
+        assert merged.ledger_offset < os.path.getsize(ledger.path)
+        assert all(merged.lookup(_device(n)) == rebuilt.lookup(_device(n)) for n in range(41))
+    with open(path, 'rb') as a, open(full, 'rb') as b:
+        # نفس الترويسة (عدا موضع السجل) والجدول والسجلات
+        assert a.read()[32:] == b.read()[32:]
+
+
+def test_invalid_or_old_index_is_rebuilt(tmp_path):
+    ledger = _ledger(tmp_path / "issued.csv", range(5))
+    path = index_path_for_ledger(ledger.path)
+    with open(path, 'wb') as f:
+        f.write(b'DDLIDX01' + bytes(600000))
+    with pytest.raises(ValueError):
+        LicenseIndex(path)
+    assert sync_index(ledger.path) == 5
+    with LicenseIndex(path) as index:
+        assert index.ledger_offset == os.path.getsize(ledger.path)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبارات قراءة ملفات معرفات الأجهزة (license_ingest)
+"""
+
+import codecs
+
+from license_ingest import (
+    ingest_device_ids, _scan_chunk, REASON_LENGTH, REASON_CHARACTERS, REASON_ENCODING
+)
+
+DEVICE_A = "40677b86a3f4d164d1d5e8f9a2b3c4d5"
+DEVICE_B = "0123456789abcdef0123456789abcdef"
+
+
+def _ingest(tmp_path, data, chunk_bytes=None):
+    path = tmp_path / "devices.txt"
+    path.write_bytes(data)
+    if chunk_bytes is None:
+        return ingest_device_ids(str(path))
+    return ingest_device_ids(str(path), chunk_bytes)
+
+
+def test_fast_path_rejects_short_lines_with_aligned_newlines():
+    # أسطر قصيرة مجموع أطوالها 33 بايت: السطر الجديد في الموضع 32 لا يكفي للمسار السريع
+    data = b"aaaaa\n" + b"b" * 26 + b"\n" + DEVICE_A.encode() + b"\n"
+    device_ids, errors = [], []
+    assert _scan_chunk(data, 1, device_ids, errors) == 3
+    assert device_ids == [DEVICE_A]
+    assert errors == [(1, "aaaaa", REASON_LENGTH), (2, "b" * 26, REASON_LENGTH)]
+
+
+def test_valid_file_fast_path(tmp_path):
+    device_ids, errors = _ingest(tmp_path, f"{DEVICE_A}\n{DEVICE_B}\n".encode())
+    assert device_ids == [DEVICE_A, DEVICE_B]
+    assert errors == []
+
+
+def test_crlf_bom_case_and_spaces(tmp_path):
+    data = codecs.BOM_UTF8 + f"  {DEVICE_A.upper()}\r\n\r\n{DEVICE_B}\t\r\n".encode()
+    device_ids, errors = _ingest(tmp_path, data)
+    assert device_ids == [DEVICE_A, DEVICE_B]
+    assert errors == []
+
+
+def test_cr_only_line_endings(tmp_path):
+    data = f"{DEVICE_A}\r{DEVICE_B}\rabc\r".encode()
+    device_ids, errors = _ingest(tmp_path, data)
+    assert device_ids == [DEVICE_A, DEVICE_B]
+    assert errors == [(3, "abc", REASON_LENGTH)]
+
+
+def test_cr_only_line_endings_across_chunks(tmp_path):
+    lines = [f"{i:032x}" for i in range(200)]
+    data = "\r".join(lines).encode() + b"\r"
+    device_ids, errors = _ingest(tmp_path, data, chunk_bytes=100)
+    assert device_ids == lines
+    assert errors == []
+
+
+def test_error_line_numbers_across_chunks(tmp_path):
+    lines = [f"{i:032x}" for i in range(100)]
+    lines[10] = "zz" + lines[10][2:]
+    lines[57] = "abc"
+    lines[80] = ""
+    data = ("\n".join(lines) + "\n").encode()
+    device_ids, errors = _ingest(tmp_path, data, chunk_bytes=200)
+    assert device_ids == [line for i, line in enumerate(lines) if i not in (10, 57, 80)]
+    assert [(line, reason) for line, _, reason in errors] == [(11, REASON_CHARACTERS), (58, REASON_LENGTH)]
+
+
+def test_invalid_utf8(tmp_path):
+    device_ids, errors = _ingest(tmp_path, DEVICE_A.encode() + b"\n\xff\xfe" + b"a" * 30 + b"\n")
+    assert device_ids == [DEVICE_A]
+    assert errors[0][0] == 2 and errors[0][2] == REASON_ENCODING
+
+
+def test_utf16_file(tmp_path):
+    device_ids, errors = _ingest(tmp_path, f"{DEVICE_A}\r\n{DEVICE_B}\r\n".encode('utf-16'))
+    assert device_ids == [DEVICE_A, DEVICE_B]
+    assert errors == []
+
+
+def test_empty_file_and_missing_final_newline(tmp_path):
+    assert _ingest(tmp_path, b"") == ([], [])
+    assert _ingest(tmp_path, DEVICE_A.encode()) == ([DEVICE_A], [])
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبارات توليد المفاتيح وجدول كل الأنواع (license_keys / quote_all_tiers)
+"""
+
+import csv
+import hashlib
+
+from license_batch import quote_all_tiers, write_quote_csv
+from license_keys import (
+    LICENSE_TYPES, MASTER_KEY, generate_key, generate_all_tiers, validate_device_id, normalize_device_id
+)
+
+DEVICE_ID = "40677b86a3f4d164d1d5e8f9a2b3c4d5"
+
+
+def test_key_algorithm():
+    # نفس خوارزمية DeviceBoundLicenseGenerator: sha256(المعرف + المفتاح الرئيسي + النوع) وأجزاء ثابتة
+    digest = hashlib.sha256((DEVICE_ID + MASTER_KEY + "STANDARD").encode('utf-8')).hexdigest()
+    expected = '-'.join(digest[start:end] for start, end in ((0, 5), (8, 13), (16, 21), (24, 29))).upper()
+    assert generate_key(DEVICE_ID, "STANDARD") == expected
+    assert generate_key(DEVICE_ID, "") == expected
+    assert generate_key(DEVICE_ID, "STANDARD") != generate_key(DEVICE_ID, "PREMIUM")
+
+
+def test_all_tiers_match_single_generation():
+    keys = generate_all_tiers(DEVICE_ID)
+    assert list(keys) == LICENSE_TYPES
+    assert keys == {license_type: generate_key(DEVICE_ID, license_type) for license_type in LICENSE_TYPES}
+    assert generate_all_tiers(DEVICE_ID, ["PREMIUM"]) == {"PREMIUM": generate_key(DEVICE_ID, "PREMIUM")}
+
+
+def test_quote_csv(tmp_path):
+    device_ids = [DEVICE_ID, "0" * 32]
+    path = str(tmp_path / "quote.csv")
+    write_quote_csv(quote_all_tiers(device_ids), path)
+    with open(path, encoding='utf-8', newline='') as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ['device_id'] + LICENSE_TYPES
+    assert rows[2] == ["0" * 32] + [generate_key("0" * 32, t) for t in LICENSE_TYPES]
+
+
+def test_device_id_validation():
+    assert validate_device_id(DEVICE_ID.upper())
+    assert not validate_device_id(DEVICE_ID[:-1] + "g")
+    assert not validate_device_id("")
+    assert normalize_device_id(f"  {DEVICE_ID.upper()}\n") == DEVICE_ID
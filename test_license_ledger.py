@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبارات سجل المفاتيح الصادرة (license_ledger)
+"""
+
+from license_ledger import LicenseLedger, LEDGER_HEADER, iter_records, read_ledger_chunk
+
+
+def _ledger(tmp_path, count=5):
+    ledger = LicenseLedger(str(tmp_path / "data" / "issued.csv"))
+    for number in range(count):
+        ledger.append(f"{number:032x}", f"{number:020X}", 'PREMIUM', 'UAE', issued_at=1000 + number,
+                      customer="عيادة النور", operator='ali')
+    return ledger
+
+
+def test_append_and_iter_records(tmp_path):
+    ledger = _ledger(tmp_path)
+    records = list(ledger)
+    assert len(records) == 5 and list(records[0]) == LEDGER_HEADER
+    assert records[4]['issued_at'] == 1004 and records[4]['customer'] == "عيادة النور"
+    assert list(iter_records(str(tmp_path / "missing.csv"))) == []
+
+
+def test_chunks_end_at_line_boundaries(tmp_path):
+    ledger = _ledger(tmp_path, 20)
+    with open(ledger.path, 'rb') as f:
+        data = f.read()
+
+    pieces = []
+    offset = 0
+    while True:
+        text, offset = read_ledger_chunk(ledger.path, offset, chunk_bytes=50)
+        if not text:
+            break
+        assert text.endswith('\n')
+        pieces.append(text)
+    assert ''.join(pieces) == data.decode('utf-8') and offset == len(data)
+
+
+def test_incomplete_last_line_waits(tmp_path):
+    ledger = _ledger(tmp_path, 2)
+    with open(ledger.path, 'rb') as f:
+        size = len(f.read())
+    with open(ledger.path, 'a', encoding='utf-8') as f:
+        f.write("ffff,عيادة")
+    text, offset = read_ledger_chunk(ledger.path)
+    assert offset == size and text.count('\n') == 3
+    assert read_ledger_chunk(ledger.path, offset, chunk_bytes=4) == ('', offset)
+
+
+def test_bom_is_skipped(tmp_path):
+    path = tmp_path / "issued.csv"
+    path.write_bytes(b'\xef\xbb\xbf' + ','.join(LEDGER_HEADER).encode('ascii') + b'\r\n')
+    text, offset = read_ledger_chunk(str(path))
+    assert text.startswith('device_id') and offset == path.stat().st_size
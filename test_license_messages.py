@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبارات رسائل التفعيل للعملاء (license_messages)
+"""
+
+import os
+import time
+import zipfile
+
+import pytest
+
+from license_export import bundle_filename
+from license_messages import (
+    MessageRenderer, MessageTemplate, LANGUAGE_SEPARATOR, parse_languages, write_messages
+)
+
+ISSUED_AT = int(time.mktime((2025, 3, 10, 12, 0, 0, 0, 0, -1)))
+ROWS = [
+    ("40677b86a3f4d164d1d5e8f9a2b3c4d5", "ABCDE-12345-FFFFF-00000", "PREMIUM", "UAE", ISSUED_AT),
+    ("0123456789abcdef0123456789abcdef", "11111-22222-33333-44444", "STANDARD", "GCC", ISSUED_AT),
+    ("ffffffffffffffffffffffffffffffff", "99999-88888-77777-66666", "PREMIUM", "UAE", ISSUED_AT + 86400),
+]
+
+LRI, PDI = "\u2066", "\u2069"
+
+
+def test_default_bilingual_message():
+    text = MessageRenderer().render(*ROWS[0])
+    arabic, english = text.split(LANGUAGE_SEPARATOR)
+    assert "🎯 ABCDE-12345-FFFFF-00000\n" in arabic and "🎯 ABCDE-12345-FFFFF-00000\n" in english
+    assert LRI + ROWS[0][0] + PDI in arabic and "ترخيص مميز" in arabic and "الإمارات" in arabic
+    assert LRI + "2025-03-10" + PDI in arabic
+    assert LRI not in english and "Device ID: " + ROWS[0][0] in english
+    assert "Region: United Arab Emirates" in english
+
+
+def test_custom_template_field_order_and_percent():
+    templates = {'en': "{device_id} -> {license_key} (100%) ٢٠٢٥ {issued} {license_type}"}
+    renderer = MessageRenderer(("en",), templates)
+    expected = [f"{row[0]} -> {row[1]} (100%) 2025 {time.strftime('%Y-%m-%d', time.localtime(row[4]))} {row[2]}"
+                for row in ROWS]
+    assert [renderer.render(*row) for row in ROWS] == expected
+    assert [text for _, _, text in renderer.iter_messages(ROWS)] == expected
+
+
+@pytest.mark.parametrize('text', ["{customer}", "{license_key:>30}", "{license_key!r}", "{license_key"])
+def test_invalid_templates(text):
+    with pytest.raises(ValueError):
+        MessageTemplate(text, 'en')
+
+
+def test_invalid_languages():
+    with pytest.raises(ValueError):
+        MessageTemplate("{license_key}", 'fr')
+    with pytest.raises(ValueError):
+        MessageRenderer(())
+    with pytest.raises(ValueError):
+        MessageRenderer(("en",), {'ar': "{license_key}"})
+    assert parse_languages(" EN, ar ") == ("en", "ar")
+    with pytest.raises(ValueError):
+        parse_languages("en,fr")
+
+
+def test_iter_messages_matches_render():
+    renderer = MessageRenderer()
+    messages = list(renderer.iter_messages(ROWS))
+    assert [name for name, _, _ in messages] == [bundle_filename(row[0], row[2]) for row in ROWS]
+    assert [text for _, _, text in messages] == [MessageRenderer().render(*row) for row in ROWS]
+
+
+def test_write_zip_and_directory(tmp_path):
+    done = []
+    path = str(tmp_path / "messages.zip")
+    assert write_messages(ROWS, path, languages=("ar",), progress=done.append) == 3
+    assert done == [3] and not os.path.exists(path + '.tmp')
+    renderer = MessageRenderer(("ar",))
+    with zipfile.ZipFile(path) as bundle:
+        info = bundle.getinfo(bundle_filename(ROWS[2][0], ROWS[2][2]))
+        assert bundle.read(info).decode('utf-8') == renderer.render(*ROWS[2])
+        assert info.date_time == time.localtime(ROWS[2][4])[:6]
+
+    directory = tmp_path / "messages"
+    assert write_messages(iter(ROWS), str(directory)) == 3
+    name = bundle_filename(ROWS[1][0], ROWS[1][2])
+    assert (directory / name).read_text(encoding='utf-8') == MessageRenderer().render(*ROWS[1])
+
+
+def test_repeated_device_keeps_every_message(tmp_path):
+    rows = ROWS + [(ROWS[0][0], "AAAAA-BBBBB-CCCCC-DDDDD", ROWS[0][2], ROWS[0][3], ISSUED_AT + 60)]
+    path = str(tmp_path / "messages.zip")
+    assert write_messages(rows, path, languages=("en",)) == 4
+    with zipfile.ZipFile(path) as bundle:
+        texts = [bundle.read(name).decode('utf-8') for name in bundle.namelist()]
+    assert len(texts) == 4 and all(row[1] in text for row, text in zip(rows, texts))
+
+    directory = tmp_path / "messages"
+    assert write_messages(rows, str(directory), languages=("en",)) == 4
+    assert len(os.listdir(directory)) == 4
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبارات تشغيل Node.js مع ذاكرة الترجمة (license_node)
+"""
+
+import os
+import shutil
+
+import pytest
+
+from license_keys import generate_key
+from license_node import NodeLauncher, SCRIPT_FILES, NODE_CACHE_DIR_NAME, PROBE_DEVICE_ID
+from license_ledger import data_dir
+
+PROJECT_PATH = os.path.dirname(os.path.abspath(__file__))
+
+
+def _project(tmp_path):
+    for name in SCRIPT_FILES:
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("// v1\n", encoding='utf-8')
+    return str(tmp_path)
+
+
+def _launcher(project, version):
+    launcher = NodeLauncher(project)
+    launcher._version = version
+    return launcher
+
+
+def test_fingerprint_follows_scripts_and_node_version(tmp_path):
+    project = _project(tmp_path)
+    fingerprint = _launcher(project, (22, 1)).script_fingerprint()
+    assert _launcher(project, (22, 1)).script_fingerprint() == fingerprint
+    assert _launcher(project, (23, 0)).script_fingerprint() != fingerprint
+
+    (tmp_path / SCRIPT_FILES[1]).write_text("// v2 - changed\n", encoding='utf-8')
+    assert _launcher(project, (22, 1)).script_fingerprint() != fingerprint
+
+
+def test_cache_dir_replaces_stale_caches(tmp_path):
+    project = _project(tmp_path)
+    launcher = _launcher(project, (22, 1))
+    first = launcher.cache_dir()
+    assert os.path.dirname(first) == os.path.join(data_dir(project), NODE_CACHE_DIR_NAME)
+
+    (tmp_path / SCRIPT_FILES[0]).write_text("// v2 - changed\n", encoding='utf-8')
+    second = launcher.cache_dir()
+    assert second != first
+    assert os.listdir(os.path.dirname(second)) == [os.path.basename(second)]
+
+
+@pytest.mark.parametrize('version, expected', [((22, 1), True), ((20, 19), False), ((), False)])
+def test_env_sets_compile_cache_only_when_supported(tmp_path, monkeypatch, version, expected):
+    monkeypatch.setenv("NODE_COMPILE_CACHE", "/stale/cache")
+    launcher = _launcher(_project(tmp_path), version)
+    env = launcher.env()
+    assert ("NODE_COMPILE_CACHE" in env) == expected
+    assert launcher.accelerator() == ("compile-cache" if expected else "none")
+    assert "NODE_COMPILE_CACHE" not in launcher.env(accelerate=False)
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="Node.js غير مثبت")
+def test_run_generator_matches_python_key():
+    result = NodeLauncher(PROJECT_PATH).run_generator(PROBE_DEVICE_ID, "PREMIUM", "UAE", accelerate=False)
+    assert result.returncode == 0
+    assert generate_key(PROBE_DEVICE_ID, "PREMIUM") in result.stdout
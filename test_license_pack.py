@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبارات ملف مفاتيح الإنتاج وفهرسه الجانبي (license_pack)
+"""
+
+import json
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from license_pack import (
+    PackBuilder, PackIndex, index_path_for, key_slot_hash, read_pack_records, verify_pack
+)
+
+KEYS = ["ZZZZZ-11111-22222-33333", "AAAAA-BBBBB-CCCCC-DDDDD", "M0M0M-N1N1N-P2P2P-Q3Q3Q"]
+
+# نفس المفتاح بدون شرطات أو بشرطات في غير موضعها - يجب رفضه بالفهرس وبدونه
+MALFORMED = ["AAAAABBBBBCCCCCDDDDD", "AAAAA-BBBBB--CCCCC-DDDDD", "AAAA-ABBBBB-CCCCC-DDDDD", "-AAAAABBBBB-CCCCC-DDDDD"]
+
+VALIDATOR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'electron', 'productionLicenseValidator.js')
+
+
+def _build(tmp_path, keys=KEYS, generate=0):
+    source = tmp_path / "keys.txt"
+    source.write_text("# مفاتيح قديمة\n" + "\n".join(keys) + "\n", encoding='utf-8')
+    builder = PackBuilder('PREMIUM', 'UAE')
+    builder.add_source(str(source))
+    builder.generate(generate)
+    path = str(tmp_path / "production-licenses.json")
+    builder.write(path)
+    return path, builder
+
+
+def test_slot_hash_matches_fnv1a():
+    # قيم FNV-1a المعروفة (نفس الدالة في productionLicenseValidator.js)
+    assert key_slot_hash("") == 0x811c9dc5
+    assert key_slot_hash("a") == 0xe40c292c
+    assert key_slot_hash("foobar") == 0xbf9cf968
+
+
+def test_pack_is_sorted_deduplicated_and_indexed(tmp_path):
+    path, builder = _build(tmp_path, KEYS + [KEYS[0].lower(), "bad-key"])
+    assert builder.duplicates == 1 and builder.invalid == ["BAD-KEY"]
+
+    records = read_pack_records(path)
+    assert [record['key'] for record in records] == sorted(KEYS)
+    assert [record['metadata']['keyIndex'] for record in records] == [1, 2, 3]
+    with open(path, encoding='utf-8') as f:
+        assert json.load(f)['statistics']['licenseTypes'] == {'PREMIUM': 3}
+
+    with PackIndex(index_path_for(path)) as index:
+        assert index.count == 3 and index.matches(path)
+        assert index.position(" zzzzz-11111-22222-33333 ") == 2
+        assert "AAAAA-BBBBB-CCCCC-DDDDE" not in index
+        assert index.position("short") is None
+
+
+def test_verify_pack_large_and_stale(tmp_path):
+    path, _ = _build(tmp_path, generate=3000)
+    assert verify_pack(path) == []
+
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write("\n")
+    assert len(verify_pack(path)) == 1
+
+    (tmp_path / "production-licenses.idx").unlink()
+    assert "غير موجود" in verify_pack(path)[0]
+
+
+def test_rebuild_keeps_existing_metadata(tmp_path):
+    path, _ = _build(tmp_path)
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    data['licenses'][0]['metadata']['isUsed'] = True
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+
+    builder = PackBuilder()
+    builder.add_source(path)
+    builder.write(path)
+    assert read_pack_records(path)[0]['metadata']['isUsed'] is True
+    assert verify_pack(path) == []
+
+
+def test_malformed_keys_rejected_with_and_without_index(tmp_path):
+    path, _ = _build(tmp_path)
+    keys = {record['key'] for record in read_pack_records(path)}
+    with PackIndex(index_path_for(path)) as index:
+        for license_key in MALFORMED:
+            assert index.position(license_key) is None
+            assert license_key.upper() not in keys
+        assert index.position(KEYS[1].lower()) is not None
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="Node.js غير مثبت")
+def test_validator_paths_agree(tmp_path):
+    path, _ = _build(tmp_path)
+    script = """
+const { ProductionLicenseValidator } = require(process.argv[1])
+const validator = new ProductionLicenseValidator(process.argv[2])
+const keys = JSON.parse(process.argv[3])
+process.stdout.write('\\n' + JSON.stringify({
+  indexed: validator.licenseIndex !== null,
+  valid: keys.map((key) => validator.isValidLicense(key))
+}))
+"""
+    keys = [KEYS[1], KEYS[1].lower()] + MALFORMED
+
+    def run():
+        output = subprocess.run(["node", "-e", script, VALIDATOR, path, json.dumps(keys)],
+                                capture_output=True, text=True, encoding='utf-8', check=True).stdout
+        return json.loads(output.rsplit('\n', 1)[-1])
+
+    indexed = run()
+    os.remove(index_path_for(path))
+    plain = run()
+    assert indexed['indexed'] and not plain['indexed']
+    assert indexed['valid'] == plain['valid'] == [True, True] + [False] * len(MALFORMED)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبارات مطابقة المفاتيح الصادرة مع التفعيلات (license_reconcile)
+"""
+
+import csv
+import json
+import os
+
+import pytest
+
+from license_ledger import LicenseLedger
+from license_reconcile import reconcile, activation_hash, REPORTS
+
+ISSUED_AT = 1741600000
+
+
+def _device(number):
+    return f"{number:032x}"
+
+
+def _key(number):
+    return f"{number:05X}-ABCDE-12345-FFFFF"
+
+
+def _sources(tmp_path):
+    ledger = LicenseLedger(str(tmp_path / "issued.csv"))
+    for number in range(1, 6):
+        ledger.append(_device(number), _key(number), 'PREMIUM', 'UAE', issued_at=ISSUED_AT)
+    ledger.append(_device(1), _key(1), 'PREMIUM', 'UAE', issued_at=ISSUED_AT)
+
+    # صيغة usedLicensesTracker.js
+    tracker = tmp_path / "used-licenses.json"
+    tracker.write_text(json.dumps({'usedLicenses': {
+        activation_hash(_key(1)).hex(): {'hwid': _device(1), 'activatedAt': "2025-03-10T10:00:00.000Z",
+                                         'activationCount': 1},
+        activation_hash(_key(2)).hex(): {'hwid': _device(99), 'activatedAt': "2025-03-11T10:00:00.000Z",
+                                         'activationCount': 3},
+        activation_hash("FFFFF-FFFFF-FFFFF-FFFFF").hex(): {'hwid': _device(99), 'activatedAt': 1741700000},
+    }}), encoding='utf-8')
+
+    extra = tmp_path / "activations.jsonl"
+    extra.write_text("\n".join([
+        json.dumps({'license_key': _key(3).lower(), 'hwid': _device(3), 'activated_at': 1741800000}),
+        json.dumps({'license_key': _key(3), 'hwid': _device(33), 'activated_at': 1741900000}),
+        json.dumps({'hwid': _device(3)}),
+        json.dumps({'license_key': _key(4), 'hwid': "not-hex"}),
+    ]) + "\n", encoding='utf-8')
+    return [ledger.path], [str(tracker), str(extra)]
+
+
+def _report(paths, name):
+    with open(paths[name], encoding='utf-8', newline='') as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == REPORTS[name]
+    return rows[1:]
+
+
+@pytest.mark.parametrize('workers, chunk_rows', [(1, 500000), (1, 2), (2, 2)])
+def test_reports(tmp_path, workers, chunk_rows):
+    issued, activations = _sources(tmp_path)
+    stats, paths = reconcile(issued, activations, str(tmp_path / "out"), workers=workers, chunk_rows=chunk_rows)
+
+    assert stats == {
+        'issued_rejected': 0, 'activations_rejected': 2, 'duplicate_issued': 1, 'activated': 3,
+        'never_activated': 2, 'unknown_activations': 1, 'device_mismatch': 2,
+        'multiple_activations': 2, 'repeated_devices': 1,
+    }
+    assert sorted(row[0] for row in _report(paths, 'activated')) == [_key(1), _key(2), _key(3)]
+    assert sorted(row[0] for row in _report(paths, 'never_activated')) == [_key(4), _key(5)]
+    assert _report(paths, 'unknown_activations')[0][1:] == [_device(99), "2025-03-11T13:33:20Z", "1"]
+    mismatch = sorted((row[0], row[2]) for row in _report(paths, 'device_mismatch'))
+    assert mismatch == [(_key(2), _device(99)), (_key(3), _device(33))]
+    multiple = {row[0]: row[2:4] for row in _report(paths, 'multiple_activations')}
+    assert multiple == {_key(2): ["3", "1"], _key(3): ["2", "2"]}
+    assert [row[:3] for row in _report(paths, 'repeated_devices')] == [[_device(99), "4", "2"]]
+
+    # الملفات المؤقتة للفرز الخارجي تُحذف
+    assert sorted(os.listdir(tmp_path / "out")) == sorted(name + '.csv' for name in REPORTS)
+
+
+def test_activated_row_uses_first_activation(tmp_path):
+    issued, activations = _sources(tmp_path)
+    _, paths = reconcile(issued, activations, str(tmp_path / "out"), workers=1)
+    rows = {row[0]: row for row in _report(paths, 'activated')}
+    assert rows[_key(3)][1:] == [_device(3), 'PREMIUM', 'UAE', "2025-03-10T09:46:40Z",
+                                 _device(3), "2025-03-12T17:20:00Z", "2"]
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبارات الترحيل القابل للاستئناف (license_rekey)
+"""
+
+import csv
+import json
+import os
+
+import pytest
+
+from license_keys import KEY_SLICES, generate_key
+from license_ledger import LicenseLedger
+from license_rekey import RekeyJob, KeyScheme, SCHEMES, MAPPING_HEADER, DELTA_HEADER, customer_filename
+
+NEW_SCHEME = KeyScheme(2, 'ROTATED_MASTER_KEY', KEY_SLICES)
+CUSTOMERS = ["Smile Clinics", "Nour Dental", ""]
+
+
+class _Stop(Exception):
+    pass
+
+
+def _ledger(tmp_path, count=25):
+    ledger = LicenseLedger(str(tmp_path / "issued.csv"))
+    for number in range(count):
+        device_id = f"{number:032x}"
+        license_key = generate_key(device_id, 'PREMIUM')
+        if number == 7:
+            license_key = "AAAAA-BBBBB-CCCCC-DDDDD"
+        ledger.append(device_id, license_key, 'PREMIUM', 'UAE', issued_at=1,
+                      customer=CUSTOMERS[number % 3], operator='ali')
+    return ledger.path
+
+
+def _job(ledger, output):
+    return RekeyJob([ledger], str(output), SCHEMES[1], NEW_SCHEME, workers=1, chunk_rows=4)
+
+
+def _read(path):
+    with open(path, encoding='utf-8', newline='') as f:
+        return list(csv.reader(f))
+
+
+def test_full_run(tmp_path):
+    ledger = _ledger(tmp_path)
+    checkpoint = _job(ledger, tmp_path / "out").run()
+    assert checkpoint['done'] and checkpoint['records'] == 25 and checkpoint['mismatches'] == 1
+
+    mapping = _read(tmp_path / "out" / "mapping.csv")
+    assert mapping[0] == MAPPING_HEADER and len(mapping) == 26
+    assert mapping[8][-1] == 'mismatch'
+    assert mapping[1][5] == generate_key(f"{0:032x}", 'PREMIUM', NEW_SCHEME.master_key)
+
+    customers = _read(tmp_path / "out" / "customers" / customer_filename("Smile Clinics"))
+    assert customers[0] == DELTA_HEADER and len(customers) == 1 + 9
+
+
+def test_resume_matches_uninterrupted_run(tmp_path):
+    ledger = _ledger(tmp_path)
+    _job(ledger, tmp_path / "whole").run()
+
+    def stop_after_two_chunks(records):
+        if records >= 8:
+            raise _Stop()
+
+    with pytest.raises(_Stop):
+        _job(ledger, tmp_path / "resumed").run(progress=stop_after_two_chunks)
+    # بقايا كتابة بعد آخر نقطة استئناف تُقص عند الاستئناف
+    with open(tmp_path / "resumed" / "mapping.csv", 'ab') as f:
+        f.write(b"partial,row")
+    checkpoint = _job(ledger, tmp_path / "resumed").run()
+    assert checkpoint['records'] == 25
+
+    for name in ["mapping.csv"] + [os.path.join("customers", customer_filename(c)) for c in CUSTOMERS]:
+        assert _read(tmp_path / "resumed" / name) == _read(tmp_path / "whole" / name)
+
+
+def test_crash_before_first_checkpoint(tmp_path, monkeypatch):
+    ledger = _ledger(tmp_path)
+    _job(ledger, tmp_path / "whole").run()
+
+    def crash(self, checkpoint):
+        raise _Stop()
+
+    # ملفات العملاء كُتبت لكن checkpoint.json لم يُحفظ بعد
+    monkeypatch.setattr(RekeyJob, '_save_checkpoint', crash)
+    with pytest.raises(_Stop):
+        _job(ledger, tmp_path / "resumed").run()
+    assert not (tmp_path / "resumed" / "checkpoint.json").exists()
+    monkeypatch.undo()
+
+    assert _job(ledger, tmp_path / "resumed").run()['records'] == 25
+    for name in ["mapping.csv"] + [os.path.join("customers", customer_filename(c)) for c in CUSTOMERS]:
+        assert _read(tmp_path / "resumed" / name) == _read(tmp_path / "whole" / name)
+
+
+@pytest.mark.parametrize('damage', ['missing', 'short'])
+def test_resume_refuses_damaged_outputs(tmp_path, damage):
+    ledger = _ledger(tmp_path)
+    output = tmp_path / "out"
+
+    def stop(records):
+        raise _Stop()
+
+    with pytest.raises(_Stop):
+        _job(ledger, output).run(progress=stop)
+    mapping = output / "mapping.csv"
+    if damage == 'missing':
+        mapping.unlink()
+    else:
+        os.truncate(mapping, 10)
+    with pytest.raises(ValueError, match="--fresh"):
+        _job(ledger, output).run()
+
+    assert _job(ledger, output).run(fresh=True)['records'] == 25
+
+
+def test_resume_refuses_other_scheme(tmp_path):
+    ledger = _ledger(tmp_path)
+    output = tmp_path / "out"
+    _job(ledger, output).run()
+    checkpoint_path = output / "checkpoint.json"
+    checkpoint = json.loads(checkpoint_path.read_text(encoding='utf-8'))
+    checkpoint['done'] = False
+    checkpoint_path.write_text(json.dumps(checkpoint), encoding='utf-8')
+
+    job = RekeyJob([ledger], str(output), SCHEMES[1], KeyScheme(3, 'OTHER', KEY_SLICES), workers=1)
+    with pytest.raises(ValueError, match="--fresh"):
+        job.run()
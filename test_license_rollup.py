@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبارات جداول إحصاءات الإصدار (license_rollup)
+"""
+
+import functools
+import time
+
+import license_rollup
+from license_ledger import LicenseLedger, read_ledger_chunk
+from license_rollup import UsageRollups
+
+DAY = int(time.mktime((2025, 3, 10, 12, 0, 0, 0, 0, -1)))
+
+
+def _append(ledger, count, start=0, license_type='PREMIUM', region='UAE', operator='ali'):
+    for number in range(start, start + count):
+        ledger.append(f"{number:032x}", f"{number:020X}", license_type, region,
+                      issued_at=DAY, operator=operator)
+
+
+def test_incremental_sync(tmp_path):
+    ledger = LicenseLedger(str(tmp_path / "issued.csv"))
+    _append(ledger, 5)
+    with UsageRollups.open(ledger=ledger.path) as rollups:
+        assert rollups.total() == 5
+        _append(ledger, 3, start=5, license_type='STANDARD', region='GCC', operator='sara')
+        assert rollups.sync() == 3
+        assert rollups.sync() == 0
+        assert rollups.report('type') == [('PREMIUM', 5), ('STANDARD', 3)]
+        assert rollups.report('day') == [('2025-03-10', 8)]
+        assert rollups.report('region', operator='sara') == [('GCC', 3)]
+
+
+def test_incomplete_last_line_waits(tmp_path):
+    ledger = LicenseLedger(str(tmp_path / "issued.csv"))
+    _append(ledger, 2)
+    with open(ledger.path, 'a', encoding='utf-8') as f:
+        f.write(f"{9:032x},{9:020X},PREMIUM,UAE,{DAY}")
+    with UsageRollups.open(ledger=ledger.path) as rollups:
+        assert rollups.total() == 2
+        with open(ledger.path, 'a', encoding='utf-8') as f:
+            f.write(",,ali\r\n")
+        assert rollups.sync() == 1
+        assert rollups.total() == 3
+
+
+def test_chunked_sync_matches_single_read(tmp_path, monkeypatch):
+    ledger = LicenseLedger(str(tmp_path / "issued.csv"))
+    _append(ledger, 40)
+    with UsageRollups.open(str(tmp_path / "whole.sqlite"), ledger.path) as whole:
+        expected = whole.report('operator')
+    monkeypatch.setattr(license_rollup, 'read_ledger_chunk',
+                        functools.partial(read_ledger_chunk, chunk_bytes=100))
+    with UsageRollups.open(str(tmp_path / "chunked.sqlite"), ledger.path) as chunked:
+        assert chunked.report('operator') == expected == [('ali', 40)]
+        assert chunked.ledger_offset == len(open(ledger.path, 'rb').read())
+
+
+def test_truncated_ledger_rebuilds(tmp_path):
+    ledger = LicenseLedger(str(tmp_path / "issued.csv"))
+    _append(ledger, 10)
+    with UsageRollups.open(ledger=ledger.path) as rollups:
+        assert rollups.total() == 10
+        open(ledger.path, 'w').close()
+        _append(ledger, 2)
+        rollups.sync()
+        assert rollups.total() == 2
+        assert rollups.rebuild() == 2
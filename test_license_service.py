@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبارات خدمة التوليد المحلية (license_service)
+"""
+
+import asyncio
+import http.client
+import json
+import threading
+
+import pytest
+
+from license_keys import generate_key
+from license_service import LicenseService, ServiceClient
+
+DEVICE_ID = "40677b86a3f4d164d1d5e8f9a2b3c4d5"
+
+
+@pytest.fixture(scope='module')
+def service():
+    loop = asyncio.new_event_loop()
+    service = LicenseService(port=0, max_delay=0.001)
+    ready = threading.Event()
+
+    def run():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(service.start())
+        ready.set()
+        loop.run_forever()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    ready.wait(10)
+    yield service
+    asyncio.run_coroutine_threadsafe(service.close(), loop).result(10)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(10)
+
+
+def _post(service, path, body):
+    connection = http.client.HTTPConnection('127.0.0.1', service.port, timeout=10)
+    try:
+        connection.request('POST', path, body, {'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        connection.close()
+
+
+def test_generate_and_batch(service):
+    client = ServiceClient(f"http://127.0.0.1:{service.port}")
+    result = client.generate(DEVICE_ID.upper(), 'PREMIUM', 'UAE')
+    assert result['license_key'] == generate_key(DEVICE_ID, 'PREMIUM')
+    assert result['device_id'] == DEVICE_ID
+
+    batch = client.batch([DEVICE_ID, "not-a-device"], 'standard')
+    assert [item['license_key'] for item in batch['results']] == [generate_key(DEVICE_ID, 'STANDARD')]
+    assert batch['errors'][0]['index'] == 1
+
+
+@pytest.mark.parametrize('body', [b'[]', b'"x"', b'1', b'null'])
+@pytest.mark.parametrize('path', ['/generate', '/batch'])
+def test_non_object_body_is_bad_request(service, path, body):
+    status, payload = _post(service, path, body)
+    assert status == 400
+    assert 'error' in payload
+
+
+def test_bad_requests(service):
+    assert _post(service, '/generate', b'{not json')[0] == 400
+    assert _post(service, '/generate', json.dumps({'device_id': 'abc'}).encode())[0] == 400
+    assert _post(service, '/batch', json.dumps({'device_ids': 'abc'}).encode())[0] == 400
+    assert _post(service, '/unknown', b'{}')[0] == 404
+    assert service.metrics['errors'] == 0
+
+
+@pytest.mark.parametrize('device_id', [5, ['x'], {'id': DEVICE_ID}])
+def test_non_string_device_id(service, device_id):
+    status, payload = _post(service, '/generate', json.dumps({'device_id': device_id}).encode())
+    assert status == 400 and 'error' in payload
+
+    status, payload = _post(service, '/batch', json.dumps({'device_ids': [DEVICE_ID, device_id]}).encode())
+    assert status == 200
+    assert [item['device_id'] for item in payload['results']] == [DEVICE_ID]
+    assert [error['index'] for error in payload['errors']] == [1]
+    assert service.metrics['errors'] == 0
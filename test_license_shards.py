@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبارات تقسيم نتائج الدفعة حسب المنطقة والنوع (license_shards)
+"""
+
+import csv
+import json
+import os
+
+import pytest
+
+from license_batch import CSV_HEADER, run_batch
+from license_keys import generate_key
+from license_shards import ShardWriter, MANIFEST_NAME, parse_size, shard_filename, verify_manifest
+from license_store import LicenseStore
+
+MIX = [("PREMIUM", "UAE"), ("STANDARD", "GCC"), ("PREMIUM", "GCC")]
+
+
+def _rows(count, mixed=True):
+    rows = []
+    for number in range(count):
+        license_type, region = MIX[number % 3] if mixed else MIX[0]
+        key = f"{number:05X}-ABCDE-12345-FFFFF"
+        rows.append((f"{number:032x}", key, license_type, region, 1741600000 + number // 7))
+    return rows
+
+
+def _store(rows):
+    store = LicenseStore()
+    for row in rows:
+        store.append(*row)
+    return store
+
+
+def _read(directory):
+    """صفوف كل (منطقة، نوع) بعد دمج أجزائه بالترتيب"""
+    with open(os.path.join(directory, MANIFEST_NAME), encoding='utf-8') as f:
+        manifest = json.load(f)
+    shards = {}
+    for shard in manifest['shards']:
+        with open(os.path.join(directory, shard['file']), encoding='ascii', newline='') as f:
+            rows = list(csv.reader(f))
+        assert rows[0] == CSV_HEADER and len(rows) - 1 == shard['rows']
+        assert os.path.getsize(os.path.join(directory, shard['file'])) == shard['bytes']
+        shards.setdefault((shard['region'], shard['license_type']), []).extend(rows[1:])
+    return manifest, shards
+
+
+def _expected(rows):
+    shards = {}
+    for row in rows:
+        shards.setdefault((row[3], row[2]), []).append([str(value) for value in row])
+    return shards
+
+
+@pytest.mark.parametrize('text, size', [("500000", 500000), ("512K", 524288), ("50MB", 50 * 1024 ** 2), ("1.5g", 1610612736)])
+def test_parse_size(text, size):
+    assert parse_size(text) == size
+
+
+@pytest.mark.parametrize('mixed', [True, False])
+def test_partitions_match_rows(tmp_path, mixed):
+    rows = _rows(100, mixed)
+    with ShardWriter(str(tmp_path), workers=2, chunk_rows=16) as shards:
+        shards.write_store(_store(rows))
+    manifest, found = _read(str(tmp_path))
+    assert found == _expected(rows)
+    assert manifest['rows'] == 100 and manifest['files'] == len(found)
+    assert verify_manifest(str(tmp_path)) == []
+
+
+def test_rotation(tmp_path):
+    rows = _rows(200, mixed=False)
+    with ShardWriter(str(tmp_path), max_bytes=1024, chunk_rows=50) as shards:
+        shards.write_store(_store(rows))
+    manifest, found = _read(str(tmp_path))
+    files = [shard['file'] for shard in manifest['shards']]
+    assert files == [shard_filename("UAE", "PREMIUM", part) for part in range(1, len(files) + 1)]
+    assert len(files) > 10
+    assert all(shard['bytes'] <= 1024 for shard in manifest['shards'])
+    assert found == _expected(rows)
+
+
+def test_follow_run_batch(tmp_path):
+    device_ids = [f"{number:032x}" for number in range(1, 31)]
+    store = LicenseStore()
+    with ShardWriter(str(tmp_path)) as shards:
+        run_batch(device_ids, "ULTIMATE", "OMAN", store=store, progress=shards.follow(store))
+    _, found = _read(str(tmp_path))
+    assert [row[:4] for row in found[("OMAN", "ULTIMATE")]] == [
+        [device_id, generate_key(device_id, "ULTIMATE"), "ULTIMATE", "OMAN"] for device_id in device_ids
+    ]
+
+
+def test_verify_manifest_reports_damage(tmp_path):
+    with ShardWriter(str(tmp_path)) as shards:
+        shards.write_store(_store(_rows(30)))
+    names = sorted(name for name in os.listdir(tmp_path) if name != MANIFEST_NAME)
+    with open(tmp_path / names[0], 'ab') as f:
+        f.write(b"x")
+    os.remove(tmp_path / names[1])
+    problems = verify_manifest(str(tmp_path))
+    assert len(problems) == 2 and problems[0].startswith(names[0])
+
+
+def test_refuses_previous_output_and_small_limit(tmp_path):
+    ShardWriter(str(tmp_path)).close()
+    with pytest.raises(ValueError):
+        ShardWriter(str(tmp_path))
+    with pytest.raises(ValueError):
+        ShardWriter(str(tmp_path / "other"), max_bytes=100)
+
+
+def test_failure_leaves_no_manifest(tmp_path):
+    with pytest.raises(KeyError):
+        with ShardWriter(str(tmp_path)) as shards:
+            shards.write_store(_store(_rows(10)))
+            raise KeyError("generation failed")
+    assert not os.path.exists(tmp_path / MANIFEST_NAME)
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبارات اختبار التحمل للواجهة (license_soak)
+"""
+
+import csv
+import os
+import threading
+
+import pytest
+
+import license_bloom
+from license_keys import generate_key
+from license_ledger import LicenseLedger, ledger_path
+from license_soak import SoakTest, Sample, SAMPLE_FIELDS, analyze_samples, headless_gui, parse_duration
+
+
+def _samples(count=9, traced=lambda n: 5000000, threads=lambda n: 3, text=lambda n: 100):
+    return [
+        Sample(n * 30.0, n * 100, n * 100, traced(n), None, threads(n), 10, 0, text(n), n)
+        for n in range(count)
+    ]
+
+
+@pytest.mark.parametrize('text, seconds', [("90", 90), ("90s", 90), ("30m", 1800), ("8H", 28800), ("1.5h", 5400)])
+def test_parse_duration(text, seconds):
+    assert parse_duration(text) == seconds
+
+
+def test_flat_samples_pass():
+    assert analyze_samples(_samples()) == []
+    assert analyze_samples(_samples(count=3, traced=lambda n: n * 10 ** 9)) == []
+
+
+def test_detects_growth():
+    assert len(analyze_samples(_samples(traced=lambda n: 5000000 + n * 1000 * 1000))) == 1
+    # نمو بطيء تحت الحد لكل طلب لا يُعد تسرباً
+    assert analyze_samples(_samples(traced=lambda n: 5000000 + n * 100 * 10)) == []
+    assert len(analyze_samples(_samples(threads=lambda n: 3 + n))) == 1
+    assert len(analyze_samples(_samples(text=lambda n: 100 + n * 10000))) == 1
+
+
+def test_short_headless_run(tmp_path):
+    messages = []
+    soak = SoakTest(duration=1.5, rate=40, sample_every=0.25, warmup=0.25, use_node=False,
+                    batch_every=5, batch_size=5, clear_every=7, log=messages.append)
+    problems = soak.run()
+    assert soak.requests > 10 and soak.samples
+    assert not [message for message in messages if message.startswith("⚠️")]
+    assert isinstance(problems, list)
+
+    path = str(tmp_path / "samples.csv")
+    assert soak.write_samples(path) == len(soak.samples)
+    with open(path, encoding='utf-8', newline='') as f:
+        assert next(csv.reader(f)) == SAMPLE_FIELDS
+
+
+def test_gui_index_follows_ledger(tmp_path, monkeypatch):
+    project = str(tmp_path)
+    ledger = LicenseLedger(ledger_path(project))
+    devices = [f"{number:032x}" for number in range(1, 4)]
+    ledger.append(devices[0], generate_key(devices[0], "STANDARD"), "STANDARD", "GLOBAL")
+
+    with headless_gui() as (gui, dialogs):
+        app = gui.LicenseGeneratorGUI()
+        app.project_path.set(project)
+        replace = os.replace
+
+        def windows_replace(source, target):
+            # مثل Windows: لا يُستبدل الفهرس ما دامت الواجهة تبقيه مفتوحاً عبر mmap
+            if app._index is not None and not app._index._mm.closed and target == app._index.path:
+                raise PermissionError("index in use")
+            return replace(source, target)
+
+        def scan(path):
+            raise AssertionError("full ledger scan")
+
+        monkeypatch.setattr(os, 'replace', windows_replace)
+        monkeypatch.setattr(license_bloom, 'iter_records', scan)
+        assert devices[0] in app.get_index()
+
+        # ما كُتب في السجل بعد فتح الفهرس يظهر في الواجهة وفي فحص الدفعة
+        key = generate_key(devices[1], "PREMIUM")
+        ledger.append(devices[1], key, "PREMIUM", "UAE")
+        app.device_id.set(devices[1])
+        app.show_previous_keys()
+        assert key in app.result_text.get()
+
+        ledger.append(devices[2], generate_key(devices[2], "STANDARD"), "STANDARD", "GLOBAL")
+        batch_file = tmp_path / "batch.txt"
+        batch_file.write_text('\n'.join(devices + [f"{99:032x}"]) + '\n', encoding='utf-8')
+        dialogs.open_paths.append(str(batch_file))
+        before = set(threading.enumerate())
+        app.generate_batch()
+        for thread in set(threading.enumerate()) - before:
+            thread.join(30)
+        assert [row.device_id for row in app.results] == [f"{99:032x}"]
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبارات المخزن المضغوط لنتائج الدفعات (license_store)
+"""
+
+import pytest
+
+from license_batch import run_batch
+from license_keys import generate_key
+from license_store import LicenseStore
+
+DEVICE_A = "40677b86a3f4d164d1d5e8f9a2b3c4d5"
+DEVICE_B = "0123456789abcdef0123456789abcdef"
+
+
+def test_append_and_read_back():
+    store = LicenseStore()
+    store.append(DEVICE_A, "ABCDE-FGHIJ-KLMNO-PQRST", "PREMIUM", "UAE", 1741600000)
+    store.append(DEVICE_B, "12345678901234567890", "STANDARD", "GLOBAL", 1741600001)
+    assert len(store) == 2
+    assert store.memory_usage() == 2 * 42
+    assert store[0].as_dict() == {
+        'device_id': DEVICE_A, 'license_key': "ABCDE-FGHIJ-KLMNO-PQRST",
+        'license_type': "PREMIUM", 'region': "UAE", 'issued_at': 1741600000,
+    }
+    assert store[-1].license_key == "12345-67890-12345-67890"
+    with pytest.raises(IndexError):
+        store[2]
+
+
+@pytest.mark.parametrize('row', [
+    ("abc", "ABCDE-FGHIJ-KLMNO-PQRST", "PREMIUM", "UAE"),
+    (DEVICE_A, "ABCDE-FGHIJ", "PREMIUM", "UAE"),
+    (DEVICE_A, "ABCDE-FGHIJ-KLMNO-PQRST", "GOLD", "UAE"),
+    (DEVICE_A, "ABCDE-FGHIJ-KLMNO-PQRST", "PREMIUM", "MARS"),
+])
+def test_invalid_rows_leave_columns_aligned(row):
+    store = LicenseStore()
+    store.append(DEVICE_B, "ABCDE-FGHIJ-KLMNO-PQRST", "STANDARD", "GLOBAL", 1)
+    with pytest.raises(ValueError):
+        store.append(*row)
+    assert len(store) == 1
+    assert (len(store.device_ids), len(store.keys), len(store.regions), len(store.issued_at)) == (16, 20, 1, 1)
+
+
+def test_iter_chunks_matches_rows():
+    store = run_batch([f"{number:032x}" for number in range(7)], "ENTERPRISE", "GCC")
+    rows = [row for chunk in store.iter_chunks(1, 6, chunk_rows=2) for row in chunk]
+    assert [len(chunk) for chunk in store.iter_chunks(1, 6, chunk_rows=2)] == [2, 2, 1]
+    assert rows == [
+        (row.device_id, row.license_key, row.license_type, row.region, row.issued_at)
+        for row in list(store)[1:6]
+    ]
+
+
+def test_run_batch_progress_extend_and_clear():
+    calls = []
+    device_ids = [f"{number:032x}" for number in range(3)]
+    store = run_batch(device_ids, "PREMIUM", "UAE", progress=lambda done, total: calls.append((done, total)))
+    assert calls == [(3, 3)]
+    assert [row.license_key for row in store] == [generate_key(d, "PREMIUM") for d in device_ids]
+
+    other = LicenseStore()
+    other.extend(store)
+    other.extend(store)
+    assert len(other) == 6 and [row.device_id for row in other.tail(2)] == device_ids[1:]
+    other.clear()
+    assert len(other) == 0 and other.memory_usage() == 0
+    with pytest.raises(ValueError):
+        run_batch(device_ids, "GOLD", "UAE")
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبارات التتبع الزمني للمهام (license_trace)
+"""
+
+import asyncio
+import json
+
+import pytest
+
+import license_trace
+from license_async import PoolBackend, generate_many
+from license_keys import generate_key
+
+
+@pytest.fixture(autouse=True)
+def no_tracer():
+    license_trace.disable()
+    yield
+    license_trace.disable()
+
+
+def _export(tmp_path, tracer=None):
+    path = str(tmp_path / "trace.json")
+    count = (tracer or license_trace.current()).export(path)
+    with open(path, encoding='utf-8') as f:
+        trace = json.load(f)
+    assert len(trace['traceEvents']) == count
+    return trace
+
+
+def _events(trace, ph=None):
+    return [event for event in trace['traceEvents'] if ph is None or event['ph'] == ph]
+
+
+def test_disabled_is_a_no_op(tmp_path):
+    with license_trace.job("batch") as span:
+        span.set(keys=3)
+        assert span.id is None
+    assert license_trace.key_lanes(("hash",), 1, 10) == (None, 0)
+    assert license_trace.export(str(tmp_path / "trace.json")) == 0
+    assert not (tmp_path / "trace.json").exists()
+
+
+def test_spans_and_export(tmp_path):
+    license_trace.enable()
+    with license_trace.job("batch", keys=2) as job:
+        with license_trace.span("write", "io"):
+            pass
+        license_trace.instant("ui", "ui", rows=2)
+    with pytest.raises(KeyError):
+        with license_trace.span("parse", "io"):
+            raise KeyError("x")
+    tracer = license_trace.current()
+    tracer.async_span("spawn", "node", license_trace.now(), device_id="abc")
+
+    trace = _export(tmp_path)
+    complete = {event['name']: event for event in _events(trace, 'X')}
+    assert complete['batch']['args'] == {'keys': 2, 'job': job.id}
+    assert complete['write']['dur'] <= complete['batch']['dur']
+    assert complete['parse']['args'] == {'error': 'KeyError'}
+    assert _events(trace, 'i')[0]['args'] == {'rows': 2}
+    begin, end = _events(trace, 'b')[0], _events(trace, 'e')[0]
+    assert begin['id'] == end['id'] and begin['args'] == {'device_id': "abc"}
+    assert {event['name'] for event in _events(trace, 'M')} == {'process_name', 'thread_name'}
+
+
+def test_key_lanes_sample_when_over_budget(tmp_path):
+    tracer = license_trace.enable(max_key_events=100)
+    lanes, every = license_trace.key_lanes(("hash", "write"), 1, 1000)
+    assert every == 20
+    for index in range(0, 1000, every):
+        lanes[0].data.extend((index, license_trace.now(), 5000))
+    # الميزانية استُهلكت: المهمة التالية تسجل عينة أقل
+    assert license_trace.key_lanes(("hash",), 2, 10)[1] == 10
+    assert tracer.event_count() == 50
+
+    keys = [event for event in _events(_export(tmp_path)) if event.get('cat') == 'key']
+    assert len(keys) == 50 and keys[1]['args'] == {'job': 1, 'index': 20} and keys[0]['dur'] == 5.0
+
+
+def test_event_limit_drops(tmp_path):
+    license_trace.enable(max_events=3)
+    for _ in range(5):
+        license_trace.instant("ui", "ui")
+    assert license_trace.current().dropped == 2
+    assert _export(tmp_path)['otherData']['dropped'] == 2
+
+
+def test_pool_worker_events_are_merged(tmp_path):
+    license_trace.enable()
+    device_ids = [f"{number:032x}" for number in range(1, 21)]
+
+    async def run():
+        backend = PoolBackend(workers=2)
+        try:
+            return [record async for record in generate_many(device_ids, backend=backend, chunk_size=10)]
+        finally:
+            await backend.aclose()
+
+    records = asyncio.run(run())
+    assert [record['license_key'] for record in records] == [generate_key(d, "STANDARD") for d in device_ids]
+
+    trace = _export(tmp_path)
+    names = [event['args']['name'] for event in _events(trace, 'M') if event['name'] == 'process_name']
+    assert any(name.startswith("worker ") for name in names)
+    workers = [event for event in _events(trace, 'X') if event['name'] == 'worker']
+    assert len(workers) == 2
+    hashes = [event for event in _events(trace) if event.get('cat') == 'key']
+    jobs = sorted(event['args']['job'] for event in workers)
+    assert sorted(event['args']['job'] for event in hashes) == [jobs[0]] * 10 + [jobs[1]] * 10
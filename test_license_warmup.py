@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبارات تجهيز مسار التوليد في الخلفية (license_warmup)
+"""
+
+import os
+import shutil
+import subprocess
+import threading
+
+import pytest
+
+from license_keys import generate_key
+from license_node import NodeLauncher, PROBE_DEVICE_ID, SCRIPT_FILES
+from license_warmup import Warmup, node_steps, prime_files, probe_node
+
+PROJECT_PATH = os.path.dirname(os.path.abspath(__file__))
+
+
+class _FakeLauncher:
+    def __init__(self, stdout, returncode=0, stderr=''):
+        self.result = subprocess.CompletedProcess([], returncode, stdout, stderr)
+
+    def run_generator(self, device_id):
+        return self.result
+
+
+def test_prime_files():
+    expected = sum(os.path.getsize(os.path.join(PROJECT_PATH, name)) for name in SCRIPT_FILES)
+    assert prime_files(PROJECT_PATH) == expected
+
+
+def test_probe_node_checks_key():
+    key = generate_key(PROBE_DEVICE_ID, "STANDARD")
+    assert probe_node(_FakeLauncher(f"🔑 المفتاح: {key}\n")) == key
+    with pytest.raises(RuntimeError):
+        probe_node(_FakeLauncher("🔑 المفتاح: AAAAA-BBBBB-CCCCC-DDDDD\n"))
+    with pytest.raises(RuntimeError):
+        probe_node(_FakeLauncher("no key here"))
+    with pytest.raises(RuntimeError, match="boom"):
+        probe_node(_FakeLauncher("", returncode=1, stderr="boom\n"))
+
+
+def test_steps_run_in_order_and_failures_do_not_stop():
+    labels = []
+    calls = []
+    finished = threading.Event()
+
+    def fail():
+        raise OSError("missing")
+
+    warmup = Warmup([
+        ("first", "الخطوة الأولى", lambda: calls.append("first")),
+        ("broken", "خطوة فاشلة", fail),
+        ("last", "الخطوة الأخيرة", lambda: calls.append("last")),
+    ], on_step=labels.append, on_done=lambda w: finished.set())
+    assert warmup.summary().startswith("⏳")
+
+    assert warmup.start() is warmup.start()
+    assert warmup.wait(10) and finished.wait(10)
+    assert calls == ["first", "last"]
+    assert labels == ["الخطوة الأولى", "خطوة فاشلة", "الخطوة الأخيرة"]
+    assert [name for name, _, _ in warmup.results] == ["first", "broken", "last"]
+    assert warmup.failures() == [("broken", "missing")]
+    assert not warmup.ready and "broken" in warmup.summary()
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="Node.js غير مثبت")
+def test_node_steps_ready():
+    warmup = Warmup(node_steps(NodeLauncher(PROJECT_PATH))).start()
+    assert warmup.wait(60)
+    assert warmup.ready, warmup.failures()
+    assert warmup.summary().startswith("🟢")
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبارات مراقبة مجلد الطلبات (license_watch)
+"""
+
+import csv
+import os
+
+import pytest
+
+import license_watch
+from license_keys import generate_key
+from license_ledger import iter_records
+from license_watch import WatchDaemon, RESULT_HEADER
+
+
+class _Crash(Exception):
+    pass
+
+
+def _device(number):
+    return f"{number:032x}"
+
+
+def _daemon(tmp_path, **options):
+    options.setdefault('batch_size', 3)
+    daemon = WatchDaemon(str(tmp_path / "inbox"), ledger=str(tmp_path / "ledger" / "issued.csv"),
+                         settle=0, log=lambda message: None, **options)
+    daemon.setup()
+    return daemon
+
+
+def _drop(daemon, name, lines):
+    with open(os.path.join(daemon.directory, name), 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def _results(daemon, name):
+    with open(os.path.join(daemon.done_dir, name + '.licenses.csv'), encoding='utf-8', newline='') as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == RESULT_HEADER
+    return rows[1:]
+
+
+def _ledger_devices(daemon):
+    return [record['device_id'] for record in iter_records(daemon.ledger.path)]
+
+
+def test_scan_waits_for_file_to_settle(tmp_path):
+    daemon = _daemon(tmp_path)
+    _drop(daemon, "a.txt", [_device(1)])
+    _drop(daemon, "notes.md", [_device(2)])
+    assert daemon.scan() == []
+    assert daemon.scan() == ["a.txt"]
+
+
+def test_process_text_file(tmp_path):
+    daemon = _daemon(tmp_path)
+    _drop(daemon, "clinic.txt", [_device(n) for n in range(1, 6)] + ["bad-id", _device(1)])
+    daemon.scan()
+    assert daemon.poll_once() == 1
+
+    rows = _results(daemon, "clinic.txt")
+    assert [row[0] for row in rows] == [_device(n) for n in range(1, 6)] + [_device(1)]
+    assert rows[0][1] == generate_key(_device(1), "STANDARD")
+    assert [row[4] for row in rows] == ['issued'] * 5 + ['already_issued']
+    assert os.path.exists(os.path.join(daemon.done_dir, "clinic.txt.errors.csv"))
+    assert os.listdir(daemon.processing_dir) == []
+    assert _ledger_devices(daemon) == [_device(n) for n in range(1, 6)]
+
+    # ملف لاحق بنفس الأجهزة لا يُسجل مرة ثانية
+    _drop(daemon, "again.txt", [_device(2), _device(9)])
+    daemon.scan()
+    daemon.poll_once()
+    assert [row[4] for row in _results(daemon, "again.txt")] == ['already_issued', 'issued']
+    assert len(_ledger_devices(daemon)) == 6
+
+
+def test_csv_rows_override_type_and_region(tmp_path):
+    daemon = _daemon(tmp_path)
+    _drop(daemon, "orders.csv", ["device_id,license_type,region",
+                                 f"{_device(1)},premium,uae",
+                                 f"{_device(2)},,",
+                                 f"{_device(3)},GOLD,UAE"])
+    daemon.scan()
+    daemon.poll_once()
+    rows = _results(daemon, "orders.csv")
+    assert rows[0][1:4] == [generate_key(_device(1), "PREMIUM"), "PREMIUM", "UAE"]
+    assert rows[1][2:4] == ["STANDARD", "GLOBAL"]
+    assert len(rows) == 2
+
+
+@pytest.mark.parametrize('crash_on', [1, 2])
+def test_recover_after_crash_between_ledger_and_results(tmp_path, monkeypatch, crash_on):
+    daemon = _daemon(tmp_path)
+    _drop(daemon, "clinic.txt", [_device(n) for n in range(1, 8)])
+    daemon.scan()
+
+    append_csv = license_watch._append_csv
+    calls = []
+
+    def crash(path, header, rows):
+        calls.append(path)
+        if len(calls) == crash_on:
+            raise _Crash()
+        return append_csv(path, header, rows)
+
+    monkeypatch.setattr(license_watch, '_append_csv', crash)
+    with pytest.raises(_Crash):
+        daemon.poll_once()
+    monkeypatch.setattr(license_watch, '_append_csv', append_csv)
+    # الدفعة المنقطعة وصلت للسجل قبل تأكيدها في journal
+    assert len(_ledger_devices(daemon)) == 3 * crash_on
+
+    restarted = _daemon(tmp_path)
+    restarted.recover()
+    rows = _results(restarted, "clinic.txt")
+    assert [row[0] for row in rows] == [_device(n) for n in range(1, 8)]
+    assert [row[4] for row in rows] == ['issued'] * 7
+    assert _ledger_devices(restarted) == [_device(n) for n in range(1, 8)]
+    assert os.listdir(restarted.processing_dir) == []
+
+
+def test_unreadable_file_moves_to_failed(tmp_path):
+    daemon = _daemon(tmp_path)
+    with open(os.path.join(daemon.directory, "broken.txt"), 'wb') as f:
+        f.write(b"\xff\xfe\x00bad")
+    daemon.scan()
+    daemon.poll_once()
+    assert sorted(os.listdir(daemon.failed_dir)) == ["broken.txt", "broken.txt.error.txt"]
+    assert os.listdir(daemon.processing_dir) == []
+    assert not os.path.exists(daemon.ledger.path) or _ledger_devices(daemon) == []
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اختبارات ملفات المعرفات الاصطناعية ومنحنيات الأداء (license_workload)
+"""
+
+import csv
+from collections import Counter
+
+import pytest
+
+import license_workload
+from license_batch import split_new_devices
+from license_ingest import ingest_device_ids
+from license_workload import WorkloadSpec, ScalingRun, REPORT_FIELDS, STAGES, parse_count, parse_mix
+
+
+@pytest.mark.parametrize('text, count', [("1000", 1000), ("10k", 10000), ("2.5M", 2500000), ("1_000", 1000)])
+def test_parse_count(text, count):
+    assert parse_count(text) == count
+
+
+def test_parse_mix():
+    assert parse_mix("premium=3,STANDARD", ("STANDARD", "PREMIUM")) == {"PREMIUM": 3.0, "STANDARD": 1.0}
+    assert parse_mix("", ("A", "B")) == {"A": 1.0, "B": 1.0}
+    for text in ("GOLD=1", "PREMIUM=-1", "PREMIUM=0"):
+        with pytest.raises(ValueError):
+            parse_mix(text, ("STANDARD", "PREMIUM"))
+
+
+@pytest.mark.parametrize('options', [{'rows': 0}, {'rows': 10, 'duplicate_ratio': 0.6, 'invalid_ratio': 0.4}])
+def test_invalid_spec(options):
+    with pytest.raises(ValueError):
+        WorkloadSpec(**options)
+
+
+def test_same_seed_same_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(license_workload, 'CHUNK_ROWS', 100)
+    paths = []
+    for name, seed in (("a.txt", 5), ("b.txt", 5), ("c.txt", 6)):
+        paths.append(tmp_path / name)
+        WorkloadSpec(1000, seed=seed, duplicate_ratio=0.1, invalid_ratio=0.05).write(str(paths[-1]))
+    assert paths[0].read_bytes() == paths[1].read_bytes() != paths[2].read_bytes()
+
+
+def test_counts_match_what_the_tools_find(tmp_path, monkeypatch):
+    monkeypatch.setattr(license_workload, 'CHUNK_ROWS', 100)
+    path = str(tmp_path / "devices.txt")
+    progress = []
+    stats = WorkloadSpec(1050, seed=3, duplicate_ratio=0.1, invalid_ratio=0.05).write(
+        path, progress=lambda done, total: progress.append(done))
+    assert progress[-1] == 1050 and len(progress) == 11
+    assert stats['rows'] == 1050
+    assert stats['duplicates'] + stats['invalid'] == round(1050 * 0.1) + round(1050 * 0.05)
+    assert stats['unique'] == 1050 - round(1050 * 0.1) - round(1050 * 0.05)
+
+    device_ids, errors = ingest_device_ids(path)
+    unique, _, duplicates = split_new_devices(device_ids)
+    assert (len(errors), duplicates, len(unique)) == (stats['invalid'], stats['duplicates'], stats['unique'])
+
+
+def test_csv_columns_follow_mix(tmp_path):
+    spec = WorkloadSpec(2000, seed=1, types={'PREMIUM': 3, 'STANDARD': 1}, regions={'UAE': 1})
+    path = str(tmp_path / "devices.csv")
+    spec.write(path)
+    with open(path, encoding='ascii', newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 2000
+    assert all((row['license_type'], row['region']) == spec.classify(row['device_id']) for row in rows)
+    types = Counter(row['license_type'] for row in rows)
+    assert set(types) == {'PREMIUM', 'STANDARD'} and 0.65 < types['PREMIUM'] / 2000 < 0.85
+    assert {row['region'] for row in rows} == {'UAE'}
+
+
+def test_scaling_run(tmp_path):
+    messages = []
+    run = ScalingRun([300], workers=(1, 2), seed=2, duplicate_ratio=0.1, invalid_ratio=0.1,
+                     work_dir=str(tmp_path), chunk_size=50, log=messages.append)
+    results = run.run()
+    assert run.mismatches == []
+    assert [(row[1], row[2]) for row in results] == [(1, 'dataset')] + [
+        (workers, stage) for workers in (1, 2) for stage in STAGES[1:]
+    ]
+    assert [size for size, _, _ in run.table()] == [300, 300]
+    assert list(tmp_path.iterdir()) == []
+
+    path = str(tmp_path / "report.csv")
+    run.write_report(path)
+    with open(path, encoding='utf-8', newline='') as f:
+        assert next(csv.reader(f)) == REPORT_FIELDS